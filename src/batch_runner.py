@@ -0,0 +1,225 @@
+"""非交互式批量计算
+
+calc-cli --batch FILE|- 的实现：逐行读取表达式，通过
+ScientificCalculator.process_expression 求值，并按输入顺序每行输出一个结果。
+
+特点：
+1. 输入以生成器方式逐行读取，内存占用与输入大小无关
+2. 支持纯文本和 JSONL 两种输出格式，错误按行报告，不会中断后续计算
+3. workers > 1 时将输入分块交给 ProcessPoolExecutor 并行计算，
+   同时最多只保留固定数量的未完成分块，输出顺序与输入一致
+4. 可选地将计算结果写入历史记录，整个批次使用一次组提交
+"""
+import json
+import sys
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from src import calculator_cli
+from src.numeric_backends import format_number, DEFAULT_PRECISION
+
+# 每个工作进程最多预先提交的分块数
+MAX_PENDING_PER_WORKER = 2
+
+# 工作进程内的计算器实例（由 _init_worker 创建）
+_worker_calculator = None
+
+
+def iter_expressions(stream):
+    """逐行读取表达式
+
+    参数：
+        stream: 文本流
+
+    返回：
+        generator: (行号, 表达式) 元组，行号从 1 开始
+    """
+    for lineno, line in enumerate(stream, 1):
+        yield lineno, line.strip()
+
+
+def evaluate_line(calculator, expr):
+    """计算单行表达式
+
+    返回：
+        tuple: (结果, 历史记录文本, 错误信息, 警告)，成功时错误信息为 None；
+            integrate / diff / solve 没有达到容差时结果照常返回并附带警告，否则警告为 None；
+            空行的四项都为 None
+    """
+    if not expr:
+        return None, None, None, None
+    calculator.core.unconverged = 0
+    try:
+        result, record = calculator.process_expression(expr)
+    except Exception as e:
+        return None, None, calculator.translator.translate(str(e)), None
+    warning = None
+    if calculator.core.unconverged:
+        warning = calculator.translator.translate('estimate_not_converged')
+    return result, record, None, warning
+
+
+def _create_calculator(numeric_options=None, cache_settings=None):
+    # 批量模式下由 handle_errors 抛出异常，以便逐行收集错误信息
+    calculator_cli.RAISE_ERRORS = True
+    calculator = calculator_cli.ScientificCalculator()
+    if numeric_options:
+        calculator.core.set_backend(**numeric_options)
+    calculator.configure_result_cache(cache_settings)
+    return calculator
+
+
+def _init_worker(numeric_options=None, cache_settings=None, log_state=None):
+    global _worker_calculator
+    _worker_calculator = _create_calculator(numeric_options, cache_settings)
+    if log_state is not None:
+        from src import evaluation_log
+        evaluation_log.init_worker(log_state)
+
+
+def _evaluate_chunk(chunk):
+    """在工作进程中计算一个分块"""
+    return [(lineno, expr) + evaluate_line(_worker_calculator, expr)
+            for lineno, expr in chunk]
+
+
+def _chunks(items, size):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def evaluate_stream(lines, workers=1, chunk_size=1000, numeric_options=None, cache_settings=None):
+    """按输入顺序计算表达式流
+
+    参数：
+        lines: (行号, 表达式) 的可迭代对象
+        workers (int): 工作进程数，小于等于 1 时在当前进程中顺序计算
+        chunk_size (int): 每个分块包含的行数
+        numeric_options (dict, optional): 数值后端选项（见 CalculatorCore.set_backend）
+        cache_settings (dict, optional): 结果缓存配置（每个工作进程各自的内存缓存，磁盘缓存共享）
+
+    返回：
+        generator: (行号, 表达式, 结果, 历史记录文本, 错误信息, 警告) 元组
+    """
+    if workers <= 1:
+        calculator = _create_calculator(numeric_options, cache_settings)
+        for lineno, expr in lines:
+            yield (lineno, expr) + evaluate_line(calculator, expr)
+        return
+
+    max_pending = workers * MAX_PENDING_PER_WORKER
+    # 启用了求值日志时，工作进程的日志记录交给本进程的监听线程写入
+    evaluation_log = sys.modules.get('src.evaluation_log')
+    log_state = evaluation_log.worker_state(workers) if evaluation_log is not None else None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(numeric_options, cache_settings, log_state)) as pool:
+        pending = deque()
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(pool.submit(_evaluate_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def format_text(lineno, expr, result, record, error, warning=None, precision=DEFAULT_PRECISION):
+    """纯文本格式：每行一个结果，错误以 error: 开头，空行原样保留（警告由 run_batch 输出到标准错误）"""
+    if error is not None:
+        return f"error: {error}"
+    if result is None:
+        return ""
+    return format_number(result, precision)
+
+
+def format_jsonl(lineno, expr, result, record, error, warning=None, precision=DEFAULT_PRECISION):
+    """JSONL 格式：每行一个 JSON 对象，有警告时附带 warning 字段
+
+    浮点结果保留全部精度；复数结果以字符串表示，Decimal 和 Fraction 结果以 format_number 的文本表示。
+    """
+    row = {'line': lineno, 'expression': expr, 'result': json_value(result, precision), 'error': error}
+    if warning is not None:
+        row['warning'] = warning
+    return json.dumps(row, ensure_ascii=False)
+
+
+def json_value(result, precision=DEFAULT_PRECISION):
+    """将计算结果转换为可写入 JSON 的值（浮点数原样保留，其他类型转换为文本）"""
+    if isinstance(result, complex):
+        return str(result)
+    if result is not None and not isinstance(result, float):
+        return format_number(result, precision)
+    return result
+
+
+FORMATTERS = {
+    'text': format_text,
+    'jsonl': format_jsonl,
+}
+
+
+def _open(path, mode):
+    if path == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    return open(path, mode, encoding='utf-8')
+
+
+def run_batch(source, output='-', fmt='text', workers=1, chunk_size=1000, record_history=False,
+              numeric_options=None, cache_settings=None):
+    """运行批量计算
+
+    参数：
+        source (str): 输入文件路径，- 表示标准输入
+        output (str): 输出文件路径，- 表示标准输出
+        fmt (str): 输出格式（text 或 jsonl）
+        workers (int): 工作进程数
+        chunk_size (int): 多进程模式下每个分块的行数
+        record_history (bool): 是否将成功的计算写入历史记录
+        numeric_options (dict, optional): 数值后端选项（backend, precision, decimal_precision）
+        cache_settings (dict, optional): 结果缓存配置，None 表示不缓存
+
+    返回：
+        int: 退出码，所有行都计算成功时为 0，否则为 1
+    """
+    formatter = FORMATTERS[fmt]
+    precision = (numeric_options or {}).get('precision', DEFAULT_PRECISION)
+    failed = False
+    history = None
+    if record_history:
+        from src.history_manager import HistoryManager
+        history = HistoryManager(calculator_cli.load_config().get('history', {}).get('database'),
+                                 max_memory_size=calculator_cli.MAX_MEMORY_HISTORY)
+    infile = _open(source, 'r')
+    outfile = _open(output, 'w')
+    try:
+        with history.group_commit() if history is not None else nullcontext():
+            for lineno, expr, result, record, error, warning in evaluate_stream(
+                    iter_expressions(infile), workers=workers, chunk_size=max(1, chunk_size),
+                    numeric_options=numeric_options, cache_settings=cache_settings):
+                if error is not None:
+                    failed = True
+                elif result is None:
+                    # JSONL 输出中跳过空行
+                    if fmt == 'jsonl':
+                        continue
+                elif history is not None:
+                    history.add_record(record)
+                if warning is not None and fmt == 'text':
+                    print(f"line {lineno}: {warning}", file=sys.stderr)
+                outfile.write(formatter(lineno, expr, result, record, error, warning, precision))
+                outfile.write('\n')
+    finally:
+        if history is not None:
+            history.close()
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+        else:
+            outfile.flush()
+    return 1 if failed else 0
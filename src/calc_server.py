@@ -0,0 +1,821 @@
+"""计算服务（calc-server）
+
+常驻进程中的 asyncio 服务，避免每个请求都启动一次 calc-cli 解释器：
+1. HTTP/JSON 接口（支持 keep-alive 和流水线请求，响应按请求顺序返回）：
+   - POST /eval     {"expression": "sqrt(2)"} 或 {"expressions": ["1+2", ...]}
+   - POST /convert  {"value": 1.5, "from": "km", "to": "m"} 或 {"values": [...], "from": ..., "to": ...}
+   - GET /health、GET /stats（批处理统计）、GET /metrics（启用 --metrics 时，Prometheus 文本格式）
+2. Unix 域套接字（--unix PATH）：每行一个 JSON 请求，每行一个 JSON 响应，
+   请求为 {"op": "eval", "expression": ...} 或 {"op": "convert", "value": ..., "from": ..., "to": ...}，
+   可带 "id" 字段，响应中原样返回
+
+批处理：
+1. 所有连接的请求进入同一个微批处理队列，在专用的计算线程中成批求值，
+   计算进行中到达的请求在上一批完成后立即组成下一批
+2. float 后端下，同一批中形如 sqrt(2)、3*4 的单个函数调用或二元运算按函数 / 运算符分组，
+   数量达到 MIN_VECTOR_BATCH 时通过 CalculatorCore.apply_function / calculate_many 向量化计算；
+   同一单位对的转换通过 UnitConverter.convert_array 批量计算；其余表达式逐个求值
+
+背压：
+1. 整个服务中已读取、未返回的请求最多 max_pending 个，达到上限后读取循环暂停，不再读取连接
+   （由 TCP 流控传递给客户端），每个连接最多再有一个已读取的请求等待名额；
+   批量请求的条目另外占用计算名额，等待计算的条目同样最多 max_pending 个
+2. 每个连接最多 max_pipeline 个未返回的流水线请求
+3. 同时打开的连接最多 max_connections 个，超出的连接收到 503（Unix 套接字为一行错误）后关闭
+4. 请求头、请求体和批量请求的条目数有上限
+
+收到 SIGINT / SIGTERM 时停止接受新连接，等待已收到的请求计算完成并返回响应，
+然后关闭连接并将历史记录写入磁盘。
+
+用法示例：
+    calc-server --port 8765 --unix /tmp/calc.sock --history
+    curl -d '{"expression": "sqrt(3^2+4^2)"}' http://127.0.0.1:8765/eval
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from src import calculator_cli
+from src.batch_runner import json_value
+from src.expression_parser import BinaryOp, Call, Number, normalize_expression, parse_expression
+from src.numeric_backends import BACKENDS
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# 每批最多包含的请求数
+DEFAULT_MAX_BATCH = 256
+# 第一个请求到达后等待更多请求的时间（秒），计算进行中时不等待
+DEFAULT_BATCH_DELAY = 0.0005
+# 同一函数 / 运算符 / 单位对的请求达到该数量时才使用向量化计算（数量少时逐个计算更快）
+MIN_VECTOR_BATCH = 8
+# 整个服务中等待计算的请求数上限
+DEFAULT_MAX_PENDING = 4096
+# 每个连接未返回的流水线请求数上限
+DEFAULT_MAX_PIPELINE = 64
+# 同时打开的连接数上限
+DEFAULT_MAX_CONNECTIONS = 1024
+# 请求头（或 Unix 套接字的一行请求）的最大长度
+MAX_HEADER_SIZE = 64 * 1024
+# 请求体的最大长度
+MAX_BODY_SIZE = 1024 * 1024
+# 一个批量请求（expressions / values）的最大条目数
+MAX_ITEMS = 10000
+# 优雅关闭时等待进行中请求的最长时间（秒）
+SHUTDOWN_TIMEOUT = 10.0
+
+# 可以向量化计算的函数和运算符（^ 对负底数返回复数，而成组计算的结果按 float 返回，不包含在内）
+VECTOR_FUNCTIONS = frozenset(('sqrt', 'sin', 'cos', 'tan', 'log', 'log10', 'abs'))
+VECTOR_OPERATORS = frozenset(('+', '-', '*', '/', '%'))
+
+HTTP_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    422: 'Unprocessable Entity',
+    431: 'Request Header Fields Too Large',
+    503: 'Service Unavailable',
+}
+
+
+class RequestError(Exception):
+    """请求格式错误（HTTP 状态码和错误信息）"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _literal(node):
+    """返回实数字面量节点的值，其他节点返回 None"""
+    if isinstance(node, Number) and isinstance(node.value, (int, float)) \
+            and not isinstance(node.value, bool):
+        return float(node.value)
+    return None
+
+
+class BatchEvaluator:
+    """在计算线程中成批求值
+
+    属性：
+        calculator (ScientificCalculator): 计算器（只在计算线程中使用）
+        history (HistoryManager): 历史记录，None 表示不记录
+        vectorized (int): 通过向量化路径计算的请求数
+    """
+
+    def __init__(self, calculator, history=None, min_vector_batch=MIN_VECTOR_BATCH):
+        self.calculator = calculator
+        self.history = history
+        self.min_vector_batch = min_vector_batch
+        self.vectorized = 0
+
+    def evaluate_batch(self, items):
+        """计算一批请求
+
+        参数：
+            items (list): (类型, 参数) 元组，类型为 eval（参数为表达式）
+                或 convert（参数为 (数值, 源单位, 目标单位)）
+
+        返回：
+            list: 与 items 一一对应的 (结果, 错误信息) 元组；integrate / diff / solve 没有达到容差时
+                为 (结果, None, 警告信息)
+        """
+        results = [None] * len(items)
+        records = []
+        groups = {}
+        for index, (kind, payload) in enumerate(items):
+            key = self._vector_key(kind, payload)
+            if key is None:
+                results[index] = self._evaluate_one(kind, payload, records)
+            else:
+                groups.setdefault(key, []).append(index)
+
+        for key, indexes in groups.items():
+            if len(indexes) < self.min_vector_batch:
+                for index in indexes:
+                    results[index] = self._evaluate_one(*items[index], records)
+            else:
+                self._evaluate_group(key, indexes, items, results, records)
+                self.vectorized += len(indexes)
+
+        if self.history is not None and records:
+            with self.history.group_commit():
+                for record in records:
+                    self.history.add_record(record)
+        return results
+
+    def _vector_key(self, kind, payload):
+        """返回请求的向量化分组键，不能向量化时返回 None"""
+        if kind == 'convert':
+            value, from_unit, to_unit = payload
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return ('convert', from_unit, to_unit)
+            return None
+        if self.calculator.core.backend.name != 'float':
+            return None
+        try:
+            tree = parse_expression(payload)
+        except ValueError:
+            return None
+        if isinstance(tree, Call) and tree.name in VECTOR_FUNCTIONS and len(tree.args) == 1 \
+                and _literal(tree.args[0]) is not None:
+            return ('function', tree.name)
+        if isinstance(tree, BinaryOp) and tree.op in VECTOR_OPERATORS \
+                and _literal(tree.left) is not None and _literal(tree.right) is not None:
+            return ('operator', tree.op)
+        return None
+
+    def _evaluate_one(self, kind, payload, records):
+        calculator = self.calculator
+        try:
+            if kind == 'convert':
+                value, from_unit, to_unit = payload
+                from src.unit_converter import UnitConverter
+                result = UnitConverter.convert(value, from_unit, to_unit)
+                records.append(self._conversion_record(value, from_unit, result, to_unit))
+                return result, None
+            calculator.core.unconverged = 0
+            result, record = calculator.process_expression(payload)
+            records.append(record)
+            if calculator.core.unconverged:
+                # integrate / diff / solve 没有达到容差：结果照常返回，附带警告
+                return result, None, calculator.translator.translate('estimate_not_converged')
+            return result, None
+        except Exception as e:
+            return None, calculator.translator.translate(str(e))
+
+    def _evaluate_group(self, key, indexes, items, results, records):
+        core = self.calculator.core
+        if key[0] == 'convert':
+            from src.unit_converter import UnitConverter
+            _, from_unit, to_unit = key
+            values = [items[index][1][0] for index in indexes]
+            try:
+                converted = UnitConverter.convert_array(values, from_unit, to_unit)
+            except Exception as e:
+                error = self.calculator.translator.translate(str(e))
+                for index in indexes:
+                    results[index] = (None, error)
+                return
+            for index, value, result in zip(indexes, values, converted):
+                result = float(result)
+                results[index] = (result, None)
+                records.append(self._conversion_record(value, from_unit, result, to_unit))
+            return
+
+        started = time.perf_counter_ns()
+        texts = [normalize_expression(items[index][1]) for index in indexes]
+        trees = [parse_expression(text) for text in texts]
+        if key[0] == 'function':
+            batch = core.apply_function(key[1], [_literal(tree.args[0]) for tree in trees])
+        else:
+            batch = core.calculate_many([_literal(tree.left) for tree in trees],
+                                        [_literal(tree.right) for tree in trees], key[1])
+        # 向量化计算不经过 process_expression，求值日志按平均耗时逐条记录
+        evaluation_log = sys.modules.get('src.evaluation_log')
+        log = evaluation_log.active() if evaluation_log is not None else None
+        if log is not None:
+            elapsed = (time.perf_counter_ns() - started) // len(texts)
+            for text, failed in zip(texts, batch.errors):
+                log.record(text, elapsed, batch.error_key if failed else None)
+        error = self.calculator.translator.translate(batch.error_key) if batch.error_key else None
+        for index, text, value, failed in zip(indexes, texts, batch.values, batch.errors):
+            if failed:
+                results[index] = (None, error)
+                continue
+            value = float(value)
+            results[index] = (value, None)
+            records.append(f"{text}={core.format_result(value)}")
+
+    def _conversion_record(self, value, from_unit, result, to_unit):
+        return self.calculator.translator.format(
+            "unit_conversion_record", value, from_unit, f"{result:.6g}", to_unit)
+
+
+class MicroBatcher:
+    """把并发到达的请求合并成批，交给计算线程
+
+    同一时间只有一批在计算；计算期间到达的请求在这一批完成后立即组成下一批
+    （负载越高批越大），空闲时第一个请求到达后最多等待 delay 秒。
+
+    属性：
+        requests (int): 已提交的请求数
+        batches (int): 已计算的批数
+        max_batch_seen (int): 最大的一批包含的请求数
+    """
+
+    def __init__(self, evaluator, executor, max_batch=DEFAULT_MAX_BATCH, delay=DEFAULT_BATCH_DELAY):
+        self.evaluator = evaluator
+        self.executor = executor
+        self.max_batch = max_batch
+        self.delay = delay
+        self.requests = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self._pending = []
+        self._running = False
+        self._timer = None
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def submit(self, kind, payload):
+        """提交一个请求，返回 (结果, 错误信息) 的 Future"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((kind, payload, future))
+        self.requests += 1
+        self._idle.clear()
+        if not self._running:
+            if len(self._pending) >= self.max_batch:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.delay, self._dispatch)
+        return future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._running or not self._pending:
+            return
+        batch = self._pending[:self.max_batch]
+        del self._pending[:self.max_batch]
+        self._running = True
+        self.batches += 1
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, self.evaluator.evaluate_batch, [(kind, payload) for kind, payload, _ in batch])
+        future.add_done_callback(partial(self._finished, batch))
+
+    def _finished(self, batch, future):
+        self._running = False
+        error = future.exception()
+        results = future.result() if error is None else [(None, str(error))] * len(batch)
+        for (_, _, waiter), result in zip(batch, results):
+            if not waiter.done():
+                waiter.set_result(result)
+        if self._pending:
+            self._dispatch()
+        else:
+            self._idle.set()
+
+    async def drain(self):
+        """等待所有已提交的请求计算完成"""
+        await self._idle.wait()
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'vectorized': self.evaluator.vectorized,
+            'pending': len(self._pending),
+            'max_batch': self.max_batch_seen,
+            'mean_batch': round(self.requests / self.batches, 2) if self.batches else 0,
+        }
+
+
+class Connection:
+    """一个客户端连接：读取请求的协程和按顺序写回响应的任务"""
+
+    def __init__(self, reader, writer, max_pipeline):
+        self.reader = reader
+        self.writer = writer
+        # (响应任务, 编码函数)，None 表示连接结束
+        self.pipeline = asyncio.Queue(max_pipeline)
+        self.sender = asyncio.ensure_future(self._send_responses())
+
+    async def _send_responses(self):
+        try:
+            while True:
+                item = await self.pipeline.get()
+                try:
+                    if item is None:
+                        return
+                    response, encode = item
+                    self.writer.write(encode(await response))
+                    await self.writer.drain()
+                finally:
+                    self.pipeline.task_done()
+        except (ConnectionError, OSError):
+            # 客户端已断开，丢弃剩余的响应
+            self.writer.close()
+            while not self.pipeline.empty():
+                item = self.pipeline.get_nowait()
+                if item is not None:
+                    item[0].cancel()
+                self.pipeline.task_done()
+
+    async def close(self):
+        await self.pipeline.put(None)
+        await self.sender
+        self.writer.close()
+
+
+class CalcServer:
+    """计算服务
+
+    参数：
+        calculator (ScientificCalculator): 计算器
+        history (HistoryManager, optional): 历史记录，None 表示不记录
+        max_batch (int): 每批最多包含的请求数
+        batch_delay (float): 空闲时等待更多请求的时间（秒）
+        max_pending (int): 整个服务中等待计算的请求数上限
+        max_pipeline (int): 每个连接未返回的流水线请求数上限
+        max_connections (int): 同时打开的连接数上限
+    """
+
+    def __init__(self, calculator, history=None, max_batch=DEFAULT_MAX_BATCH,
+                 batch_delay=DEFAULT_BATCH_DELAY, max_pending=DEFAULT_MAX_PENDING,
+                 max_pipeline=DEFAULT_MAX_PIPELINE, max_connections=DEFAULT_MAX_CONNECTIONS):
+        self.calculator = calculator
+        self.history = history
+        self.max_pending = max_pending
+        self.max_pipeline = max_pipeline
+        self.max_connections = max_connections
+        # 计算器不是线程安全的，所有计算都在同一个线程中进行
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='calc-server')
+        self.batcher = MicroBatcher(BatchEvaluator(calculator, history), self.executor,
+                                    max_batch, batch_delay)
+        self.servers = []
+        self.connections = set()
+        self.closing = False
+        # 等待计算的条目（批量请求的每个条目各占一个）和已读取未返回的请求，各最多 max_pending 个
+        self._slots = None
+        self._requests = None
+        self._stopped = None
+
+    # ---------- 启动和关闭 ----------
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        """开始监听（port 为 None 时不启动 HTTP 接口）
+
+        返回：
+            list: 监听地址（http://host:port、unix:PATH）
+        """
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._requests = asyncio.Semaphore(self.max_pending)
+        self._stopped = asyncio.Event()
+        addresses = []
+        if port is not None:
+            server = await asyncio.start_server(self._serve_http, host, port, limit=MAX_HEADER_SIZE)
+            self.servers.append(server)
+            bound = server.sockets[0].getsockname()
+            addresses.append(f"http://{bound[0]}:{bound[1]}")
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            server = await asyncio.start_unix_server(self._serve_unix, unix_path, limit=MAX_HEADER_SIZE)
+            self.servers.append(server)
+            addresses.append(f"unix:{unix_path}")
+        return addresses
+
+    def stop(self):
+        """请求优雅关闭（可在信号处理函数中调用）"""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def serve_until_stopped(self):
+        await self._stopped.wait()
+        await self.shutdown()
+
+    async def shutdown(self):
+        """停止接受连接，等待进行中的请求返回响应，然后关闭连接并保存历史记录"""
+        self.closing = True
+        for server in self.servers:
+            server.close()
+        pending = [asyncio.ensure_future(connection.pipeline.join()) for connection in self.connections]
+        if pending:
+            await asyncio.wait(pending, timeout=SHUTDOWN_TIMEOUT)
+        for connection in list(self.connections):
+            connection.writer.close()
+        try:
+            await asyncio.wait_for(self.batcher.drain(), SHUTDOWN_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        self.executor.shutdown(wait=True)
+        self.close_history()
+
+    def close_history(self):
+        """写入缓存的记录并关闭历史记录库（可重复调用）"""
+        if self.history is not None:
+            self.history.close()
+
+    # ---------- 请求处理 ----------
+    async def evaluate(self, kind, payload):
+        """提交一个请求并等待结果（占用一个等待名额，名额用完时等待）"""
+        async with self._slots:
+            return await self.batcher.submit(kind, payload)
+
+    async def evaluate_many(self, kind, payloads):
+        futures = []
+        for payload in payloads:
+            await self._slots.acquire()
+            future = self.batcher.submit(kind, payload)
+            future.add_done_callback(lambda _: self._slots.release())
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def _submit(self, connection, encode, handler, *args):
+        """读取循环提交一个请求：先占用一个请求名额（名额用完时在这里暂停，不再读取连接），响应完成后释放"""
+        await self._requests.acquire()
+        response = asyncio.ensure_future(handler(*args))
+        response.add_done_callback(lambda _: self._requests.release())
+        await connection.pipeline.put((response, encode))
+
+    async def _refuse(self, writer, data):
+        """连接数达到上限：返回错误后关闭连接"""
+        try:
+            writer.write(data)
+            await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        writer.close()
+
+    async def _accept(self, connection, serve):
+        self.connections.add(connection)
+        try:
+            await serve(connection)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            await connection.close()
+            self.connections.discard(connection)
+
+    async def _serve_http(self, reader, writer):
+        if len(self.connections) >= self.max_connections:
+            await self._refuse(writer, http_response((503, {'error': 'too many connections'}),
+                                                     keep_alive=False))
+            return
+        await self._accept(Connection(reader, writer, self.max_pipeline), self._read_http)
+
+    async def _serve_unix(self, reader, writer):
+        if len(self.connections) >= self.max_connections:
+            await self._refuse(writer, encode_line({'error': 'too many connections'}))
+            return
+        await self._accept(Connection(reader, writer, self.max_pipeline), self._read_lines)
+
+    async def _read_http(self, connection):
+        reader = connection.reader
+        while not self.closing:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except asyncio.IncompleteReadError:
+                return
+            except asyncio.LimitOverrunError:
+                await self._reply_http(connection, 431, {'error': 'request header too large'}, False)
+                return
+            try:
+                method, path, version, headers = parse_http_head(head)
+            except RequestError as e:
+                await self._reply_http(connection, e.status, {'error': str(e)}, False)
+                return
+            connection_header = headers.get('connection', '').lower()
+            if version == 'HTTP/1.0':
+                keep_alive = connection_header == 'keep-alive'
+            else:
+                keep_alive = connection_header != 'close'
+            if 'transfer-encoding' in headers:
+                await self._reply_http(connection, 411, {'error': 'Content-Length required'}, False)
+                return
+            try:
+                length = int(headers.get('content-length', 0))
+            except ValueError:
+                await self._reply_http(connection, 400, {'error': 'invalid Content-Length'}, False)
+                return
+            if length > MAX_BODY_SIZE or length < 0:
+                await self._reply_http(connection, 413, {'error': 'request body too large'}, False)
+                return
+            body = await reader.readexactly(length) if length else b''
+            keep_alive = keep_alive and not self.closing
+            await self._submit(connection, partial(http_response, keep_alive=keep_alive),
+                               self._handle_http, method, path, body)
+            if not keep_alive:
+                return
+
+    async def _reply_http(self, connection, status, payload, keep_alive):
+        response = asyncio.get_running_loop().create_future()
+        response.set_result((status, payload))
+        await connection.pipeline.put((response, partial(http_response, keep_alive=keep_alive)))
+
+    async def _handle_http(self, method, path, body):
+        """处理一个 HTTP 请求，返回 (状态码, 响应内容)"""
+        path = path.split('?', 1)[0]
+        try:
+            if path in ('/eval', '/convert'):
+                if method != 'POST':
+                    raise RequestError(405, 'use POST')
+                request = load_json(body)
+                if path == '/eval':
+                    return await self._eval_request(request)
+                return await self._convert_request(request)
+            if method != 'GET':
+                raise RequestError(405, 'use GET')
+            if path == '/health':
+                return 200, {'status': 'closing' if self.closing else 'ok'}
+            if path == '/stats':
+                return 200, self.batcher.stats()
+            if path == '/metrics':
+                if 'src.metrics' not in sys.modules or not sys.modules['src.metrics'].REGISTRY.enabled:
+                    raise RequestError(404, 'metrics disabled (start with --metrics)')
+                return 200, sys.modules['src.metrics'].REGISTRY.to_prometheus()
+            raise RequestError(404, f"unknown path: {path}")
+        except RequestError as e:
+            return e.status, {'error': str(e)}
+
+    async def _eval_request(self, request):
+        if 'expressions' in request:
+            expressions = request['expressions']
+            check_items(expressions, str, 'expressions')
+            results = await self.evaluate_many('eval', expressions)
+            return 200, {'results': [self.result_payload(*result) for result in results]}
+        expression = request.get('expression')
+        if not isinstance(expression, str):
+            raise RequestError(400, "expected 'expression' (string) or 'expressions' (list)")
+        outcome = await self.evaluate('eval', expression)
+        return (200 if outcome[1] is None else 422), self.result_payload(*outcome)
+
+    async def _convert_request(self, request):
+        from_unit, to_unit = request.get('from'), request.get('to')
+        if not isinstance(from_unit, str) or not isinstance(to_unit, str):
+            raise RequestError(400, "expected 'from' and 'to' units")
+        if 'values' in request:
+            values = request['values']
+            check_items(values, (int, float), 'values')
+            results = await self.evaluate_many('convert', [(value, from_unit, to_unit) for value in values])
+            return 200, {'results': [self.result_payload(*result) for result in results]}
+        value = request.get('value')
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise RequestError(400, "expected 'value' (number) or 'values' (list)")
+        result, error = await self.evaluate('convert', (value, from_unit, to_unit))
+        return (200 if error is None else 422), self.result_payload(result, error)
+
+    def result_payload(self, result, error, warning=None):
+        if error is not None:
+            return {'result': None, 'error': error}
+        payload = {'result': json_value(result, self.calculator.core.precision),
+                   'formatted': self.calculator.core.format_result(result), 'error': None}
+        if warning is not None:
+            payload['warning'] = warning
+        return payload
+
+    async def _read_lines(self, connection):
+        """Unix 套接字：每行一个 JSON 请求"""
+        reader = connection.reader
+        while not self.closing:
+            try:
+                line = await reader.readuntil(b'\n')
+            except asyncio.IncompleteReadError:
+                return
+            except asyncio.LimitOverrunError:
+                await self._reply_line(connection, {'error': 'request too large'})
+                return
+            if not line.strip():
+                continue
+            await self._submit(connection, encode_line, self._handle_line, line)
+
+    async def _reply_line(self, connection, payload):
+        response = asyncio.get_running_loop().create_future()
+        response.set_result(payload)
+        await connection.pipeline.put((response, encode_line))
+
+    async def _handle_line(self, line):
+        request_id = None
+        try:
+            request = load_json(line)
+            request_id = request.get('id')
+            op = request.get('op', 'eval')
+            if op == 'eval':
+                _, payload = await self._eval_request(request)
+            elif op == 'convert':
+                _, payload = await self._convert_request(request)
+            elif op == 'stats':
+                payload = self.batcher.stats()
+            else:
+                raise RequestError(400, f"unknown op: {op}")
+        except RequestError as e:
+            payload = {'error': str(e)}
+        if request_id is not None:
+            payload = dict(payload, id=request_id)
+        return payload
+
+
+# ======================
+# 协议辅助函数
+# ======================
+def parse_http_head(head):
+    """解析请求行和请求头
+
+    返回：
+        tuple: (方法, 路径, 协议版本, 小写请求头名 -> 值)
+    """
+    try:
+        lines = head.decode('latin-1').split('\r\n')
+        method, path, version = lines[0].split(' ')
+    except ValueError:
+        raise RequestError(400, 'malformed request line')
+    if not version.startswith('HTTP/1.'):
+        raise RequestError(400, f"unsupported protocol: {version}")
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(':')
+        if not sep:
+            raise RequestError(400, 'malformed header')
+        headers[name.strip().lower()] = value.strip()
+    return method, path, version, headers
+
+
+def load_json(data):
+    try:
+        request = json.loads(data)
+    except ValueError as e:
+        raise RequestError(400, f"invalid JSON: {str(e)}")
+    if not isinstance(request, dict):
+        raise RequestError(400, 'request must be a JSON object')
+    return request
+
+
+def check_items(items, item_type, name):
+    if not isinstance(items, list):
+        raise RequestError(400, f"'{name}' must be a list")
+    if len(items) > MAX_ITEMS:
+        raise RequestError(413, f"too many {name} (max {MAX_ITEMS})")
+    for item in items:
+        if not isinstance(item, item_type) or isinstance(item, bool):
+            raise RequestError(400, f"invalid item in '{name}': {item!r}")
+
+
+def http_response(response, keep_alive=True):
+    """编码 HTTP 响应（响应内容为 dict 时编码为 JSON，str 时为纯文本）"""
+    status, payload = response
+    if isinstance(payload, str):
+        body = payload.encode('utf-8')
+        content_type = 'text/plain; version=0.0.4; charset=utf-8'
+    else:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        content_type = 'application/json'
+    head = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+def encode_line(payload):
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+# ======================
+# 命令行入口
+# ======================
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog='calc-server',
+        description='计算服务：HTTP/JSON 和 Unix 域套接字接口，请求合并成批计算')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'HTTP 监听地址（默认 {DEFAULT_HOST}）')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'HTTP 端口（默认 {DEFAULT_PORT}，0 表示自动选择，-1 表示不启动 HTTP 接口）')
+    parser.add_argument('--unix', metavar='PATH', help='同时监听 Unix 域套接字（每行一个 JSON 请求）')
+    parser.add_argument('--backend', choices=BACKENDS, help='数值后端（默认 float）')
+    parser.add_argument('--precision', type=int, metavar='N', help='结果显示的有效数字位数（默认 6）')
+    parser.add_argument('--decimal-precision', type=int, metavar='N', help='decimal 后端的工作精度（默认 28）')
+    parser.add_argument('--cache', action='store_true',
+                        help='启用函数和运算符的结果缓存（使用 config.yaml 中 result_cache 的其余配置）')
+    parser.add_argument('--history', action='store_true',
+                        help='将成功的计算写入历史记录（每批一次组提交，关闭时写入磁盘）')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='记录运行指标（GET /metrics 查看），退出时写入 FILE')
+    parser.add_argument('--log-evaluations', action='store_true',
+                        help='每次求值写一条 JSON 日志（使用 config.yaml 中 logging.evaluations 的其余配置）')
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH,
+                        help=f'每批最多包含的请求数（默认 {DEFAULT_MAX_BATCH}）')
+    parser.add_argument('--batch-delay-ms', type=float, default=DEFAULT_BATCH_DELAY * 1000,
+                        help=f'空闲时等待更多请求的时间（毫秒，默认 {DEFAULT_BATCH_DELAY * 1000:g}）')
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help=f'等待计算的请求数上限，达到后暂停读取连接（默认 {DEFAULT_MAX_PENDING}）')
+    parser.add_argument('--max-pipeline', type=int, default=DEFAULT_MAX_PIPELINE,
+                        help=f'每个连接未返回的流水线请求数上限（默认 {DEFAULT_MAX_PIPELINE}）')
+    parser.add_argument('--max-connections', type=int, default=DEFAULT_MAX_CONNECTIONS,
+                        help=f'同时打开的连接数上限，超出时返回 503（默认 {DEFAULT_MAX_CONNECTIONS}）')
+    return parser
+
+
+def create_server(args):
+    """按命令行参数创建 CalcServer"""
+    # 由 handle_errors 抛出异常，以便按请求返回错误信息
+    calculator_cli.RAISE_ERRORS = True
+    calculator = calculator_cli.ScientificCalculator()
+    calculator.core.set_backend(**calculator_cli.numeric_options(args))
+    if args.cache:
+        calculator.configure_result_cache(
+            dict(calculator_cli.load_config().get('result_cache') or {}, enabled=True))
+    history = None
+    if args.history:
+        from src.history_manager import HistoryManager
+        history = HistoryManager(calculator_cli.load_config().get('history', {}).get('database'),
+                                 max_memory_size=calculator_cli.MAX_MEMORY_HISTORY)
+    return CalcServer(calculator, history, max_batch=max(1, args.max_batch),
+                      batch_delay=max(0.0, args.batch_delay_ms) / 1000,
+                      max_pending=max(1, args.max_pending), max_pipeline=max(1, args.max_pipeline),
+                      max_connections=max(1, args.max_connections))
+
+
+async def serve(server, host, port, unix_path=None):
+    """启动服务并运行到收到 SIGINT / SIGTERM"""
+    addresses = await server.start(host, None if port < 0 else port, unix_path)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, server.stop)
+        except (NotImplementedError, RuntimeError):
+            # Windows 不支持，Ctrl+C 时由 KeyboardInterrupt 结束
+            pass
+    for address in addresses:
+        print(f"calc-server listening on {address}", flush=True)
+    await server.serve_until_stopped()
+    if unix_path and os.path.exists(unix_path):
+        os.unlink(unix_path)
+
+
+def main(argv=None):
+    """命令行入口（calc-server）"""
+    args = build_arg_parser().parse_args(argv)
+    if args.port < 0 and not args.unix:
+        print("错误: --port -1 时必须指定 --unix", file=sys.stderr)
+        return 2
+    if args.metrics:
+        from src import metrics
+        metrics.enable()
+        metrics.write_at_exit(args.metrics)
+    if args.log_evaluations:
+        from src import evaluation_log
+        evaluation_log.configure(calculator_cli.load_config().get('logging'), force=True)
+    server = create_server(args)
+    started = time.monotonic()
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"错误: 无法启动服务 - {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        server.close_history()
+    stats = server.batcher.stats()
+    print(f"calc-server stopped after {time.monotonic() - started:.1f}s: "
+          f"{stats['requests']} requests in {stats['batches']} batches "
+          f"({stats['vectorized']} vectorized)", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
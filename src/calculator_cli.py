@@ -1,34 +1,53 @@
 # 在文件顶部添加
+# 启动耗时：yaml、colorama、numpy（vectorized）、日志、更新检查、历史记录库和 readline
+# 都在第一次使用时才导入，calc-cli --eval 只加载解析和计算所需的模块
 import sys
 import os
-from src.utils.logger import setup_logger
+import argparse
 from src.i18n.translator import Translator
-from src.utils.version_checker import check_update
+from src.expression_parser import parse_expression, normalize_expression
+from src.numeric_backends import (
+    PrecisionEscalation, create_backend, format_number, power, BACKENDS,
+    DEFAULT_PRECISION, DEFAULT_DECIMAL_PRECISION)
+from src import complex_engine
+import cmath
 import math
-import re
-import json
-import yaml  # 添加这行
-from pathlib import Path
 from functools import wraps
-from collections import deque
-from datetime import datetime
 
 # 配置常量
-HISTORY_FILE = "calc_history.json"  # 历史记录文件路径
 MAX_MEMORY_HISTORY = 10            # 内存中保存的最大历史记录数
 MAX_DISPLAY_HISTORY = 5            # 显示的最大历史记录数
+MAX_EXP_ARGUMENT = math.log(sys.float_info.max)  # exp 不溢出的最大实数参数
+
+# 为 True 时 handle_errors 直接抛出异常而不是打印错误信息
+# （批量模式需要逐行收集错误）
+RAISE_ERRORS = False
 
 # 颜色配置（跨平台兼容）
 # Windows 系统需要初始化 colorama
 # 如果导入失败，使用空字符串替代颜色代码
-try:
-    from colorama import init, Fore, Style
-    init(autoreset=True)
-except ImportError:
-    class FakeColors:
-        def __getattr__(self, name):
-            return ''
-    Fore = Style = FakeColors()
+class FakeColors:
+    def __getattr__(self, name):
+        return ''
+
+class LazyColors:
+    """颜色代码的延迟代理：第一次使用颜色时才导入并初始化 colorama"""
+    def __init__(self, name):
+        self._name = name
+        self._colors = None
+
+    def __getattr__(self, name):
+        if self._colors is None:
+            try:
+                import colorama
+                colorama.init(autoreset=True)
+                self._colors = getattr(colorama, self._name)
+            except ImportError:
+                self._colors = FakeColors()
+        return getattr(self._colors, name)
+
+Fore = LazyColors('Fore')
+Style = LazyColors('Style')
 
 # ======================
 # 装饰器定义
@@ -37,7 +56,7 @@ def handle_errors(func):
     """统一错误处理装饰器
     
     处理两种场景：
-    1. 测试模式：重新抛出异常以便测试捕获
+    1. 测试模式或批量模式（RAISE_ERRORS）：重新抛出异常以便调用方捕获
     2. 正常模式：打印友好的错误信息
     
     参数：
@@ -51,12 +70,17 @@ def handle_errors(func):
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
+        except PrecisionEscalation:
+            # adaptive 后端请求以高精度重新计算，不是错误
+            raise
         except (ValueError, Exception) as e:
             # 在测试模式下重新抛出异常
-            if 'unittest' in sys.modules:
+            if RAISE_ERRORS or 'unittest' in sys.modules:
                 raise
             # 在正常模式下打印错误信息
             print(f"{Fore.RED}错误: {str(e)}{Style.RESET_ALL}")
+    # 供 metrics 在装饰器内部安装计时层（wrapper.__wrapped__ 为原函数）
+    wrapper.handles_errors = True
     return wrapper
 
 # 
@@ -65,75 +89,25 @@ def handle_errors(func):
 # ======================
 # 类定义
 # ======================
-class HistoryManager:
-    """历史记录管理器
-    
-    功能：
-    1. 内存中保存最近的计算记录
-    2. 将历史记录持久化到文件
-    3. 从文件加载历史记录
-    4. 支持获取最近的记录
-    
-    属性：
-        memory_history (deque): 内存中的历史记录队列
-        history_file (Path): 历史记录文件路径
-    """
-    
-    def __init__(self):
-        self.memory_history = deque(maxlen=MAX_MEMORY_HISTORY)
-        self.history_file = Path(HISTORY_FILE)
-        # 确保历史文件存在
-        if not self.history_file.exists():
-            self.history_file.touch()
-        self.load_history()
-
-    def add_record(self, record):
-        """添加新记录"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        entry = f"[{timestamp}] {record}"
-        self.memory_history.append(entry)
-        self.save_history()
-
-    def get_recent_history(self):
-        """获取最近的记录"""
-        return list(self.memory_history)[-MAX_DISPLAY_HISTORY:]
-
-    def save_history(self):
-        """保存历史到文件"""
-        try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(list(self.memory_history), f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"{Fore.YELLOW}警告: 无法保存历史记录 - {str(e)}{Style.RESET_ALL}")
-
-    def load_history(self):
-        """从文件加载历史
-        
-        加载规则：
-        1. 检查历史文件是否存在
-        2. 从 JSON 文件读取历史记录
-        3. 只保留最近的 MAX_MEMORY_HISTORY 条记录
-        4. 加载失败时显示警告但不中断程序
-        """
-        if self.history_file.exists():
-            try:
-                with open(self.history_file, 'r') as f:
-                    history = json.load(f)
-                    self.memory_history.extend(history[-MAX_MEMORY_HISTORY:])
-            except Exception as e:
-                print(f"{Fore.YELLOW}警告: 无法加载历史记录 - {str(e)}{Style.RESET_ALL}")
-
 class CalculatorCore:
     """计算器核心逻辑
     
     提供以下功能：
     1. 基本运算：+, -, *, /, ^, %
-    2. 科学函数：sqrt, sin, cos, tan, log, log10, abs
-    3. 复数运算：+c, -c, *c, /c, abs_c, real, imag
+    2. 科学函数：sqrt, sin, cos, tan, log, log10, exp, abs
+    3. 复数运算：+c, -c, *c, /c, abs_c, real, imag, conj, arg；
+       科学函数的参数为复数时按复平面计算（见 complex_engine）
+    4. 批量运算：calculate_many, apply_function（可选 NumPy 向量化）
+    5. 数值后端：float / decimal / fraction / adaptive（见 numeric_backends）
+    6. 编译表达式：compile 把含变量的表达式编译为可重复调用的函数（见 expression_compiler）
     
     属性：
-        FUNCTIONS (dict): 支持的数学函数映射
-        OPERATORS (dict): 支持的运算符映射
+        FUNCTIONS (dict): 支持的数学函数映射（实例上为当前后端的函数表）
+        OPERATORS (dict): 支持的运算符映射（实例上为当前后端的运算符表）
+        backend: 当前数值后端
+        precision (int): 结果显示的有效数字位数
+        variables (dict): 表达式中变量的值
+        result_cache: 函数和运算符的结果缓存（见 result_cache），None 表示不缓存
     """
     
     # 函数映射格式：
@@ -149,6 +123,7 @@ class CalculatorCore:
         'tan': (math.tan, 1, lambda x: x % 90 != 0, "error.invalid_tan"),
         'log': (math.log, 1, lambda x: x > 0, "error.positive_required"),
         'log10': (math.log10, 1, lambda x: x > 0, "error.positive_required"),
+        'exp': (math.exp, 1, lambda x: x <= MAX_EXP_ARGUMENT, "error.overflow"),
         'abs': (abs, 1, lambda _: True, "")
     }
     
@@ -159,24 +134,105 @@ class CalculatorCore:
         '*': lambda a, b: a * b,
         '/': lambda a, b: a / b if b != 0 else raise_(ValueError("error.division_by_zero")),
         '%': lambda a, b: a % b if b != 0 else raise_(ValueError("error.division_by_zero")),
-        '^': lambda a, b: a ** b,
+        '^': power,
     }
     
-    def __init__(self, translator):
+    def __init__(self, translator, backend='float', precision=DEFAULT_PRECISION,
+                 decimal_precision=DEFAULT_DECIMAL_PRECISION):
         self.translator = translator
-        # 添加复数运算符
+        # 添加复数运算符（复数引擎的标量实现，见 complex_engine）
         self.OPERATORS.update({
-            '+c': lambda a, b: complex(a) + complex(b),
-            '-c': lambda a, b: complex(a) - complex(b),
-            '*c': lambda a, b: complex(a) * complex(b),
-            '/c': lambda a, b: complex(a) / complex(b) if b != 0 else raise_(ValueError(self.translator.translate("error.division_by_zero")))
+            '+c': complex_engine.add,
+            '-c': complex_engine.subtract,
+            '*c': complex_engine.multiply,
+            '/c': complex_engine.divide,
         })
         
         self.FUNCTIONS.update({
-            'abs_c': (abs, 1, lambda x: isinstance(x, complex), self.translator.translate("error.complex_required")),
-            'real': (lambda x: x.real, 1, lambda x: isinstance(x, complex), self.translator.translate("error.complex_required")),
-            'imag': (lambda x: x.imag, 1, lambda x: isinstance(x, complex), self.translator.translate("error.complex_required"))
+            'abs_c': (abs, 1, lambda x: isinstance(x, complex), "error.complex_required"),
+            'real': (lambda x: x.real, 1, lambda x: isinstance(x, complex), "error.complex_required"),
+            'imag': (lambda x: x.imag, 1, lambda x: isinstance(x, complex), "error.complex_required"),
+            'conj': (lambda x: x.conjugate(), 1, lambda x: isinstance(x, complex), "error.complex_required"),
+            'arg': (cmath.phase, 1, lambda x: isinstance(x, complex), "error.complex_required")
         })
+        
+        self.precision = precision
+        self.decimal_precision = decimal_precision
+        # 表达式中变量的值（变量名 -> 数值），见 expression_parser.Variable
+        self.variables = {}
+        # 最近一次 integrate / diff / solve 的 calculus.Estimate（误差估计和函数求值次数）
+        self.last_estimate = None
+        # 没有达到容差的 integrate / diff / solve 次数（调用方在计算前清零，显示结果时给出警告）
+        self.unconverged = 0
+        self.result_cache = None
+        self._fallback_core = None
+        self.set_backend(backend)
+    
+    def set_backend(self, backend=None, precision=None, decimal_precision=None):
+        """切换数值后端
+        
+        参数：
+            backend (str): float, decimal, fraction 或 adaptive，None 表示保持当前后端
+            precision (int, optional): 结果显示的有效数字位数
+            decimal_precision (int, optional): decimal 后端的工作精度
+        
+        异常：
+            ValueError: 后端名称不支持时抛出
+        """
+        if precision is not None:
+            self.precision = precision
+        if decimal_precision is not None:
+            self.decimal_precision = decimal_precision
+        name = backend or self.backend.name
+        self._install(create_backend(name, self.precision, self.decimal_precision))
+    
+    def set_result_cache(self, cache):
+        """启用结果缓存（cache 为 result_cache.ResultCache，None 表示停用）"""
+        self.result_cache = cache
+        if self._fallback_core is not None:
+            self._fallback_core.result_cache = cache
+    
+    def _install(self, backend):
+        self.backend = backend
+        self.OPERATORS = backend.operators(CalculatorCore.OPERATORS)
+        self.FUNCTIONS = backend.functions(CalculatorCore.FUNCTIONS)
+        # 语法树中的数字字面量通过它从原始文本转换（float 后端为 None）
+        self.convert_literal = backend.convert_literal
+        self._fallback_core = None
+    
+    def evaluate(self, tree):
+        """对语法树求值
+        
+        adaptive 后端在局部误差估计显示浮点结果不可靠时抛出 PrecisionEscalation，
+        此时以其高精度后端（decimal）重新计算整个表达式。
+        """
+        try:
+            return tree.evaluate(self)
+        except PrecisionEscalation:
+            if self._fallback_core is None:
+                core = CalculatorCore(self.translator, precision=self.precision,
+                                      decimal_precision=self.decimal_precision)
+                core._install(self.backend.fallback)
+                core.result_cache = self.result_cache
+                self._fallback_core = core
+            core = self._fallback_core
+            core.variables = self.variables
+            core.last_estimate, core.unconverged = None, 0
+            try:
+                return tree.evaluate(core)
+            finally:
+                # 高精度后端中的 integrate / diff / solve 估计同样报告给调用方
+                self.last_estimate = core.last_estimate or self.last_estimate
+                self.unconverged += core.unconverged
+    
+    def compile(self, expr):
+        """把表达式编译为函数，参数为表达式中的变量（见 expression_compiler.compile_expression）"""
+        from src.expression_compiler import compile_expression
+        return compile_expression(expr, self)
+    
+    def format_result(self, value):
+        """按显示精度格式化结果"""
+        return format_number(value, self.precision)
     
     @handle_errors
     def calculate(self, num1, num2, operator):
@@ -195,6 +251,15 @@ class CalculatorCore:
         """
         if operator not in self.OPERATORS:
             raise ValueError(f"不支持的运算符: {operator}")
+        cache = self.result_cache
+        if cache is not None and operator in cache.names:
+            key = self._cache_key(cache, operator, (num1, num2))
+            if key is not None:
+                result = cache.get(key)
+                if result is cache.MISSING:
+                    result = self.OPERATORS[operator](num1, num2)
+                    cache.put(key, result)
+                return result
         return self.OPERATORS[operator](num1, num2)
     
     @handle_errors
@@ -203,20 +268,87 @@ class CalculatorCore:
         
         支持的函数：
         - 三角函数：sin, cos, tan（输入为角度）
-        - 数学函数：sqrt, log, log10, abs
+        - 数学函数：sqrt, log, log10, exp, abs
+        
+        参数为复数时由复数引擎（cmath）计算，不经过实数定义域验证和结果缓存。
         """
         if func_name not in self.FUNCTIONS:
             raise ValueError(f"不支持的函数: {func_name}")
+        if type(value) is complex and func_name in complex_engine.FUNCTIONS:
+            return complex_engine.apply(func_name, value, func_name in ('sin', 'cos', 'tan'))
             
         func, _, validator, error_msg = self.FUNCTIONS[func_name]
         if not validator(value):
             raise ValueError(error_msg)
-            
+        
+        cache = self.result_cache
+        if cache is not None and func_name in cache.names:
+            key = self._cache_key(cache, func_name, (value,))
+            if key is not None:
+                result = cache.get(key)
+                if result is cache.MISSING:
+                    result = self._apply_function(func, func_name, value)
+                    cache.put(key, result)
+                return result
+        return self._apply_function(func, func_name, value)
+    
+    def _apply_function(self, func, func_name, value):
         if func_name in ('sin', 'cos', 'tan'):
             # 将角度转换为弧度
-            value = math.radians(value)
+            value = self.backend.radians(value)
             
         return func(value)
+    
+    def _cache_key(self, cache, name, args):
+        """生成结果缓存的键，参数类型不支持缓存时返回 None"""
+        try:
+            return cache.make_key(self.backend.cache_namespace, name, args)
+        except TypeError:
+            return None
+
+    def calculate_many(self, a, b, operator):
+        """批量执行二元运算
+        
+        与 calculate 不同，批量接口不经过 handle_errors：
+        非法元素（如除数为零）不会抛出异常，而是在返回的错误标记中置为 True，
+        对应位置的结果为 NaN。安装了 NumPy 时以向量化方式执行。
+        
+        参数：
+            a: 第一个操作数数组（NumPy 数组、array.array、列表等）或标量
+            b: 第二个操作数数组或标量
+            operator (str): 运算符，必须在 OPERATORS 中定义
+        
+        返回：
+            BatchResult: (values, errors, error_key)
+            
+        异常：
+            ValueError: 当运算符不支持时抛出
+        """
+        if operator not in self.OPERATORS:
+            raise ValueError(f"不支持的运算符: {operator}")
+        from src import vectorized
+        return vectorized.calculate_many(a, b, operator, self.OPERATORS)
+
+    def apply_function(self, func_name, values):
+        """对一组数值批量执行函数
+        
+        参数验证（sqrt 定义域、log 正数、tan 角度等）以向量化掩码执行，
+        返回逐元素错误标记而不是在第一个非法元素处抛出异常。
+        
+        参数：
+            func_name (str): 函数名，必须在 FUNCTIONS 中定义
+            values: 参数数组（NumPy 数组、array.array、列表等）
+        
+        返回：
+            BatchResult: (values, errors, error_key)
+            
+        异常：
+            ValueError: 当函数不支持时抛出
+        """
+        if func_name not in self.FUNCTIONS:
+            raise ValueError(f"不支持的函数: {func_name}")
+        from src import vectorized
+        return vectorized.apply_function(func_name, values, self.FUNCTIONS)
 
 # 在类外添加辅助函数
 def raise_(ex):
@@ -240,22 +372,41 @@ class CalculatorUI:
         self.core = core
         self.history = history
         self.translator = translator  # 保存翻译器实例
-        self.setup_autocomplete()
+        # 补全索引（见 completion），进入交互模式时由 setup_autocomplete 建立
+        self.completion = None
+        self._matches = []
 
     def setup_autocomplete(self):
-        """设置自动完成（如果可用）"""
+        """设置自动完成（如果可用）
+        
+        readline 导入较慢，只在进入交互模式时由 ScientificCalculator.run 调用。
+        """
         try:
             import readline
             readline.parse_and_bind("tab: complete")
             readline.set_completer(self.autocomplete)
         except ImportError:
-            pass
+            return
+        from src.completion import CompletionIndex
+        self.completion = CompletionIndex(self.core, self.history)
 
     def autocomplete(self, text, state):
-        """自动完成逻辑"""
-        options = [f"{k}(" for k in CalculatorCore.FUNCTIONS.keys() if k.startswith(text)]
-        options += [op for op in CalculatorCore.OPERATORS.keys() if op.startswith(text)]
-        return (options + [None])[state]
+        """自动完成逻辑
+        
+        readline 对同一个单词按 state = 0, 1, 2, ... 逐个取候选：state 为 0 时按整行的上下文
+        从补全索引取出全部候选，之后的调用直接按下标返回。
+        """
+        if state == 0:
+            if self.completion is None:
+                from src.completion import CompletionIndex
+                self.completion = CompletionIndex(self.core, self.history)
+            readline = sys.modules.get('readline')
+            if readline is not None:
+                self._matches = self.completion.complete(text, readline.get_line_buffer(),
+                                                         readline.get_begidx())
+            else:
+                self._matches = self.completion.complete(text)
+        return self._matches[state] if state < len(self._matches) else None
 
     def display_help(self):
         """显示帮助信息"""
@@ -263,9 +414,14 @@ class CalculatorUI:
         print(f"{Fore.GREEN}{self.translator.translate('basic_ops')}: {Style.RESET_ALL}3 + 5, 2.5e3 * -1.5")
         print(f"{Fore.GREEN}{self.translator.translate('func_call')}: {Style.RESET_ALL}sin(30), log(100), sqrt(25)")
         print(f"{Fore.GREEN}{self.translator.translate('complex_ops')}: {Style.RESET_ALL}1 +c 2j, 3 *c (1+2j)")
+        print(f"{Fore.GREEN}{self.translator.translate('variables')}: {Style.RESET_ALL}a = 3, b = a*2 + sqrt(a)")
+        print(f"{Fore.GREEN}{self.translator.translate('unit_conv')}: {Style.RESET_ALL}3 km -> mile, 100 km/h -> m/s")
+        print(f"{Fore.GREEN}{self.translator.translate('calculus')}: {Style.RESET_ALL}integrate(x^2, 0, 1), diff(sin(x), 30), solve(x^2 - 2, 0, 2)")
         print(f"{Fore.GREEN}{self.translator.translate('supported_funcs')}: {Style.RESET_ALL}{', '.join(CalculatorCore.FUNCTIONS.keys())}")
         print(f"{Fore.GREEN}{self.translator.translate('commands')}: {Style.RESET_ALL}")
-        print(f"  q - {self.translator.translate('exit')}  h - {self.translator.translate('help')}  c - {self.translator.translate('clear')}  l - {self.translator.translate('history')}  m - {self.translator.translate('multiline')}")
+        print(f"  q - {self.translator.translate('exit')}  h - {self.translator.translate('help')}  c - {self.translator.translate('clear')}  l - {self.translator.translate('history')}  m - {self.translator.translate('multiline')}  stats - {self.translator.translate('stats')}")
+        print(f"  vars [save FILE | load FILE | del NAME | clear] - {self.translator.translate('variables')}")
+        print(f"  table EXPR x=START..STOP step H [adaptive [TOL]] [> FILE] - {self.translator.translate('table')}")
 
     def get_expression(self):
         print(f"{Fore.YELLOW}{self.translator.translate('multiline_prompt')}{Style.RESET_ALL}")
@@ -303,38 +459,205 @@ def get_resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+def numeric_settings(config):
+    """从配置中读取数值后端选项（对应 CalculatorCore.set_backend 的参数）"""
+    settings = config.get('settings', {})
+    return {
+        'backend': settings.get('numeric_backend', 'float'),
+        'precision': settings.get('precision', DEFAULT_PRECISION),
+        'decimal_precision': settings.get('decimal_precision', DEFAULT_DECIMAL_PRECISION),
+    }
+
+def numeric_options(args):
+    """从命令行参数中读取显式指定的数值后端选项"""
+    options = {
+        'backend': args.backend,
+        'precision': args.precision,
+        'decimal_precision': args.decimal_precision,
+    }
+    return {key: value for key, value in options.items() if value is not None}
+
+def load_config():
+    """加载 config.yaml 配置"""
+    import yaml
+    config_path = get_resource_path('config.yaml')
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
 class ScientificCalculator:
+    """计算器主程序
+    
+    构造时只创建翻译器和计算核心；配置、日志、历史记录、界面和变量工作区在第一次访问时
+    才创建（见 __getattr__），更新检查和 readline 只在进入交互模式时执行，
+    因此 calc-cli --eval 和批量模式不需要为它们付出启动时间。
+    """
+    
     def __init__(self):
         try:
             # 设置翻译器（移到最前面）
             self.translator = Translator()
-            
-            # 加载配置
-            config_path = get_resource_path('config.yaml')
-            with open(config_path, 'r') as f:
-                self.config = yaml.safe_load(f)
-            
-            # 设置日志
-            self.logger = setup_logger()
-            
-            # 检查更新
-            try:
-                has_update, latest_version = check_update()
-                if has_update:
-                    print(f"{Fore.YELLOW}{self.translator.translate('update_available')}: {latest_version}{Style.RESET_ALL}")
-            except Exception as e:
-                print(f"{Fore.YELLOW}{self.translator.translate('error.update_check_failed')}: {str(e)}{Style.RESET_ALL}")
-            
-            # 初始化其他组件
-            self.history = HistoryManager()
             self.core = CalculatorCore(self.translator)
-            self.ui = CalculatorUI(self.core, self.history, self.translator)
-            
+            # 后台更新检查（进入交互模式时启动）
+            self.update_checker = None
         except Exception as e:
             print(f"{Fore.RED}{self.translator.translate('error.init_failed')}: {str(e)}{Style.RESET_ALL}")
             sys.exit(1)
 
-    def run(self):
+    # 延迟创建的组件：属性名 -> 创建方法名
+    LAZY_COMPONENTS = {
+        'config': '_create_config',
+        'logger': '_create_logger',
+        'history': '_create_history',
+        'ui': '_create_ui',
+        'workspace': '_create_workspace',
+    }
+
+    def __getattr__(self, name):
+        """第一次访问 config、logger、history、ui、workspace 时创建并缓存为实例属性"""
+        factory = ScientificCalculator.LAZY_COMPONENTS.get(name)
+        if factory is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        value = getattr(self, factory)()
+        setattr(self, name, value)
+        return value
+
+    def _create_config(self):
+        return load_config()
+
+    def _create_logger(self):
+        from src.utils.logger import setup_logger
+        return setup_logger(self.config.get('logging'))
+
+    def _create_history(self):
+        from src.history_manager import HistoryManager
+        history = HistoryManager(self.config.get('history', {}).get('database'),
+                                 max_memory_size=MAX_MEMORY_HISTORY)
+        if history.error is not None:
+            print(f"{Fore.YELLOW}警告: 无法打开历史记录 - {str(history.error)}{Style.RESET_ALL}")
+        return history
+
+    def _create_ui(self):
+        return CalculatorUI(self.core, self.history, self.translator)
+
+    def _create_workspace(self):
+        # 表达式中的变量从工作区读取（见 workspace.Workspace）
+        from src.workspace import Workspace
+        workspace = Workspace(self.core)
+        self.core.variables = workspace
+        return workspace
+
+    def start_interactive(self):
+        """初始化交互模式需要的组件：配置、日志、历史记录、更新检查和自动补全"""
+        try:
+            self.config
+            self.logger
+            self.history
+        except Exception as e:
+            print(f"{Fore.RED}{self.translator.translate('error.init_failed')}: {str(e)}{Style.RESET_ALL}")
+            sys.exit(1)
+        
+        # 数值后端和显示精度
+        settings = self.config.get('settings', {})
+        self.core.set_backend(**numeric_settings(self.config))
+        self.configure_result_cache(self.config.get('result_cache'))
+        metrics_settings = self.config.get('metrics')
+        if metrics_settings and metrics_settings.get('enabled', False):
+            from src import metrics
+            metrics.configure(metrics_settings)
+        logging_settings = self.config.get('logging') or {}
+        if (logging_settings.get('evaluations') or {}).get('enabled', False):
+            from src import evaluation_log
+            evaluation_log.configure(logging_settings)
+        
+        # 在后台检查更新，结果在第一次输入之后才显示（见 show_update_notice）
+        if settings.get('auto_update_check', True):
+            from src.utils import version_checker
+            self.update_checker = version_checker.UpdateChecker(
+                current_version=self.config.get('version'),
+                url=self.config.get('update_url'),
+                ttl=settings.get('update_check_ttl', version_checker.DEFAULT_TTL),
+                timeout=settings.get('update_check_timeout', version_checker.DEFAULT_TIMEOUT)).start()
+        
+        self.ui.setup_autocomplete()
+
+    def configure_result_cache(self, settings):
+        """按 result_cache 配置启用函数和运算符的结果缓存（未启用时不导入 result_cache 模块）"""
+        if settings and settings.get('enabled', False):
+            from src.result_cache import create_result_cache
+            self.core.set_result_cache(create_result_cache(settings))
+        else:
+            self.core.set_result_cache(None)
+
+    def show_stats(self, argument=''):
+        """stats 命令：显示运行指标和结果缓存统计
+        
+        参数：
+            argument (str): on 启用指标，off 停用，reset 清空，空字符串表示显示
+        """
+        from src import metrics
+        if argument == 'on':
+            metrics.enable()
+            print(self.translator.translate('metrics_enabled'))
+            return
+        if argument == 'off':
+            metrics.disable()
+            print(self.translator.translate('metrics_disabled'))
+            return
+        if argument == 'reset':
+            metrics.REGISTRY.reset()
+            if self.core.result_cache is not None:
+                self.core.result_cache.clear()
+            print(self.translator.translate('metrics_reset'))
+            return
+        
+        print(f"\n{Fore.CYAN}{self.translator.translate('stats_title')}{Style.RESET_ALL}")
+        if not metrics.REGISTRY.enabled:
+            print(self.translator.translate('metrics_off_hint'))
+        rows = metrics.REGISTRY.snapshot()
+        if rows:
+            print(f"{'operation':<22}{'calls':>9}{'errors':>8}{'mean':>10}{'p50':>10}{'p99':>10}{'max':>10}  (us)")
+        for row in rows:
+            label = f"{row['operation']} {row['name']}".strip()
+            latency = row['latency']
+            print(f"{label:<22}{row['calls']:>9}{sum(row['errors'].values()):>8}"
+                  f"{latency['mean_ns'] / 1000:>10.2f}{latency['p50_ns'] / 1000:>10.2f}"
+                  f"{latency['p99_ns'] / 1000:>10.2f}{latency['max_ns'] / 1000:>10.2f}")
+            for message_key, count in sorted(row['errors'].items()):
+                print(f"  {Fore.RED}{count:>6} x {self.translator.translate(message_key)}{Style.RESET_ALL}")
+        
+        cache = self.core.result_cache
+        if cache is not None:
+            stats = cache.stats()
+            print(f"{self.translator.translate('result_cache')}: hits {stats['hits']} "
+                  f"(disk {stats['disk_hits']}), misses {stats['misses']}, evictions {stats['evictions']}, "
+                  f"size {stats['size']}/{stats['max_entries']}, hit rate {stats['hit_rate']:.1%}")
+
+    def show_update_notice(self):
+        """后台更新检查结束后输出一次提示；检查未结束时直接返回，不等待网络"""
+        checker = self.update_checker
+        if checker is None or not checker.done:
+            return
+        self.update_checker = None
+        if checker.error is not None:
+            self.logger.warning(f"{self.translator.translate('error.update_check_failed')}: {checker.error}")
+            return
+        result = checker.result()
+        if result and result[0]:
+            print(f"{Fore.YELLOW}{self.translator.translate('update_available')}: {result[1]}{Style.RESET_ALL}")
+
+    def run(self, numeric_options=None, cache_settings=None):
+        """进入交互模式
+        
+        参数：
+            numeric_options (dict, optional): 覆盖 config.yaml 的数值后端选项
+                （backend, precision, decimal_precision）
+            cache_settings (dict, optional): 覆盖 config.yaml 的 result_cache 配置
+        """
+        self.start_interactive()
+        if numeric_options:
+            self.core.set_backend(**numeric_options)
+        if cache_settings:
+            self.configure_result_cache(cache_settings)
         print(f"{Fore.BLUE}{self.translator.translate('welcome')}{Style.RESET_ALL}")
         # 修改这里的硬编码中文
         multi_line_mode = False
@@ -343,6 +666,7 @@ class ScientificCalculator:
             try:
                 expr = self.ui.get_expression() if multi_line_mode else \
                     input(f"\n{self.translator.translate('prompt')}").strip()
+                self.show_update_notice()
 
                 if not expr:
                     continue
@@ -359,73 +683,433 @@ class ScientificCalculator:
                 if expr == 'l':
                     self.show_history()
                     continue
+                if expr == 'stats' or expr.startswith('stats '):
+                    self.show_stats(expr[len('stats'):].strip())
+                    continue
+                if expr == 'vars' or expr.startswith('vars '):
+                    self.show_variables(expr[len('vars'):].strip())
+                    continue
+                if expr == 'table' or expr.startswith('table '):
+                    self.show_table(expr[len('table'):].strip())
+                    continue
                 if expr == 'm':
                     multi_line_mode = not multi_line_mode
                     print(self.translator.translate('multiline_enabled' if multi_line_mode else 'multiline_disabled'))
                     continue
 
-                # 解析和执行表达式
-                result, record = self.process_expression(expr)
+                # 单位转换（值 源单位 -> 目标单位）
+                if '->' in expr:
+                    record = self.convert_units(expr)
+                    if record is not None:
+                        self.history.add_record(record)
+                        self.remember(expr)
+                        continue
+
+                # 解析和执行表达式（或赋值语句）
+                self.core.last_estimate, self.core.unconverged = None, 0
+                result, record = self.process_input(expr)
                 if result is not None:
-                    print(f"{Fore.GREEN}{self.translator.translate('result')}: {result:.6g}{Style.RESET_ALL}")
+                    print(f"{Fore.GREEN}{self.translator.translate('result')}: {self.core.format_result(result)}{Style.RESET_ALL}")
+                    self.show_estimate()
                     self.history.add_record(record)
+                    self.remember(expr)
 
+            except ValueError as e:
+                print(f"{Fore.RED}错误: {self.translator.translate(str(e))}{Style.RESET_ALL}")
             except KeyboardInterrupt:
                 print("\n检测到退出请求...")
                 break
 
+    def show_estimate(self):
+        """显示表达式中最后一次 integrate / diff / solve 的误差估计和函数求值次数"""
+        estimate = self.core.last_estimate
+        if estimate is None:
+            return
+        print(self.translator.format('estimate', f"{estimate.error:.3g}", estimate.evaluations))
+        self.warn_not_converged()
+
+    def warn_not_converged(self, file=None):
+        """上一次计算中有 integrate / diff / solve 没有达到容差时输出警告（core.unconverged）"""
+        if not self.core.unconverged:
+            return
+        message = self.translator.translate('estimate_not_converged')
+        if file is None:
+            print(f"{Fore.YELLOW}{message}{Style.RESET_ALL}")
+        else:
+            print(message, file=file)
+
+    def remember(self, expr):
+        """把成功计算的输入加入补全索引的最近表达式（未启用补全时什么也不做）"""
+        completion = self.ui.completion
+        if completion is not None:
+            completion.add_history(expr)
+
+    def convert_units(self, line):
+        """单位转换语句：3 km -> mile、2*x m/s -> km/h（值可以是表达式）
+        
+        返回：
+            str: 历史记录，不是单位转换语句时返回 None
+        
+        异常：
+            ValueError: 值的表达式无效、单位未知或量纲不一致时抛出
+        """
+        from src.unit_converter import UnitConverter, parse_conversion
+        conversion = parse_conversion(line)
+        if conversion is None:
+            return None
+        text, from_unit, to_unit = conversion
+        value = self.evaluate_number(text)
+        result = UnitConverter.convert(value, from_unit, to_unit)
+        print(f"{Fore.GREEN}{self.translator.translate('result')}: {self.core.format_result(result)} {to_unit}{Style.RESET_ALL}")
+        return self.translator.format("unit_conversion_record", self.core.format_result(value),
+                                      from_unit, f"{result:.6g}", to_unit)
+
     def process_expression(self, expr):
         """处理表达式并返回结果
         
         支持的表达式格式：
         1. 函数调用：sin(30), log(100)
         2. 基本运算：2+3, 5*6
-        3. 复数运算：(1+2j)+(2+3j), (2+3j)*(1+1j)
+        3. 复数运算：(1+2j)+(2+3j), (2+3j)*(1+1j), 1 +c 2j
+        4. 任意嵌套组合：sqrt(3^2+4^2)*2, -log10(1e-3)+sin(30)
+        
+        表达式由 expression_parser 解析为语法树，解析结果按规范化文本缓存，
+        重复提交的表达式不会再次解析。求值使用 core 的当前数值后端，
+        历史记录中的结果按 core.precision 位有效数字格式化。
         """
-        expr = expr.strip()
+        text = normalize_expression(expr)
+        tree = parse_expression(text)
+        result = self.core.evaluate(tree)
+        if result is None:
+            # 错误信息已由 handle_errors 输出
+            return None, None
+        return result, f"{text}={self.core.format_result(result)}"
+
+    def process_input(self, line):
+        """处理一行输入：赋值语句（name = expr）定义工作区变量，其余按表达式计算
         
-        # 匹配函数调用
-        func_match = re.match(r"^([a-z_]+)\((.*)\)$", expr)
-        if func_match:
-            func_name, arg = func_match.groups()
-            try:
-                # 尝试解析复数参数
-                arg = complex(arg) if 'j' in arg else float(arg)
-                result = self.core.process_function(func_name, arg)
-                return result, f"{func_name}({arg})={result:.6g}"
-            except ValueError:
-                pass
-    
-        # 匹配复数运算
-        complex_match = re.match(r"^\((.*?)\)\s*([+\-*/])\s*\((.*?)\)$", expr)
-        if complex_match:
+        返回：
+            tuple: (结果, 历史记录)，与 process_expression 相同
+        """
+        if '=' in line:
+            from src.workspace import parse_assignment
+            assignment = parse_assignment(line)
+            if assignment is not None:
+                return self.assign(*assignment)
+        return self.process_expression(line)
+
+    def assign(self, name, expr):
+        """定义（或重新定义）工作区变量并计算它的新值
+        
+        依赖它的变量只标记为需要重新计算，在下次读取时更新。
+        定义引用了尚未定义的变量时仍然保存，读取它的值时抛出 ValueError。
+        
+        返回：
+            tuple: (变量的值, 历史记录)
+        
+        异常：
+            ValueError: 变量名无效、表达式语法错误、循环依赖或计算失败时抛出
+        """
+        text = self.workspace.define(name, expr)
+        value = self.workspace.value(name)
+        return value, f"{name} = {text} = {self.core.format_result(value)}"
+
+    def show_variables(self, argument=''):
+        """vars 命令：显示、保存、加载或删除工作区变量
+        
+        参数：
+            argument (str): save FILE、load FILE、del NAME、clear，空字符串表示显示全部变量
+        """
+        workspace = self.workspace
+        command, _, operand = argument.partition(' ')
+        operand = operand.strip()
+        if command in ('save', 'load') and operand:
             try:
-                num1, op, num2 = complex_match.groups()
-                num1 = complex(num1)
-                num2 = complex(num2)
-                if isinstance(num1, complex) or isinstance(num2, complex):
-                    result = self.core.calculate(num1, num2, f"{op}c")
-                    return result, f"({num1}){op}({num2})={result}"
-            except ValueError:
-                pass
-    
-        # 匹配基本运算
-        basic_match = re.match(r"^([+-]?\d+\.?\d*(?:e[+-]?\d+)?)([+\-*/%^])([+-]?\d+\.?\d*(?:e[+-]?\d+)?)$", expr)
-        if basic_match:
-            num1, op, num2 = basic_match.groups()
-            result = self.core.calculate(float(num1), float(num2), op)
-            return result, f"{num1}{op}{num2}={result}"
+                count = workspace.save(operand) if command == 'save' else workspace.load(operand)
+            except OSError as e:
+                raise ValueError(f"无法访问工作区文件 - {str(e)}") from None
+            key = 'variables_saved' if command == 'save' else 'variables_loaded'
+            print(self.translator.format(key, count, operand))
+            return
+        if command == 'del' and operand:
+            if operand not in workspace:
+                raise ValueError(f"未知的标识符: {operand}")
+            workspace.delete(operand)
+            return
+        if command == 'clear':
+            workspace.clear()
+            return
+        if command:
+            raise ValueError("用法: vars [save FILE | load FILE | del NAME | clear]")
+        
+        print(f"\n{Fore.CYAN}{self.translator.translate('variables')}{Style.RESET_ALL}")
+        entries = workspace.entries()
+        if not entries:
+            print(self.translator.translate('variables_empty'))
+        for name, expression, value, error in entries:
+            if error is None:
+                print(f"{name} = {expression} -> {self.core.format_result(value)}")
+            else:
+                print(f"{name} = {expression} -> {Fore.RED}{self.translator.translate(error)}{Style.RESET_ALL}")
 
-        raise ValueError("无法识别的表达式格式")
+    def evaluate_number(self, text):
+        """计算一个实数参数（如 table 的区间端点和步长）
+        
+        异常：
+            ValueError: 表达式无效或结果不是实数时抛出
+        """
+        value, _ = self.process_expression(text)
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"需要实数: {text}") from None
+
+    def show_table(self, argument):
+        """table 命令：在区间上对表达式制表（见 tabulator）
+        
+        参数：
+            argument (str): 表达式 x=起点..终点 step 步长 [adaptive [容差]] [> 文件]，
+                不指定文件时输出到终端，文件按扩展名选择格式（.csv、.bin / .f64、其余为文本）
+        """
+        from src import tabulator
+        self.core.unconverged = 0
+        spec = tabulator.parse_table_command(argument)
+        start, stop, step = (self.evaluate_number(spec[key]) for key in ('start', 'stop', 'step'))
+        tolerance = tabulator.DEFAULT_TOLERANCE
+        if spec['tolerance'] is not None:
+            tolerance = self.evaluate_number(spec['tolerance'])
+        chunks = tabulator.tabulate(spec['expression'], spec['variable'], start, stop, step,
+                                    core=self.core, adaptive=spec['adaptive'], tolerance=tolerance)
+        header = (spec['variable'], normalize_expression(spec['expression']))
+        path = spec['output']
+        if path is None:
+            tabulator.write_table(chunks, sys.stdout, 'text', self.core, header)
+        else:
+            try:
+                rows = tabulator.save_table(chunks, path, core=self.core, header=header)
+            except OSError as e:
+                raise ValueError(f"无法写入文件 - {str(e)}") from None
+            print(self.translator.format('table_written', rows, path))
+        self.warn_not_converged()
 
     def show_history(self):
         """显示历史记录"""
         print(f"\n{self.translator.translate('recent_calculations')}")
-        for i, record in enumerate(self.history.get_recent_history(), 1):
+        for i, record in enumerate(self.history.get_recent_history(MAX_DISPLAY_HISTORY), 1):
             print(f"{i}. {record}")
         print()
 
+def build_arg_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog='calc-cli',
+        description='高级科学计算器命令行界面（不带参数时进入交互模式）')
+    parser.add_argument('--eval', metavar='EXPR', dest='expression',
+                        help='计算一个表达式并输出结果后退出（不加载历史记录、更新检查和 readline）；'
+                             '以 - 开头的表达式可直接写作 --eval -3^2 或 --eval=-3^2')
+    parser.add_argument('--backend', choices=BACKENDS,
+                        help='数值后端（默认 float；交互模式默认读取 config.yaml 的 settings.numeric_backend）')
+    parser.add_argument('--precision', type=int, metavar='N',
+                        help='结果显示的有效数字位数（默认 6）')
+    parser.add_argument('--decimal-precision', type=int, metavar='N',
+                        help='decimal 后端的工作精度（默认 28）')
+    parser.add_argument('--batch', metavar='FILE',
+                        help='批量模式：逐行读取表达式文件（- 表示标准输入），每行输出一个结果')
+    parser.add_argument('--format', choices=('text', 'jsonl'), default='text',
+                        help='批量模式的输出格式（默认 text）')
+    parser.add_argument('--output', metavar='FILE', default='-',
+                        help='批量模式的输出文件（默认标准输出）')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='批量模式的工作进程数，大于 1 时使用多进程并保持输出顺序')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help='多进程模式下每个任务包含的行数（默认 1000）')
+    parser.add_argument('--history', action='store_true',
+                        help='批量模式下将成功的计算写入历史记录（组提交）')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='记录运行指标，退出时写入 FILE（.prom / .txt 为 Prometheus 文本格式，否则为 JSON）')
+    parser.add_argument('--cache', action='store_true',
+                        help='启用函数和运算符的结果缓存（使用 config.yaml 中 result_cache 的其余配置）')
+    parser.add_argument('--log-evaluations', action='store_true',
+                        help='每次求值写一条 JSON 日志（使用 config.yaml 中 logging.evaluations 的其余配置）')
+    parser.add_argument('--import-history', metavar='FILE', nargs='+',
+                        help='把旧版历史文件（如启动目录下的 calc_history.json / calc_history.jsonl）导入历史记录库后退出')
+
+    subparsers = parser.add_subparsers(dest='command')
+    csv_parser = subparsers.add_parser('convert-csv', help='流式转换 CSV 文件中一列的单位')
+    csv_parser.add_argument('file', help='CSV 文件路径（- 表示标准输入）')
+    csv_parser.add_argument('--column', required=True, help='列名或从 0 开始的列号')
+    csv_parser.add_argument('--from', dest='from_unit', required=True, help='源单位')
+    csv_parser.add_argument('--to', dest='to_unit', required=True, help='目标单位')
+    csv_parser.add_argument('--output', default='-', help='输出文件（默认标准输出）')
+    csv_parser.add_argument('--delimiter', default=',', help='分隔符（默认 ,）')
+    csv_parser.add_argument('--no-header', action='store_true', help='第一行不是表头')
+    csv_parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='每次转换的行数（默认 10000）')
+    table_parser = subparsers.add_parser('table', help='在区间上对表达式制表（分块向量化计算，流式输出）')
+    table_parser.add_argument('expression', help='表达式，如 "sin(x)"')
+    table_parser.add_argument('range', help='制表变量和区间，如 x=0..360')
+    table_parser.add_argument('--step', required=True, help='步长（步长为负时从大到小）')
+    table_parser.add_argument('--format', choices=('text', 'csv', 'binary'),
+                              help='输出格式（默认按输出文件扩展名选择，标准输出为 text；'
+                                   'binary 为每行两个小端 float64）')
+    table_parser.add_argument('--output', default='-', help='输出文件（默认标准输出）')
+    table_parser.add_argument('--adaptive', action='store_true',
+                              help='在函数变化快的地方加密取样')
+    table_parser.add_argument('--tolerance', type=float, default=1e-3,
+                              help='自适应模式的容差（相对于 max(1, |f|)，默认 1e-3）')
+    table_parser.add_argument('--max-depth', type=int, default=8,
+                              help='自适应模式每个区间最多对分的层数（默认 8）')
+    table_parser.add_argument('--chunk-size', type=int, default=8192,
+                              help='每块计算的网格点数（默认 8192）')
+    table_parser.add_argument('--no-header', action='store_true', help='不输出表头')
+    return parser
+
+def run_convert_csv(args):
+    """convert-csv 子命令：转换 CSV 文件中的一列"""
+    from src.unit_converter import convert_csv
+    source = sys.stdin if args.file == '-' else open(args.file, 'r', newline='', encoding='utf-8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        skipped = convert_csv(source, args.column, args.from_unit, args.to_unit, output=output,
+                              has_header=not args.no_header, delimiter=args.delimiter,
+                              chunk_size=max(1, args.chunk_size))
+    except ValueError as e:
+        print(f"错误: {str(e)}", file=sys.stderr)
+        return 2
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    if skipped:
+        print(f"警告: {skipped} 个单元格无法转换，已保持原样", file=sys.stderr)
+    return 0
+
+def run_table(args):
+    """table 子命令：在区间上对表达式制表，结果流式写入文件或标准输出"""
+    from src import tabulator
+    global RAISE_ERRORS
+    RAISE_ERRORS = True
+    calculator = ScientificCalculator()
+    try:
+        options = numeric_options(args)
+        if options:
+            calculator.core.set_backend(**options)
+        variable, start, stop = tabulator.parse_range(args.range)
+        start, stop, step = (calculator.evaluate_number(text) for text in (start, stop, args.step))
+        chunks = tabulator.tabulate(args.expression, variable, start, stop, step,
+                                    core=calculator.core, chunk_size=args.chunk_size,
+                                    adaptive=args.adaptive, tolerance=args.tolerance,
+                                    max_depth=args.max_depth)
+        header = None if args.no_header else (variable, normalize_expression(args.expression))
+        tabulator.save_table(chunks, args.output, args.format, calculator.core, header)
+    except (ValueError, OSError) as e:
+        print(f"错误: {calculator.translator.translate(str(e))}", file=sys.stderr)
+        return 1
+    calculator.warn_not_converged(sys.stderr)
+    return 0
+
+def run_import_history(paths):
+    """--import-history：把旧版历史文件导入历史记录库
+
+    返回：
+        int: 退出码，文件不存在或历史记录库不可用时为 1
+    """
+    import sqlite3
+    from src.history_manager import HistoryManager
+    missing = [path for path in paths if not os.path.isfile(os.path.expanduser(path))]
+    if missing:
+        print(f"错误: 找不到历史文件: {', '.join(missing)}", file=sys.stderr)
+        return 1
+    history = HistoryManager(load_config().get('history', {}).get('database'))
+    try:
+        count = history.import_files(paths)
+    except (OSError, sqlite3.Error, ValueError) as e:
+        print(f"错误: 无法导入历史记录 - {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        history.close()
+    print(f"已导入 {count} 条记录到 {history.history_file}")
+    return 0
+
+def run_eval(expression, numeric_options=None, cache_settings=None):
+    """--eval：计算一个表达式，结果输出到标准输出，错误输出到标准错误
+    
+    参数：
+        expression (str): 表达式
+        numeric_options (dict, optional): 数值后端选项（不读取 config.yaml，默认 float 后端）
+        cache_settings (dict, optional): 结果缓存配置，None 表示不缓存
+    
+    返回：
+        int: 退出码，计算成功时为 0，否则为 1
+    """
+    global RAISE_ERRORS
+    RAISE_ERRORS = True
+    calculator = ScientificCalculator()
+    try:
+        if numeric_options:
+            calculator.core.set_backend(**numeric_options)
+        calculator.configure_result_cache(cache_settings)
+        result, _ = calculator.process_expression(expression)
+    except Exception as e:
+        print(f"错误: {calculator.translator.translate(str(e))}", file=sys.stderr)
+        return 1
+    print(calculator.core.format_result(result))
+    calculator.warn_not_converged(sys.stderr)
+    return 0
+
+def join_eval_argument(argv, parser):
+    """把 --eval 后以 - 开头的表达式合并为 --eval=EXPR
+
+    argparse 把 -3^2 这样的参数当作选项（只有 -3、-0.5 这样的纯数字才当作值），
+    合并后 --eval -3^2 与 --eval=-3^2 相同。下一个参数本身是选项（如 --backend）时不合并。
+    """
+    argv = list(argv)
+    for i, arg in enumerate(argv[:-1]):
+        if arg == '--':
+            break
+        following = argv[i + 1]
+        if arg == '--eval' and following.startswith('-') and following not in parser._option_string_actions:
+            argv[i:i + 2] = [f'--eval={following}']
+            break
+    return argv
+
+
+def main(argv=None):
+    """命令行入口（calc-cli）"""
+    parser = build_arg_parser()
+    args = parser.parse_args(join_eval_argument(sys.argv[1:] if argv is None else argv, parser))
+    if args.command == 'convert-csv':
+        return run_convert_csv(args)
+    if args.command == 'table':
+        return run_table(args)
+    if args.metrics:
+        from src import metrics
+        metrics.enable()
+        metrics.write_at_exit(args.metrics)
+    if args.log_evaluations:
+        from src import evaluation_log
+        evaluation_log.configure(load_config().get('logging'), force=True)
+    cache_settings = None
+    if args.cache:
+        cache_settings = dict(load_config().get('result_cache') or {}, enabled=True)
+    if args.import_history:
+        return run_import_history(args.import_history)
+    if args.expression is not None:
+        return run_eval(args.expression, numeric_options(args), cache_settings)
+    if args.batch:
+        from src.batch_runner import run_batch
+        return run_batch(args.batch, output=args.output, fmt=args.format,
+                         workers=args.workers, chunk_size=args.chunk_size,
+                         record_history=args.history, numeric_options=numeric_options(args),
+                         cache_settings=cache_settings)
+    ScientificCalculator().run(numeric_options(args), cache_settings)
+    return 0
+
 if __name__ == "__main__":
     os.environ['LANG'] = 'en_US'
-    ScientificCalculator().run()
+    # 通过 src.calculator_cli 模块运行（python -m 时本文件是 __main__，
+    # metrics 等按模块替换的类和全局变量必须与其他模块看到的是同一份）
+    from src import calculator_cli
+    sys.exit(calculator_cli.main())
     
\ No newline at end of file
@@ -0,0 +1,694 @@
+"""数值积分、求导和求根
+
+基于计算器自己的函数表（表达式经 expression_compiler 编译，函数和运算符来自 CalculatorCore）：
+
+1. integrate(expr, a, b): 自适应 Gauss–Kronrod 积分（7 点 Gauss / 15 点 Kronrod）
+   - 每个区间的 15 个节点、以及每轮需要对分的全部区间的节点，在一次数组调用中计算
+   - 误差估计与 QUADPACK 的 QK15 相同（|K15 - G7| 按 resasc 缩放，不低于舍入误差）
+   - 只对分误差超过按宽度分摊的容差的区间，总误差不超过 max(tolerance, rel_tolerance*|积分|) 时结束
+   - 积分限可以是 ±inf（变量替换到有限区间）
+2. diff(expr, x0): 中心差分的 Richardson 外推（Ridders 方法）
+   - 步长 h, h/2, h/4, ... 的 2*levels 个点一次数组调用计算，外推表中误差最小的一项为结果
+   - 大步长处无法求值（如 log 在 0 附近）时只使用之后的各层
+3. solve(expr, lo, hi): Brent 方法（反二次插值 / 割线 / 对分），区间两端的函数值需要异号
+4. solve_many(expr, lo, hi, bindings={'k': [...]}): 批量 Brent，参数数组的每个元素是一个独立的问题，
+   每轮把所有未收敛问题的下一个求值点合在一次数组调用中计算
+
+结果为 Estimate(value, error, evaluations, converged)：估计值、误差估计、函数求值次数和是否达到容差。
+
+表达式中的 x 为自变量，其他变量从 bindings 或计算核心的 variables（变量工作区）读取。
+在表达式和交互模式中写作 integrate(x^2, 0, 1)、diff(sin(x), 30)、solve(x^2 - 2, 0, 2)
+（见 expression_parser.CALCULUS_FUNCTIONS）；三角函数的参数仍为角度。
+
+用法示例：
+integrate("exp(-x^2)", -math.inf, math.inf)  # Estimate(value=1.7724538509..., error=..., ...)
+diff("x^3", 2).value                       # 12.0
+solve("x^2 - k", 0, 10, bindings={'k': 2})
+solve_many("x^2 - k", 0, 10, bindings={'k': [1, 2, 3]}).values
+"""
+import math
+from collections import namedtuple
+
+from src.expression_compiler import compile_expression, default_core
+from src.expression_parser import CALCULUS_FUNCTIONS, CALCULUS_VARIABLE
+from src.vectorized import BatchResult, NAN, np
+
+# 数值积分 / 求导 / 求根的结果
+# - value: 估计值
+# - error: 误差估计（积分为绝对误差估计，求导为外推表中相邻项的差，求根为包含根的区间宽度）
+# - evaluations: 函数求值次数
+# - converged: 是否达到容差
+Estimate = namedtuple('Estimate', ['value', 'error', 'evaluations', 'converged'])
+
+# 批量求根的结果（values / error 按问题排列，failed 为没有根或没有收敛的问题）
+BatchEstimate = namedtuple('BatchEstimate', ['values', 'error', 'failed', 'evaluations', 'error_key'])
+
+EPSILON = 2.220446049250313e-16
+UNDERFLOW = 2.2250738585072014e-308
+
+# 积分的默认容差和最多区间数
+DEFAULT_TOLERANCE = 1e-10
+DEFAULT_REL_TOLERANCE = 1e-10
+DEFAULT_MAX_PANELS = 1000
+
+# 求导的初始步长（相对于 max(1, |x0|)）、步长层数和判断收敛的相对容差
+DIFF_STEP = 0.1
+DIFF_LEVELS = 12
+DIFF_REL_TOLERANCE = 1e-6
+# 外推表的对角线误差超过当前最小误差的这个倍数时停止（之后的项受舍入误差支配）
+DIFF_SAFE = 2.0
+
+# 求根的默认容差和最大迭代次数
+DEFAULT_XTOL = 2e-12
+DEFAULT_RTOL = 4 * EPSILON
+DEFAULT_MAX_ITERATIONS = 100
+
+# 15 点 Gauss–Kronrod 节点（正半轴，从大到小，最后一个为 0）和权重；
+# 7 点 Gauss 节点为其中下标 1, 3, 5, 7 的节点
+_XGK = (0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+        0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+        0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+        0.207784955007898467600689403773245, 0.0)
+_WGK = (0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+        0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+        0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+        0.204432940075298892414161999234649, 0.209482141084727828012999174891714)
+_WG = {1: 0.129484966168869693270611432679082, 3: 0.279705391489276667901467771423780,
+       5: 0.381830050505118944950369775488975, 7: 0.417959183673469387755102040816327}
+
+# [-1, 1] 上的 15 个节点（从 -1 到 1）及其 Kronrod / Gauss 权重（非 Gauss 节点的 Gauss 权重为 0）
+NODES = tuple(-x for x in _XGK[:7]) + (0.0,) + tuple(reversed(_XGK[:7]))
+KRONROD = _WGK[:7] + (_WGK[7],) + tuple(reversed(_WGK[:7]))
+GAUSS = tuple(_WG.get(i, 0.0) for i in range(7)) + (_WG[7],) + tuple(_WG.get(i, 0.0) for i in reversed(range(7)))
+
+if np is not None:
+    _NODES = np.array(NODES)
+    _KRONROD = np.array(KRONROD)
+    _GAUSS = np.array(GAUSS)
+
+SAME_SIGN = "区间两端的函数值同号"
+NOT_REAL = "函数值不是有限实数"
+NOT_FINITE = "函数值不是有限数"
+
+
+# ======================
+# 函数求值
+# ======================
+def _is_array(value):
+    return not isinstance(value, (int, float, complex)) and hasattr(value, '__len__')
+
+
+def _as_lists(result):
+    if np is not None:
+        return np.asarray(result.values).tolist(), np.asarray(result.errors, dtype=bool).tolist()
+    return list(result.values), list(result.errors)
+
+
+class _Function:
+    """以 variable 为自变量的函数（其他变量取 bindings 或计算核心的当前值），记录求值次数
+
+    属性：
+        compiled (CompiledExpression): 编译后的表达式
+        size (int): bindings 中数组的长度（批量求根的问题数），没有数组时为 None
+        evaluations (int): 函数求值次数
+    """
+
+    def __init__(self, expr, variable, core, bindings=None):
+        self.compiled = compile_expression(expr, core if core is not None else default_core())
+        self.size = None
+        self.evaluations = 0
+        self._index = None
+        self._args = []
+        self._arrays = []
+        for position, name in enumerate(self.compiled.variables):
+            if name == variable:
+                self._index = position
+                self._args.append(None)
+                continue
+            if bindings is not None and name in bindings:
+                value = bindings[name]
+            else:
+                try:
+                    value = self.compiled.core.variables[name]
+                except KeyError:
+                    raise ValueError(f"未知的标识符: {name}") from None
+            if _is_array(value):
+                value = np.asarray(value) if np is not None else list(value)
+                if self.size is not None and len(value) != self.size:
+                    raise ValueError("参数数组的长度不一致")
+                self.size = len(value)
+                self._arrays.append(position)
+            self._args.append(value)
+
+    def scalar(self, x):
+        """f(x)，出错时抛出 ValueError"""
+        self.evaluations += 1
+        args = list(self._args)
+        if self._index is not None:
+            args[self._index] = x
+        return self.compiled(*args)
+
+    def batch(self, xs, select=None):
+        """对一组自变量求值，返回 BatchResult；select 为每个点使用的参数数组下标"""
+        self.evaluations += len(xs)
+        args = list(self._args)
+        if select is not None:
+            for position in self._arrays:
+                array = args[position]
+                args[position] = array[np.asarray(select)] if np is not None else [array[i] for i in select]
+        if self._index is not None:
+            args[self._index] = np.asarray(xs, dtype=float) if np is not None else list(xs)
+            return self.compiled(*args)
+        value = self.compiled(*args)
+        if isinstance(value, BatchResult):
+            return value
+        # 表达式不含自变量：计算一次后广播
+        if np is not None:
+            return BatchResult(np.full(len(xs), value), np.zeros(len(xs), dtype=bool), "")
+        return BatchResult([value] * len(xs), [False] * len(xs), "")
+
+    def values(self, xs):
+        """对一组自变量求值，任一点出错或不是有限值时抛出 ValueError"""
+        result = self.batch(xs)
+        if np is not None:
+            values = np.asarray(result.values)
+            if np.any(result.errors):
+                raise ValueError(result.error_key or NOT_FINITE)
+            if values.dtype == object or not np.all(np.isfinite(values)):
+                raise ValueError(NOT_FINITE)
+            return values
+        if any(result.errors):
+            raise ValueError(result.error_key or NOT_FINITE)
+        values = list(result.values)
+        if not all(math.isfinite(abs(value)) for value in values):
+            raise ValueError(NOT_FINITE)
+        return values
+
+
+def _real(value, name):
+    """积分限、求导点和区间端点转换为 float"""
+    if isinstance(value, complex):
+        raise ValueError(f"{name} 必须是实数")
+    value = float(value)
+    if math.isnan(value):
+        raise ValueError(f"{name} 必须是实数")
+    return value
+
+
+def _real_value(value):
+    """求根使用的函数值（必须是有限实数）"""
+    if isinstance(value, complex) or not math.isfinite(value):
+        raise ValueError(NOT_REAL)
+    return float(value)
+
+
+# ======================
+# 积分
+# ======================
+def _apply(func, ts):
+    """对数组（NumPy）或列表逐元素计算只含算术运算的 func"""
+    if np is not None:
+        return func(ts)
+    return [func(t) for t in ts]
+
+
+def _multiply(values, factors):
+    if np is not None:
+        return values * factors
+    return [value * factor for value, factor in zip(values, factors)]
+
+
+def _finite_interval(f, a, b):
+    """无穷积分限替换为有限区间，返回 (g, lo, hi)，g 为替换后的被积函数（已乘以 dx/dt）"""
+    if math.isinf(a) and math.isinf(b):
+        # x = t / (1 - t^2)，dx = (1 + t^2) / (1 - t^2)^2
+        def g(ts):
+            return _multiply(f.values(_apply(lambda t: t / (1 - t * t), ts)),
+                             _apply(lambda t: (1 + t * t) / (1 - t * t) ** 2, ts))
+        return g, -1.0, 1.0
+    if math.isinf(b):
+        # x = a + t / (1 - t)，dx = 1 / (1 - t)^2
+        def g(ts):
+            return _multiply(f.values(_apply(lambda t: a + t / (1 - t), ts)),
+                             _apply(lambda t: 1 / (1 - t) ** 2, ts))
+        return g, 0.0, 1.0
+    if math.isinf(a):
+        # x = b - (1 - t) / t，dx = 1 / t^2
+        def g(ts):
+            return _multiply(f.values(_apply(lambda t: b - (1 - t) / t, ts)),
+                             _apply(lambda t: 1 / (t * t), ts))
+        return g, 0.0, 1.0
+    return f.values, a, b
+
+
+def _scale_error(error, resabs, resasc):
+    """QUADPACK QK15 的误差估计：按 resasc 缩放，不低于舍入误差"""
+    if resasc != 0 and error != 0:
+        error = resasc * min(1.0, (200 * error / resasc) ** 1.5)
+    floor = 50 * EPSILON * resabs
+    if resabs > UNDERFLOW / (50 * EPSILON):
+        error = max(floor, error)
+    return error, floor
+
+
+def _gauss_kronrod(g, lows, highs):
+    """在全部区间上计算 15 点 Kronrod 积分（一次数组调用）
+
+    返回：
+        tuple: (积分列表, 误差估计列表, 舍入误差下限列表)
+    """
+    count = len(lows)
+    if np is not None:
+        lows, highs = np.asarray(lows), np.asarray(highs)
+        centers, half = (lows + highs) / 2, (highs - lows) / 2
+        fx = g((centers[:, None] + half[:, None] * _NODES).ravel()).reshape(count, len(NODES))
+        weighted = fx @ _KRONROD
+        kronrod = weighted * half
+        gauss = (fx @ _GAUSS) * half
+        resabs = (np.abs(fx) @ _KRONROD) * np.abs(half)
+        resasc = (np.abs(fx - (weighted / 2)[:, None]) @ _KRONROD) * np.abs(half)
+        error = np.abs(kronrod - gauss)
+        scaled = [_scale_error(*row) for row in zip(error.tolist(), resabs.tolist(), resasc.tolist())]
+        return kronrod.tolist(), [row[0] for row in scaled], [row[1] for row in scaled]
+
+    xs = [(low + high) / 2 + (high - low) / 2 * node for low, high in zip(lows, highs) for node in NODES]
+    fx = g(xs)
+    size = len(NODES)
+    values, errors, floors = [], [], []
+    for i, (low, high) in enumerate(zip(lows, highs)):
+        row = fx[i * size:(i + 1) * size]
+        half = (high - low) / 2
+        weighted = sum(w * value for w, value in zip(KRONROD, row))
+        kronrod = weighted * half
+        gauss = sum(w * value for w, value in zip(GAUSS, row)) * half
+        resabs = sum(w * abs(value) for w, value in zip(KRONROD, row)) * abs(half)
+        resasc = sum(w * abs(value - weighted / 2) for w, value in zip(KRONROD, row)) * abs(half)
+        error, floor = _scale_error(abs(kronrod - gauss), resabs, resasc)
+        values.append(kronrod)
+        errors.append(error)
+        floors.append(floor)
+    return values, errors, floors
+
+
+def integrate(expr, a, b, core=None, variable=CALCULUS_VARIABLE, bindings=None,
+              tolerance=DEFAULT_TOLERANCE, rel_tolerance=DEFAULT_REL_TOLERANCE,
+              max_panels=DEFAULT_MAX_PANELS):
+    """自适应 Gauss–Kronrod 积分
+
+    每轮对分误差超过 tolerance_i = 容差 * 区间宽度 / 总宽度 的全部区间（误差已达到舍入误差下限的
+    区间除外），新区间的节点在一次数组调用中计算；总误差估计不超过
+    max(tolerance, rel_tolerance*|积分|)、没有可以对分的区间或区间数达到 max_panels 时结束。
+
+    参数：
+        expr (str): 被积函数，如 exp(-x^2)
+        a, b (float): 积分限，可以是 ±inf
+        core (CalculatorCore, optional): 计算核心，默认使用 float 后端
+        variable (str): 积分变量
+        bindings (dict, optional): 其他变量的值（未给出的变量从 core.variables 读取）
+
+    返回：
+        Estimate: (积分, 绝对误差估计, 函数求值次数, 是否达到容差)
+
+    异常：
+        ValueError: 表达式无效，或被积函数在某个节点上无定义 / 不是有限值时抛出
+    """
+    f = _Function(expr, variable, core, bindings)
+    a, b = _real(a, 'a'), _real(b, 'b')
+    if a == b:
+        return Estimate(0.0, 0.0, 0, True)
+    sign = 1.0
+    if a > b:
+        a, b, sign = b, a, -1.0
+    g, lo, hi = _finite_interval(f, a, b)
+    width = hi - lo
+    lows, highs = [lo], [hi]
+    values, errors, floors = _gauss_kronrod(g, lows, highs)
+    while True:
+        total = sum(values)
+        error = sum(errors)
+        limit = max(tolerance, rel_tolerance * abs(total))
+        if error <= limit or len(lows) >= max_panels:
+            break
+        split = [i for i in range(len(lows))
+                 if errors[i] > limit * (highs[i] - lows[i]) / width and errors[i] > floors[i]
+                 and highs[i] - lows[i] > 4 * EPSILON * max(abs(lows[i]), abs(highs[i]))]
+        if not split:
+            break
+        room = max_panels - len(lows)
+        if len(split) > room:
+            split = sorted(sorted(split, key=errors.__getitem__, reverse=True)[:room])
+        new_lows, new_highs = [], []
+        for i in split:
+            middle = (lows[i] + highs[i]) / 2
+            new_lows += [lows[i], middle]
+            new_highs += [middle, highs[i]]
+        new_values, new_errors, new_floors = _gauss_kronrod(g, new_lows, new_highs)
+        keep = sorted(set(range(len(lows))) - set(split))
+        lows = [lows[i] for i in keep] + new_lows
+        highs = [highs[i] for i in keep] + new_highs
+        values = [values[i] for i in keep] + new_values
+        errors = [errors[i] for i in keep] + new_errors
+        floors = [floors[i] for i in keep] + new_floors
+    return Estimate(sign * total, error, f.evaluations, error <= limit)
+
+
+# ======================
+# 求导
+# ======================
+def diff(expr, x0, core=None, variable=CALCULUS_VARIABLE, bindings=None, step=None,
+         levels=DIFF_LEVELS):
+    """一阶导数：中心差分的 Richardson 外推（Ridders 方法）
+
+    步长为 h, h/2, ..., h/2^(levels-1)（h 默认为 DIFF_STEP * max(1, |x0|)），
+    x0 ± 步长的 2*levels 个点在一次数组调用中计算。中心差分的误差只含 h 的偶次幂，
+    外推表第 j 列消去 h^(2j) 项；取误差估计最小的一项，对角线误差开始增大时停止。
+
+    返回：
+        Estimate: (导数, 误差估计, 函数求值次数, 误差是否不超过 DIFF_REL_TOLERANCE * max(1, |导数|))
+
+    异常：
+        ValueError: 表达式无效，或在 x0 附近少于两层步长可以求值时抛出
+    """
+    f = _Function(expr, variable, core, bindings)
+    x0 = _real(x0, 'x0')
+    h = float(step) if step else DIFF_STEP * max(1.0, abs(x0))
+    steps = [h / 2 ** k for k in range(levels)]
+    result = f.batch([x0 + s for s in steps] + [x0 - s for s in steps])
+    values, errors = _as_lists(result)
+
+    def usable(k):
+        pair = (values[k], values[levels + k])
+        return not (errors[k] or errors[levels + k]) and all(math.isfinite(abs(v)) for v in pair)
+
+    # 大步长可能越过定义域的边界：只使用最后一段连续可以求值的层
+    start = levels
+    while start > 0 and usable(start - 1):
+        start -= 1
+    if levels - start < 2:
+        raise ValueError(result.error_key or f"无法在 x = {x0:g} 附近求值")
+
+    best, error = None, math.inf
+    previous = None
+    for k in range(start, levels):
+        row = [(values[k] - values[levels + k]) / (2 * steps[k])]
+        if previous is not None:
+            factor = 4.0
+            for j in range(1, len(previous) + 1):
+                row.append(row[j - 1] + (row[j - 1] - previous[j - 1]) / (factor - 1))
+                factor *= 4.0
+                estimate = max(abs(row[j] - row[j - 1]), abs(row[j] - previous[j - 1]))
+                if estimate <= error:
+                    best, error = row[j], estimate
+            if abs(row[-1] - previous[-1]) >= DIFF_SAFE * error:
+                break
+        previous = row
+    return Estimate(best, error, f.evaluations, error <= DIFF_REL_TOLERANCE * max(1.0, abs(best)))
+
+
+# ======================
+# 求根
+# ======================
+def _brent(xa, xb, fa, fb, xtol, rtol, max_iterations):
+    """Brent 方法的协程：产生下一个求值点，接收该点的函数值
+
+    返回（StopIteration.value）：
+        tuple: (根, 包含根的区间宽度, 是否收敛)
+    """
+    xpre, xcur, fpre, fcur = xa, xb, fa, fb
+    xblk = fblk = spre = scur = 0.0
+    if fpre == 0:
+        return xpre, 0.0, True
+    if fcur == 0:
+        return xcur, 0.0, True
+    for _ in range(max_iterations):
+        if fpre != 0 and fcur != 0 and (fpre < 0) != (fcur < 0):
+            xblk, fblk = xpre, fpre
+            spre = scur = xcur - xpre
+        if abs(fblk) < abs(fcur):
+            xpre, xcur, xblk = xcur, xblk, xcur
+            fpre, fcur, fblk = fcur, fblk, fcur
+        delta = (xtol + rtol * abs(xcur)) / 2
+        sbis = (xblk - xcur) / 2
+        if fcur == 0 or abs(sbis) < delta:
+            return xcur, 0.0 if fcur == 0 else abs(xblk - xcur), True
+        if abs(spre) > delta and abs(fcur) < abs(fpre):
+            try:
+                if xpre == xblk:
+                    # 割线法
+                    stry = -fcur * (xcur - xpre) / (fcur - fpre)
+                else:
+                    # 反二次插值
+                    dpre = (fpre - fcur) / (xpre - xcur)
+                    dblk = (fblk - fcur) / (xblk - xcur)
+                    stry = -fcur * (fblk * dblk - fpre * dpre) / (dblk * dpre * (fblk - fpre))
+            except ZeroDivisionError:
+                # 插值点退化（与 C 实现中得到 inf 一样改用对分）
+                stry = math.inf
+            if 2 * abs(stry) < min(abs(spre), 3 * abs(sbis) - delta):
+                spre, scur = scur, stry
+            else:
+                spre = scur = sbis
+        else:
+            spre = scur = sbis
+        xpre, fpre = xcur, fcur
+        xcur += scur if abs(scur) > delta else (delta if sbis > 0 else -delta)
+        fcur = yield xcur
+    return xcur, abs(xblk - xcur), False
+
+
+def solve(expr, lo, hi, core=None, variable=CALCULUS_VARIABLE, bindings=None, xtol=DEFAULT_XTOL,
+          rtol=DEFAULT_RTOL, max_iterations=DEFAULT_MAX_ITERATIONS):
+    """在 [lo, hi] 中求 f(x) = 0 的根（Brent 方法）
+
+    返回：
+        Estimate: (根, 包含根的区间宽度, 函数求值次数, 是否在 max_iterations 次迭代内收敛)
+
+    异常：
+        ValueError: 表达式无效、区间两端的函数值同号或函数值不是有限实数时抛出
+    """
+    f = _Function(expr, variable, core, bindings)
+    lo, hi = _real(lo, 'lo'), _real(hi, 'hi')
+    fa, fb = _real_value(f.scalar(lo)), _real_value(f.scalar(hi))
+    if (fa > 0 and fb > 0) or (fa < 0 and fb < 0):
+        raise ValueError(f"{SAME_SIGN}: f({lo:g}) = {fa:g}, f({hi:g}) = {fb:g}")
+    brent = _brent(lo, hi, fa, fb, xtol, rtol, max_iterations)
+    try:
+        x = next(brent)
+        while True:
+            x = brent.send(_real_value(f.scalar(x)))
+    except StopIteration as stop:
+        root, error, converged = stop.value
+    return Estimate(root, error, f.evaluations, converged)
+
+
+def _brent_arrays(f, index, xpre, xcur, fpre, fcur, xtol, rtol, max_iterations, finish):
+    """NumPy 数组上的 Brent 方法：与 _brent 的公式和分支相同，按元素用 np.where 选择
+
+    index 为各问题的编号，每轮只保留未结束的问题，它们的下一个求值点在一次 f.batch 中计算；
+    问题结束时调用 finish(编号, 根, 区间宽度, 是否收敛)，求值出错时为 finish(编号, None, None, 错误信息)。
+    """
+    xblk = np.zeros_like(xcur)
+    fblk = np.zeros_like(xcur)
+    spre = np.zeros_like(xcur)
+    scur = np.zeros_like(xcur)
+    for _ in range(max_iterations):
+        bracket = (fpre != 0) & (fcur != 0) & ((fpre < 0) != (fcur < 0))
+        xblk = np.where(bracket, xpre, xblk)
+        fblk = np.where(bracket, fpre, fblk)
+        spre = np.where(bracket, xcur - xpre, spre)
+        scur = np.where(bracket, xcur - xpre, scur)
+        swap = np.abs(fblk) < np.abs(fcur)
+        xpre, xcur, xblk = np.where(swap, xcur, xpre), np.where(swap, xblk, xcur), np.where(swap, xcur, xblk)
+        fpre, fcur, fblk = np.where(swap, fcur, fpre), np.where(swap, fblk, fcur), np.where(swap, fcur, fblk)
+        delta = (xtol + rtol * np.abs(xcur)) / 2
+        sbis = (xblk - xcur) / 2
+        done = (fcur == 0) | (np.abs(sbis) < delta)
+        for i, root, width in zip(index[done].tolist(), xcur[done].tolist(),
+                                  np.where(fcur == 0, 0.0, np.abs(xblk - xcur))[done].tolist()):
+            finish(i, root, width, True)
+        if np.all(done):
+            return
+        keep = ~done
+        (index, xpre, xcur, xblk, fpre, fcur, fblk, spre, scur, delta, sbis) = (
+            array[keep] for array in (index, xpre, xcur, xblk, fpre, fcur, fblk, spre, scur, delta, sbis))
+
+        with np.errstate(all='ignore'):
+            secant = -fcur * (xcur - xpre) / (fcur - fpre)
+            dpre = (fpre - fcur) / (xpre - xcur)
+            dblk = (fblk - fcur) / (xblk - xcur)
+            inverse = -fcur * (fblk * dblk - fpre * dpre) / (dblk * dpre * (fblk - fpre))
+            stry = np.where(xpre == xblk, secant, inverse)
+            interpolate = (np.abs(spre) > delta) & (np.abs(fcur) < np.abs(fpre)) \
+                & (2 * np.abs(stry) < np.minimum(np.abs(spre), 3 * np.abs(sbis) - delta))
+        spre, scur = np.where(interpolate, scur, sbis), np.where(interpolate, stry, sbis)
+        xpre, fpre = xcur, fcur
+        xcur = xcur + np.where(np.abs(scur) > delta, scur, np.where(sbis > 0, delta, -delta))
+
+        result = f.batch(xcur, index)
+        fcur = np.asarray(result.values)
+        valid = ~np.asarray(result.errors, dtype=bool)
+        if fcur.dtype.kind == 'c':
+            valid &= fcur.imag == 0
+            fcur = fcur.real
+        valid &= np.isfinite(fcur)
+        if not np.all(valid):
+            for i in index[~valid].tolist():
+                finish(i, None, None, result.error_key or NOT_REAL)
+            (index, xpre, xcur, xblk, fpre, fcur, fblk, spre, scur) = (
+                array[valid] for array in (index, xpre, xcur, xblk, fpre, fcur, fblk, spre, scur))
+            if not len(index):
+                return
+        fcur = fcur.astype(float)
+    for i, root, width in zip(index.tolist(), xcur.tolist(), np.abs(xblk - xcur).tolist()):
+        finish(i, root, width, False)
+
+
+def _broadcast(value, size, name):
+    if _is_array(value):
+        if len(value) != size:
+            raise ValueError("参数数组的长度不一致")
+        return [_real(item, name) for item in value]
+    return [_real(value, name)] * size
+
+
+def solve_many(expr, lo, hi, core=None, variable=CALCULUS_VARIABLE, bindings=None,
+               xtol=DEFAULT_XTOL, rtol=DEFAULT_RTOL, max_iterations=DEFAULT_MAX_ITERATIONS):
+    """批量求根：bindings 中的数组和数组形式的 lo / hi 按元素组成独立的问题
+
+    每个问题按 Brent 方法独立迭代（与 solve 的迭代序列相同），安装 NumPy 时整个迭代在数组上进行
+    （见 _brent_arrays），每轮全部未结束问题的下一个求值点在一次数组调用中计算（参数取各自问题的值）。某个问题区间两端同号、出错或不收敛时
+    只标记该问题，不影响其他问题。
+
+    返回：
+        BatchEstimate: (根, 包含根的区间宽度, 失败标记, 函数求值总次数, 第一个失败的错误信息)，
+            安装 NumPy 时 values / error / failed 为数组，失败的问题的根为 NaN
+    """
+    f = _Function(expr, variable, core, bindings)
+    size = f.size
+    for value in (lo, hi):
+        if _is_array(value):
+            size = len(value) if size is None else size
+    if size is None:
+        size = 1
+    los, his = _broadcast(lo, size, 'lo'), _broadcast(hi, size, 'hi')
+    roots, widths, failed = [NAN] * size, [NAN] * size, [True] * size
+    error_key = ""
+
+    def finish(i, root, width, converged):
+        nonlocal error_key
+        if root is None:
+            error_key = error_key or converged
+            return
+        roots[i], widths[i], failed[i] = root, width, not converged
+
+    problems = list(range(size))
+    ends = f.batch(los + his, problems + problems)
+    values, errors = _as_lists(ends)
+    started = []
+    for i in problems:
+        fa, fb = values[i], values[size + i]
+        if errors[i] or errors[size + i]:
+            error_key = error_key or ends.error_key
+            continue
+        if isinstance(fa, complex) or isinstance(fb, complex) \
+                or not (math.isfinite(fa) and math.isfinite(fb)):
+            error_key = error_key or NOT_REAL
+            continue
+        if (fa > 0 and fb > 0) or (fa < 0 and fb < 0):
+            error_key = error_key or SAME_SIGN
+            continue
+        if fa == 0:
+            finish(i, los[i], 0.0, True)
+        elif fb == 0:
+            finish(i, his[i], 0.0, True)
+        else:
+            started.append((i, los[i], his[i], float(fa), float(fb)))
+
+    if np is not None:
+        if started:
+            index, xa, xb, fa, fb = (np.array(column) for column in zip(*started))
+            _brent_arrays(f, index, xa, xb, fa, fb, xtol, rtol, max_iterations, finish)
+        return BatchEstimate(np.array(roots), np.array(widths), np.array(failed), f.evaluations, error_key)
+
+    # 未安装 NumPy：每个问题一个 _brent 协程，每轮的求值点合在一次调用中
+    pending = {}
+    for i, xa, xb, fa, fb in started:
+        brent = _brent(xa, xb, fa, fb, xtol, rtol, max_iterations)
+        pending[i] = (brent, next(brent))
+    while pending:
+        indexes = list(pending)
+        result = f.batch([pending[i][1] for i in indexes], indexes)
+        values, errors = _as_lists(result)
+        for i, value, error in zip(indexes, values, errors):
+            brent = pending.pop(i)[0]
+            if error or isinstance(value, complex) or not math.isfinite(value):
+                finish(i, None, None, result.error_key or NOT_REAL)
+                brent.close()
+                continue
+            try:
+                pending[i] = (brent, brent.send(float(value)))
+            except StopIteration as stop:
+                finish(i, *stop.value)
+    return BatchEstimate(roots, widths, failed, f.evaluations, error_key)
+
+
+# ======================
+# 表达式中的调用
+# ======================
+METHODS = {'integrate': integrate, 'diff': diff, 'solve': solve}
+
+
+def _check_arguments(name, count):
+    expected = CALCULUS_FUNCTIONS[name]
+    if count != expected:
+        raise ValueError(f"函数 {name} 需要 {expected} 个参数，实际为 {count} 个")
+
+
+def evaluate_call(node, core):
+    """对语法树中的 integrate / diff / solve 调用求值（见 expression_parser.Call）
+
+    第一个参数是以 x 为自变量的表达式，其余参数按普通表达式求值；
+    估计结果保存在 core.last_estimate 中（交互模式显示误差估计和求值次数），
+    没有达到容差的估计计入 core.unconverged。
+
+    返回：
+        估计值，参数求值出错（错误已由 handle_errors 输出）时返回 None
+    """
+    _check_arguments(node.name, len(node.args))
+    values = []
+    for arg in node.args[1:]:
+        value = arg.evaluate(core)
+        if value is None:
+            return None
+        values.append(value)
+    estimate = METHODS[node.name](str(node.args[0]), *values, core=core)
+    core.last_estimate = estimate
+    return _estimate_value(core, estimate)
+
+
+def _estimate_value(core, estimate):
+    """返回估计值；没有达到容差时计入 core.unconverged（显示结果时给出警告）"""
+    if not estimate.converged:
+        core.unconverged += 1
+    return estimate.value
+
+
+def bind(core, name, expression, outer=()):
+    """编译表达式（expression_compiler）中的 integrate / diff / solve 调用
+
+    参数：
+        expression (str): 第一个参数（以 x 为自变量的表达式）
+        outer (tuple): 表达式中 x 以外的变量名，它们的值跟在其余参数之后传入
+
+    返回：
+        function: (其余参数..., 外层变量的值...) -> 估计值
+    """
+    count = CALCULUS_FUNCTIONS[name] - 1
+    method = METHODS[name]
+    # 检查表达式能否编译
+    compile_expression(expression, core)
+
+    def call(*args):
+        bindings = dict(zip(outer, args[count:]))
+        return _estimate_value(core, method(expression, *args[:count], core=core, bindings=bindings))
+    return call
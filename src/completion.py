@@ -0,0 +1,275 @@
+"""交互模式的 Tab 补全索引
+
+函数名、单位名、变量名、REPL 命令和最近的表达式各保存在一棵前缀树中，
+进入交互模式时建立一次，之后只在来源变化时增量更新：
+
+1. 函数：CalculatorCore.FUNCTIONS（按函数个数检测注册）和 integrate / diff / solve
+2. 单位：unit_dimensions.UNITS（按单位表对象和单位个数检测注册，UnitConverter.clear_cache 会替换单位表）
+3. 变量：core.variables（Workspace 按 generation 检测定义和删除，普通字典按个数检测）
+4. 最近的表达式：启动时取自历史记录，之后由 add_history 加入，只保留最近 HISTORY_SIZE 条
+
+补全按光标前的文本选择上下文：
+
+- 行首：命令、最近的表达式、函数和变量
+- -> 之后：目标单位；数字之后（3 km -> m 中的 km）：源单位
+- vars / stats 之后：子命令；vars del 之后：变量名
+- 其他位置（运算符、括号之后）：函数和变量
+
+一次补全只遍历一次前缀所在的子树，结果按 (上下文, 前缀) 缓存，任一来源变化时清空缓存。
+readline 对同一前缀按 state 逐个取候选，CalculatorUI.autocomplete 只在 state 为 0 时调用 complete。
+
+用法示例：
+index = CompletionIndex(core, history)
+index.complete('sq')                    # ['sqrt(']
+index.complete('k', '3 km -> k', 8)     # ['kJ', 'kN', 'kPa', 'kW', 'kg', 'km', 'km2']
+"""
+import re
+from collections import OrderedDict
+
+# 保留的最近表达式条数
+HISTORY_SIZE = 100
+
+# REPL 命令（见 ScientificCalculator.run）和它们的子命令
+COMMANDS = ('q', 'h', 'c', 'l', 'm', 'stats', 'vars', 'table')
+SUBCOMMANDS = {
+    'stats': ('on', 'off', 'reset'),
+    'vars': ('save', 'load', 'del', 'clear'),
+}
+
+# 光标前为一个数字和空白（源单位的位置）
+NUMBER_PREFIX = re.compile(r'\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s+$')
+
+# 上下文
+START = 'start'
+OPERAND = 'operand'
+UNITS = 'units'
+VARIABLES = 'variables'
+NONE = 'none'
+
+# 叶子节点中保存候选值的键（单个字符不会与它冲突）
+_VALUE = ''
+
+
+class PrefixTrie:
+    """前缀树：每个节点是 字符 -> 子节点 的字典，单词的终点节点在 '' 键下保存候选值"""
+
+    def __init__(self, words=()):
+        self._root = {}
+        self._size = 0
+        for word in words:
+            self.insert(word)
+
+    def insert(self, word, value=None):
+        """加入单词（已存在时替换候选值），value 默认为单词本身"""
+        node = self._root
+        for char in word:
+            node = node.setdefault(char, {})
+        if _VALUE not in node:
+            self._size += 1
+        node[_VALUE] = word if value is None else value
+
+    def discard(self, word):
+        """删除单词（不存在时什么也不做），同时删除不再通向任何单词的节点"""
+        path = []
+        node = self._root
+        for char in word:
+            child = node.get(char)
+            if child is None:
+                return
+            path.append((node, char))
+            node = child
+        if node.pop(_VALUE, None) is None:
+            return
+        self._size -= 1
+        for parent, char in reversed(path):
+            if parent[char]:
+                break
+            del parent[char]
+
+    def __contains__(self, word):
+        node = self._root
+        for char in word:
+            node = node.get(char)
+            if node is None:
+                return False
+        return _VALUE in node
+
+    def __len__(self):
+        return self._size
+
+    def words(self, prefix=''):
+        """以 prefix 开头的全部单词的候选值（一次遍历子树）"""
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        values = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char == _VALUE:
+                    values.append(child)
+                else:
+                    stack.append(child)
+        return values
+
+
+def _sync(trie, known, names, value=None):
+    """按 names 增量更新前缀树，known 为已加入的名称集合（原地更新）"""
+    names = set(names)
+    for name in known - names:
+        trie.discard(name)
+    for name in names - known:
+        trie.insert(name, value(name) if value else None)
+    known.clear()
+    known.update(names)
+
+
+def context_of(line, begidx):
+    """按光标前的文本（line[:begidx]）返回补全上下文（子命令的上下文为命令名）"""
+    before = line[:begidx]
+    stripped = before.rstrip()
+    if not stripped:
+        return START
+    if stripped.endswith('->') or NUMBER_PREFIX.match(before):
+        return UNITS
+    words = before.split()
+    if words[0] in SUBCOMMANDS and before[-1:].isspace():
+        if len(words) == 1:
+            return words[0]
+        if words[:2] == ['vars', 'del'] and len(words) == 2:
+            return VARIABLES
+        return NONE
+    return OPERAND
+
+
+class CompletionIndex:
+    """按上下文补全函数、单位、变量、命令和最近的表达式
+
+    属性：
+        core (CalculatorCore): 计算核心（函数表和变量）
+        builds (int): 前缀树的更新次数（调试和基准测试用）
+    """
+
+    def __init__(self, core, history=None):
+        self.core = core
+        self.builds = 0
+        self._functions = PrefixTrie()
+        self._units = PrefixTrie()
+        self._variables = PrefixTrie()
+        self._commands = PrefixTrie(COMMANDS)
+        self._subcommands = {command: PrefixTrie(words) for command, words in SUBCOMMANDS.items()}
+        self._history = PrefixTrie()
+        # 最近的表达式（按时间顺序，最后一个最新）
+        self._recent = OrderedDict()
+        self._known = {'functions': set(), 'units': set(), 'variables': set()}
+        self._versions = {}
+        self._cache = {}
+        if history is not None:
+            self._load_history(history)
+        self.refresh()
+
+    # ======================
+    # 来源变化检测
+    # ======================
+    def _sources(self):
+        """各来源的版本（注册或删除名称时改变）"""
+        from src import unit_dimensions
+        variables = self.core.variables
+        return {
+            'functions': len(type(self.core).FUNCTIONS),
+            'units': (id(unit_dimensions.UNITS), len(unit_dimensions.UNITS)),
+            'variables': (id(variables), getattr(variables, 'generation', None), len(variables)),
+        }
+
+    def refresh(self):
+        """检查函数、单位和变量是否变化，更新变化的前缀树
+
+        返回：
+            bool: 是否有来源变化（有变化时清空补全缓存）
+        """
+        versions = self._sources()
+        changed = [name for name, version in versions.items() if self._versions.get(name) != version]
+        if not changed:
+            return False
+        self._versions = versions
+        for name in changed:
+            if name == 'functions':
+                from src.expression_parser import CALCULUS_FUNCTIONS
+                _sync(self._functions, self._known['functions'],
+                      list(type(self.core).FUNCTIONS) + list(CALCULUS_FUNCTIONS),
+                      lambda function: f"{function}(")
+            elif name == 'units':
+                from src import unit_dimensions
+                _sync(self._units, self._known['units'], unit_dimensions.UNITS)
+            else:
+                _sync(self._variables, self._known['variables'], self.core.variables)
+            self.builds += 1
+        self._cache.clear()
+        return True
+
+    # ======================
+    # 最近的表达式
+    # ======================
+    def _load_history(self, history):
+        from src.history_records import strip_timestamp
+        for entry in history.get_recent_history(HISTORY_SIZE):
+            expression, sign, _ = strip_timestamp(entry).rpartition('=')
+            if sign:
+                self.add_history(expression.strip())
+
+    def add_history(self, expression):
+        """加入一条最近的表达式（超过 HISTORY_SIZE 条时删除最早的一条）"""
+        expression = expression.strip()
+        if not expression:
+            return
+        self._recent.pop(expression, None)
+        self._recent[expression] = None
+        self._history.insert(expression)
+        if len(self._recent) > HISTORY_SIZE:
+            oldest, _ = self._recent.popitem(last=False)
+            self._history.discard(oldest)
+        self._cache.pop(START, None)
+
+    # ======================
+    # 补全
+    # ======================
+    def complete(self, text, line=None, begidx=None):
+        """返回 text 的全部补全候选
+
+        参数：
+            text (str): 待补全的单词（readline 按分隔符切出的光标前的部分）
+            line (str, optional): 整行输入，默认为 text
+            begidx (int, optional): text 在行中的起始位置，默认为 0
+
+        返回：
+            list: 候选（行首依次为命令、最近的表达式、函数和变量）
+        """
+        if line is None:
+            line, begidx = text, 0
+        self.refresh()
+        context = context_of(line, begidx or 0)
+        matches = self._cache.get(context, {}).get(text)
+        if matches is None:
+            matches = self._lookup(context, text)
+            self._cache.setdefault(context, {})[text] = matches
+        return matches
+
+    def _lookup(self, context, text):
+        if context == START:
+            # 最近的表达式按时间倒序（最多 HISTORY_SIZE 条）
+            matched = set(self._history.words(text))
+            recent = [expression for expression in reversed(self._recent) if expression in matched]
+            return (sorted(self._commands.words(text)) + recent
+                    + sorted(self._functions.words(text)) + sorted(self._variables.words(text)))
+        if context == OPERAND:
+            return sorted(self._functions.words(text)) + sorted(self._variables.words(text))
+        if context == UNITS:
+            return sorted(self._units.words(text))
+        if context == VARIABLES:
+            return sorted(self._variables.words(text))
+        if context in self._subcommands:
+            return sorted(self._subcommands[context].words(text))
+        return []
@@ -0,0 +1,286 @@
+"""复数引擎
+
+复平面上的初等函数和复数运算：
+1. 标量使用 cmath
+2. 数组使用 NumPy complex128 通用函数，整组数据一次计算，
+   元素不会逐个装箱为 Python complex 对象
+3. 未安装 NumPy 时，数组接口退回到逐个元素调用 cmath
+
+分支切割与 cmath 一致（C99 附录 G）：sqrt、log、log10 的切割线为负实轴，
+虚部为 +0.0 / -0.0 时分别取切割线上方 / 下方的值；幂运算取主值
+a ^ b = exp(b * log(a))。NumPy 的复数通用函数使用相同的约定，标量和数组结果一致。
+
+错误语义也一致：标量接口抛出 ValueError（信息为错误信息键），
+数组接口返回逐元素错误标记（BatchResult，非法位置为 NaN）。
+有限输入得到无穷或 NaN（log(0)、atanh(1)、exp 溢出、0 的负数次幂等）即为非法。
+
+用法示例：
+apply('sqrt', -4+0j)                  # 2j
+apply('sqrt', complex(-4, -0.0))      # -2j（切割线下方）
+apply_many('log', [1j, -1, 0])        # BatchResult，0 的位置标记为错误
+calculate_many(a, b, '^c')            # 逐元素主值幂
+"""
+import cmath
+import math
+
+# 角度转换为弧度的系数（计算器中 sin/cos/tan 的参数为角度）
+RADIANS_PER_DEGREE = math.pi / 180
+
+# 复数运算非法（对数的零点、溢出等）时的错误信息键
+DOMAIN_ERROR = "error.complex_domain"
+
+
+# ======================
+# 标量实现
+# ======================
+def _complex(value):
+    """转换为复数，已经是复数时直接返回（不创建新对象）"""
+    return value if type(value) is complex else complex(value)
+
+
+def add(a, b):
+    return _complex(a) + _complex(b)
+
+
+def subtract(a, b):
+    return _complex(a) - _complex(b)
+
+
+def multiply(a, b):
+    return _complex(a) * _complex(b)
+
+
+def divide(a, b):
+    b = _complex(b)
+    if not b:
+        raise ValueError("error.division_by_zero")
+    return _complex(a) / b
+
+
+def power(a, b):
+    """主值幂 a ^ b（0 的实部非正或非实数次幂无定义）"""
+    try:
+        return _complex(a) ** _complex(b)
+    except (ZeroDivisionError, OverflowError):
+        raise ValueError(DOMAIN_ERROR) from None
+
+
+# 'op': 标量实现（带 c 后缀和不带后缀的运算符都按复数计算）
+OPERATORS = {
+    '+': add,
+    '-': subtract,
+    '*': multiply,
+    '/': divide,
+    '^': power,
+}
+
+# 'func_name': cmath 实现（参数为弧度）
+FUNCTIONS = {
+    'sqrt': cmath.sqrt,
+    'exp': cmath.exp,
+    'log': cmath.log,
+    'log10': cmath.log10,
+    'sin': cmath.sin,
+    'cos': cmath.cos,
+    'tan': cmath.tan,
+    'asin': cmath.asin,
+    'acos': cmath.acos,
+    'atan': cmath.atan,
+    'sinh': cmath.sinh,
+    'cosh': cmath.cosh,
+    'tanh': cmath.tanh,
+    'asinh': cmath.asinh,
+    'acosh': cmath.acosh,
+    'atanh': cmath.atanh,
+    'abs': abs,
+    'abs_c': abs,
+    'real': lambda z: z.real,
+    'imag': lambda z: z.imag,
+    'conj': lambda z: z.conjugate(),
+    'arg': cmath.phase,
+}
+
+# 'func_name': NumPy 通用函数名（与 FUNCTIONS 一一对应）
+ARRAY_FUNCTIONS = {
+    'sqrt': 'sqrt',
+    'exp': 'exp',
+    'log': 'log',
+    'log10': 'log10',
+    'sin': 'sin',
+    'cos': 'cos',
+    'tan': 'tan',
+    'asin': 'arcsin',
+    'acos': 'arccos',
+    'atan': 'arctan',
+    'sinh': 'sinh',
+    'cosh': 'cosh',
+    'tanh': 'tanh',
+    'asinh': 'arcsinh',
+    'acosh': 'arccosh',
+    'atanh': 'arctanh',
+    'abs': 'abs',
+    'abs_c': 'abs',
+    'real': 'real',
+    'imag': 'imag',
+    'conj': 'conjugate',
+    'arg': 'angle',
+}
+
+
+def operator(op):
+    """返回运算符的标量实现（'+c' 与 '+' 相同）
+
+    异常：
+        ValueError: 运算符不支持时抛出
+    """
+    try:
+        return OPERATORS[op[:-1] if op.endswith('c') else op]
+    except KeyError:
+        raise ValueError(f"不支持的运算符: {op}") from None
+
+
+def calculate(a, b, op):
+    """对两个标量执行复数运算"""
+    return operator(op)(a, b)
+
+
+def apply(func_name, value, degrees=False):
+    """对一个标量执行复数函数
+
+    参数：
+        func_name (str): 函数名，必须在 FUNCTIONS 中定义
+        value: 参数（实数按虚部为 0 的复数处理）
+        degrees (bool): 参数是否为角度（先转换为弧度）
+
+    返回：
+        complex 或 float: 结果（abs、real、imag、arg 返回 float）
+
+    异常：
+        ValueError: 函数不支持或在该点无定义时抛出
+    """
+    func = FUNCTIONS.get(func_name)
+    if func is None:
+        raise ValueError(f"不支持的函数: {func_name}")
+    value = _complex(value)
+    if degrees:
+        value = value * RADIANS_PER_DEGREE
+    try:
+        return func(value)
+    except (ValueError, OverflowError):
+        raise ValueError(DOMAIN_ERROR) from None
+
+
+# ======================
+# 数组实现
+# ======================
+def _finish(values, errors, error_key):
+    """非法位置置为 NaN 并返回 BatchResult"""
+    from src.vectorized import BatchResult, NAN
+    if not errors.any():
+        return BatchResult(values, errors, "")
+    values = values.copy()
+    values[errors] = NAN
+    return BatchResult(values, errors, error_key)
+
+
+def _invalid(values, *operands):
+    """有限输入得到非有限结果的位置"""
+    from src.vectorized import np
+    finite = np.isfinite(operands[0])
+    for operand in operands[1:]:
+        finite = finite & np.isfinite(operand)
+    return finite & ~np.isfinite(values)
+
+
+def _fallback_many(func, operands):
+    """逐个元素调用标量实现（未安装 NumPy 时）"""
+    from src.vectorized import BatchResult, NAN
+    values, errors = [], []
+    error_key = ""
+    for args in operands:
+        try:
+            values.append(func(*args))
+            errors.append(False)
+        except (ValueError, ArithmeticError, TypeError) as e:
+            values.append(NAN)
+            errors.append(True)
+            error_key = error_key or str(e)
+    return BatchResult(values, errors, error_key)
+
+
+def _as_sequence(value):
+    if isinstance(value, (int, float, complex)):
+        return None
+    return list(value)
+
+
+def apply_many(func_name, values, degrees=False):
+    """对一组数值批量执行复数函数
+
+    参数：
+        func_name (str): 函数名，必须在 FUNCTIONS 中定义
+        values: 参数数组（NumPy 数组、列表等，实数按复数处理）
+        degrees (bool): 参数是否为角度
+
+    返回：
+        BatchResult: 结果数组、逐元素错误标记和错误信息键
+
+    异常：
+        ValueError: 函数不支持时抛出
+    """
+    if func_name not in FUNCTIONS:
+        raise ValueError(f"不支持的函数: {func_name}")
+    from src.vectorized import HAVE_NUMPY, as_array, np
+    if not HAVE_NUMPY:
+        return _fallback_many(lambda z: apply(func_name, z, degrees), zip(values))
+    z = as_array(values, complex_values=True)
+    if degrees:
+        z = z * RADIANS_PER_DEGREE
+    with np.errstate(all='ignore'):
+        result = np.asarray(getattr(np, ARRAY_FUNCTIONS[func_name])(z))
+        errors = _invalid(result, z)
+    return _finish(result, errors, DOMAIN_ERROR)
+
+
+def calculate_many(a, b, op):
+    """批量执行复数运算
+
+    参数：
+        a: 第一个操作数数组或标量
+        b: 第二个操作数数组或标量，与 a 按 NumPy 规则广播
+        op (str): 运算符（+ - * / ^，可带 c 后缀）
+
+    返回：
+        BatchResult: 结果数组、逐元素错误标记和错误信息键
+
+    异常：
+        ValueError: 运算符不支持或操作数长度不一致时抛出
+    """
+    func = operator(op)
+    from src.vectorized import HAVE_NUMPY, as_array, np
+    if not HAVE_NUMPY:
+        a_list, b_list = _as_sequence(a), _as_sequence(b)
+        if a_list is None and b_list is None:
+            a_list, b_list = [a], [b]
+        elif a_list is None:
+            a_list = [a] * len(b_list)
+        elif b_list is None:
+            b_list = [b] * len(a_list)
+        elif len(a_list) != len(b_list):
+            raise ValueError(f"操作数长度不一致: {len(a_list)} != {len(b_list)}")
+        return _fallback_many(func, zip(a_list, b_list))
+    a = as_array(a, complex_values=True)
+    b = as_array(b, complex_values=True)
+    with np.errstate(all='ignore'):
+        if func is divide:
+            result = np.asarray(np.divide(a, b))
+            errors = np.broadcast_to(b == 0, result.shape).copy()
+            return _finish(result, errors, "error.division_by_zero")
+        if func is power:
+            result = np.asarray(np.power(a, b))
+            zero_base = (a == 0) & ((b.real < 0) | (b.imag != 0))
+            errors = np.broadcast_to(zero_base, result.shape) | _invalid(result, a, b)
+            return _finish(result, errors, DOMAIN_ERROR)
+        kernel = {add: np.add, subtract: np.subtract, multiply: np.multiply}[func]
+        result = np.asarray(kernel(a, b))
+    return _finish(result, np.zeros(result.shape, dtype=bool), "")
@@ -0,0 +1,289 @@
+"""表达式求值的结构化日志
+
+启用后在 ScientificCalculator.process_expression 外包一层，每次求值生成一条日志记录，
+经 utils.logger 的队列在监听线程中格式化为一行 JSON，写入单独的文件：
+
+{"time": "2026-10-18T12:00:00.123+0800", "expr_hash": "5d41402abc4b2a76", "opcode": "sqrt",
+ "duration_us": 12.5, "error": null, "pid": 4242}
+
+1. expr_hash: 规范化后的表达式文本的 blake2b 摘要（8 字节），日志中不保存表达式本身
+2. opcode: 语法树最外层的运算符或函数名，其他表达式为 ''
+3. duration_us: 求值耗时（微秒）
+4. error: 错误的消息键（见 metrics.error_key），成功时为 null；交互模式下错误已由
+   handle_errors 输出，看不到异常，消息键为 'handled'
+5. suppressed: 上一条记录之后因限流丢弃的记录数（没有时省略）
+
+调用方线程只做采样、限流和入队；摘要、解析操作码、JSON 编码和写文件都在监听线程中完成。
+采样（sample_rate）只作用于成功的求值，错误总是记录；限流（max_per_second / burst，令牌桶）
+作用于全部记录，批量模式和 calc-server 的大量求值不会让日志 I/O 拖慢计算。
+
+与 metrics 相同，包装层在 enable() 时替换类上的方法，disable() 时恢复，未启用时没有额外开销。
+
+用法示例：
+evaluation_log.configure(config['logging'])        # logging.evaluations.enabled 为 true 时启用
+evaluation_log.enable({'file': 'evaluations.jsonl', 'sample_rate': 0.1})
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from functools import wraps
+
+from src.expression_parser import BinaryOp, Call, normalize_expression, parse_expression
+from src.utils import logger as log_setup
+
+LOGGER_NAME = 'calculator.evaluations'
+
+DEFAULT_SETTINGS = {
+    'file': 'evaluations.jsonl',
+    'sample_rate': 1.0,
+    'max_per_second': 1000,
+    'burst': 1000,
+}
+
+# 交互模式下被 handle_errors 处理的错误
+HANDLED = 'handled'
+
+
+def expression_hash(text):
+    """表达式文本的摘要（16 个十六进制字符）"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def opcode_of(text):
+    """语法树最外层的运算符或函数名，无法解析或不是运算 / 函数调用时为 ''"""
+    try:
+        tree = parse_expression(text)
+    except ValueError:
+        return ''
+    if isinstance(tree, BinaryOp):
+        return tree.op
+    if isinstance(tree, Call):
+        return tree.name
+    return ''
+
+
+class EvaluationFormatter(log_setup.JsonFormatter):
+    """在监听线程中把求值记录格式化为一行 JSON（其他记录按 JsonFormatter 格式化）"""
+
+    def format(self, record):
+        evaluation = getattr(record, 'evaluation', None)
+        if evaluation is None:
+            return super().format(record)
+        expr, elapsed_ns, error, suppressed = evaluation
+        text = normalize_expression(expr)
+        # 运算符和函数名不含需要转义的字符，只有错误的消息键需要 json.dumps
+        line = (f'{{"time": "{self.formatTime(record)}", "expr_hash": "{expression_hash(text)}", '
+                f'"opcode": "{opcode_of(text)}", "duration_us": {round(elapsed_ns / 1000, 3)}, '
+                f'"error": {"null" if error is None else json.dumps(error, ensure_ascii=False)}, '
+                f'"pid": {record.process}')
+        if suppressed:
+            line += f', "suppressed": {suppressed}'
+        return line + '}'
+
+
+class EvaluationLog:
+    """求值日志的采样和限流
+
+    emit(记录器名称, 属性) 把通过采样和限流的记录放入日志队列（默认为 utils.logger.enqueue）。
+
+    属性：
+        sample_rate (float): 成功求值的记录比例（0 到 1）
+        max_per_second (float): 每秒最多记录数，0 表示不限流
+        burst (float): 令牌桶容量（允许的突发记录数）
+        emitted (int): 已放入日志队列的记录数
+        sampled_out (int): 未被采样的成功求值数
+        rate_limited (int): 因限流丢弃的记录数
+    """
+
+    def __init__(self, sample_rate=1.0, max_per_second=0, burst=None, emit=None):
+        self.emit = emit or log_setup.enqueue
+        self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+        self.max_per_second = max(0.0, float(max_per_second or 0))
+        self.burst = max(1.0, float(burst if burst is not None else self.max_per_second))
+        self.emitted = 0
+        self.sampled_out = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+        self._random = random.random
+        self._clock = time.monotonic
+        self._tokens = self.burst
+        self._refilled = self._clock()
+        self._suppressed = 0
+        self._pid = os.getpid()
+
+    def _take(self):
+        """从令牌桶取一个令牌（调用方持有锁）"""
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.max_per_second)
+        self._refilled = now
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def record(self, expr, elapsed_ns, error=None):
+        """记录一次求值（采样或限流时丢弃）
+
+        参数：
+            expr (str): 表达式原文（在监听线程中规范化并计算摘要）
+            elapsed_ns (int): 耗时（纳秒）
+            error (str, optional): 错误的消息键
+        """
+        sampled = error is not None or self.sample_rate >= 1.0 or self._random() < self.sample_rate
+        with self._lock:
+            if not sampled:
+                self.sampled_out += 1
+                return
+            if self.max_per_second and not self._take():
+                self.rate_limited += 1
+                self._suppressed += 1
+                return
+            suppressed, self._suppressed = self._suppressed, 0
+            self.emitted += 1
+        # LogRecord、摘要和 JSON 都在监听线程中生成
+        self.emit(LOGGER_NAME, {'evaluation': (expr, elapsed_ns, error, suppressed),
+                                'process': self._pid})
+
+    def stats(self):
+        with self._lock:
+            return {
+                'emitted': self.emitted,
+                'sampled_out': self.sampled_out,
+                'rate_limited': self.rate_limited,
+                'queue_dropped': log_setup.dropped(),
+            }
+
+
+# 当前进程的 EvaluationLog，未启用时为 None
+_active = None
+# 被替换的 process_expression 和替换后的包装函数
+_original = None
+_wrapper = None
+
+
+def _logged(func):
+    """返回记录每次求值的包装函数"""
+    from src.metrics import error_key
+    clock = time.perf_counter_ns
+
+    @wraps(func)
+    def wrapper(self, expr):
+        log = _active
+        if log is None:
+            return func(self, expr)
+        start = clock()
+        try:
+            value = func(self, expr)
+        except Exception as e:
+            log.record(expr, clock() - start, error_key(e))
+            raise
+        log.record(expr, clock() - start, None if value[0] is not None else HANDLED)
+        return value
+    return wrapper
+
+
+def _settings(settings):
+    merged = dict(DEFAULT_SETTINGS)
+    merged.update({key: value for key, value in (settings or {}).items() if value is not None})
+    return merged
+
+
+def _install(log):
+    global _active, _original, _wrapper
+    from src.calculator_cli import ScientificCalculator
+    _active = log
+    if _wrapper is not None and ScientificCalculator.__dict__['process_expression'] is _wrapper:
+        # fork 出的工作进程继承了已替换的方法
+        return
+    _original = ScientificCalculator.__dict__['process_expression']
+    _wrapper = _logged(_original)
+    ScientificCalculator.process_expression = _wrapper
+
+
+def enable(settings=None):
+    """启用求值日志（再次调用时按新的配置替换输出和采样 / 限流参数）
+
+    参数：
+        settings (dict, optional): file, sample_rate, max_per_second, burst，以及可选的
+            max_bytes / backup_count / when / interval（轮转，默认与主日志相同）
+
+    返回：
+        EvaluationLog: 当前的采样和限流状态
+    """
+    settings = _settings(settings)
+    handler = log_setup.file_handler(settings['file'], settings)
+    handler.setFormatter(EvaluationFormatter())
+    log_setup.attach_handler(LOGGER_NAME, handler)
+    log = EvaluationLog(settings['sample_rate'], settings['max_per_second'], settings['burst'])
+    _install(log)
+    return log
+
+
+def disable():
+    """恢复原方法并移除求值日志的输出（队列中已有的记录仍会写完）"""
+    global _active, _original, _wrapper
+    if _active is None:
+        return
+    from src.calculator_cli import ScientificCalculator
+    _active = None
+    if ScientificCalculator.__dict__.get('process_expression') is _wrapper:
+        ScientificCalculator.process_expression = _original
+        _original = _wrapper = None
+    log_setup.detach_handler(LOGGER_NAME)
+
+
+def active():
+    """当前进程的 EvaluationLog，未启用时为 None（calc-server 的向量化批处理直接调用它的 record）"""
+    return _active
+
+
+def stats():
+    """采样、限流和队列丢弃的计数，未启用时为 None"""
+    log = _active
+    return log.stats() if log is not None else None
+
+
+def configure(logging_settings, force=False):
+    """按 config.yaml 的 logging 部分配置日志，logging.evaluations.enabled 为 true（或 force）时启用求值日志
+
+    参数：
+        logging_settings (dict): logging 配置（level, file, 轮转选项, evaluations）
+        force (bool): 忽略 evaluations.enabled（calc-cli / calc-server --log-evaluations）
+    """
+    logging_settings = dict(logging_settings or {})
+    evaluations = dict(logging_settings.pop('evaluations', None) or {})
+    if not evaluations.pop('enabled', False) and not force:
+        return None
+    log_setup.setup_logger(logging_settings)
+    # 轮转选项默认与主日志相同
+    rotation = {key: logging_settings[key] for key in ('max_bytes', 'backup_count', 'when', 'interval')
+                if key in logging_settings}
+    return enable(dict(rotation, **evaluations))
+
+
+def worker_state(workers=1):
+    """返回传给工作进程 init_worker 的参数，未启用时为 None
+
+    工作进程的记录经 multiprocessing 队列交给本进程的监听线程写入；
+    限流额度按工作进程数平分。
+    """
+    log = _active
+    if log is None:
+        return None
+    workers = max(1, workers)
+    settings = {
+        'sample_rate': log.sample_rate,
+        'max_per_second': log.max_per_second / workers,
+        'burst': max(1.0, log.burst / workers),
+    }
+    return log_setup.shared_queue(), settings
+
+
+def init_worker(state):
+    """在工作进程中启用求值日志，记录放入父进程的共享队列"""
+    log_setup.attach_queue(state[0])
+    settings = state[1]
+    _install(EvaluationLog(settings['sample_rate'], settings['max_per_second'], settings['burst']))
@@ -0,0 +1,474 @@
+"""表达式编译器
+
+把含变量的表达式（如 3*x^2 + sin(x)）编译为可以反复调用的函数，
+避免对每组输入都拼接字符串、解析并经过 process_expression 的逐层分派。
+
+实现方式：
+1. 语法树生成一段 Python 源码并编译为代码对象（按表达式文本缓存，与计算核心无关）：
+   变量为函数参数，字面量、运算符和函数为命名空间中的名称
+2. 绑定到 CalculatorCore 时，命名空间中填入当前数值后端的运算符和函数：
+   - 后端使用 CalculatorCore 默认实现的 + - * ^ 直接生成 Python 运算符
+   - 其余运算符调用后端的运算符实现，函数调用先执行参数验证
+   - sin / cos / tan 的参数先按角度转换为弧度（backend.radians），与 process_function 一致
+   - 字面量按后端转换一次（decimal 后端保证 0.1 精确）
+3. 参数中有数组（NumPy 数组、列表等）时按语法树调用 calculate_many / apply_function
+   向量化计算，返回 BatchResult（逐元素错误标记，非法位置为 NaN）
+
+编译后的函数不经过 handle_errors、结果缓存和运行指标：参数非法时直接抛出 ValueError，
+错误信息为翻译键（如 error.negative_sqrt）。
+
+用法示例：
+f = compile_expression("3*x^2 + sin(x)")
+f(2)                 # 12.034899...
+f(x=2)
+f([0, 30, 90])       # BatchResult(values, errors, error_key)
+"""
+import weakref
+from decimal import Decimal
+from fractions import Fraction
+from functools import lru_cache
+from numbers import Number as NumberType
+
+from src.expression_parser import (CALCULUS_FUNCTIONS, CALCULUS_VARIABLE, BinaryOp, Call, Number,
+                                   UnaryOp, Variable, free_variables, normalize_expression,
+                                   parse_expression)
+from src import complex_engine
+from src.numeric_backends import PrecisionEscalation, convert_input
+from src.vectorized import BatchResult, NAN, np
+
+# 代码对象缓存和每个计算核心的已编译函数缓存的最大条目数
+COMPILE_CACHE_SIZE = 1024
+
+# 后端使用 CalculatorCore 的默认实现时可以直接生成的 Python 运算符
+INLINE_OPERATORS = {'+': '+', '-': '-', '*': '*', '^': '**'}
+
+# 参数为角度的函数
+DEGREE_FUNCTIONS = ('sin', 'cos', 'tan')
+
+# 按标量计算的参数类型（其他类型视为数组）
+SCALAR_TYPES = frozenset((int, float, complex, Decimal, Fraction))
+
+# 计算核心 -> {规范化的表达式文本: CompiledExpression}
+_compiled = weakref.WeakKeyDictionary()
+_default_core = None
+
+
+class _CodeGenerator:
+    """把语法树转换为 Python 表达式源码
+
+    属性：
+        literals (list): 字面量节点，对应名称 _c0, _c1, ...
+        operators (list): 调用实现的运算符，对应名称 _o0, _o1, ...
+        functions (list): (函数名, 参数个数)，对应名称 _f0, _f1, ...；
+            integrate / diff / solve 为 (函数名, 参数个数, 第一个参数的文本, 其中 x 以外的变量名)
+    """
+
+    def __init__(self, variables, inline):
+        self.variables = {name: index for index, name in enumerate(variables)}
+        self.inline = inline
+        self.literals = []
+        self.operators = []
+        self.functions = []
+
+    def emit(self, node):
+        if isinstance(node, Number):
+            self.literals.append(node)
+            return f"_c{len(self.literals) - 1}"
+        if isinstance(node, Variable):
+            return f"_v{self.variables[node.name]}"
+        if isinstance(node, UnaryOp):
+            operand = self.emit(node.operand)
+            return f"(-{operand})" if node.op == '-' else operand
+        if isinstance(node, BinaryOp):
+            left, right = self.emit(node.left), self.emit(node.right)
+            if node.op in self.inline:
+                return f"({left} {INLINE_OPERATORS[node.op]} {right})"
+            return f"{self._name(self.operators, node.op, '_o')}({left}, {right})"
+        if isinstance(node, Call) and node.name in CALCULUS_FUNCTIONS:
+            # 第一个参数不求值，其中 x 以外的变量的值跟在其余参数之后传入
+            outer = _outer_variables(node)
+            args = ', '.join([self.emit(arg) for arg in node.args[1:]]
+                             + [f"_v{self.variables[name]}" for name in outer])
+            key = (node.name, len(node.args), str(node.args[0]) if node.args else '', outer)
+            return f"{self._name(self.functions, key, '_f')}({args})"
+        if isinstance(node, Call):
+            args = ', '.join(self.emit(arg) for arg in node.args)
+            return f"{self._name(self.functions, (node.name, len(node.args)), '_f')}({args})"
+        raise ValueError(f"无法编译的语法树节点: {type(node).__name__}")
+
+    @staticmethod
+    def _name(table, key, prefix):
+        if key not in table:
+            table.append(key)
+        return f"{prefix}{table.index(key)}"
+
+
+def _outer_variables(node):
+    """integrate / diff / solve 的第一个参数中 x 以外的变量名"""
+    if not node.args:
+        return ()
+    return tuple(name for name in free_variables(node.args[0]) if name != CALCULUS_VARIABLE)
+
+
+def _generate(tree, inline):
+    """生成代码对象
+
+    返回：
+        tuple: (代码对象, 变量名, 字面量节点, 运算符, (函数名, 参数个数))
+    """
+    variables = free_variables(tree)
+    generator = _CodeGenerator(variables, inline)
+    body = generator.emit(tree)
+    params = ', '.join(f"_v{index}" for index in range(len(variables)))
+    source = f"def _compiled({params}):\n    return {body}\n"
+    code = compile(source, f"<compiled {tree}>", 'exec')
+    return (code, variables, tuple(generator.literals), tuple(generator.operators),
+            tuple(generator.functions))
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _generate_text(text, inline):
+    tree = parse_expression(text)
+    return (tree,) + _generate(tree, inline)
+
+
+def _inline_operators(core):
+    """当前后端中仍使用 CalculatorCore 默认实现的运算符"""
+    base = type(core).OPERATORS
+    return frozenset(op for op in INLINE_OPERATORS if core.OPERATORS.get(op) is base.get(op))
+
+
+def _bind_function(core, name, arg_count, expression=None, outer=()):
+    """返回执行参数验证（三角函数还要转换为弧度）后调用函数实现的单参数函数
+
+    与 CalculatorCore.process_function 一致，复数参数由复数引擎计算。
+    integrate / diff / solve 返回 calculus.bind 的函数（参数为其余参数和 outer 变量的值）。
+    """
+    if name in CALCULUS_FUNCTIONS:
+        from src import calculus
+        calculus._check_arguments(name, arg_count)
+        return calculus.bind(core, name, expression, outer)
+    spec = core.FUNCTIONS.get(name)
+    if spec is None:
+        raise ValueError(core.translator.format('error.invalid_function', name))
+    func, expected, validator, error_msg = spec
+    if expected != arg_count:
+        raise ValueError(core.translator.format('error.argument_count', name, expected, arg_count))
+    complex_func = complex_engine.FUNCTIONS.get(name)
+    apply_complex = complex_engine.apply
+
+    if name in DEGREE_FUNCTIONS:
+        radians = core.backend.radians
+
+        def call(value):
+            if type(value) is complex and complex_func is not None:
+                return apply_complex(name, value, True)
+            if not validator(value):
+                raise ValueError(error_msg)
+            return func(radians(value))
+    else:
+        def call(value):
+            if type(value) is complex and complex_func is not None:
+                return apply_complex(name, value)
+            if not validator(value):
+                raise ValueError(error_msg)
+            return func(value)
+    return call
+
+
+def _bind(core, generated):
+    """在 core 的运算符和函数上实例化代码对象，返回 Python 函数"""
+    code, _, literals, operators, functions = generated
+    namespace = {'__builtins__': {}}
+    convert = core.convert_literal
+    for index, node in enumerate(literals):
+        namespace[f"_c{index}"] = node.value if convert is None else convert(node.text, node.value)
+    for index, op in enumerate(operators):
+        if op not in core.OPERATORS:
+            raise ValueError(f"不支持的运算符: {op}")
+        namespace[f"_o{index}"] = core.OPERATORS[op]
+    for index, key in enumerate(functions):
+        namespace[f"_f{index}"] = _bind_function(core, *key)
+    exec(code, namespace)
+    return namespace['_compiled']
+
+
+def _is_scalar(value):
+    return type(value) in SCALAR_TYPES or isinstance(value, NumberType)
+
+
+class CompiledExpression:
+    """编译后的表达式
+
+    按位置（顺序为 variables）或按变量名传入变量的值。参数都是标量时返回标量结果，
+    有数组参数时返回 BatchResult。
+
+    属性：
+        source (str): 规范化的表达式文本
+        variables (tuple): 变量名（按在表达式中第一次出现的顺序）
+        tree (Node): 语法树
+        core (CalculatorCore): 绑定的计算核心
+        backend: 编译时的数值后端（切换后端后需要重新编译）
+    """
+
+    def __init__(self, text, core):
+        generated = _generate_text(text, _inline_operators(core))
+        self.source = text
+        self.tree = generated[0]
+        self.variables = generated[2]
+        self.core = core
+        self.backend = core.backend
+        self.function = _bind(core, generated[1:])
+        self._vector = None
+
+    def __repr__(self):
+        return f"CompiledExpression({self.source!r}, variables={self.variables})"
+
+    def __call__(self, *args, **kwargs):
+        if kwargs or len(args) != len(self.variables):
+            args = self._arguments(args, kwargs)
+        for arg in args:
+            if not _is_scalar(arg):
+                return self.evaluate_many(args)
+        convert = self.backend.convert_literal
+        if convert is not None:
+            # decimal / fraction 后端中 float 参数按字面量转换，与表达式中的数字一致
+            args = [convert_input(convert, arg) for arg in args]
+        try:
+            return self.function(*args)
+        except PrecisionEscalation:
+            # adaptive 后端：由 CalculatorCore.evaluate 以高精度后端重新计算
+            return self._evaluate_tree(args)
+        except OverflowError:
+            # 内联的 ** 上溢或 0 的负数次幂，与 numeric_backends.power 相同
+            raise ValueError("error.overflow")
+        except ZeroDivisionError:
+            raise ValueError("error.division_by_zero")
+
+    def _arguments(self, args, kwargs):
+        if len(args) > len(self.variables):
+            raise ValueError(f"参数过多: 表达式只有 {len(self.variables)} 个变量 {self.variables}")
+        values = list(args)
+        for name in self.variables[len(args):]:
+            if name not in kwargs:
+                raise ValueError(f"缺少变量的值: {name}")
+            values.append(kwargs[name])
+        unknown = set(kwargs) - set(self.variables[len(args):])
+        if unknown:
+            raise ValueError(f"未知的变量: {', '.join(sorted(unknown))}")
+        return values
+
+    def _evaluate_tree(self, args):
+        core = self.core
+        saved = core.variables
+        core.variables = dict(zip(self.variables, args))
+        try:
+            return core.evaluate(self.tree)
+        finally:
+            core.variables = saved
+
+    def evaluate_many(self, args):
+        """按数组计算（标量参数自动广播）
+
+        返回：
+            BatchResult: (values, errors, error_key)
+        """
+        if self._vector is None:
+            self._vector = _vector_node(self.tree, self.core, {name: index for index, name
+                                                               in enumerate(self.variables)})
+        values, errors, error_key = self._vector(args)
+        size = None
+        for arg in args:
+            if not _is_scalar(arg):
+                size = np.shape(np.asarray(arg)) if np is not None else len(arg)
+                break
+        if np is not None:
+            values = np.broadcast_to(values, size).copy() if np.shape(values) != size else values
+            errors = np.broadcast_to(np.asarray(errors, dtype=bool), size).copy() \
+                if np.shape(errors) != size else np.asarray(errors, dtype=bool)
+        else:
+            if _is_scalar(values):
+                values = [values] * size
+            if isinstance(errors, bool):
+                errors = [errors] * size
+        return BatchResult(values, errors, error_key)
+
+
+# ======================
+# 向量化计算
+# ======================
+def _merge_errors(a, b):
+    if a is False or b is True:
+        return b
+    if b is False or a is True:
+        return a
+    if isinstance(a, list):
+        return [x or y for x, y in zip(a, b)]
+    return np.logical_or(a, b)
+
+
+def _scalar_call(func, *args):
+    """计算标量，失败时返回 NaN 和错误标记"""
+    try:
+        return func(*args), False, ""
+    except (ValueError, ArithmeticError, TypeError) as e:
+        return NAN, True, str(e)
+
+
+def _vector_node(node, core, variables):
+    """把语法树转换为闭包：参数列表 -> (values, errors, error_key)"""
+    if not free_variables(node):
+        # 不含变量的子树在编译时计算一次
+        value = _scalar_call(_bind(core, _generate(node, _inline_operators(core))))
+        return lambda args: value
+    if isinstance(node, Variable):
+        index = variables[node.name]
+        return lambda args: (args[index], False, "")
+    if isinstance(node, UnaryOp):
+        operand = _vector_node(node.operand, core, variables)
+        if node.op == '+':
+            return operand
+        # 乘以 -1 保留 -0.0 和 NaN，与一元负号一致
+        return _vector_binary(core, '*', operand, lambda args: (-1.0, False, ""))
+    if isinstance(node, BinaryOp):
+        return _vector_binary(core, node.op, _vector_node(node.left, core, variables),
+                              _vector_node(node.right, core, variables))
+    if isinstance(node, Call) and node.name in CALCULUS_FUNCTIONS:
+        return _vector_calculus(node, core, variables)
+    if isinstance(node, Call):
+        if len(node.args) != 1:
+            _bind_function(core, node.name, len(node.args))
+        scalar = _bind_function(core, node.name, 1)
+        operand = _vector_node(node.args[0], core, variables)
+
+        def call(args):
+            values, errors, error_key = operand(args)
+            if _is_scalar(values):
+                result = _scalar_call(scalar, values)
+            else:
+                result = core.apply_function(node.name, values)
+            return (result[0], _merge_errors(errors, result[1]), error_key or result[2])
+        return call
+    raise ValueError(f"无法编译的语法树节点: {type(node).__name__}")
+
+
+def _vector_calculus(node, core, variables):
+    """integrate / diff / solve 的参数中有数组时逐个元素计算（solve 按 calculus.solve_many 批量求根）"""
+    outer = _outer_variables(node)
+    key = (node.name, len(node.args), str(node.args[0]) if node.args else '', outer)
+    scalar = _bind_function(core, *key)
+    operands = [_vector_node(arg, core, variables) for arg in node.args[1:]]
+    operands += [_vector_node(Variable(name), core, variables) for name in outer]
+
+    def call(args):
+        results = [operand(args) for operand in operands]
+        values = [result[0] for result in results]
+        errors = False
+        error_key = ""
+        for result in results:
+            errors = _merge_errors(errors, result[1])
+            error_key = error_key or result[2]
+        if all(_is_scalar(value) for value in values):
+            result = _scalar_call(scalar, *values)
+        else:
+            result = _calculus_many(core, node.name, key[2], outer, values)
+        return (result[0], _merge_errors(errors, result[1]), error_key or result[2])
+    return call
+
+
+def _calculus_many(core, name, expression, outer, values):
+    """参数（其余参数和外层变量的值）中有数组时的 integrate / diff / solve"""
+    from src import calculus
+    count = CALCULUS_FUNCTIONS[name] - 1
+    size = next(len(value) for value in values if not _is_scalar(value))
+    if np is not None:
+        columns = [np.broadcast_to(np.asarray(value), (size,)) for value in values]
+    else:
+        columns = [[value] * size if _is_scalar(value) else list(value) for value in values]
+    if name == 'solve':
+        batch = calculus.solve_many(expression, columns[0], columns[1], core=core,
+                                    bindings=dict(zip(outer, columns[count:])))
+        return batch.values, batch.failed, batch.error_key
+    method = calculus.METHODS[name]
+    results = []
+    errors = []
+    error_key = ""
+    for row in zip(*columns):
+        row = [item.item() if hasattr(item, 'item') else item for item in row]
+        try:
+            results.append(calculus._estimate_value(core, method(
+                expression, *row[:count], core=core, bindings=dict(zip(outer, row[count:])))))
+            errors.append(False)
+        except (ValueError, ArithmeticError, TypeError) as e:
+            results.append(NAN)
+            errors.append(True)
+            error_key = error_key or str(e)
+    if np is not None:
+        return np.array(results), np.array(errors), error_key
+    return results, errors, error_key
+
+
+def _vector_binary(core, op, left, right):
+    if op not in core.OPERATORS:
+        raise ValueError(f"不支持的运算符: {op}")
+    scalar = core.OPERATORS[op]
+
+    def binary(args):
+        a, a_errors, a_key = left(args)
+        b, b_errors, b_key = right(args)
+        if _is_scalar(a) and _is_scalar(b):
+            result = _scalar_call(scalar, a, b)
+        else:
+            result = core.calculate_many(a, b, op)
+        errors = _merge_errors(_merge_errors(a_errors, b_errors), result[1])
+        return result[0], errors, a_key or b_key or result[2]
+    return binary
+
+
+# ======================
+# 公共接口
+# ======================
+def default_core():
+    """未指定计算核心时使用的 float 后端核心（第一次使用时创建）"""
+    global _default_core
+    if _default_core is None:
+        from src.calculator_cli import CalculatorCore
+        from src.i18n.translator import Translator
+        _default_core = CalculatorCore(Translator())
+    return _default_core
+
+
+def compile_expression(expr, core=None):
+    """编译表达式
+
+    同一计算核心上相同文本（规范化后）的表达式只编译一次；
+    切换数值后端后再次调用会重新编译。
+
+    参数：
+        expr (str): 表达式，不带括号的标识符为变量（如 x、rate）
+        core (CalculatorCore, optional): 计算核心，默认使用 float 后端
+
+    返回：
+        CompiledExpression: 可调用对象
+
+    异常：
+        ValueError: 表达式语法错误，或使用了不支持的函数 / 运算符时抛出
+    """
+    if core is None:
+        core = default_core()
+    text = normalize_expression(expr)
+    cache = _compiled.get(core)
+    if cache is None:
+        cache = _compiled[core] = {}
+    compiled = cache.get(text)
+    if compiled is None or compiled.backend is not core.backend:
+        if len(cache) >= COMPILE_CACHE_SIZE:
+            cache.clear()
+        compiled = cache[text] = CompiledExpression(text, core)
+    return compiled
+
+
+def clear_compile_cache():
+    """清空代码对象和已编译函数的缓存"""
+    _generate_text.cache_clear()
+    _compiled.clear()
@@ -0,0 +1,471 @@
+"""表达式解析器
+
+将一行表达式文本解析为抽象语法树（AST），替代 process_expression 中
+逐个尝试正则表达式的做法。
+
+组成部分：
+1. tokenize: 词法分析，把文本切分为数字、标识符、运算符和括号
+2. Parser: 优先级爬升（precedence climbing）语法分析器
+3. 语法树节点：Number, Variable, UnaryOp, BinaryOp, Call
+4. parse_expression: 带 LRU 缓存的解析入口，相同表达式只解析一次
+
+运算符和函数的具体实现仍由 CalculatorCore.OPERATORS / FUNCTIONS 提供，
+语法树在求值时通过 CalculatorCore.calculate / process_function 调用它们。
+"""
+from functools import lru_cache
+
+from src.numeric_backends import convert_input
+
+# 解析缓存的最大条目数
+PARSE_CACHE_SIZE = 1024
+
+# 二元运算符优先级与结合性：(优先级, 是否右结合)
+# 复数运算符 +c, -c, *c, /c 与对应的实数运算符优先级相同
+BINARY_OPERATORS = {
+    '+': (1, False),
+    '-': (1, False),
+    '+c': (1, False),
+    '-c': (1, False),
+    '*': (2, False),
+    '/': (2, False),
+    '%': (2, False),
+    '*c': (2, False),
+    '/c': (2, False),
+    '^': (4, True),
+}
+
+# 一元正负号的优先级：低于 ^，因此 -3^2 == -(3^2)
+UNARY_PRECEDENCE = 3
+
+OPERATOR_CHARS = '+-*/%^'
+COMPLEX_OPERATOR_CHARS = '+-*/'
+
+# 数值微积分函数：函数名 -> 参数个数（见 calculus）。第一个参数是以 CALCULUS_VARIABLE 为自变量的表达式，
+# 不在调用前求值，其中的 x 不是外层表达式的变量
+CALCULUS_FUNCTIONS = {'integrate': 3, 'diff': 2, 'solve': 3}
+CALCULUS_VARIABLE = 'x'
+
+# 不能作为变量名的标识符：单独的 j 表示虚数单位；c 紧跟在运算符后面时是复数运算符的后缀
+# （2*c+1 读作 2 *c (+1)），作为变量时只有在运算符两侧留空格才能正确解析
+RESERVED_NAMES = frozenset(('j', 'J', 'c'))
+
+# 词法单元类型
+NUMBER = 'NUMBER'
+NAME = 'NAME'
+OP = 'OP'
+LPAREN = 'LPAREN'
+RPAREN = 'RPAREN'
+COMMA = 'COMMA'
+END = 'END'
+
+
+class Token:
+    """词法单元
+
+    属性：
+        kind (str): 单元类型（NUMBER, NAME, OP, LPAREN, RPAREN, COMMA, END）
+        text (str): 原始文本
+        value: 数字单元的数值（float 或 complex），其他单元为 None
+        pos (int): 在表达式中的位置
+    """
+    __slots__ = ('kind', 'text', 'value', 'pos')
+
+    def __init__(self, kind, text, value=None, pos=0):
+        self.kind = kind
+        self.text = text
+        self.value = value
+        self.pos = pos
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.text!r})"
+
+
+def check_variable_name(name):
+    """变量名是保留名（RESERVED_NAMES）时抛出 ValueError"""
+    if name in RESERVED_NAMES:
+        raise ValueError(f"{name} 是保留名，不能作为变量名（j 表示虚数单位，c 是复数运算符 +c -c *c /c 的后缀）")
+
+
+def _is_name_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+def tokenize(text):
+    """将表达式文本切分为词法单元列表
+
+    规则：
+    1. 数字支持小数和科学计数法（2.5e3, .5, 1e-3），以 j 结尾表示虚数（2j）
+    2. 标识符由字母、数字和下划线组成（sqrt, log10, abs_c）
+    3. 运算符后紧跟独立的 c 时识别为复数运算符（1 +c 2j）
+
+    参数：
+        text (str): 表达式文本
+
+    返回：
+        list: Token 列表，以 END 结尾
+
+    异常：
+        ValueError: 遇到无法识别的字符时抛出
+    """
+    tokens = []
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch.isspace():
+            i += 1
+            continue
+
+        if ch.isdigit() or (ch == '.' and i + 1 < n and text[i + 1].isdigit()):
+            start = i
+            while i < n and text[i].isdigit():
+                i += 1
+            if i < n and text[i] == '.':
+                i += 1
+                while i < n and text[i].isdigit():
+                    i += 1
+            # 科学计数法：e 后必须跟数字（可带符号）
+            if i < n and text[i] in 'eE':
+                j = i + 1
+                if j < n and text[j] in '+-':
+                    j += 1
+                if j < n and text[j].isdigit():
+                    i = j
+                    while i < n and text[i].isdigit():
+                        i += 1
+            literal = text[start:i]
+            if i < n and text[i] in 'jJ':
+                i += 1
+                tokens.append(Token(NUMBER, literal + 'j', complex(0, float(literal)), start))
+            else:
+                tokens.append(Token(NUMBER, literal, float(literal), start))
+            if i < n and _is_name_char(text[i]):
+                raise ValueError(f"无法识别的数字: {text[start:i + 1]}")
+            continue
+
+        if ch.isalpha() or ch == '_':
+            start = i
+            while i < n and _is_name_char(text[i]):
+                i += 1
+            name = text[start:i]
+            # 单独的 j 表示虚数单位
+            if name in ('j', 'J'):
+                tokens.append(Token(NUMBER, '1j', 1j, start))
+            else:
+                tokens.append(Token(NAME, name, pos=start))
+            continue
+
+        if ch in OPERATOR_CHARS:
+            # +c, -c, *c, /c：c 之后不能再接标识符字符或左括号
+            if (ch in COMPLEX_OPERATOR_CHARS and i + 1 < n and text[i + 1] == 'c'
+                    and (i + 2 >= n or not (_is_name_char(text[i + 2]) or text[i + 2] == '('))):
+                tokens.append(Token(OP, ch + 'c', pos=i))
+                i += 2
+            else:
+                tokens.append(Token(OP, ch, pos=i))
+                i += 1
+            continue
+
+        if ch == '(':
+            tokens.append(Token(LPAREN, ch, pos=i))
+        elif ch == ')':
+            tokens.append(Token(RPAREN, ch, pos=i))
+        elif ch == ',':
+            tokens.append(Token(COMMA, ch, pos=i))
+        else:
+            raise ValueError(f"无法识别的字符: {ch}")
+        i += 1
+
+    tokens.append(Token(END, '', pos=n))
+    return tokens
+
+
+# ======================
+# 语法树节点
+# ======================
+class Node:
+    """语法树节点基类
+
+    子类需要实现：
+        evaluate(core): 使用 CalculatorCore 求值，出错时返回 None
+        __str__(): 返回规范化的表达式文本
+    """
+    __slots__ = ()
+
+
+class Number(Node):
+    """数字字面量"""
+    __slots__ = ('value', 'text')
+
+    def __init__(self, value, text):
+        self.value = value
+        self.text = text
+
+    def evaluate(self, core):
+        convert = core.convert_literal
+        if convert is None:
+            return self.value
+        # 非浮点后端从原始文本转换，保证 0.1 等字面量精确
+        return convert(self.text, self.value)
+
+    def __str__(self):
+        return self.text
+
+
+class Variable(Node):
+    """变量引用，值从 CalculatorCore.variables 中读取"""
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def evaluate(self, core):
+        try:
+            value = core.variables[self.name]
+        except KeyError:
+            raise ValueError(f"未知的标识符: {self.name}") from None
+        # decimal / fraction 后端中 float 值按字面量转换
+        return convert_input(core.convert_literal, value)
+
+    def __str__(self):
+        return self.name
+
+
+class UnaryOp(Node):
+    """一元正负号"""
+    __slots__ = ('op', 'operand')
+
+    def __init__(self, op, operand):
+        self.op = op
+        self.operand = operand
+
+    def evaluate(self, core):
+        value = self.operand.evaluate(core)
+        if value is None:
+            return None
+        return -value if self.op == '-' else value
+
+    def __str__(self):
+        return f"{self.op}{_wrap(self.operand)}"
+
+
+class BinaryOp(Node):
+    """二元运算，运算由 CalculatorCore.calculate 执行"""
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def evaluate(self, core):
+        left = self.left.evaluate(core)
+        if left is None:
+            return None
+        right = self.right.evaluate(core)
+        if right is None:
+            return None
+        return core.calculate(left, right, self.op)
+
+    def __str__(self):
+        op = f" {self.op} " if self.op.endswith('c') else self.op
+        return f"{_wrap(self.left)}{op}{_wrap(self.right)}"
+
+
+class Call(Node):
+    """函数调用，函数由 CalculatorCore.process_function 执行（integrate / diff / solve 由 calculus 计算）"""
+    __slots__ = ('name', 'args')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def evaluate(self, core):
+        if self.name in CALCULUS_FUNCTIONS:
+            from src import calculus
+            return calculus.evaluate_call(self, core)
+        spec = core.FUNCTIONS.get(self.name)
+        if spec is None:
+            raise ValueError(core.translator.format('error.invalid_function', self.name))
+        if spec[1] != len(self.args):
+            raise ValueError(core.translator.format('error.argument_count', self.name,
+                                                    spec[1], len(self.args)))
+        values = []
+        for arg in self.args:
+            value = arg.evaluate(core)
+            if value is None:
+                return None
+            values.append(value)
+        return core.process_function(self.name, *values)
+
+    def __str__(self):
+        return f"{self.name}({', '.join(str(arg) for arg in self.args)})"
+
+
+def free_variables(node):
+    """返回语法树中引用的变量名（按第一次出现的顺序，不重复）
+
+    integrate / diff / solve 的第一个参数中的自变量 x 不计入。
+    """
+    names = {}
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Variable):
+            names.setdefault(node.name)
+        elif isinstance(node, UnaryOp):
+            stack.append(node.operand)
+        elif isinstance(node, BinaryOp):
+            stack.append(node.right)
+            stack.append(node.left)
+        elif isinstance(node, Call) and node.name in CALCULUS_FUNCTIONS and node.args:
+            stack.extend(reversed(node.args[1:]))
+            for name in free_variables(node.args[0]):
+                if name != CALCULUS_VARIABLE:
+                    names.setdefault(name)
+        elif isinstance(node, Call):
+            stack.extend(reversed(node.args))
+    return tuple(names)
+
+
+def _wrap(node):
+    """复合子表达式在输出时加括号"""
+    if isinstance(node, (BinaryOp, UnaryOp)):
+        return f"({node})"
+    if isinstance(node, Number) and isinstance(node.value, complex):
+        return f"({node})"
+    return str(node)
+
+
+# ======================
+# 语法分析
+# ======================
+class Parser:
+    """优先级爬升语法分析器
+
+    语法：
+        expr    := unary (BINOP unary)*      # 按 BINARY_OPERATORS 的优先级组合
+        unary   := ('+' | '-') expr[UNARY_PRECEDENCE] | primary
+        primary := NUMBER | NAME | NAME '(' [expr (',' expr)*] ')' | '(' expr ')'
+
+    不带括号的标识符解析为变量（Variable），求值时从 CalculatorCore.variables 读取。
+    """
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos]
+
+    def advance(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def expect(self, kind):
+        token = self.advance()
+        if token.kind != kind:
+            raise ValueError(f"语法错误: 位置 {token.pos} 处缺少 {kind}")
+        return token
+
+    def parse(self):
+        """解析完整表达式，末尾不能有多余内容"""
+        if self.peek().kind == END:
+            raise ValueError("表达式为空")
+        node = self.parse_expression(0)
+        token = self.peek()
+        if token.kind != END:
+            raise ValueError(f"语法错误: 位置 {token.pos} 处有多余内容 '{token.text}'")
+        return node
+
+    def parse_expression(self, min_precedence):
+        left = self.parse_unary()
+        while True:
+            token = self.peek()
+            if token.kind != OP:
+                break
+            precedence, right_assoc = BINARY_OPERATORS[token.text]
+            if precedence < min_precedence:
+                break
+            self.advance()
+            next_min = precedence if right_assoc else precedence + 1
+            right = self.parse_expression(next_min)
+            left = BinaryOp(token.text, left, right)
+        return left
+
+    def parse_unary(self):
+        token = self.peek()
+        if token.kind == OP and token.text in ('+', '-'):
+            self.advance()
+            operand = self.parse_expression(UNARY_PRECEDENCE)
+            # 负数字面量直接折叠为常量
+            if isinstance(operand, Number) and token.text == '-':
+                text = operand.text[1:] if operand.text.startswith('-') else f"-{operand.text}"
+                return Number(-operand.value, text)
+            if token.text == '+':
+                return operand
+            return UnaryOp(token.text, operand)
+        return self.parse_primary()
+
+    def parse_primary(self):
+        token = self.advance()
+        if token.kind == NUMBER:
+            return Number(token.value, token.text)
+        if token.kind == NAME:
+            if self.peek().kind != LPAREN:
+                return Variable(token.text)
+            self.advance()
+            args = []
+            if self.peek().kind != RPAREN:
+                args.append(self.parse_expression(0))
+                while self.peek().kind == COMMA:
+                    self.advance()
+                    args.append(self.parse_expression(0))
+            self.expect(RPAREN)
+            return Call(token.text, tuple(args))
+        if token.kind == LPAREN:
+            node = self.parse_expression(0)
+            self.expect(RPAREN)
+            return node
+        if token.kind == END:
+            raise ValueError("表达式不完整")
+        raise ValueError(f"语法错误: 位置 {token.pos} 处不应出现 '{token.text}'")
+
+
+def normalize_expression(expr):
+    """规范化表达式文本（去除首尾空白并合并连续空白），用作缓存键"""
+    return ' '.join(expr.split())
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_normalized(text):
+    return Parser(text).parse()
+
+
+def parse_expression(expr):
+    """解析表达式并返回语法树
+
+    解析结果按规范化文本缓存在有界 LRU 缓存中，
+    重复提交的表达式会直接复用已编译的语法树。
+
+    参数：
+        expr (str): 表达式文本
+
+    返回：
+        Node: 语法树根节点
+
+    异常：
+        ValueError: 表达式语法错误时抛出
+    """
+    return _parse_normalized(normalize_expression(expr))
+
+
+def parse_cache_info():
+    """返回解析缓存的统计信息（hits, misses, maxsize, currsize）"""
+    return _parse_normalized.cache_info()
+
+
+def clear_parse_cache():
+    """清空解析缓存"""
+    _parse_normalized.cache_clear()
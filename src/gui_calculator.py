@@ -1,17 +1,27 @@
 import sys
 import os
-from datetime import datetime
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout,
     QTabWidget, QPushButton, QLineEdit, QLabel, QGridLayout,
-    QComboBox, QMessageBox, QListWidget, QHBoxLayout
+    QComboBox, QMessageBox, QListWidget, QHBoxLayout,
+    QTableWidget, QTableWidgetItem, QAbstractItemView, QFileDialog
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThreadPool
+from src import calculator_cli
 from src.calculator_cli import ScientificCalculator
+from src.gui_worker import EvaluationRunner, DEFAULT_TIMEOUT_MS
 from src.unit_converter import UnitConverter, UnitType
 from src.i18n.translator import Translator
-# 添加 HistoryManager 的导入
-from src.history_manager import HistoryManager
+from src.workspace import parse_assignment
+
+# 历史搜索最多显示的记录数
+HISTORY_SEARCH_LIMIT = 200
+
+# 历史列表每次从历史记录库读取的记录数（滚动到顶部时再读取更早的一页）
+HISTORY_PAGE_SIZE = 100
+
+# 关闭窗口时等待后台任务（历史记录写入）结束的最长时间（毫秒）
+CLOSE_WAIT_MS = 2000
 
 class CalculatorGUI(QMainWindow):
     def __init__(self):
@@ -20,8 +30,39 @@ class CalculatorGUI(QMainWindow):
         self.calculator = ScientificCalculator()
         # 确保 calculator 和 translator 正确初始化
         self.calculator.translator = self.translator
-        self.calculator.history = HistoryManager()  # 显式初始化历史记录管理器
+        self.calculator.core.set_backend(**calculator_cli.numeric_settings(self.calculator.config))
+        self.calculator.configure_result_cache(self.calculator.config.get('result_cache'))
+        # 计算在工作线程中执行，错误以异常形式通过信号送回界面线程
+        calculator_cli.RAISE_ERRORS = True
+        self.setup_workers()
         self.init_ui()
+
+    def setup_workers(self):
+        """创建后台执行器：表达式计算、单位转换和变量定义各自独立取代、取消和超时
+
+        计算核心和变量工作区不是线程安全的，线程池只有一个线程，任务依次执行；
+        被取代或放弃的任务如果还在排队则直接跳过（见 gui_worker.EvaluationTask）。
+        """
+        timeout_ms = self.calculator.config.get('settings', {}).get(
+            'evaluation_timeout_ms', DEFAULT_TIMEOUT_MS)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.evaluator = EvaluationRunner(self.thread_pool, timeout_ms, self)
+        self.evaluator.finished.connect(self.on_calculation_finished)
+        self.evaluator.failed.connect(self.on_calculation_failed)
+        self.evaluator.timed_out.connect(self.on_timed_out)
+        self.converter = EvaluationRunner(self.thread_pool, timeout_ms, self)
+        self.converter.finished.connect(self.on_conversion_finished)
+        self.converter.failed.connect(self.on_conversion_failed)
+        self.converter.timed_out.connect(self.on_timed_out)
+        self.variable_runner = EvaluationRunner(self.thread_pool, timeout_ms, self)
+        self.variable_runner.finished.connect(self.on_variable_defined)
+        self.variable_runner.failed.connect(self.on_variable_failed)
+        self.variable_runner.timed_out.connect(self.on_timed_out)
+        # 变量表的内容（读取时会重新计算脏变量）也在工作线程中计算
+        self.table_runner = EvaluationRunner(self.thread_pool, timeout_ms, self)
+        self.table_runner.finished.connect(self.show_variable_table)
+        self.table_runner.timed_out.connect(self.on_timed_out)
         
     def init_ui(self):
         self.setWindowTitle(self.translator.translate("calculator_title"))
@@ -41,15 +82,18 @@ class CalculatorGUI(QMainWindow):
         basic_tab = QWidget()
         unit_tab = QWidget()
         history_tab = QWidget()
+        variables_tab = QWidget()
         
         # 修改标签页文本
         tabs.addTab(basic_tab, self.translator.translate("basic_calc"))
         tabs.addTab(unit_tab, self.translator.translate("unit_converter"))
         tabs.addTab(history_tab, self.translator.translate("history"))
+        tabs.addTab(variables_tab, self.translator.translate("variables"))
         
         self.setup_basic_calc(basic_tab)
         self.setup_unit_converter(unit_tab)
         self.setup_history(history_tab)
+        self.setup_variables(variables_tab)
 
     def setup_basic_calc(self, parent):
         layout = QVBoxLayout(parent)
@@ -171,10 +215,27 @@ class CalculatorGUI(QMainWindow):
         """清除输入框内容"""
         self.expr_input.clear()
 
+    def closeEvent(self, event):
+        """关闭窗口时放弃进行中的计算，等待历史记录写入结束后关闭历史记录库"""
+        self.evaluator.cancel()
+        self.converter.cancel()
+        self.variable_runner.cancel()
+        self.table_runner.cancel()
+        self.thread_pool.waitForDone(CLOSE_WAIT_MS)
+        self.calculator.history.close()
+        super().closeEvent(event)
+
     def keyPressEvent(self, event):
-        """处理键盘事件"""
+        """处理键盘事件：Esc 放弃进行中的计算，没有进行中的计算时清除输入"""
         if event.key() == Qt.Key.Key_Escape:
-            self.clear_input()
+            cancelled = self.evaluator.cancel()
+            cancelled = self.converter.cancel() or cancelled
+            cancelled = self.variable_runner.cancel() or cancelled
+            cancelled = self.table_runner.cancel() or cancelled
+            if cancelled:
+                self.statusBar().showMessage(self.translator.translate("calculation_cancelled"))
+            else:
+                self.clear_input()
         else:
             super().keyPressEvent(event)
 
@@ -192,6 +253,9 @@ class CalculatorGUI(QMainWindow):
         # 历史列表优化
         self.history_list = QListWidget()
         self.history_list.setAlternatingRowColors(True)  # 交替行颜色
+        # 下一页（更早的记录）的游标：已显示的最早一条记录的 id，None 表示没有更早的记录
+        self.history_cursor = None
+        self.history_list.verticalScrollBar().valueChanged.connect(self.on_history_scrolled)
         self.history_list.setStyleSheet("""
             QListWidget {
                 border: 1px solid #ccc;
@@ -206,56 +270,215 @@ class CalculatorGUI(QMainWindow):
         layout.addWidget(self.history_list)
         self.update_history_list()
 
+    def setup_variables(self, parent):
+        layout = QVBoxLayout(parent)
+        layout.setSpacing(5)
+        
+        # 定义输入框：name = expression
+        define_layout = QHBoxLayout()
+        self.variable_input = QLineEdit()
+        self.variable_input.setPlaceholderText(self.translator.translate("enter_assignment"))
+        self.variable_input.returnPressed.connect(self.define_variable)
+        define_layout.addWidget(self.variable_input)
+        define_btn = QPushButton(self.translator.translate("define_variable"))
+        define_btn.clicked.connect(self.define_variable)
+        define_layout.addWidget(define_btn)
+        
+        # 变量表：变量名、表达式、当前值（双击一行把定义放回输入框编辑）
+        self.variable_table = QTableWidget(0, 3)
+        self.variable_table.setHorizontalHeaderLabels([
+            self.translator.translate("variable_name"),
+            self.translator.translate("variable_expression"),
+            self.translator.translate("variable_value"),
+        ])
+        self.variable_table.horizontalHeader().setStretchLastSection(True)
+        self.variable_table.verticalHeader().setVisible(False)
+        self.variable_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.variable_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.variable_table.cellDoubleClicked.connect(self.edit_variable)
+        
+        button_layout = QHBoxLayout()
+        for key, handler in (("delete_variable", self.delete_variable),
+                             ("save_workspace", self.save_workspace),
+                             ("load_workspace", self.load_workspace)):
+            button = QPushButton(self.translator.translate(key))
+            button.clicked.connect(handler)
+            button_layout.addWidget(button)
+        
+        layout.addLayout(define_layout)
+        layout.addWidget(self.variable_table)
+        layout.addLayout(button_layout)
+        self.update_variable_table()
+
     def calculate(self):
-        try:
-            expr = self.expr_input.text()
-            result, record = self.calculator.process_expression(expr)
+        """在工作线程中计算输入的表达式（取代尚未完成的上一次计算）"""
+        expr = self.expr_input.text()
+        if not expr.strip():
+            return
+        self.statusBar().showMessage(self.translator.translate("calculating"))
+        self.evaluator.submit(self.evaluate_expression, expr)
+
+    def evaluate_expression(self, is_stale, expr):
+        """工作线程：计算表达式（或赋值语句）并写入历史记录（已被取代或取消时不写入）
+
+        返回：
+            tuple: (结果, 变量表的内容)
+        """
+        result, record = self.calculator.process_input(expr)
+        if not is_stale():
             self.calculator.history.add_record(record)
-            self.expr_input.setText(str(result))
-            self.update_history_list()
-        except Exception as e:
-            QMessageBox.critical(self, 
-                               self.translator.translate("error"),
-                               self.translator.translate("calc_error").format(str(e)))
+        return result, self.calculator.workspace.entries()
+
+    def on_calculation_finished(self, finished):
+        result, entries = finished
+        self.statusBar().clearMessage()
+        self.expr_input.setText(str(result))
+        self.update_history_list()
+        self.show_variable_table(entries)
+
+    def on_calculation_failed(self, error):
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, 
+                           self.translator.translate("error.title"),
+                           self.translator.format("error.calc_error",
+                                                  self.translator.translate(str(error))))
+
+    def define_variable(self):
+        """在工作线程中定义输入框中的变量（name = expression）"""
+        assignment = parse_assignment(self.variable_input.text())
+        if assignment is None:
+            QMessageBox.critical(self,
+                           self.translator.translate("error.title"),
+                           self.translator.translate("enter_assignment"))
+            return
+        self.statusBar().showMessage(self.translator.translate("calculating"))
+        self.variable_runner.submit(self.assign_variable, *assignment)
+
+    def assign_variable(self, is_stale, name, expr):
+        """工作线程：定义变量，重新计算受影响的变量并写入历史记录
+
+        返回：
+            tuple: (结果, 变量表的内容)
+        """
+        result, record = self.calculator.assign(name, expr)
+        entries = self.calculator.workspace.entries()
+        if not is_stale():
+            self.calculator.history.add_record(record)
+        return result, entries
+
+    def on_variable_defined(self, finished):
+        _, entries = finished
+        self.statusBar().clearMessage()
+        self.variable_input.clear()
+        self.show_variable_table(entries)
+        self.update_history_list()
+
+    def on_variable_failed(self, error):
+        # 引用未定义变量等计算错误时定义仍然保存，表中显示错误信息
+        self.update_variable_table()
+        self.on_calculation_failed(error)
+
+    def edit_variable(self, row, column):
+        name = self.variable_table.item(row, 0).text()
+        expression = self.variable_table.item(row, 1).text()
+        self.variable_input.setText(f"{name} = {expression}")
+        self.variable_input.setFocus()
+
+    def delete_variable(self):
+        row = self.variable_table.currentRow()
+        if row < 0:
+            return
+        name = self.variable_table.item(row, 0).text()
+        if name in self.calculator.workspace:
+            self.calculator.workspace.delete(name)
+        self.update_variable_table()
+
+    def save_workspace(self):
+        path, _ = QFileDialog.getSaveFileName(self, self.translator.translate("save_workspace"),
+                                              "", self.translator.translate("workspace_files"))
+        if not path:
+            return
+        try:
+            count = self.calculator.workspace.save(path)
+        except OSError as e:
+            QMessageBox.critical(self, self.translator.translate("error.title"), str(e))
+            return
+        self.statusBar().showMessage(self.translator.format("variables_saved", count, path))
+
+    def load_workspace(self):
+        path, _ = QFileDialog.getOpenFileName(self, self.translator.translate("load_workspace"),
+                                              "", self.translator.translate("workspace_files"))
+        if not path:
+            return
+        try:
+            count = self.calculator.workspace.load(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, self.translator.translate("error.title"), str(e))
+            return
+        self.statusBar().showMessage(self.translator.format("variables_loaded", count, path))
+        self.update_variable_table()
+
+    def update_variable_table(self):
+        """在工作线程中读取全部变量（只重新计算脏变量），完成后由 show_variable_table 显示"""
+        self.table_runner.submit(self.read_variables)
+
+    def read_variables(self, is_stale):
+        """工作线程：按定义顺序返回全部变量 [(变量名, 表达式, 值, 错误信息)]"""
+        return self.calculator.workspace.entries()
+
+    def show_variable_table(self, entries):
+        """显示工作线程读取的变量"""
+        self.variable_table.setRowCount(len(entries))
+        for row, (name, expression, value, error) in enumerate(entries):
+            text = self.calculator.core.format_result(value) if error is None \
+                else self.translator.translate(error)
+            for column, cell in enumerate((name, expression, text)):
+                self.variable_table.setItem(row, column, QTableWidgetItem(cell))
+
+    def on_timed_out(self):
+        self.statusBar().showMessage(self.translator.translate("error.timeout"))
 
     def convert_units(self):
+        """在工作线程中执行单位转换（取代尚未完成的上一次转换）"""
         try:
             if not self.value_input.text():
                 raise ValueError(self.translator.translate("error.value_required"))
-                
             value = float(self.value_input.text())
-            result = UnitConverter.convert(
-                value,
-                self.from_unit_combo.currentText(),
-                self.to_unit_combo.currentText()
-            )
-            # 先更新显示结果
-            self.result_label.setText(
-                f"{value} {self.from_unit_combo.currentText()} = "
-                f"{result:.6g} {self.to_unit_combo.currentText()}"
-            )
-            
-            # 添加历史记录
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            record = f"[{timestamp}] " + self.translator.translate("unit_conversion_record").format(
-                value,
-                self.from_unit_combo.currentText(),
-                f"{result:.6g}",
-                self.to_unit_combo.currentText()
-            )
-            
-            # 确保历史记录被正确添加
-            if hasattr(self.calculator, 'history'):
-                self.calculator.history.add_record(record)
-                self.update_history_list()  # 立即更新显示
         except ValueError as e:
             QMessageBox.critical(self, 
                            self.translator.translate("error.title"),
                            str(e))
-        except Exception as e:
-            QMessageBox.critical(self, 
+            return
+        self.statusBar().showMessage(self.translator.translate("calculating"))
+        self.converter.submit(self.convert_and_record, value,
+                              self.from_unit_combo.currentText(),
+                              self.to_unit_combo.currentText())
+
+    def convert_and_record(self, is_stale, value, from_unit, to_unit):
+        """工作线程：转换单位并写入历史记录（已被取代或取消时不写入）"""
+        result = UnitConverter.convert(value, from_unit, to_unit)
+        record = self.translator.format(
+            "unit_conversion_record", value, from_unit, f"{result:.6g}", to_unit
+        )
+        if not is_stale() and hasattr(self.calculator, 'history'):
+            self.calculator.history.add_record(record)
+        return value, from_unit, result, to_unit
+
+    def on_conversion_finished(self, conversion):
+        value, from_unit, result, to_unit = conversion
+        self.statusBar().clearMessage()
+        self.result_label.setText(f"{value} {from_unit} = {result:.6g} {to_unit}")
+        self.update_history_list()
+
+    def on_conversion_failed(self, error):
+        self.statusBar().clearMessage()
+        if isinstance(error, ValueError):
+            message = str(error)
+        else:
+            message = self.translator.format("error.convert_error", str(error))
+        QMessageBox.critical(self, 
                            self.translator.translate("error.title"),
-                           self.translator.translate("error.convert_error").format(str(e)))
+                           message)
 
     def update_unit_options(self):
         unit_type = UnitType(self.unit_type_combo.currentText())
@@ -270,15 +493,45 @@ class CalculatorGUI(QMainWindow):
         self.update_history_list(search_term)
 
     def update_history_list(self, search_term=''):
+        """重新填充历史列表：搜索时显示匹配的记录，否则只读取最新的一页"""
+        self.history_cursor = None
         self.history_list.clear()
-        if hasattr(self.calculator, 'history'):
-            history_items = self.calculator.history.get_recent_history()
-            for item in history_items:
-                if search_term.lower() in item.lower():
-                    self.history_list.addItem(item)
-            # 滚动到最新记录
-            if self.history_list.count() > 0:
-                self.history_list.scrollToBottom()
+        if not hasattr(self.calculator, 'history'):
+            return
+        page = []
+        if search_term.strip():
+            # 通过全文索引搜索全部历史记录，结果按从旧到新显示
+            history_items = reversed(self.calculator.history.search(
+                search_term, limit=HISTORY_SEARCH_LIMIT))
+        else:
+            page = self.calculator.history.page(limit=HISTORY_PAGE_SIZE)
+            # 历史记录库不可用时显示内存中的记录
+            history_items = [str(record) for record in reversed(page)] if page else \
+                self.calculator.history.get_recent_history()
+        for item in history_items:
+            self.history_list.addItem(item)
+        # 滚动到最新记录
+        if self.history_list.count() > 0:
+            self.history_list.scrollToBottom()
+        if len(page) == HISTORY_PAGE_SIZE:
+            self.history_cursor = page[-1].id
+
+    def on_history_scrolled(self, value):
+        if value == self.history_list.verticalScrollBar().minimum():
+            self.load_older_history()
+
+    def load_older_history(self):
+        """历史列表滚动到顶部时读取更早的一页，插入到列表开头并保持当前的可见位置"""
+        if self.history_cursor is None:
+            return
+        page = self.calculator.history.page(before=self.history_cursor, limit=HISTORY_PAGE_SIZE)
+        self.history_cursor = page[-1].id if len(page) == HISTORY_PAGE_SIZE else None
+        scroll_bar = self.history_list.verticalScrollBar()
+        distance = scroll_bar.maximum() - scroll_bar.value()
+        for record in page:
+            self.history_list.insertItem(0, str(record))
+        self.history_list.doItemsLayout()
+        scroll_bar.setValue(scroll_bar.maximum() - distance)
 
 def main():
     os.environ['LANG'] = 'en_US.UTF-8'
@@ -0,0 +1,146 @@
+"""图形界面的后台计算
+
+把表达式求值、单位转换和历史记录写入从 Qt 事件循环移到 QThreadPool 的工作线程中，
+避免慢计算或慢磁盘冻结窗口：
+1. 结果通过信号送回界面线程
+2. 每次提交有独立的超时，超时后放弃该次计算
+3. cancel()（界面上的 Esc）放弃正在进行的计算
+4. 新的提交会取代尚未完成的旧提交，旧提交的结果被丢弃
+
+Python 线程无法被强制终止：被放弃的计算会在工作线程中继续运行到结束，
+只是其结果不再送达界面。共享计算核心的执行器应使用只有一个线程的线程池
+（见 CalculatorGUI.setup_workers），被放弃的计算结束之前后续提交在队列中等待，
+不会与它同时访问计算核心。任务函数可以通过传入的 is_stale() 判断自己是否已被放弃，
+以便跳过后续的副作用（如写入历史记录）。
+"""
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+# 默认的单次计算超时（毫秒）
+DEFAULT_TIMEOUT_MS = 5000
+
+
+class TaskSignals(QObject):
+    """工作线程发往界面线程的信号（参数中的 int 为提交的代号）"""
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, object)
+
+
+class EvaluationTask(QRunnable):
+    """在线程池中执行一次提交"""
+
+    def __init__(self, signals, generation, is_stale, func, args):
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.is_stale = is_stale
+        self.func = func
+        self.args = args
+
+    def run(self):
+        if self.is_stale():
+            # 排队期间已被取代或取消
+            return
+        try:
+            result = self.func(self.is_stale, *self.args)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, e)
+        else:
+            self.signals.finished.emit(self.generation, result)
+
+
+class EvaluationRunner(QObject):
+    """带超时、取消和取代语义的后台执行器
+
+    同一时刻只有最新一次提交的结果会通过信号送出。
+
+    信号：
+        finished(object): 最新提交的返回值
+        failed(object): 最新提交抛出的异常
+        timed_out(): 最新提交超时被放弃
+        busy_changed(bool): 是否有正在进行的提交
+
+    属性：
+        pool (QThreadPool): 执行任务的线程池
+        timeout_ms (int): 默认超时（毫秒），0 表示不限
+        generation (int): 最新提交的代号，取消、超时或新提交时递增
+    """
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    timed_out = pyqtSignal()
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, pool=None, timeout_ms=DEFAULT_TIMEOUT_MS, parent=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self.timeout_ms = timeout_ms
+        self.generation = 0
+        self.busy = False
+        self._signals = TaskSignals()
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_timeout)
+
+    def submit(self, func, *args, timeout_ms=None):
+        """提交任务，取代尚未完成的旧提交
+
+        参数：
+            func: 在工作线程中执行的函数，调用方式为 func(is_stale, *args)
+            timeout_ms (int, optional): 本次超时（毫秒），默认使用 self.timeout_ms
+
+        返回：
+            int: 本次提交的代号
+        """
+        self.generation += 1
+        generation = self.generation
+        self.pool.start(EvaluationTask(self._signals, generation,
+                                       lambda: self.generation != generation, func, args))
+        timeout_ms = self.timeout_ms if timeout_ms is None else timeout_ms
+        if timeout_ms:
+            self._timer.start(timeout_ms)
+        else:
+            self._timer.stop()
+        self._set_busy(True)
+        return generation
+
+    def cancel(self):
+        """放弃正在进行的提交
+
+        返回：
+            bool: 是否有被放弃的提交
+        """
+        if not self.busy:
+            return False
+        self._abandon()
+        return True
+
+    def _abandon(self):
+        self.generation += 1
+        self._timer.stop()
+        self._set_busy(False)
+
+    def _set_busy(self, busy):
+        if busy != self.busy:
+            self.busy = busy
+            self.busy_changed.emit(busy)
+
+    def _on_finished(self, generation, result):
+        if generation != self.generation:
+            return
+        self._timer.stop()
+        self._set_busy(False)
+        self.finished.emit(result)
+
+    def _on_failed(self, generation, error):
+        if generation != self.generation:
+            return
+        self._timer.stop()
+        self._set_busy(False)
+        self.failed.emit(error)
+
+    def _on_timeout(self):
+        if not self.busy:
+            return
+        self._abandon()
+        self.timed_out.emit()
@@ -1,65 +1,211 @@
-from collections import deque
-import json
+import threading
+import time
+from contextlib import nullcontext
 from pathlib import Path
 
+from src.history_records import HistoryRecords
+from src.history_store import DB_FILE, STORE_ERRORS, HistoryStore, Query
+from src.utils.paths import user_data_dir
+
+# 图形界面写在用户主目录的旧版历史文件，打开时自动导入历史记录库。
+# calc-cli 写在启动目录的 calc_history.json(l) 不自动导入（否则在任何目录启动都会把同名文件
+# 并入共用的历史记录库），由 calc-cli --import-history FILE 显式导入
+LEGACY_FILES = (
+    '~/.calculator_history.json',
+    '~/.calculator_history.jsonl',
+)
+
 class HistoryManager:
-    """历史记录管理器类
-    
+    """历史记录管理器类（calc-cli、批量模式、calc-server 和图形界面共用）
+
     功能：
     1. 内存中保存最近的计算记录
-    2. 将历史记录持久化到文件
-    3. 从文件加载历史记录
-    4. 支持获取最近的记录
+    2. 将历史记录写入用户数据目录下的 SQLite 历史记录库（见 history_store），
+       多个进程可以同时写入
+    3. 启动时只从库中读取最近的记录，并导入旧版 JSON / JSONL 历史文件
+    4. 支持获取最近的记录、按游标分页、按时间范围查询和搜索全部已保存的记录
+    5. 支持批量写入时的组提交
+    6. 线程安全：图形界面在工作线程中写入记录，在界面线程中查询
+
+    内存中的记录按列保存（见 history_records），显示文本和时间前缀在读取时才生成。
+
+    属性：
+        memory_history (HistoryRecords): 内存中的历史记录
+        history_file (Path): 历史记录库路径
+        store (HistoryStore): 历史记录库，打开失败或关闭后为 None
+        error (Exception): 历史记录库打开或写入失败的原因，正常时为 None
     """
-    
-    def __init__(self, max_memory_size=100):
+
+    def __init__(self, settings=None, max_memory_size=100):
         """初始化历史记录管理器
-        
+
         Args:
+            settings (dict, optional): 历史记录库选项（path, synchronous, timeout, retain），
+                对应 config.yaml 中的 history.database
             max_memory_size (int): 内存中保存的最大记录数
         """
-        self.memory_history = deque(maxlen=max_memory_size)
-        self.history_file = Path.home() / '.calculator_history.json'
+        settings = dict(settings or {})
+        self.memory_history = HistoryRecords(maxlen=max_memory_size)
+        self.history_file = None
+        self.store = None
+        self.error = None
+        self._lock = threading.Lock()
+        try:
+            path = settings.pop('path', None)
+            self.history_file = Path(path).expanduser() if path else user_data_dir() / DB_FILE
+            self.store = HistoryStore(self.history_file, **settings)
+            self.store.import_files(Path(name).expanduser() for name in LEGACY_FILES)
+        except STORE_ERRORS + (ValueError, TypeError) as e:
+            # 打开失败时只在内存中保存历史记录
+            self._disable_store(e)
         self._load_history()
-    
+
     def add_record(self, record):
         """添加新的记录
-        
+
         Args:
-            record (str): 要添加的记录
+            record (str): 要添加的记录（不含时间前缀）
         """
-        self.memory_history.append(record)
-        self._save_history()
-    
+        timestamp = time.time()
+        with self._lock:
+            self.memory_history.append(record, timestamp)
+            if self.store is None:
+                return
+            try:
+                self.store.append(record, timestamp)
+            except STORE_ERRORS as e:
+                # 保存失败时不抛出异常，之后的记录只保存在内存中
+                self._disable_store(e)
+
     def get_recent_history(self, count=None):
-        """获取最近的历史记录
-        
+        """获取本进程中最近的历史记录
+
         Args:
             count (int, optional): 要获取的记录数量。默认为None，表示获取所有记录。
-        
+
         Returns:
-            list: 历史记录列表
+            list: 带时间前缀的显示文本列表（按时间顺序）
         """
-        if count is None:
-            return list(self.memory_history)
-        return list(self.memory_history)[-count:]
-    
-    def _save_history(self):
-        """将历史记录保存到文件"""
-        try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(list(self.memory_history), f, ensure_ascii=False, indent=2)
-        except Exception:
-            # 保存失败时不抛出异常，只是静默失败
-            pass
-    
+        with self._lock:
+            return self.memory_history.texts(count)
+
+    def page(self, before=None, limit=50):
+        """按游标从新到旧分页读取全部已保存的记录（包括其他进程写入的记录）
+
+        Args:
+            before (int, optional): 上一页最后一条记录的 id，None 表示从最新开始
+            limit (int): 每页记录数
+
+        Returns:
+            list: StoredRecord 列表（从新到旧），str() 为显示文本
+        """
+        return self._query('page', before=before, limit=limit)
+
+    def range(self, start=None, end=None, opcode=None):
+        """按时间范围读取已保存的记录
+
+        Args:
+            start (float, optional): 起始时间戳（含）
+            end (float, optional): 结束时间戳（含）
+            opcode (str, optional): 只返回该运算符或函数名的记录
+
+        Returns:
+            list: StoredRecord 列表（按时间顺序）
+        """
+        return self._query('range', start=start, end=end, opcode=opcode)
+
+    def search(self, query, limit=20, offset=0):
+        """搜索全部已保存的历史记录
+
+        支持子串查询和 func:sqrt、op:^、from:2026-10-01、to:2026-10-18 等过滤条件，
+        结果按时间从新到旧排列。
+
+        Args:
+            query (str): 查询文本
+            limit (int): 最多返回的记录数
+            offset (int): 跳过的匹配记录数（分页）
+
+        Returns:
+            list: 带时间前缀的显示文本列表
+        """
+        with self._lock:
+            store = self.store
+        if store is not None:
+            return [str(record) for record in self._query('search', query, limit=limit, offset=offset)]
+        # 没有历史记录库时只能在内存中的记录里查找，过滤条件与历史记录库相同（匹配不含时间前缀的文本）
+        parsed = Query(query)
+        with self._lock:
+            records = self.memory_history.select(start=parsed.start, end=parsed.end)
+        matches = [str(record) for record in reversed(records)
+                   if all(substring in record.body.lower() for substring in parsed.substrings)]
+        return matches[offset:offset + limit]
+
+    def import_files(self, paths):
+        """导入旧版 JSON / JSONL 历史文件（见 HistoryStore.import_files，重复导入是幂等的）
+
+        导入的记录只写入历史记录库，不加入本进程内存中的记录。
+
+        Args:
+            paths (iterable): 文件路径
+
+        Returns:
+            int: 导入的记录数
+
+        Raises:
+            OSError, sqlite3.Error: 历史记录库不可用或写入失败时抛出
+        """
+        with self._lock:
+            if self.store is None:
+                raise self.error or OSError("历史记录库已关闭")
+            return self.store.import_files(Path(path).expanduser() for path in paths)
+
+    def group_commit(self):
+        """组提交上下文：其中添加的记录在一个事务中写入"""
+        if self.store is None:
+            return nullcontext()
+        return self.store.group_commit()
+
+    def save_history(self):
+        """写入组提交中缓存的记录"""
+        with self._lock:
+            if self.store is None:
+                return
+            try:
+                self.store.flush()
+            except STORE_ERRORS as e:
+                self._disable_store(e)
+
+    def close(self):
+        """写入缓存的记录并关闭历史记录库（之后添加的记录只保存在内存中）"""
+        with self._lock:
+            if self.store is None:
+                return
+            try:
+                self.store.close()
+            except STORE_ERRORS as e:
+                self.error = e
+            self.store = None
+
+    def _query(self, method, *args, **kwargs):
+        with self._lock:
+            if self.store is None:
+                return []
+            try:
+                return getattr(self.store, method)(*args, **kwargs)
+            except STORE_ERRORS as e:
+                self._disable_store(e)
+                return []
+
+    def _disable_store(self, error):
+        self.error = error
+        if self.store is not None:
+            try:
+                self.store.close()
+            except STORE_ERRORS:
+                pass
+        self.store = None
+
     def _load_history(self):
-        """从文件加载历史记录"""
-        try:
-            if self.history_file.exists():
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    records = json.load(f)
-                    self.memory_history.extend(records)
-        except Exception:
-            # 加载失败时不抛出异常，使用空的历史记录
-            pass
\ No newline at end of file
+        """从历史记录库读取最近的记录"""
+        records = self._query('tail', self.memory_history.maxlen)
+        self.memory_history.extend((record.entry, record.timestamp) for record in records)
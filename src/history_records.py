@@ -0,0 +1,338 @@
+"""紧凑的历史记录存储
+
+HistoryManager 原来在内存中把每条记录保存为一个带时间前缀的字符串
+（"[2026-10-18 12:00:00] 3+5=8"）：每次添加都要 strftime，而且除了文本之外没有别的表示，
+不重新解析文本就无法按时间、运算符或数值筛选。这里改为按列保存：
+
+1. 时间戳：array('d')，Unix 时间（秒）
+2. 操作码：array('H')，指向驻留的操作码表（运算符或函数名，0 号为 '' 表示其他记录）
+3. 操作数和结果：array('d')，没有时为 NaN
+4. 错误标记：array('b')
+5. 无法由以上各列还原的记录文本（嵌套表达式、复数结果、赋值、单位转换等）
+   按序号保存在字典中
+
+一个运算符或一个函数调用、数字按最短形式书写的记录（"3+5=8"、"sqrt(25)=5"）
+只占各列中的一格，不保存文本。显示用的字符串（包括时间前缀）在读取时才生成。
+
+用法示例：
+records = HistoryRecords(maxlen=100)
+records.append("3+5=8")
+records.append("sqrt(25)=5")
+records[-1].opcode          # 'sqrt'
+str(records[0])             # '[2026-10-18 12:00:00] 3+5=8'
+records.select(opcode='+')  # [HistoryRecord(...)]
+"""
+import math
+import re
+import time
+from array import array
+
+# 显示时间前缀的格式（与旧版记录文本中的前缀相同）
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+NAN = float('nan')
+
+# 旧版记录文本开头的 "[时间] " 前缀
+TIMESTAMP_PREFIX = re.compile(r'\[\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\] ')
+
+# 没有多余的 0 和指数的十进制数
+_PLAIN_NUMBER = r'-?(?:0|[1-9]\d*)(?:\.\d*[1-9])?'
+
+# 任意十进制数
+_NUMBER = r'-?\d+(?:\.\d+)?(?:e[+-]?\d+)?'
+
+
+def _record_pattern(number):
+    """数字 运算符 数字=结果，或 函数名(数字)=结果"""
+    return re.compile(rf'(?:({number})([+\-*/%^])({number})|([A-Za-z_][A-Za-z0-9_]*)\(({number})\))'
+                      rf'=({number})$')
+
+
+PLAIN_RECORD = _record_pattern(_PLAIN_NUMBER)
+RECORD = _record_pattern(_NUMBER)
+
+# 不超过这个长度的 _PLAIN_NUMBER（数字不超过 15 位）一定是 float 的最短形式
+PLAIN_LENGTH = 15
+
+# parse_record 无法解析的记录
+UNPARSED = ('', NAN, NAN, NAN)
+
+# 操作码表的容量（array('H')）
+MAX_OPCODES = 1 << 16
+
+
+def strip_timestamp(entry):
+    """去掉旧版记录文本开头的 "[时间] " 前缀"""
+    match = TIMESTAMP_PREFIX.match(entry)
+    return entry[match.end():] if match else entry
+
+
+def _number(value):
+    """数值的最短文本（整数值不带 .0）"""
+    text = repr(value)
+    return text[:-2] if text.endswith('.0') else text
+
+
+def _parse_number(text):
+    """文本按最短形式书写时返回其数值，否则返回 None（需要保存原文）"""
+    value = float(text)
+    return value if _number(value) == text else None
+
+
+def _parse_plain(text):
+    """_PLAIN_NUMBER 的数值：位数不多且不小于 1e-4 时不必再比较 repr"""
+    if len(text) <= PLAIN_LENGTH and '.000' not in text:
+        return float(text)
+    return _parse_number(text)
+
+
+def parse_record(entry):
+    """把记录文本解析为 (操作码, 操作数 1, 操作数 2, 结果)
+
+    只有一个运算符或一个函数调用、数字按最短形式书写的记录可以解析，
+    其他记录返回 ('', NaN, NaN, NaN)；函数调用的操作数 2 为 NaN。
+    """
+    match = PLAIN_RECORD.match(entry)
+    parse = _parse_plain
+    if match is None:
+        match = RECORD.match(entry)
+        parse = _parse_number
+        if match is None:
+            return UNPARSED
+    first, op, second, name, operand, result = match.groups()
+    result = parse(result)
+    if result is None:
+        return UNPARSED
+    if name is not None:
+        operand = parse(operand)
+        if operand is None:
+            return UNPARSED
+        return name, operand, NAN, result
+    # -3^2 是 -(3^2)，第一个数字不是 ^ 的操作数
+    if op == '^' and first[0] == '-':
+        return UNPARSED
+    first, second = parse(first), parse(second)
+    if first is None or second is None:
+        return UNPARSED
+    return op, first, second, result
+
+
+def format_record(timestamp, body):
+    """带 "[时间] " 前缀的显示文本"""
+    return f"[{time.strftime(TIME_FORMAT, time.localtime(timestamp))}] {body}"
+
+
+class HistoryRecord:
+    """一条历史记录（显示文本在第一次使用时生成）
+
+    属性：
+        timestamp (float): Unix 时间戳（秒）
+        opcode (str): 运算符或函数名，其他记录为 ''
+        operands (tuple): 操作数（float）
+        result (float): 结果，不是实数时为 NaN
+        error (bool): 是否为出错的计算
+    """
+    __slots__ = ('timestamp', 'opcode', 'operands', 'result', 'error', '_body', '_show_time')
+
+    def __init__(self, timestamp, opcode, operands, result, error=False, body=None,
+                 show_time=True):
+        self.timestamp = timestamp
+        self.opcode = opcode
+        self.operands = operands
+        self.result = result
+        self.error = error
+        self._body = body
+        self._show_time = show_time
+
+    @property
+    def body(self):
+        """不含时间前缀的记录文本"""
+        if self._body is None:
+            result = _number(self.result)
+            if len(self.operands) == 2:
+                a, b = self.operands
+                self._body = f"{_number(a)}{self.opcode}{_number(b)}={result}"
+            else:
+                self._body = f"{self.opcode}({_number(self.operands[0])})={result}"
+        return self._body
+
+    def text(self, show_time=True):
+        """显示文本（show_time 为 True 时带 "[时间] " 前缀）"""
+        if not show_time:
+            return self.body
+        return format_record(self.timestamp, self.body)
+
+    def __str__(self):
+        return self.text(self._show_time)
+
+    def __repr__(self):
+        return (f"HistoryRecord(timestamp={self.timestamp!r}, opcode={self.opcode!r}, "
+                f"operands={self.operands!r}, result={self.result!r}, error={self.error!r})")
+
+
+class HistoryRecords:
+    """按列保存的历史记录序列（超过 maxlen 时丢弃最早的记录，与 deque 相同）
+
+    属性：
+        maxlen (int): 最多保存的记录数，None 表示不限
+        show_time (bool): 显示文本是否带时间前缀
+    """
+
+    def __init__(self, maxlen=None, show_time=True):
+        self.maxlen = maxlen
+        self.show_time = show_time
+        self._timestamps = array('d')
+        self._opcodes = array('H')
+        self._first = array('d')
+        self._second = array('d')
+        self._results = array('d')
+        self._errors = array('b')
+        # 序号 -> 无法由各列还原的记录文本（序号从第一条记录开始累计，丢弃记录后不变）
+        self._texts = {}
+        self._opcode_table = ['']
+        self._opcode_ids = {'': 0}
+        # 各列中第一个有效位置和它的序号
+        self._start = 0
+        self._base = 0
+
+    # ======================
+    # 添加
+    # ======================
+    def append(self, entry, timestamp=None, error=False):
+        """添加一条记录
+
+        参数：
+            entry (str): 记录文本（不含时间前缀，如 "3+5=8"）
+            timestamp (float, optional): Unix 时间戳，默认为当前时间
+            error (bool): 是否为出错的计算
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        opcode, first, second, result = self._encode(entry)
+        if opcode == 0:
+            self._texts[self._base + len(self._timestamps) - self._start] = entry
+        self._timestamps.append(timestamp)
+        self._opcodes.append(opcode)
+        self._first.append(first)
+        self._second.append(second)
+        self._results.append(result)
+        self._errors.append(error)
+        if self.maxlen is not None and len(self._timestamps) - self._start > self.maxlen:
+            self._drop_oldest()
+
+    def extend(self, entries):
+        """添加多条记录：entries 为 (记录文本, 时间戳) 的序列"""
+        for entry, timestamp in entries:
+            self.append(entry, timestamp)
+
+    def clear(self):
+        """删除全部记录"""
+        self._base += len(self)
+        self._start = 0
+        for column in self._columns():
+            del column[:]
+        self._texts.clear()
+
+    # ======================
+    # 读取
+    # ======================
+    def __len__(self):
+        return len(self._timestamps) - self._start
+
+    def __getitem__(self, index):
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError('history index out of range')
+        return self._record(self._start + index)
+
+    def __iter__(self):
+        for position in range(self._start, len(self._timestamps)):
+            yield self._record(position)
+
+    def texts(self, count=None):
+        """最近 count 条记录的显示文本（按时间顺序，None 表示全部）"""
+        total = len(self)
+        first = self._start if count is None else self._start + max(0, total - count)
+        return [str(self._record(position)) for position in range(first, len(self._timestamps))]
+
+    def select(self, opcode=None, start=None, end=None, error=None):
+        """按列筛选记录，不解析记录文本
+
+        参数：
+            opcode (str, optional): 运算符或函数名
+            start (float, optional): 起始时间戳（含）
+            end (float, optional): 结束时间戳（含）
+            error (bool, optional): 只返回出错 / 成功的记录
+
+        返回：
+            list: 匹配的 HistoryRecord（按时间顺序）
+        """
+        if opcode is not None:
+            opcode_id = self._opcode_ids.get(opcode)
+            if opcode_id is None:
+                return []
+        timestamps, opcodes, errors = self._timestamps, self._opcodes, self._errors
+        matches = []
+        for position in range(self._start, len(timestamps)):
+            if opcode is not None and opcodes[position] != opcode_id:
+                continue
+            if start is not None and timestamps[position] < start:
+                continue
+            if end is not None and timestamps[position] > end:
+                continue
+            if error is not None and bool(errors[position]) != error:
+                continue
+            matches.append(self._record(position))
+        return matches
+
+    # ======================
+    # 内部实现
+    # ======================
+    def _columns(self):
+        return (self._timestamps, self._opcodes, self._first, self._second,
+                self._results, self._errors)
+
+    def _opcode_id(self, opcode):
+        """驻留操作码，返回它的编号（操作码表已满时返回 0）"""
+        opcode_id = self._opcode_ids.get(opcode)
+        if opcode_id is None:
+            if len(self._opcode_table) >= MAX_OPCODES:
+                return 0
+            opcode_id = self._opcode_ids[opcode] = len(self._opcode_table)
+            self._opcode_table.append(opcode)
+        return opcode_id
+
+    def _encode(self, entry):
+        """返回 (操作码编号, 操作数 1, 操作数 2, 结果)，不能按列保存时操作码编号为 0"""
+        opcode, first, second, result = parse_record(entry)
+        if not opcode:
+            return 0, NAN, NAN, NAN
+        return self._opcode_id(opcode), first, second, result
+
+    def _record(self, position):
+        opcode_id = self._opcodes[position]
+        first = self._first[position]
+        if opcode_id == 0:
+            body = self._texts[self._base + position - self._start]
+            operands = ()
+        else:
+            body = None
+            second = self._second[position]
+            operands = (first,) if math.isnan(second) else (first, second)
+        return HistoryRecord(self._timestamps[position], self._opcode_table[opcode_id],
+                             operands, self._results[position], bool(self._errors[position]),
+                             body, self.show_time)
+
+    def _drop_oldest(self):
+        """丢弃最早的记录：只移动起点，无效位置积累到 maxlen 时再一次性删除（均摊 O(1)）"""
+        position = self._start
+        if self._opcodes[position] == 0:
+            del self._texts[self._base]
+        self._start += 1
+        self._base += 1
+        if self._start >= max(self.maxlen, 64):
+            for column in self._columns():
+                del column[:self._start]
+            self._start = 0
@@ -0,0 +1,480 @@
+"""SQLite 历史记录库
+
+替代原来两套互不兼容的历史文件（calc-cli 写当前目录下的 calc_history.jsonl，
+图形界面写 ~/.calculator_history.jsonl）：所有前端共用用户数据目录下的一个 SQLite 数据库。
+
+功能：
+1. WAL 模式：多个进程（calc-cli、图形界面、calc-server）可以同时写入，读取不阻塞写入；
+   每次写入是一个短事务，被锁定时按 timeout 等待
+2. 组提交：group_commit() 上下文中的记录先缓存，每 FLUSH_EVERY 条或退出时在一个事务中写入
+3. 按时间戳和操作码（运算符或函数名，见 history_records.parse_record）建立索引：
+   - page(before=..., limit=...): 按游标（记录编号）从新到旧分页，耗时与翻到第几页无关
+   - range(start, end): 按时间范围查询
+4. 全文搜索：FTS5 trigram 索引加速子串查询（SQLite 不支持 FTS5 时逐条比较）
+5. 导入旧版 JSON / JSONL 历史文件，按文件记录已导入的条数，重复导入时只追加新增的记录
+6. 打开时只保留最近 retain 条记录
+
+表结构：
+    history(id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL, op TEXT, entry TEXT)
+    imports(path TEXT PRIMARY KEY, size INTEGER, mtime REAL, count INTEGER)
+
+搜索语法（多个条件之间为"与"关系）：
+    sqrt 25          子串查询（不区分大小写）
+    func:sqrt        包含 sqrt( 调用的记录
+    op:^             包含 ^ 运算符的记录
+    from:2026-10-01  时间不早于该日期（也可写 2026-10-01T12:00:00）
+    to:2026-10-18    时间不晚于该日期（含当天）
+
+用法示例：
+store = HistoryStore(path)
+store.append("3+5=8")
+rows = store.page(limit=50)                 # 最新的 50 条
+older = store.page(before=rows[-1].id)      # 下一页
+store.range(start, end, opcode='sqrt')
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from src.history_records import TIME_FORMAT, format_record, parse_record, strip_timestamp
+
+DB_FILE = 'history.sqlite'
+
+# 等待其他进程释放写锁的最长时间（秒）
+DB_TIMEOUT = 5.0
+
+# 组提交中每缓存多少条记录写入一次
+FLUSH_EVERY = 256
+
+# 打开时保留的最近记录数
+DEFAULT_RETAIN = 1000000
+
+DEFAULT_PAGE_SIZE = 50
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+# 读写数据库可能抛出的异常
+STORE_ERRORS = (OSError, sqlite3.Error)
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS history ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL,"
+    " op TEXT NOT NULL DEFAULT '', entry TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS history_ts ON history (ts)",
+    "CREATE INDEX IF NOT EXISTS history_op ON history (op, ts)",
+    "CREATE TABLE IF NOT EXISTS imports ("
+    " path TEXT PRIMARY KEY, size INTEGER, mtime REAL, count INTEGER)",
+)
+
+# 外部内容的全文索引：只保存 trigram，记录文本仍在 history 表中。
+# 新记录不用触发器逐行写入索引（每条约 45 µs），由 _insert 在同一事务中批量写入
+FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE history_fts USING fts5("
+    " entry, content='history', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER history_fts_delete AFTER DELETE ON history BEGIN"
+    " INSERT INTO history_fts (history_fts, rowid, entry) VALUES ('delete', old.id, old.entry); END",
+    "INSERT INTO history_fts (history_fts) VALUES ('rebuild')",
+)
+
+# trigram 索引能匹配的最短子串
+TRIGRAM = 3
+
+
+class StoredRecord(namedtuple('StoredRecord', ['id', 'timestamp', 'entry'])):
+    """数据库中的一条记录（str() 为带时间前缀的显示文本）"""
+    __slots__ = ()
+
+    def __str__(self):
+        return format_record(self.timestamp, self.entry)
+
+
+def legacy_timestamp(entry, default):
+    """从旧版记录的 "[时间] " 前缀解析时间戳，失败时返回 default"""
+    if isinstance(entry, str) and entry.startswith('[') and ']' in entry:
+        try:
+            return datetime.strptime(entry[1:entry.index(']')], TIME_FORMAT).timestamp()
+        except ValueError:
+            pass
+    return default
+
+
+def read_legacy_file(path, skip=0):
+    """读取旧版历史文件
+
+    支持两种格式：JSON 字符串数组（"[时间] 表达式=结果"），
+    以及每行一个 {"ts": 时间戳, "entry": 记录文本} 的 JSONL 日志。
+    没有时间戳的记录取文件的修改时间；无法解析的行（崩溃时写了一半）跳过。
+
+    参数：
+        path (Path): 文件路径
+        skip (int): 跳过开头的记录数（之前已经导入的部分）
+
+    返回：
+        list: (时间戳, 不带时间前缀的记录文本) 列表
+    """
+    default = path.stat().st_mtime
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        entries = json.loads(text)
+        if not isinstance(entries, list):
+            raise ValueError(f"无法识别的历史文件: {path}")
+        records = [(legacy_timestamp(entry, default), entry)
+                   for entry in entries if isinstance(entry, str)]
+    else:
+        records = []
+        for line in text.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and isinstance(record.get('entry'), str):
+                entry = record['entry']
+                records.append((record.get('ts') or legacy_timestamp(entry, default), entry))
+    return [(timestamp, strip_timestamp(entry)) for timestamp, entry in records[skip:]]
+
+
+def parse_date(value, end_of_day=False):
+    """解析查询中的日期，返回时间戳
+
+    参数：
+        value (str): YYYY-MM-DD 或 YYYY-MM-DDTHH:MM[:SS]
+        end_of_day (bool): 只给出日期时是否取当天结束时刻
+    """
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"无法识别的日期: {value}")
+    if end_of_day and len(value) <= 10:
+        moment += timedelta(days=1)
+        return moment.timestamp() - 1e-6
+    return moment.timestamp()
+
+
+class Query:
+    """解析后的搜索条件
+
+    属性：
+        substrings (list): 记录文本中必须包含的子串（小写；函数条件为 "name("）
+        start (float): 起始时间戳（含），None 表示不限
+        end (float): 结束时间戳（含），None 表示不限
+    """
+
+    def __init__(self, text):
+        self.substrings = []
+        self.start = None
+        self.end = None
+        for part in text.lower().split():
+            prefix, _, value = part.partition(':')
+            if value and prefix == 'func':
+                self.substrings.append(value + '(')
+            elif value and prefix == 'op':
+                self.substrings.append(value)
+            elif value and prefix == 'from':
+                self.start = parse_date(value)
+            elif value and prefix == 'to':
+                self.end = parse_date(value, end_of_day=True)
+            else:
+                self.substrings.append(part)
+
+
+class HistoryStore:
+    """SQLite 历史记录库
+
+    属性：
+        path (Path): 数据库文件路径
+        synchronous (str): PRAGMA synchronous，见 SYNCHRONOUS_MODES
+            （WAL 模式下 NORMAL 只在检查点同步，断电时可能丢失最后几条记录；FULL 每次提交都同步）
+        timeout (float): 等待其他进程释放写锁的最长时间（秒）
+        retain (int): 打开时保留的最近记录数
+        full_text (bool): 是否有 FTS5 全文索引
+    """
+
+    def __init__(self, path, synchronous='NORMAL', timeout=DB_TIMEOUT, retain=DEFAULT_RETAIN):
+        """打开（必要时创建）历史记录库
+
+        异常：
+            ValueError: synchronous 不支持时抛出
+            sqlite3.Error, OSError: 数据库无法打开时抛出
+        """
+        synchronous = str(synchronous).upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"不支持的 synchronous 模式: {synchronous}")
+        self.path = Path(path)
+        self.synchronous = synchronous
+        self.timeout = float(timeout)
+        self.retain = max(1, int(retain))
+        self.full_text = False
+        # 图形界面在工作线程中写入、在界面线程中查询
+        self._lock = threading.RLock()
+        self._pending = []
+        self._group_depth = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None：由这里显式开始事务，不在每条语句前隐式 BEGIN
+        self._db = sqlite3.connect(str(self.path), timeout=self.timeout,
+                                   isolation_level=None, check_same_thread=False)
+        try:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(f"PRAGMA synchronous={synchronous}")
+            self._create_schema()
+            self._prune()
+        except Exception:
+            self._db.close()
+            raise
+
+    # ======================
+    # 建表与维护
+    # ======================
+    @contextmanager
+    def _transaction(self):
+        """写事务：BEGIN IMMEDIATE 一开始就取得写锁，避免读锁升级时与其他进程死锁"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _create_schema(self):
+        with self._transaction() as db:
+            for statement in SCHEMA:
+                db.execute(statement)
+            exists = db.execute("SELECT 1 FROM sqlite_master WHERE name = 'history_fts'").fetchone()
+            if exists is None:
+                try:
+                    db.execute("SAVEPOINT fts")
+                    for statement in FTS_SCHEMA:
+                        db.execute(statement)
+                    db.execute("RELEASE fts")
+                    exists = True
+                except sqlite3.OperationalError:
+                    # 没有编译 FTS5 或 trigram 分词器（SQLite < 3.34）
+                    db.execute("ROLLBACK TO fts")
+                    db.execute("RELEASE fts")
+            self.full_text = exists is not None
+
+    def _prune(self):
+        """只保留最近 retain 条记录"""
+        with self._transaction() as db:
+            db.execute("DELETE FROM history WHERE id <= (SELECT MAX(id) FROM history) - ?",
+                       (self.retain,))
+
+    def close(self):
+        """写入缓存的记录并关闭数据库"""
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                self._flush()
+            finally:
+                self._db.close()
+                self._db = None
+
+    # ======================
+    # 写入
+    # ======================
+    def append(self, entry, timestamp=None):
+        """添加一条记录（组提交中只写入缓存）
+
+        参数：
+            entry (str): 记录文本（不含时间前缀）
+            timestamp (float, optional): Unix 时间戳，默认为当前时间
+        """
+        row = (time.time() if timestamp is None else timestamp, parse_record(entry)[0], entry)
+        with self._lock:
+            self._pending.append(row)
+            if not self._group_depth or len(self._pending) >= FLUSH_EVERY:
+                self._flush()
+
+    def append_many(self, entries, timestamp=None):
+        """在一个事务中添加多条记录（时间戳相同）"""
+        now = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._pending.extend((now, parse_record(entry)[0], entry) for entry in entries)
+            self._flush()
+
+    @contextmanager
+    def group_commit(self):
+        """组提交上下文：其中的记录每 FLUSH_EVERY 条或退出时在一个事务中写入
+
+        可以嵌套，只在最外层退出时写入。
+        """
+        with self._lock:
+            self._group_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._group_depth -= 1
+                if not self._group_depth:
+                    self._flush()
+
+    def flush(self):
+        """写入缓存的记录"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        with self._transaction() as db:
+            self._insert(db, pending)
+
+    def _insert(self, db, rows):
+        """在当前写事务中写入 (ts, op, entry) 记录，并为它们建立全文索引"""
+        # 事务持有写锁，其他进程不会在这之后插入记录
+        last = db.execute("SELECT IFNULL(MAX(id), 0) FROM history").fetchone()[0]
+        db.executemany("INSERT INTO history (ts, op, entry) VALUES (?, ?, ?)", rows)
+        if self.full_text:
+            db.execute("INSERT INTO history_fts (rowid, entry) SELECT id, entry FROM history WHERE id > ?",
+                       (last,))
+
+    # ======================
+    # 查询
+    # ======================
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM history")[0][0]
+
+    def tail(self, count):
+        """最近的 count 条记录（按时间顺序）"""
+        if count <= 0:
+            return []
+        return self.page(limit=count)[::-1]
+
+    def page(self, before=None, limit=DEFAULT_PAGE_SIZE):
+        """按游标从新到旧分页（沿主键倒序读取，耗时与翻到第几页无关）
+
+        参数：
+            before (int, optional): 只返回编号小于它的记录（上一页最后一条的 id），None 表示从最新开始
+            limit (int): 每页记录数
+
+        返回：
+            list: StoredRecord 列表（从新到旧），少于 limit 条时说明已经没有更早的记录
+        """
+        if before is None:
+            return self._records("SELECT id, ts, entry FROM history ORDER BY id DESC LIMIT ?", (limit,))
+        return self._records("SELECT id, ts, entry FROM history WHERE id < ? ORDER BY id DESC LIMIT ?",
+                             (before, limit))
+
+    def range(self, start=None, end=None, opcode=None, limit=None):
+        """按时间范围查询
+
+        参数：
+            start (float, optional): 起始时间戳（含）
+            end (float, optional): 结束时间戳（含）
+            opcode (str, optional): 只返回该运算符或函数名的记录
+            limit (int, optional): 最多返回的记录数
+
+        返回：
+            list: StoredRecord 列表（按时间顺序）
+        """
+        conditions, args = [], []
+        if start is not None:
+            conditions.append("ts >= ?")
+            args.append(start)
+        if end is not None:
+            conditions.append("ts <= ?")
+            args.append(end)
+        if opcode is not None:
+            conditions.append("op = ?")
+            args.append(opcode)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        args.append(-1 if limit is None else limit)
+        return self._records(f"SELECT id, ts, entry FROM history{where} ORDER BY ts, id LIMIT ?", args)
+
+    def search(self, query, limit=20, offset=0):
+        """搜索历史记录（语法见模块说明），结果从新到旧
+
+        有时间条件时沿时间戳索引从范围末尾向前逐条比较子串；否则不短于 3 个字符的子串
+        通过 trigram 索引按编号倒序查找，更短的子串在候选记录上逐条比较。
+        两种方式都在找到 offset + limit 条后停止。
+
+        返回：
+            list: StoredRecord 列表
+        """
+        parsed = Query(query)
+        conditions, args = [], []
+        timed = parsed.start is not None or parsed.end is not None
+        phrases = []
+        for substring in parsed.substrings:
+            if self.full_text and not timed and len(substring) >= TRIGRAM:
+                phrases.append('"' + substring.replace('"', '""') + '"')
+            else:
+                conditions.append("instr(lower(h.entry), ?) > 0")
+                args.append(substring)
+        if parsed.start is not None:
+            conditions.append("h.ts >= ?")
+            args.append(parsed.start)
+        if parsed.end is not None:
+            conditions.append("h.ts <= ?")
+            args.append(parsed.end)
+        source, order = "history h", "h.id DESC"
+        if phrases:
+            source, order = "history_fts f JOIN history h ON h.id = f.rowid", "f.rowid DESC"
+            conditions.insert(0, "history_fts MATCH ?")
+            args.insert(0, ' AND '.join(phrases))
+        elif timed:
+            order = "h.ts DESC, h.id DESC"
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._records(f"SELECT h.id, h.ts, h.entry FROM {source}{where} ORDER BY {order} "
+                             f"LIMIT ? OFFSET ?", args + [limit, offset])
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            # 组提交中缓存的记录也要能查到
+            self._flush()
+            return self._db.execute(sql, args).fetchall()
+
+    def _records(self, sql, args):
+        return [StoredRecord(*row) for row in self._query(sql, args)]
+
+    # ======================
+    # 旧版数据导入
+    # ======================
+    def import_files(self, paths):
+        """导入旧版历史文件（见 read_legacy_file）
+
+        每个文件已导入的记录数保存在 imports 表中：文件没有变化时跳过，
+        变长时只导入新增的记录。同一次导入的全部记录按时间排序后在一个事务中写入，
+        多个进程同时导入同一文件时只有一个会写入。
+
+        参数：
+            paths (iterable): 文件路径，不存在的文件忽略
+
+        返回：
+            int: 导入的记录数
+        """
+        with self._transaction() as db:
+            rows, imports = [], []
+            for path in map(Path, paths):
+                try:
+                    stat = path.stat()
+                    if not stat.st_size:
+                        continue
+                    key = str(path.resolve())
+                    row = db.execute("SELECT size, mtime, count FROM imports WHERE path = ?",
+                                     (key,)).fetchone()
+                    if row is not None and row[:2] == (stat.st_size, stat.st_mtime):
+                        continue
+                    # 文件变短说明被重写（如压缩），无法判断哪些是新记录，整体跳过
+                    if row is not None and stat.st_size < row[0]:
+                        continue
+                    skip = row[2] if row is not None else 0
+                    records = read_legacy_file(path, skip)
+                except (OSError, ValueError):
+                    continue
+                rows.extend(records)
+                imports.append((key, stat.st_size, stat.st_mtime, skip + len(records)))
+            rows.sort(key=lambda record: record[0])
+            self._insert(db, [(timestamp, parse_record(entry)[0], entry) for timestamp, entry in rows])
+            db.executemany("INSERT OR REPLACE INTO imports (path, size, mtime, count) VALUES (?, ?, ?, ?)",
+                           imports)
+        return len(rows)
@@ -1,8 +1,8 @@
-import json
-import yaml
-from pathlib import Path
+import marshal
 import os
 import sys
+import threading
+from functools import lru_cache
 
 def get_resource_path(relative_path):
     """获取资源文件的绝对路径（支持 PyInstaller 打包）"""
@@ -12,65 +12,176 @@ def get_resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+# 内置的默认翻译（语言文件缺失或缺少某个键时使用）
+DEFAULT_TRANSLATIONS = {
+    'welcome': 'Advanced Scientific Calculator (Enter \'h\' for help)',
+    'prompt': 'Enter expression (or command): ',
+    'help_title': 'Help Information',
+    'basic_ops': 'Basic Operations',
+    'func_call': 'Function Call',
+    'complex_ops': 'Complex Operations',
+    'supported_funcs': 'Supported Functions',
+    'commands': 'Commands',
+    'result': 'Result',
+    'exit': 'Exit',
+    'help': 'Help',
+    'clear': 'Clear',
+    'history': 'History',
+    'multiline': 'Multi-line',
+    'multiline_enabled': 'Multi-line mode enabled',
+    'multiline_disabled': 'Multi-line mode disabled',
+    'error': {
+        'division_by_zero': 'Division by zero',
+        'invalid_expression': 'Invalid expression format',
+        'init_failed': 'Initialization failed'
+    }
+}
+
+# 编译后的语言文件格式版本（格式变化时递增，旧的编译文件自动失效）
+CATALOG_FORMAT = 1
+
+# 进程内共享的翻译表：语言 -> 扁平化的 {点分键: 文本}
+_catalogs = {}
+# 进程内共享的格式模板：(语言, 键) -> 预编译的 % 模板，None 表示需要 str.format
+_templates = {}
+_lock = threading.Lock()
+
+def flatten(translations, prefix=''):
+    """把嵌套的翻译字典展开为 {点分键: 文本}"""
+    flat = {}
+    for key, value in translations.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = str(value)
+    return flat
+
+def catalog_path(lang):
+    """语言文件路径（PyInstaller 打包后位于 _MEIPASS 下）"""
+    if hasattr(sys, '_MEIPASS'):
+        return get_resource_path(f'src/i18n/{lang}.json')
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), f'{lang}.json')
+
+def _compiled_path(lang):
+    return os.path.join(_compiled_dir(), f'{lang}.marshal')
+
+@lru_cache(maxsize=None)
+def _compiled_dir():
+    """编译后的语言文件目录（用户缓存目录下的 i18n，只计算一次）"""
+    from src.utils.paths import user_cache_dir
+    return str(user_cache_dir() / 'i18n')
+
+def _read_compiled(lang, stat):
+    """读取编译后的语言文件，源文件的修改时间或大小不一致时返回 None"""
+    try:
+        with open(_compiled_path(lang), 'rb') as f:
+            header, catalog = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if header != (CATALOG_FORMAT, stat.st_mtime_ns, stat.st_size) or not isinstance(catalog, dict):
+        return None
+    return catalog
+
+def _write_compiled(lang, stat, catalog):
+    try:
+        os.makedirs(_compiled_dir(), exist_ok=True)
+        path = _compiled_path(lang)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            marshal.dump(((CATALOG_FORMAT, stat.st_mtime_ns, stat.st_size), catalog), f)
+        os.replace(tmp_path, path)
+    except OSError:
+        # 编译文件只用于加速，写入失败时下次仍解析 JSON
+        pass
+
+def load_file(path, lang):
+    """读取语言文件并展开
+
+    优先使用用户缓存目录中编译好的 marshal 文件（与源文件的修改时间和大小一致时），
+    否则解析 JSON 并写入编译文件。
+
+    返回：
+        dict: {点分键: 文本}；文件不存在时返回空字典
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {}
+    catalog = _read_compiled(lang, stat)
+    if catalog is None:
+        import json
+        with open(path, 'r', encoding='utf-8') as f:
+            catalog = flatten(json.load(f))
+        _write_compiled(lang, stat, catalog)
+    return catalog
+
+def load_catalog(lang):
+    """返回语言的扁平化翻译表（每个进程只加载一次）"""
+    catalog = _catalogs.get(lang)
+    if catalog is not None:
+        return catalog
+    with _lock:
+        catalog = _catalogs.get(lang)
+        if catalog is None:
+            catalog = flatten(DEFAULT_TRANSLATIONS)
+            try:
+                catalog.update(load_file(catalog_path(lang), lang))
+            except Exception as e:
+                print(f"Warning: Unable to load translation file, using defaults - {str(e)}")
+            _catalogs[lang] = catalog
+    return catalog
+
+def compile_template(template):
+    """把只含 {} 占位符的模板编译为 % 模板，含有其他格式语法时返回 None"""
+    parts = template.split('{}')
+    if any('{' in part or '}' in part for part in parts):
+        return None
+    return '%s'.join(part.replace('%', '%%') for part in parts)
+
+def clear_cache():
+    """清空进程内的翻译表和格式模板（语言文件修改后重新加载）"""
+    with _lock:
+        _catalogs.clear()
+        _templates.clear()
+
 class Translator:
     """国际化翻译器
-    
+
     配置说明：
     1. 语言设置：从 config.yaml 的 language 字段读取
-    2. 翻译文件：从 i18n/{language}.json 读取
+    2. 翻译文件：从 i18n/{language}.json 读取，展开为点分键（error.division_by_zero）的扁平字典
     3. 翻译规则：使用键值对映射，找不到键时返回原文
-    
+    4. 缓存：同一进程中的所有 Translator 共享每种语言的翻译表；语言文件编译为 marshal 格式
+       缓存在用户缓存目录中，之后启动时不再解析 JSON
+
     用法示例：
     translator = Translator()
     text = translator.translate("key")  # 返回对应语言的文本
+    text = translator.format("error.calc_error", "1/0")  # 填充 {} 占位符
     """
-    def __init__(self):
-        self.translations = {
-            'welcome': 'Advanced Scientific Calculator (Enter \'h\' for help)',
-            'prompt': 'Enter expression (or command): ',
-            'help_title': 'Help Information',
-            'basic_ops': 'Basic Operations',
-            'func_call': 'Function Call',
-            'complex_ops': 'Complex Operations',
-            'supported_funcs': 'Supported Functions',
-            'commands': 'Commands',
-            'result': 'Result',
-            'exit': 'Exit',
-            'help': 'Help',
-            'clear': 'Clear',
-            'history': 'History',
-            'multiline': 'Multi-line',
-            'multiline_enabled': 'Multi-line mode enabled',
-            'multiline_disabled': 'Multi-line mode disabled',
-            'error': {
-                'division_by_zero': 'Division by zero',
-                'invalid_expression': 'Invalid expression format',
-                'init_failed': 'Initialization failed'
-            }
-        }
-        
-        try:
-            lang = os.environ.get('LANG', 'en_US').split('.')[0]
-            i18n_path = self.get_resource_path(f'src/i18n/{lang}.json')
-            if os.path.exists(i18n_path):
-                with open(i18n_path, 'r', encoding='utf-8') as f:
-                    self.translations.update(json.load(f))
-        except Exception as e:
-            print(f"Warning: Unable to load translation file, using defaults - {str(e)}")
+    def __init__(self, lang=None):
+        self.lang = lang or os.environ.get('LANG', 'en_US').split('.')[0]
+        self.translations = load_catalog(self.lang)
 
     def get_resource_path(self, relative_path):
-        try:
-            base_path = sys._MEIPASS
-        except Exception:
-            base_path = os.path.abspath(".")
-        return os.path.join(base_path, relative_path)
+        return get_resource_path(relative_path)
 
     def translate(self, key):
-        keys = key.split('.')
-        value = self.translations
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return key
-        return str(value)
\ No newline at end of file
+        return self.translations.get(key, key)
+
+    def format(self, key, *args):
+        """翻译并按顺序填充模板中的 {} 占位符
+
+        模板第一次使用时按 {} 拆分并编译为 % 模板（比 str.format 快）后缓存；
+        含有其他格式语法（{0}、{name}、{{ 等）的模板使用 str.format。
+        参数个数与占位符个数不一致时返回未填充的模板。
+        """
+        compiled = _templates.get((self.lang, key), False)
+        if compiled is False:
+            compiled = _templates[(self.lang, key)] = compile_template(self.translate(key))
+        try:
+            if compiled is None:
+                return self.translate(key).format(*args)
+            return compiled % args
+        except (IndexError, KeyError, ValueError, TypeError):
+            return self.translate(key)
@@ -0,0 +1,346 @@
+"""运行指标：热点路径的调用次数、错误次数和延迟直方图
+
+启用后在以下方法外包一层计时：
+1. ScientificCalculator.process_expression（expression）
+2. CalculatorCore.calculate（operator，按运算符区分）
+3. CalculatorCore.process_function（function，按函数名区分）
+4. UnitConverter.convert（unit.convert）
+5. HistoryStore.append / append_many / flush（history.*，历史记录持久化）
+
+计时层在 enable() 时替换类上的方法，disable() 时恢复原方法，因此未启用时没有任何额外开销。
+被 handle_errors 装饰的方法在装饰器内部计时，错误在被 handle_errors 吞掉之前按消息键计数。
+
+指标可以通过交互模式的 stats 命令查看，或用 write() 导出为 JSON / Prometheus 文本格式。
+
+用法示例：
+metrics.enable()
+...
+print(metrics.REGISTRY.snapshot())
+metrics.write('metrics.prom')
+"""
+import atexit
+import json
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+
+# 直方图在每个 2 的幂区间内的子桶数为 2^SUB_BUCKET_BITS（相对误差约 1/16）
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+# 报告的百分位数
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Prometheus 直方图的桶上限（秒）
+PROMETHEUS_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                      1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+
+
+def bucket_index(value):
+    """返回 value（非负整数）所在的桶
+
+    小于 2 * SUB_BUCKETS 的值每个值一个桶；更大的值按最高的 SUB_BUCKET_BITS + 1 位分桶。
+    """
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return shift * SUB_BUCKETS + (value >> shift)
+
+
+def bucket_upper_bound(index):
+    """返回桶内的最大值"""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    top = index - shift * SUB_BUCKETS
+    return ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """HDR 风格的对数线性延迟直方图（纳秒）
+
+    桶的宽度随数值按 2 的幂增长，任意量级上的相对误差都不超过 1/SUB_BUCKETS，
+    只保存非空的桶。
+
+    属性：
+        count (int): 记录次数
+        total (int): 延迟总和（纳秒）
+        min (int): 最小延迟，没有记录时为 None
+        max (int): 最大延迟
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, value):
+        index = bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """返回第 q 百分位的延迟（所在桶的上限，不超过 max）"""
+        if not self.count:
+            return 0
+        threshold = self.count * q / 100
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= threshold:
+                return min(bucket_upper_bound(index), self.max)
+        return self.max
+
+    def cumulative(self, bounds):
+        """返回不超过各个上限的记录数（用于 Prometheus 直方图）"""
+        counts = []
+        items = sorted(self.buckets.items())
+        for bound in bounds:
+            counts.append(sum(count for index, count in items if bucket_upper_bound(index) <= bound))
+        return counts
+
+    def snapshot(self):
+        data = {
+            'count': self.count,
+            'sum_ns': self.total,
+            'min_ns': self.min or 0,
+            'max_ns': self.max,
+            'mean_ns': self.total // self.count if self.count else 0,
+        }
+        for q in PERCENTILES:
+            data[f"p{q:g}_ns"] = self.percentile(q)
+        return data
+
+
+class MetricsRegistry:
+    """指标注册表：按 (操作, 名称) 记录调用次数、错误次数和延迟
+
+    属性：
+        enabled (bool): 计时层是否已安装
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._errors = {}
+        self._latency = {}
+
+    def record(self, operation, name, elapsed_ns, error=None):
+        key = (operation, name)
+        with self._lock:
+            self._calls[key] = self._calls.get(key, 0) + 1
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = LatencyHistogram()
+            histogram.record(elapsed_ns)
+            if error is not None:
+                errors = self._errors.setdefault(key, {})
+                message_key = error_key(error)
+                errors[message_key] = errors.get(message_key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
+            self._errors.clear()
+            self._latency.clear()
+
+    def snapshot(self):
+        """返回所有指标
+
+        返回：
+            list: 按操作和名称排序的 dict（operation, name, calls, errors, latency）
+        """
+        with self._lock:
+            return [{
+                'operation': operation,
+                'name': name,
+                'calls': self._calls[(operation, name)],
+                'errors': dict(self._errors.get((operation, name), {})),
+                'latency': self._latency[(operation, name)].snapshot(),
+            } for operation, name in sorted(self._calls)]
+
+    def to_json(self):
+        return json.dumps({'generated_at': time.time(), 'metrics': self.snapshot()},
+                          ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        """Prometheus 文本格式（calculator_calls_total、calculator_errors_total、calculator_latency_seconds）"""
+        with self._lock:
+            keys = sorted(self._calls)
+            calls = dict(self._calls)
+            errors = {key: dict(value) for key, value in self._errors.items()}
+            latency = {key: (histogram.cumulative([bound * 1e9 for bound in PROMETHEUS_BUCKETS]),
+                             histogram.count, histogram.total)
+                       for key, histogram in self._latency.items()}
+        lines = ['# HELP calculator_calls_total Number of calls.',
+                 '# TYPE calculator_calls_total counter']
+        for key in keys:
+            lines.append(f"calculator_calls_total{{{_labels(key)}}} {calls[key]}")
+        lines += ['# HELP calculator_errors_total Number of failed calls by error message key.',
+                  '# TYPE calculator_errors_total counter']
+        for key in keys:
+            for message_key, count in sorted(errors.get(key, {}).items()):
+                lines.append(f"calculator_errors_total{{{_labels(key, error=message_key)}}} {count}")
+        lines += ['# HELP calculator_latency_seconds Call latency.',
+                  '# TYPE calculator_latency_seconds histogram']
+        for key in keys:
+            cumulative, count, total = latency[key]
+            for bound, bucket_count in zip(PROMETHEUS_BUCKETS, cumulative):
+                lines.append(f"calculator_latency_seconds_bucket{{{_labels(key, le=f'{bound:g}')}}} "
+                             f"{bucket_count}")
+            lines.append(f"calculator_latency_seconds_bucket{{{_labels(key, le='+Inf')}}} {count}")
+            lines.append(f"calculator_latency_seconds_sum{{{_labels(key)}}} {total / 1e9:.9f}")
+            lines.append(f"calculator_latency_seconds_count{{{_labels(key)}}} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(key, **extra):
+    labels = {'operation': key[0], 'name': key[1], **extra}
+    return ','.join(f'{label}="{_escape(value)}"' for label, value in labels.items())
+
+
+def error_key(error):
+    """错误的消息键：翻译键（error.xxx）或消息中冒号之前的部分，避免参数造成的高基数"""
+    message = str(error)
+    if not message:
+        return type(error).__name__
+    return message.split(':', 1)[0].strip()
+
+
+REGISTRY = MetricsRegistry()
+
+
+# ======================
+# 计时层
+# ======================
+def _timed(func, operation, name_of):
+    """返回记录调用次数、错误和延迟的包装函数；name_of(args) 返回指标名称"""
+    record = REGISTRY.record
+    clock = time.perf_counter_ns
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            record(operation, name_of(args), clock() - start, e)
+            raise
+        record(operation, name_of(args), clock() - start)
+        return result
+    return wrapper
+
+
+def _arg(position):
+    def name_of(args):
+        try:
+            return str(args[position])
+        except IndexError:
+            return ''
+    return name_of
+
+
+def _no_name(args):
+    return ''
+
+
+def _targets():
+    """(类, 方法名, 操作名, 名称函数)"""
+    from src.calculator_cli import CalculatorCore, ScientificCalculator
+    from src.history_store import HistoryStore
+    from src.unit_converter import UnitConverter
+    return [
+        (ScientificCalculator, 'process_expression', 'expression', _no_name),
+        (CalculatorCore, 'calculate', 'operator', _arg(3)),
+        (CalculatorCore, 'process_function', 'function', _arg(1)),
+        (UnitConverter, 'convert', 'unit.convert', _no_name),
+        (HistoryStore, 'append', 'history.append', _no_name),
+        (HistoryStore, 'append_many', 'history.append_many', _no_name),
+        (HistoryStore, 'flush', 'history.flush', _no_name),
+    ]
+
+
+# 已替换的方法：(类, 方法名) -> 原始的类属性
+_originals = {}
+
+
+def enable():
+    """安装计时层（重复调用无副作用）"""
+    if REGISTRY.enabled:
+        return
+    from src.calculator_cli import handle_errors
+    for owner, attr, operation, name_of in _targets():
+        original = owner.__dict__[attr]
+        _originals[(owner, attr)] = original
+        if isinstance(original, classmethod):
+            replacement = classmethod(_timed(original.__func__, operation, name_of))
+        elif getattr(original, 'handles_errors', False):
+            # handle_errors 装饰的方法：在装饰器内部计时，才能看到被吞掉的异常
+            replacement = handle_errors(_timed(original.__wrapped__, operation, name_of))
+        else:
+            replacement = _timed(original, operation, name_of)
+        setattr(owner, attr, replacement)
+    REGISTRY.enabled = True
+
+
+def disable():
+    """恢复原方法（已记录的指标保留）"""
+    if not REGISTRY.enabled:
+        return
+    for (owner, attr), original in _originals.items():
+        setattr(owner, attr, original)
+    _originals.clear()
+    REGISTRY.enabled = False
+
+
+def write(path, fmt=None):
+    """导出指标
+
+    参数：
+        path (str): 输出文件路径
+        fmt (str, optional): json 或 prometheus，默认按扩展名判断（.prom / .txt 为 prometheus）
+    """
+    path = Path(path)
+    if fmt is None:
+        fmt = 'prometheus' if path.suffix in ('.prom', '.txt') else 'json'
+    text = REGISTRY.to_prometheus() if fmt == 'prometheus' else REGISTRY.to_json()
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    tmp_path.replace(path)
+
+
+def write_at_exit(path, fmt=None):
+    """进程退出时导出指标"""
+    def dump():
+        try:
+            write(path, fmt)
+        except OSError as e:
+            print(f"警告: 无法写入指标文件 - {str(e)}")
+    atexit.register(dump)
+
+
+def configure(settings):
+    """按 config.yaml 的 metrics 配置启用指标
+
+    参数：
+        settings (dict): enabled, file, format
+    """
+    if not settings or not settings.get('enabled', False):
+        return
+    enable()
+    if settings.get('file'):
+        write_at_exit(settings['file'], settings.get('format'))
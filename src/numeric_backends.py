@@ -0,0 +1,511 @@
+"""数值后端
+
+CalculatorCore 的运算符和函数可以在不同的数值类型上执行：
+1. float: 硬件浮点数（默认，最快）
+2. decimal: decimal.Decimal，工作精度可配置（decimal_precision）
+3. fraction: fractions.Fraction 精确有理数；无理结果（sqrt(2)、sin、log 等）退回浮点数
+4. adaptive: 在浮点数上计算，每次运算做局部误差估计；出现严重抵消、上溢或下溢时
+   抛出 PrecisionEscalation，由 CalculatorCore.evaluate 以 decimal 后端重新计算整个表达式，
+   常见情况保持浮点速度
+
+后端只替换实数运算符（+ - * / % ^）和科学函数；复数运算符和复数值始终使用浮点复数。
+数字字面量由后端的 convert_literal 从原始文本转换（0.1 在 decimal / fraction 后端中是精确的）。
+"""
+import math
+import sys
+from decimal import Context, Decimal, InvalidOperation, Overflow, localcontext
+from fractions import Fraction
+
+BACKENDS = ('float', 'decimal', 'fraction', 'adaptive')
+
+# 默认显示的有效数字位数（config.yaml 的 settings.precision）
+DEFAULT_PRECISION = 6
+# decimal 后端默认的工作精度（有效数字位数）
+DEFAULT_DECIMAL_PRECISION = 28
+
+# fraction 后端精确计算 ^ 时允许的最大结果位数（超过时退回浮点数）
+MAX_EXACT_POWER_BITS = 1 << 20
+
+
+class PrecisionEscalation(ArithmeticError):
+    """adaptive 后端的浮点结果不可靠，需要以更高精度的后端重新计算"""
+
+
+def _division_by_zero():
+    raise ValueError("error.division_by_zero")
+
+
+def _overflow():
+    raise ValueError("error.overflow")
+
+
+def power(a, b):
+    """浮点数 / 复数的幂运算，上溢时抛出 error.overflow、0 的负数次幂抛出 error.division_by_zero
+    （而不是 OverflowError / ZeroDivisionError 的原始信息）"""
+    try:
+        return a ** b
+    except OverflowError:
+        _overflow()
+    except ZeroDivisionError:
+        _division_by_zero()
+
+
+def _is_inexact(value):
+    return isinstance(value, (float, complex))
+
+
+def convert_input(convert_literal, value):
+    """把外部传入的 int / float（如变量的值）按后端的字面量规则转换
+
+    参数：
+        convert_literal: 后端的 convert_literal，None 表示不转换
+        value: 数值
+
+    返回：
+        转换后的数值；无法转换（如 fraction 后端的 inf）或不是 int / float 时原样返回
+    """
+    if convert_literal is None or type(value) not in (int, float):
+        return value
+    try:
+        return convert_literal(repr(value), value)
+    except (ValueError, ArithmeticError):
+        return value
+
+
+def format_number(value, precision=DEFAULT_PRECISION):
+    """按显示精度格式化结果
+
+    浮点数、复数和 Decimal 保留 precision 位有效数字；Fraction 显示为精确的分数。
+    """
+    if isinstance(value, Fraction):
+        return str(value.numerator) if value.denominator == 1 else str(value)
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            return str(value)
+        # 与浮点数的 g 格式一致：去掉末尾的 0，指数小于 -4 或不小于 precision 时用科学计数法
+        value = value.normalize(Context(prec=precision))
+        if -4 <= value.adjusted() < precision:
+            return format(value, 'f')
+        mantissa, exponent = format(value, 'e').split('e')
+        return f"{mantissa}e{int(exponent):+03d}"
+    return f"{value:.{precision}g}"
+
+
+class FloatBackend:
+    """硬件浮点数后端：直接使用 CalculatorCore 中定义的运算符和函数
+
+    属性：
+        name (str): 后端名称
+        convert_literal: 字面量转换函数 (文本, 浮点值) -> 数值，None 表示直接使用浮点值
+        fallback: 需要更高精度时改用的后端，None 表示不升级
+        cache_namespace (str): 结果缓存的命名空间，计算结果相同的后端配置使用相同的值
+    """
+    name = 'float'
+    cache_namespace = 'float'
+    convert_literal = None
+    fallback = None
+
+    def operators(self, base):
+        """返回运算符表（base 为 CalculatorCore.OPERATORS）"""
+        return base
+
+    def functions(self, base):
+        """返回函数表（base 为 CalculatorCore.FUNCTIONS）"""
+        return base
+
+    def radians(self, degrees):
+        return math.radians(degrees)
+
+
+class _OverlayBackend(FloatBackend):
+    """在 CalculatorCore 的运算符和函数表上覆盖部分实现的后端基类
+
+    子类提供 OPERATOR_NAMES / FUNCTION_NAMES 对应的 _op_* / _fn_* 方法，
+    其余条目（复数运算符、abs_c 等）保持原样。函数表只替换实现，参数个数、
+    校验函数和错误信息不变。
+    """
+    OPERATOR_NAMES = {'+': 'add', '-': 'sub', '*': 'mul', '/': 'div', '%': 'mod', '^': 'pow'}
+    FUNCTION_NAMES = ('sqrt', 'sin', 'cos', 'tan', 'log', 'log10', 'abs')
+
+    def __init__(self):
+        self._operators = None
+        self._functions = None
+
+    def operators(self, base):
+        if self._operators is None:
+            self._operators = dict(base)
+            for op, name in self.OPERATOR_NAMES.items():
+                self._operators[op] = getattr(self, f"_op_{name}")
+        return self._operators
+
+    def functions(self, base):
+        if self._functions is None:
+            self._functions = dict(base)
+            for name in self.FUNCTION_NAMES:
+                _, arg_count, validator, error_message = base[name]
+                self._functions[name] = (getattr(self, f"_fn_{name}"), arg_count,
+                                         validator, error_message)
+        return self._functions
+
+
+class DecimalBackend(_OverlayBackend):
+    """decimal.Decimal 后端
+
+    所有运算在独立的 Context 中以 decimal_precision 位有效数字执行，不受线程当前上下文影响。
+    与浮点数或复数混合运算时退回浮点运算。
+    """
+    name = 'decimal'
+
+    def __init__(self, decimal_precision=DEFAULT_DECIMAL_PRECISION):
+        super().__init__()
+        self.decimal_precision = decimal_precision
+        self.cache_namespace = f"decimal:{decimal_precision}"
+        self.context = Context(prec=decimal_precision)
+        self._pi = None
+
+    def convert_literal(self, text, value):
+        if isinstance(value, complex):
+            return value
+        return self.context.create_decimal(text)
+
+    # ---------- 运算符 ----------
+    @staticmethod
+    def _exact(operation, a, b):
+        """在 Decimal 上执行运算，结果超出指数范围（decimal.Overflow）时抛出 error.overflow"""
+        try:
+            return operation(a, b)
+        except Overflow:
+            _overflow()
+
+    def _op_add(self, a, b):
+        if _is_inexact(a) or _is_inexact(b):
+            return complex_or_float(a) + complex_or_float(b)
+        return self._exact(self.context.add, a, b)
+
+    def _op_sub(self, a, b):
+        if _is_inexact(a) or _is_inexact(b):
+            return complex_or_float(a) - complex_or_float(b)
+        return self._exact(self.context.subtract, a, b)
+
+    def _op_mul(self, a, b):
+        if _is_inexact(a) or _is_inexact(b):
+            return complex_or_float(a) * complex_or_float(b)
+        return self._exact(self.context.multiply, a, b)
+
+    def _op_div(self, a, b):
+        if b == 0:
+            _division_by_zero()
+        if _is_inexact(a) or _is_inexact(b):
+            return complex_or_float(a) / complex_or_float(b)
+        return self._exact(self.context.divide, a, b)
+
+    def _op_mod(self, a, b):
+        if b == 0:
+            _division_by_zero()
+        if _is_inexact(a) or _is_inexact(b):
+            return complex_or_float(a) % complex_or_float(b)
+        # 与浮点数 % 一致：结果与除数同号
+        remainder = self.context.remainder(a, b)
+        if remainder and (remainder < 0) != (b < 0):
+            remainder = self.context.add(remainder, b)
+        return remainder
+
+    def _op_pow(self, a, b):
+        if _is_inexact(a) or _is_inexact(b) or (a < 0 and b != b.to_integral_value()):
+            # 负数的非整数次幂为复数
+            return power(complex_or_float(a), complex_or_float(b))
+        if a == 0 and b < 0:
+            _division_by_zero()
+        try:
+            result = self._exact(self.context.power, a, b)
+        except InvalidOperation:
+            raise ValueError(f"无效的幂运算: {a}^{b}")
+        if result.is_infinite() and a.is_finite() and b.is_finite():
+            _overflow()
+        return result
+
+    # ---------- 函数 ----------
+    def radians(self, degrees):
+        if _is_inexact(degrees):
+            return math.radians(degrees)
+        # 先在角度上做精确的周期约简
+        degrees = self.context.remainder(degrees, Decimal(360))
+        return self.context.divide(self.context.multiply(degrees, self.pi()), Decimal(180))
+
+    def pi(self):
+        """以工作精度计算 π（decimal 文档中的级数算法）"""
+        if self._pi is None:
+            with localcontext(self.context) as ctx:
+                ctx.prec += 2
+                three = Decimal(3)
+                lasts, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+                while s != lasts:
+                    lasts = s
+                    n, na = n + na, na + 8
+                    d, da = d + da, da + 32
+                    t = (t * n) / d
+                    s += t
+                ctx.prec -= 2
+                self._pi = +s
+        return self._pi
+
+    def _series(self, x, start, first):
+        """sin / cos 的泰勒级数（decimal 文档中的算法）"""
+        with localcontext(self.context) as ctx:
+            ctx.prec += 2
+            i, lasts, s, fact, num, sign = start, 0, first, 1, first, 1
+            while s != lasts:
+                lasts = s
+                i += 2
+                fact *= i * (i - 1)
+                num *= x * x
+                sign *= -1
+                s += num / fact * sign
+            ctx.prec -= 2
+            return +s
+
+    def _fn_sin(self, x):
+        if _is_inexact(x):
+            return math.sin(x)
+        return self._series(x, 1, x)
+
+    def _fn_cos(self, x):
+        if _is_inexact(x):
+            return math.cos(x)
+        return self._series(x, 0, Decimal(1))
+
+    def _fn_tan(self, x):
+        if _is_inexact(x):
+            return math.tan(x)
+        return self.context.divide(self._fn_sin(x), self._fn_cos(x))
+
+    def _fn_sqrt(self, x):
+        if _is_inexact(x):
+            return math.sqrt(x)
+        return self.context.sqrt(x)
+
+    def _fn_log(self, x):
+        if _is_inexact(x):
+            return math.log(x)
+        return self.context.ln(x)
+
+    def _fn_log10(self, x):
+        if _is_inexact(x):
+            return math.log10(x)
+        return self.context.log10(x)
+
+    def _fn_abs(self, x):
+        if _is_inexact(x):
+            return abs(x)
+        return self.context.abs(x)
+
+
+def complex_or_float(value):
+    """把 Decimal / Fraction 转为浮点数，复数和浮点数保持不变"""
+    return value if _is_inexact(value) else float(value)
+
+
+class FractionBackend(_OverlayBackend):
+    """fractions.Fraction 精确有理数后端
+
+    + - * / % 和整数次幂的结果是精确的；平方根在参数为完全平方数时精确，
+    其余无理结果（非整数次幂、三角函数、对数）退回浮点数，并在后续运算中按浮点数传播。
+    """
+    name = 'fraction'
+    cache_namespace = 'fraction'
+
+    def convert_literal(self, text, value):
+        if isinstance(value, complex):
+            return value
+        return Fraction(text)
+
+    def _op_add(self, a, b):
+        return a + b
+
+    def _op_sub(self, a, b):
+        return a - b
+
+    def _op_mul(self, a, b):
+        return a * b
+
+    def _op_div(self, a, b):
+        if b == 0:
+            _division_by_zero()
+        return a / b
+
+    def _op_mod(self, a, b):
+        if b == 0:
+            _division_by_zero()
+        return a % b
+
+    def _op_pow(self, a, b):
+        if isinstance(a, Fraction) and isinstance(b, Fraction) and b.denominator == 1:
+            size = max(abs(a.numerator), a.denominator).bit_length()
+            if size * abs(b.numerator) <= MAX_EXACT_POWER_BITS:
+                if a == 0 and b < 0:
+                    _division_by_zero()
+                return a ** b.numerator
+        try:
+            return power(complex_or_float(a), complex_or_float(b))
+        except OverflowError:
+            # 超出浮点范围的分数无法转换为 float
+            _overflow()
+
+    def radians(self, degrees):
+        return math.radians(degrees)
+
+    def _fn_sqrt(self, x):
+        if isinstance(x, Fraction):
+            numerator, denominator = math.isqrt(x.numerator), math.isqrt(x.denominator)
+            if numerator * numerator == x.numerator and denominator * denominator == x.denominator:
+                return Fraction(numerator, denominator)
+        return math.sqrt(x)
+
+    def _fn_sin(self, x):
+        return math.sin(x)
+
+    def _fn_cos(self, x):
+        return math.cos(x)
+
+    def _fn_tan(self, x):
+        return math.tan(x)
+
+    def _fn_log(self, x):
+        if isinstance(x, Fraction):
+            # 分子分母分别取对数：超出浮点范围的分数（如 1e-400）转换为 float 后为 0 或 inf
+            return math.log(x.numerator) - math.log(x.denominator)
+        return math.log(x)
+
+    def _fn_log10(self, x):
+        if isinstance(x, Fraction):
+            return math.log10(x.numerator) - math.log10(x.denominator)
+        return math.log10(x)
+
+    def _fn_abs(self, x):
+        return abs(x)
+
+
+class _EscalatedDecimalBackend(DecimalBackend):
+    """adaptive 后端升级时使用的 decimal 后端
+
+    加减法的结果不超过操作数在工作精度下的舍入误差时取 0。浮点路径在完全相消得到 0 时
+    同样会升级（如 (1e16+1)-1e16），但 1/3*3-1 这类表达式的浮点结果 0 本来就是准确的，
+    decimal 重新计算得到的 -1e-28 只是 1/3 自身的舍入误差。
+    """
+
+    def __init__(self, decimal_precision=DEFAULT_DECIMAL_PRECISION):
+        super().__init__(decimal_precision)
+        # 结果与普通 decimal 后端不同，不能共用结果缓存
+        self.cache_namespace = f"adaptive-decimal:{decimal_precision}"
+        self.noise = Decimal(1).scaleb(1 - decimal_precision)
+
+    def _cancel_noise(self, a, b, result):
+        if isinstance(result, Decimal) and result and result.is_finite() and \
+                abs(result) <= self.context.multiply(abs(a) + abs(b), self.noise):
+            return Decimal(0)
+        return result
+
+    def _op_add(self, a, b):
+        return self._cancel_noise(a, b, super()._op_add(a, b))
+
+    def _op_sub(self, a, b):
+        return self._cancel_noise(a, b, super()._op_sub(a, b))
+
+
+class AdaptiveBackend(_OverlayBackend):
+    """自适应精度后端：浮点快速路径 + 局部误差估计
+
+    每次加减法估计抵消造成的相对误差放大：结果的相对误差约为
+    eps * (|a| + |b|) / |a ± b|，超过显示精度允许的范围时升级。
+    乘除法和幂运算在有限的操作数产生 inf（上溢）或 0（下溢）时升级。
+    升级时抛出 PrecisionEscalation，由 CalculatorCore.evaluate 使用 fallback 重新计算；
+    fallback 中加减法在 decimal 舍入误差以内的结果取 0（见 _EscalatedDecimalBackend）。
+    """
+    name = 'adaptive'
+    FUNCTION_NAMES = ()
+
+    def __init__(self, precision=DEFAULT_PRECISION, decimal_precision=DEFAULT_DECIMAL_PRECISION):
+        super().__init__()
+        self.precision = precision
+        # 升级阈值取决于 precision
+        self.cache_namespace = f"adaptive:{precision}"
+        # 允许的抵消程度：|a ± b| / (|a| + |b|) 小于该值时结果的有效数字少于 precision 位
+        self.cancellation_limit = 2 * sys.float_info.epsilon * 10 ** precision
+        self.fallback = _EscalatedDecimalBackend(max(decimal_precision, precision + 10))
+
+    def _check_sum(self, a, b, result):
+        magnitude = abs(result)
+        if magnitude < (abs(a) + abs(b)) * self.cancellation_limit:
+            # 严重抵消（包括非零操作数相消为 0）
+            raise PrecisionEscalation()
+        if magnitude == math.inf and abs(a) != math.inf and abs(b) != math.inf:
+            # 上溢
+            raise PrecisionEscalation()
+        return result
+
+    def _check_product(self, a, b, result):
+        magnitude = abs(result)
+        if magnitude == math.inf:
+            if abs(a) != math.inf and abs(b) != math.inf:
+                # 上溢
+                raise PrecisionEscalation()
+        elif magnitude == 0 and a != 0 and b != 0 and abs(b) != math.inf:
+            # 下溢
+            raise PrecisionEscalation()
+        return result
+
+    def _op_add(self, a, b):
+        return self._check_sum(a, b, a + b)
+
+    def _op_sub(self, a, b):
+        return self._check_sum(a, b, a - b)
+
+    def _op_mul(self, a, b):
+        return self._check_product(a, b, a * b)
+
+    def _op_div(self, a, b):
+        if b == 0:
+            _division_by_zero()
+        return self._check_product(a, b, a / b)
+
+    def _op_mod(self, a, b):
+        if b == 0:
+            _division_by_zero()
+        return a % b
+
+    def _op_pow(self, a, b):
+        try:
+            result = a ** b
+        except OverflowError:
+            raise PrecisionEscalation()
+        except ZeroDivisionError:
+            _division_by_zero()
+        magnitude = abs(result)
+        if magnitude == math.inf and abs(a) != math.inf:
+            raise PrecisionEscalation()
+        if magnitude == 0 and a != 0 and abs(b) != math.inf:
+            raise PrecisionEscalation()
+        return result
+
+
+def create_backend(name='float', precision=DEFAULT_PRECISION,
+                   decimal_precision=DEFAULT_DECIMAL_PRECISION):
+    """按名称创建数值后端
+
+    参数：
+        name (str): float, decimal, fraction 或 adaptive
+        precision (int): 显示的有效数字位数（adaptive 以此决定何时升级）
+        decimal_precision (int): decimal 后端的工作精度
+
+    异常：
+        ValueError: 后端名称不支持时抛出
+    """
+    if name == 'float':
+        return FloatBackend()
+    if name == 'decimal':
+        return DecimalBackend(decimal_precision)
+    if name == 'fraction':
+        return FractionBackend()
+    if name == 'adaptive':
+        return AdaptiveBackend(precision, decimal_precision)
+    raise ValueError(f"不支持的数值后端: {name}（可选 {', '.join(BACKENDS)}）")
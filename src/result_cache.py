@@ -0,0 +1,311 @@
+"""纯函数和运算符的结果缓存
+
+CalculatorCore.calculate / process_function 的结果按 (数值后端, 名称, 参数) 缓存，分为两级：
+1. 内存：有容量上限的 LRU
+2. 磁盘（可选）：用户缓存目录下的 SQLite 数据库，多次 calc-cli 调用之间共享
+
+缓存键包含参数的类型（Fraction(2) 与 2.0 相等但结果类型不同），区分 -0.0 和 0.0
+（sin(-0.0) 为 -0.0），所有 NaN 使用同一个键；Decimal 按文本区分（Decimal('1.0') 与 Decimal('1')
+是不同的键）。
+只缓存成功的结果，出错的调用每次都重新计算。磁盘缓存出错（损坏、被锁定等）时
+只停用磁盘缓存，不影响计算。
+
+用法示例：
+cache = create_result_cache({'enabled': True, 'functions': ['sin'], 'persistent': True})
+core.set_result_cache(cache)
+...
+print(cache.stats())
+"""
+import atexit
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from fractions import Fraction
+
+from src.utils.paths import user_cache_dir
+
+DB_FILE = 'result_cache.sqlite'
+
+# 默认缓存的函数和运算符（+ - * / 本身比查缓存更快，默认不缓存）
+DEFAULT_FUNCTIONS = ('sin', 'cos', 'tan', 'sqrt', 'log', 'log10')
+DEFAULT_OPERATORS = ('^',)
+# 内存 LRU 的默认容量
+DEFAULT_MAX_ENTRIES = 4096
+# 磁盘缓存保留的最大条目数
+DEFAULT_MAX_DISK_ENTRIES = 100000
+# 磁盘写入攒够该条数后提交一次
+FLUSH_EVERY = 256
+# SQLite 等待其他进程释放锁的时间（秒）
+DB_TIMEOUT = 0.5
+
+# get() 未命中时的返回值（None 可能是合法的缓存结果）
+MISSING = object()
+
+
+def canonical_arg(value):
+    """返回参数在缓存键中的表示
+
+    普通的浮点数直接作为键（最快）；0.0 / -0.0 和 NaN 在字典中会被合并或永不命中，
+    改用 float.hex()（-0.0 为 -0x0.0p+0，所有 NaN 为 nan）。
+
+    异常：
+        TypeError: 不支持的数值类型
+    """
+    kind = type(value)
+    if kind is float:
+        return value.hex() if value != value or value == 0.0 else value
+    if kind is Fraction or kind is int:
+        return value
+    if kind is complex or kind is Decimal:
+        return encode_value(value)
+    raise TypeError(f"无法缓存的数值类型: {kind.__name__}")
+
+
+def encode_value(value):
+    """把数值编码为文本（用于磁盘缓存）
+
+    浮点数使用 float.hex()：保留全部精度，-0.0 编码为 -0x0.0p+0，所有 NaN 编码为 nan。
+
+    异常：
+        TypeError: 不支持的数值类型
+    """
+    kind = type(value)
+    if kind is float:
+        return f"f{value.hex()}"
+    if kind is complex:
+        return f"c{value.real.hex()},{value.imag.hex()}"
+    if kind is Decimal:
+        return f"d{value}"
+    if kind is Fraction:
+        return f"q{value}"
+    if kind is int:
+        return f"i{value}"
+    raise TypeError(f"无法缓存的数值类型: {kind.__name__}")
+
+
+def decode_value(text):
+    """encode_value 的逆操作"""
+    kind, body = text[0], text[1:]
+    if kind == 'f':
+        return float.fromhex(body)
+    if kind == 'c':
+        real, imag = body.split(',')
+        return complex(float.fromhex(real), float.fromhex(imag))
+    if kind == 'd':
+        return Decimal(body)
+    if kind == 'q':
+        return Fraction(body)
+    if kind == 'i':
+        return int(body)
+    raise ValueError(f"无法解析的缓存值: {text}")
+
+
+class ResultCache:
+    """两级结果缓存
+
+    属性：
+        names (frozenset): 启用缓存的函数名和运算符
+        max_entries (int): 内存 LRU 的容量
+        path (Path): 磁盘缓存文件，None 表示只使用内存
+        max_disk_entries (int): 磁盘缓存保留的最大条目数
+        disk_error (Exception): 磁盘缓存被停用的原因，正常时为 None
+        hits, misses, evictions, disk_hits, disk_writes (int): 统计计数（见 stats）
+    """
+    MISSING = MISSING
+
+    def __init__(self, names=DEFAULT_FUNCTIONS + DEFAULT_OPERATORS, max_entries=DEFAULT_MAX_ENTRIES,
+                 path=None, max_disk_entries=DEFAULT_MAX_DISK_ENTRIES):
+        self.names = frozenset(names)
+        self.max_entries = max(1, max_entries)
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.disk_error = None
+        self._entries = OrderedDict()
+        # GUI 在工作线程中计算，内存和磁盘缓存都需要加锁
+        self._lock = threading.Lock()
+        self._db = None
+        self._pending = []
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk_writes = 0
+
+    @staticmethod
+    def make_key(namespace, name, args):
+        """生成缓存键
+
+        参数：
+            namespace (str): 数值后端的命名空间（见 numeric_backends 的 cache_namespace）
+            name (str): 函数名或运算符
+            args (tuple): 参数
+
+        异常：
+            TypeError: 参数类型不支持缓存
+        """
+        if len(args) == 1:
+            arg = args[0]
+            return (namespace, name, type(arg), canonical_arg(arg))
+        key = [namespace, name]
+        for arg in args:
+            key.append(type(arg))
+            key.append(canonical_arg(arg))
+        return tuple(key)
+
+    @staticmethod
+    def _disk_key(key):
+        # 类型用名称表示，参数用 repr（浮点数的 repr 可以精确还原）
+        return '|'.join(part.__name__ if isinstance(part, type) else repr(part) for part in key)
+
+    def get(self, key):
+        """查询缓存，内存未命中时查询磁盘缓存；未命中时返回 MISSING"""
+        with self._lock:
+            value = self._entries.get(key, MISSING)
+            if value is not MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if self.path is not None:
+                value = self._disk_get(self._disk_key(key))
+                if value is not MISSING:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._remember(key, value)
+                    return value
+            self.misses += 1
+            return MISSING
+
+    def put(self, key, value):
+        """写入缓存（磁盘缓存批量提交）"""
+        encoded = None
+        if self.path is not None:
+            try:
+                encoded = encode_value(value)
+            except TypeError:
+                return
+        with self._lock:
+            self._remember(key, value)
+            if encoded is not None and self.disk_error is None:
+                self._pending.append((self._disk_key(key), encoded))
+                if len(self._pending) >= FLUSH_EVERY:
+                    self._flush()
+
+    def stats(self):
+        """返回统计信息
+
+        返回：
+            dict: hits（含磁盘命中）, misses, evictions, disk_hits, disk_writes,
+                  size（内存条目数）, max_entries, hit_rate
+        """
+        with self._lock:
+            stats = {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                     'disk_hits': self.disk_hits, 'disk_writes': self.disk_writes,
+                     'size': len(self._entries), 'max_entries': self.max_entries}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self, disk=False):
+        """清空内存缓存和统计；disk 为 True 时同时清空磁盘缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._reset_counters()
+            if disk and self._connect() is not None:
+                try:
+                    with self._db:
+                        self._db.execute("DELETE FROM results")
+                except Exception as e:
+                    self._disable_disk(e)
+
+    def close(self):
+        """提交未写入的磁盘缓存并关闭数据库"""
+        with self._lock:
+            self._flush()
+            if self._db:
+                self._db.close()
+            self._db = None
+        atexit.unregister(self.close)
+
+    def _remember(self, key, value):
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    # ======================
+    # 磁盘缓存
+    # ======================
+    def _connect(self):
+        if self._db is None and self.disk_error is None:
+            try:
+                import sqlite3
+                self._db = sqlite3.connect(str(self.path), timeout=DB_TIMEOUT,
+                                           check_same_thread=False)
+                with self._db:
+                    self._db.execute(
+                        "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                atexit.register(self.close)
+            except Exception as e:
+                self._disable_disk(e)
+        return self._db
+
+    def _disk_get(self, key):
+        if self._connect() is None:
+            return MISSING
+        try:
+            row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            return MISSING if row is None else decode_value(row[0])
+        except Exception as e:
+            self._disable_disk(e)
+            return MISSING
+
+    def _flush(self):
+        if not self._pending or self._connect() is None:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", pending)
+                # 只保留最近写入的 max_disk_entries 条
+                self._db.execute("DELETE FROM results WHERE rowid <= (SELECT MAX(rowid) FROM results) - ?",
+                                 (self.max_disk_entries,))
+            self.disk_writes += len(pending)
+        except Exception as e:
+            self._disable_disk(e)
+
+    def _disable_disk(self, error):
+        self.disk_error = error
+        self._pending = []
+        if self._db:
+            try:
+                self._db.close()
+            except Exception:
+                pass
+        self._db = None
+
+
+def create_result_cache(settings):
+    """按 config.yaml 的 result_cache 配置创建缓存
+
+    参数：
+        settings (dict): enabled, functions, operators, max_entries, persistent, path, max_disk_entries
+
+    返回：
+        ResultCache: 未启用时返回 None
+    """
+    if not settings or not settings.get('enabled', False):
+        return None
+    names = tuple(settings.get('functions', DEFAULT_FUNCTIONS) or ()) + \
+        tuple(settings.get('operators', DEFAULT_OPERATORS) or ())
+    path = None
+    if settings.get('persistent', False):
+        path = settings.get('path') or user_cache_dir() / DB_FILE
+    return ResultCache(names, max_entries=settings.get('max_entries', DEFAULT_MAX_ENTRIES),
+                       path=path,
+                       max_disk_entries=settings.get('max_disk_entries', DEFAULT_MAX_DISK_ENTRIES))
@@ -0,0 +1,386 @@
+"""函数制表
+
+在等距网格上对表达式取样（如 sin(x)，x 从 0 到 360，步长 0.001），
+代替逐点调用 process_function：
+
+1. 表达式编译一次（expression_compiler），网格按块生成（x_i = start + i*step，不累加误差），
+   每块以数组调用编译后的函数，安装 NumPy 时向量化计算
+2. 结果按块以 text / CSV / 二进制流式写出，不在内存中构造整张表
+3. 自适应模式只在函数变化快的地方加密取样：
+   - 粗网格上二阶差分超过容差、或相邻点一个有效一个无效（如 tan 的奇点）的区间取中点
+   - 中点偏离两端连线超过容差的区间继续对分，直到 max_depth 层
+   每层的全部中点一次批量计算
+
+表达式中制表变量以外的变量从计算核心的 variables（变量工作区）读取。
+
+用法示例：
+for xs, result in tabulate("sin(x)", "x", 0, 360, 0.001):
+    ...                                      # 每块 (x 数组, BatchResult)
+write_table(tabulate("sin(x)", "x", 0, 360, 1), sys.stdout, fmt='csv')
+"""
+import math
+import re
+import sys
+from array import array
+
+from src.expression_compiler import compile_expression, default_core
+from src.expression_parser import check_variable_name
+from src.vectorized import BatchResult, NAN, np
+
+# 每块的网格点数
+DEFAULT_CHUNK_SIZE = 8192
+
+# 自适应模式的默认容差（相对于 max(1, |f|)）和最大对分层数
+DEFAULT_TOLERANCE = 1e-3
+DEFAULT_MAX_DEPTH = 8
+
+# 输出格式：text（制表符分隔、按显示精度格式化）、csv（完整精度）、
+# binary（每行两个小端 float64：x, f(x)，无表头，无效值为 NaN）
+FORMATS = ('text', 'csv', 'binary')
+
+# 区间：变量=起点..终点
+RANGE = re.compile(r'\s*([A-Za-z_][A-Za-z0-9_]*)\s*=\s*(\S+?)\s*\.\.\s*(\S+)\s*$')
+
+# table 命令：表达式 变量=起点..终点 step 步长 [adaptive [容差]] [> 文件]
+TABLE_COMMAND = re.compile(
+    r'(?P<expr>.+?)\s+(?P<range>[A-Za-z_][A-Za-z0-9_]*\s*=\s*\S+?\s*\.\.\s*\S+)'
+    r'\s+step\s+(?P<step>\S+)'
+    r'(?:\s+(?P<adaptive>adaptive)(?:\s+(?P<tolerance>[^\s>]+))?)?'
+    r'(?:\s*>\s*(?P<output>\S+))?\s*$')
+
+# 输出文件扩展名 -> 格式
+EXTENSION_FORMATS = {'.csv': 'csv', '.bin': 'binary', '.f64': 'binary'}
+
+# 文本格式中 x 的有效数字位数（去掉 0.1*3 这类浮点噪声）
+X_DIGITS = 12
+
+# CSV 行：x 保留 15 位有效数字，结果为完整精度（repr），无效值为空
+CSV_ROW = f"%.{X_DIGITS + 3}g,%r\n"
+CSV_ERROR_ROW = f"%.{X_DIGITS + 3}g,\n"
+
+
+def parse_range(text):
+    """解析区间 x=0..360
+
+    返回：
+        tuple: (变量名, 起点文本, 终点文本)
+
+    异常：
+        ValueError: 格式错误时抛出
+    """
+    match = RANGE.match(text)
+    if match is None:
+        raise ValueError(f"区间格式错误（应为 x=起点..终点）: {text}")
+    check_variable_name(match.group(1))
+    return match.groups()
+
+
+def parse_table_command(text):
+    """解析 table 命令的参数
+
+    返回：
+        dict: expression, variable, start, stop, step, adaptive, tolerance, output
+            （起点、终点、步长和容差为文本，由调用方求值）
+
+    异常：
+        ValueError: 格式错误时抛出
+    """
+    match = TABLE_COMMAND.match(text)
+    if match is None:
+        raise ValueError("用法: table 表达式 x=起点..终点 step 步长 [adaptive [容差]] [> 文件]")
+    variable, start, stop = parse_range(match.group('range'))
+    return {
+        'expression': match.group('expr'),
+        'variable': variable,
+        'start': start,
+        'stop': stop,
+        'step': match.group('step'),
+        'adaptive': match.group('adaptive') is not None,
+        'tolerance': match.group('tolerance'),
+        'output': match.group('output'),
+    }
+
+
+def format_for_path(path):
+    """按输出文件扩展名选择格式（默认 text）"""
+    for extension, fmt in EXTENSION_FORMATS.items():
+        if path.lower().endswith(extension):
+            return fmt
+    return 'text'
+
+
+def grid_size(start, stop, step):
+    """网格点数（包含两个端点；终点不在网格上时取不超过终点的最后一点）
+
+    异常：
+        ValueError: 步长为 0、方向与区间相反或不是有限数时抛出
+    """
+    if not all(math.isfinite(value) for value in (start, stop, step)):
+        raise ValueError("区间和步长必须是有限数")
+    if step == 0 or (stop - start) * step < 0:
+        raise ValueError(f"步长无效: {step}")
+    # 容许除法的舍入误差，避免 0..1 step 0.1 丢掉终点
+    return int(math.floor((stop - start) / step + 1e-9)) + 1
+
+
+def _grid(start, step, first, last):
+    """网格点 first..last-1"""
+    if np is not None:
+        return start + step * np.arange(first, last, dtype=float)
+    return [start + step * i for i in range(first, last)]
+
+
+def _evaluator(expr, variable, core):
+    """返回 evaluate(xs) -> BatchResult，制表变量以外的变量取计算核心中的当前值"""
+    compiled = compile_expression(expr, core)
+    core = compiled.core
+    args = []
+    index = None
+    for position, name in enumerate(compiled.variables):
+        if name == variable:
+            index = position
+            args.append(None)
+            continue
+        try:
+            args.append(core.variables[name])
+        except KeyError:
+            raise ValueError(f"未知的标识符: {name}") from None
+
+    if index is None:
+        # 表达式不含制表变量：计算一次后广播
+        value = compiled(*args)
+
+        def evaluate(xs):
+            size = len(xs)
+            if np is not None:
+                return BatchResult(np.full(size, value), np.zeros(size, dtype=bool), "")
+            return BatchResult([value] * size, [False] * size, "")
+        return evaluate
+
+    def evaluate(xs):
+        args[index] = xs
+        return compiled(*args)
+    return evaluate
+
+
+def tabulate(expr, variable, start, stop, step, core=None, chunk_size=DEFAULT_CHUNK_SIZE,
+             adaptive=False, tolerance=DEFAULT_TOLERANCE, max_depth=DEFAULT_MAX_DEPTH):
+    """在网格上对表达式取样，返回按块生成结果的迭代器
+
+    表达式、区间和步长在调用时立即检查，计算在迭代时按块进行。
+
+    参数：
+        expr (str): 表达式，如 sin(x)
+        variable (str): 制表变量名
+        start, stop, step (float): 区间和步长（步长为负时从大到小）
+        core (CalculatorCore, optional): 计算核心，默认使用 float 后端
+        chunk_size (int): 每块的网格点数
+        adaptive (bool): 是否在函数变化快的地方加密取样
+        tolerance (float): 自适应模式的容差（相对于 max(1, |f|)）
+        max_depth (int): 自适应模式每个网格区间最多对分的层数
+
+    返回：
+        iterator: 每块 (xs, BatchResult)，xs 按取样顺序排列，无效位置的值为 NaN
+
+    异常：
+        ValueError: 表达式、区间或步长无效时抛出
+    """
+    evaluate = _evaluator(expr, variable, core if core is not None else default_core())
+    count = grid_size(start, stop, step)
+    return _chunks(evaluate, start, step, count, max(1, int(chunk_size)),
+                   adaptive, tolerance, max_depth)
+
+
+def _chunks(evaluate, start, step, count, chunk_size, adaptive, tolerance, max_depth):
+    for first in range(0, count, chunk_size):
+        last = min(first + chunk_size, count)
+        if not adaptive:
+            xs = _grid(start, step, first, last)
+            yield xs, evaluate(xs)
+            continue
+        # 二阶差分需要块两侧各一个相邻点，对分区间 (i, i+1) 需要右侧的下一个点
+        low = max(first - 1, 0)
+        high = min(last + 2, count)
+        xs = _grid(start, step, low, high)
+        yield _refine(evaluate, xs, evaluate(xs), first - low, last - low,
+                      tolerance, max_depth)
+
+
+def _deviation(fa, fm, fb):
+    return abs(fm - (fa + fb) / 2)
+
+
+def _refine(evaluate, xs, result, begin, end, tolerance, max_depth):
+    """自适应加密：返回 xs[begin:end] 及其右侧区间中加入的中点（按取样顺序）"""
+    xs = list(xs.tolist() if np is not None else xs)
+    values = result.values.tolist() if np is not None else list(result.values)
+    errors = result.errors.tolist() if np is not None else list(result.errors)
+    points = list(zip(xs, values, errors))
+    error_key = result.error_key
+
+    def limit(value):
+        return tolerance * max(1.0, abs(value))
+
+    # 第一层：粗网格上二阶差分大（中点偏离连线约为二阶差分的 1/8）或跨越奇点的区间
+    flagged = set()
+    for i in range(len(points) - 1):
+        if points[i][2] != points[i + 1][2]:
+            flagged.add(i)
+    for i in range(1, len(points) - 1):
+        a, m, b = points[i - 1], points[i], points[i + 1]
+        if not (a[2] or m[2] or b[2]) and abs(a[1] - 2 * m[1] + b[1]) / 8 > limit(m[1]):
+            flagged.update((i - 1, i))
+    pending = [(points[i], points[i + 1], 1) for i in sorted(flagged)
+               if begin <= i < end and i + 1 < len(points)]
+
+    extra = []
+    while pending:
+        mids = [(a[0] + b[0]) / 2 for a, b, _ in pending]
+        refined = evaluate(mids)
+        error_key = error_key or refined.error_key
+        mid_values = refined.values.tolist() if np is not None else refined.values
+        mid_errors = refined.errors.tolist() if np is not None else refined.errors
+        following = []
+        for (a, b, depth), x, value, error in zip(pending, mids, mid_values, mid_errors):
+            m = (x, value, error)
+            extra.append(m)
+            if depth >= max_depth:
+                continue
+            if a[2] or b[2] or error:
+                if a[2] != error:
+                    following.append((a, m, depth + 1))
+                if error != b[2]:
+                    following.append((m, b, depth + 1))
+            elif _deviation(a[1], value, b[1]) > limit(value):
+                following.append((a, m, depth + 1))
+                following.append((m, b, depth + 1))
+        pending = following
+
+    rows = points[begin:end] + extra
+    # 步长为负时网格从大到小
+    rows.sort(key=lambda row: row[0], reverse=xs[-1] < xs[0] if len(xs) > 1 else False)
+    return ([row[0] for row in rows],
+            BatchResult([row[1] for row in rows], [row[2] for row in rows], error_key))
+
+
+# ======================
+# 输出
+# ======================
+def write_table(chunks, output, fmt='text', core=None, header=None):
+    """把 tabulate 生成的块流式写入 output
+
+    参数：
+        chunks: tabulate 的返回值
+        output: text / csv 为文本流，binary 为二进制流（如 sys.stdout.buffer）
+        fmt (str): text, csv 或 binary
+        core (CalculatorCore, optional): text 格式按其显示精度格式化结果并翻译错误信息
+        header (tuple, optional): (变量名, 表达式)，text / csv 输出表头
+
+    返回：
+        int: 写出的行数
+
+    异常：
+        ValueError: 格式不支持，或 binary 格式遇到复数结果时抛出
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的输出格式: {fmt}")
+    if core is None:
+        core = default_core()
+    if header and fmt == 'csv':
+        import csv
+        csv.writer(output, lineterminator='\n').writerow(header)
+    elif header and fmt == 'text':
+        output.write(f"{header[0]}\t{header[1]}\n")
+
+    rows = 0
+    for xs, result in chunks:
+        if fmt == 'binary':
+            output.write(_binary_chunk(xs, result))
+        elif fmt == 'csv':
+            output.write(_csv_chunk(xs, result))
+        else:
+            output.write(_text_chunk(xs, result, core))
+        rows += len(xs)
+    return rows
+
+
+def save_table(chunks, path, fmt=None, core=None, header=None):
+    """把 tabulate 生成的块写入文件（'-' 表示标准输出）
+
+    参数：
+        fmt (str, optional): 输出格式，默认按文件扩展名选择（标准输出为 text）
+        其余参数同 write_table
+
+    返回：
+        int: 写出的行数
+    """
+    if fmt is None:
+        fmt = 'text' if path == '-' else format_for_path(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的输出格式: {fmt}")
+    if path == '-':
+        output = sys.stdout.buffer if fmt == 'binary' else sys.stdout
+        rows = write_table(chunks, output, fmt, core, header)
+        output.flush()
+        return rows
+    if fmt == 'binary':
+        with open(path, 'wb') as output:
+            return write_table(chunks, output, fmt, core, header)
+    with open(path, 'w', newline='', encoding='utf-8') as output:
+        return write_table(chunks, output, fmt, core, header)
+
+
+def _as_lists(xs, result):
+    if np is not None:
+        return (np.asarray(xs).tolist(), np.asarray(result.values).tolist(),
+                np.asarray(result.errors).tolist())
+    return xs, result.values, result.errors
+
+
+def _real_values(result):
+    """结果是否全部为浮点数（可以用 % 模板批量格式化）"""
+    if np is not None:
+        return np.asarray(result.values).dtype.kind == 'f'
+    return all(type(value) is float for value in result.values)
+
+
+def _text_chunk(xs, result, core):
+    real = _real_values(result)
+    xs, values, errors = _as_lists(xs, result)
+    if real and not any(errors):
+        # 与 format_number 对浮点数的格式（precision 位有效数字的 g 格式）相同
+        template = f"%.{X_DIGITS}g\t%.{core.precision}g\n"
+        return ''.join(map(template.__mod__, zip(xs, values)))
+    message = core.translator.translate(result.error_key) if result.error_key else "error"
+    format_result = core.format_result
+    return ''.join(f"{x:.{X_DIGITS}g}\t{message if error else format_result(value)}\n"
+                   for x, value, error in zip(xs, values, errors))
+
+
+def _csv_chunk(xs, result):
+    real = _real_values(result)
+    xs, values, errors = _as_lists(xs, result)
+    if real and not any(errors):
+        return ''.join(map(CSV_ROW.__mod__, zip(xs, values)))
+    return ''.join(CSV_ERROR_ROW % x if error else CSV_ROW % (x, value)
+                   for x, value, error in zip(xs, values, errors))
+
+
+def _binary_chunk(xs, result):
+    if np is not None:
+        values = np.asarray(result.values)
+        if np.iscomplexobj(values):
+            raise ValueError("二进制格式只支持实数结果")
+        table = np.empty((len(xs), 2), dtype='<f8')
+        table[:, 0] = xs
+        table[:, 1] = np.where(np.asarray(result.errors, dtype=bool), NAN, values.astype(float))
+        return table.tobytes()
+    data = array('d')
+    for x, value, error in zip(xs, result.values, result.errors):
+        if isinstance(value, complex):
+            raise ValueError("二进制格式只支持实数结果")
+        data.append(x)
+        data.append(NAN if error else float(value))
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
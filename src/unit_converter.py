@@ -1,4 +1,15 @@
+import csv
+import re
+import sys
+from array import array
 from enum import Enum
+from fractions import Fraction
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖
+    np = None
 
 class UnitType(Enum):
     LENGTH = "Length"
@@ -6,6 +17,14 @@ class UnitType(Enum):
     TEMPERATURE = "Temperature"
     AREA = "Area"
 
+# 温度单位到基准单位（摄氏度）的仿射定义：celsius = value * scale + offset
+# 使用分数保证换算系数在合并后只舍入一次
+TEMPERATURE_SCALES = {
+    "C": (Fraction(1), Fraction(0)),
+    "F": (Fraction(5, 9), Fraction(-160, 9)),
+    "K": (Fraction(1), Fraction(-27315, 100)),
+}
+
 class UnitConverter:
     """单位转换器类
     
@@ -19,6 +38,15 @@ class UnitConverter:
     - 每种单位类型都有一个基准单位（如长度是米，质量是千克）
     - 所有转换先转为基准单位，再转为目标单位
     - 温度转换使用特殊公式
+    
+    复合单位：
+    - 单位以量纲向量表示（见 unit_dimensions），支持 km/h -> m/s、
+      kg*m/s^2 -> N、ft^2 -> m2 等复合单位转换
+    - 上面的单位表是量纲引擎的基础单位定义
+    
+    性能优化：
+    - 转换方案缓存：每个 (源单位, 目标单位) 只解析和检查量纲一次，
+      合并为一个 (乘数, 加数)，此后任意线性或仿射转换都只需一次乘加
     """
     
     CONVERSIONS = {
@@ -51,33 +79,118 @@ class UnitConverter:
         }
     }
 
+    @classmethod
+    def clear_cache(cls):
+        """清空单位解析和转换方案缓存（修改 CONVERSIONS 后调用）"""
+        unit_dimensions.clear_cache()
+        unit_dimensions.UNITS = unit_dimensions._build_registry()
+
+    @classmethod
+    def conversion_plan(cls, from_unit, to_unit):
+        """返回 (乘数, 加数)，使 目标值 = 值 * 乘数 + 加数
+        
+        单位可以是单位表中的名称，也可以是复合单位表达式（km/h, kg*m/s^2, ft^2）。
+        每个单位对只解析和检查一次量纲，结果由 unit_dimensions 缓存。
+        """
+        return unit_dimensions.compile_conversion(from_unit, to_unit)
+
     @classmethod
     def convert(cls, value, from_unit, to_unit):
         """转换单位"""
-        # 找到单位类型
-        unit_type = None
-        for type_ in UnitType:
-            if from_unit in cls.CONVERSIONS[type_] and to_unit in cls.CONVERSIONS[type_]:
-                unit_type = type_
-                break
-        
-        if unit_type is None:
-            raise ValueError(f"Unsupported unit conversion: {from_unit} -> {to_unit}")
+        scale, offset = cls.conversion_plan(from_unit, to_unit)
+        return value * scale + offset
+
+    @classmethod
+    def convert_array(cls, values, from_unit, to_unit):
+        """批量转换单位
         
-        # 温度需要特殊处理
-        if unit_type == UnitType.TEMPERATURE:
-            # 先转换为摄氏度
-            if from_unit == "F":
-                celsius = (value - 32) * 5/9
-            elif from_unit == "K":
-                celsius = value - 273.15
-            else:
-                celsius = value
-            
-            # 再从摄氏度转换为目标单位
-            return cls.CONVERSIONS[unit_type][to_unit](celsius)
+        参数：
+            values: 数值数组（NumPy 数组、array.array、列表等）
+            from_unit (str): 源单位
+            to_unit (str): 目标单位
         
-        # 其他单位的转换
-        from_factor = cls.CONVERSIONS[unit_type][from_unit]
-        to_factor = cls.CONVERSIONS[unit_type][to_unit]
-        return value * from_factor / to_factor
\ No newline at end of file
+        返回：
+            安装了 NumPy 时返回 float64 数组（一次向量化乘加），否则返回 array('d')
+        """
+        scale, offset = cls.conversion_plan(from_unit, to_unit)
+        if np is not None:
+            result = np.asarray(values, dtype=np.float64) * scale
+            if offset:
+                result += offset
+            return result
+        return array('d', (value * scale + offset for value in values))
+
+
+# 交互模式中的单位转换语句：值 源单位 -> 目标单位（值可以是表达式，如 2*3 km -> mile）
+CONVERSION = re.compile(r'\s*(.+?)\s*([A-Za-z][A-Za-z0-9_/*^.]*)\s*->\s*(\S+)\s*$')
+
+
+def parse_conversion(line):
+    """解析单位转换语句
+
+    返回：
+        tuple: (值的表达式, 源单位, 目标单位)，不是单位转换语句时返回 None
+    """
+    match = CONVERSION.match(line)
+    if match is None:
+        return None
+    return match.groups()
+
+
+def convert_csv(source, column, from_unit, to_unit, output=None, has_header=True,
+                delimiter=',', chunk_size=10000):
+    """流式转换 CSV 文件中的一列
+    
+    按 chunk_size 行为一块读取，每块的目标列通过 convert_array 一次转换后写出，
+    内存占用只与块大小有关。无法解析为数字的单元格保持原样。
+    
+    参数：
+        source: 输入文本流
+        column (str | int): 列名（需要表头）或从 0 开始的列号
+        from_unit (str): 源单位
+        to_unit (str): 目标单位
+        output: 输出文本流，默认为标准输出
+        has_header (bool): 第一行是否为表头
+        delimiter (str): 分隔符
+        chunk_size (int): 每块的行数
+    
+    返回：
+        int: 无法转换的单元格数
+    """
+    # 提前检查单位是否支持
+    UnitConverter.conversion_plan(from_unit, to_unit)
+    reader = csv.reader(source, delimiter=delimiter)
+    writer = csv.writer(output or sys.stdout, delimiter=delimiter, lineterminator='\n')
+
+    if has_header:
+        header = next(reader, None)
+        if header is None:
+            return 0
+        writer.writerow(header)
+        if isinstance(column, str) and not column.isdigit():
+            if column not in header:
+                raise ValueError(f"CSV 中没有列: {column}")
+            column = header.index(column)
+    column = int(column)
+
+    skipped = 0
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            break
+        positions, values = [], []
+        for i, row in enumerate(rows):
+            try:
+                values.append(float(row[column]))
+                positions.append(i)
+            except (IndexError, ValueError):
+                skipped += 1
+        converted = UnitConverter.convert_array(values, from_unit, to_unit)
+        for i, value in zip(positions, converted):
+            rows[i][column] = repr(float(value))
+        writer.writerows(rows)
+    return skipped
+
+
+# unit_dimensions 以上面的单位表为基础定义，需在 UnitConverter 定义之后导入
+from src import unit_dimensions  # noqa: E402
@@ -0,0 +1,327 @@
+"""量纲分析单位引擎
+
+把单位表示为 (系数, 量纲向量, 偏移)，量纲向量的每个分量是 SI 基本量纲的有理数指数。
+支持复合单位表达式，例如 km/h、kg*m/s^2、ft^2、kg/(m*s^2)、m^(1/2)。
+
+单位定义：
+1. UnitConverter.CONVERSIONS 中的现有单位表作为基础定义
+   （长度 -> L，质量 -> M，面积 -> L^2，温度 -> Θ）
+2. 补充时间单位和常用导出单位（N, J, W, Pa, Hz, L 等）
+
+转换方案：
+每个 (源单位, 目标单位) 只在第一次使用时解析并检查量纲，编译为 (乘数, 加数)
+并缓存；之后的转换不再解析或检查，只执行一次乘加。
+
+温度等带偏移的单位（C, F）只能单独使用，不能出现在复合单位中；
+开尔文（K）没有偏移，可以参与复合单位。
+"""
+from fractions import Fraction
+from functools import lru_cache
+
+from src.unit_converter import UnitConverter, UnitType, TEMPERATURE_SCALES
+
+# SI 基本量纲：长度、质量、时间、温度、电流、物质的量、发光强度
+BASE_DIMENSIONS = ('L', 'M', 'T', 'Θ', 'I', 'N', 'J')
+
+# 编译缓存的最大条目数
+PLAN_CACHE_SIZE = 4096
+
+
+class Dimension(tuple):
+    """量纲向量：各 SI 基本量纲的有理数指数"""
+    __slots__ = ()
+
+    def __new__(cls, exponents=()):
+        exponents = tuple(Fraction(e) for e in exponents)
+        exponents += (Fraction(0),) * (len(BASE_DIMENSIONS) - len(exponents))
+        return super().__new__(cls, exponents)
+
+    @classmethod
+    def base(cls, symbol):
+        """返回单个基本量纲（指数为 1）"""
+        exponents = [0] * len(BASE_DIMENSIONS)
+        exponents[BASE_DIMENSIONS.index(symbol)] = 1
+        return cls(exponents)
+
+    def __mul__(self, other):
+        return Dimension(a + b for a, b in zip(self, other))
+
+    def __truediv__(self, other):
+        return Dimension(a - b for a, b in zip(self, other))
+
+    def __pow__(self, exponent):
+        return Dimension(a * exponent for a in self)
+
+    def __str__(self):
+        parts = []
+        for symbol, exponent in zip(BASE_DIMENSIONS, self):
+            if exponent == 1:
+                parts.append(symbol)
+            elif exponent:
+                parts.append(f"{symbol}^{exponent}")
+        return '·'.join(parts) or '1'
+
+
+DIMENSIONLESS = Dimension()
+LENGTH = Dimension.base('L')
+MASS = Dimension.base('M')
+TIME = Dimension.base('T')
+TEMPERATURE = Dimension.base('Θ')
+
+
+class Unit:
+    """单位：基准值 = 值 * scale + offset
+
+    属性：
+        scale (Fraction | float): 换算到 SI 基准单位的系数
+        dimension (Dimension): 量纲向量
+        offset (Fraction): 偏移（只有温度等仿射单位不为 0）
+    """
+    __slots__ = ('scale', 'dimension', 'offset')
+
+    def __init__(self, scale, dimension, offset=Fraction(0)):
+        self.scale = scale
+        self.dimension = dimension
+        self.offset = offset
+
+    def __mul__(self, other):
+        return Unit(self.scale * other.scale, self.dimension * other.dimension)
+
+    def __truediv__(self, other):
+        return Unit(self.scale / other.scale, self.dimension / other.dimension)
+
+    def __pow__(self, exponent):
+        if exponent.denominator == 1:
+            scale = self.scale ** int(exponent)
+        else:
+            scale = float(self.scale) ** float(exponent)
+        return Unit(scale, self.dimension ** exponent)
+
+
+# 现有单位表中各单位类型对应的量纲
+TYPE_DIMENSIONS = {
+    UnitType.LENGTH: LENGTH,
+    UnitType.WEIGHT: MASS,
+    UnitType.AREA: LENGTH ** 2,
+    UnitType.TEMPERATURE: TEMPERATURE,
+}
+
+# 开尔文相对摄氏度的偏移
+KELVIN_OFFSET = Fraction(27315, 100)
+
+
+def _build_registry():
+    """由 UnitConverter.CONVERSIONS 和补充定义构建单位表"""
+    registry = {}
+    for unit_type, table in UnitConverter.CONVERSIONS.items():
+        dimension = TYPE_DIMENSIONS[unit_type]
+        for name, factor in table.items():
+            if unit_type == UnitType.TEMPERATURE:
+                # 温度以开尔文为基准：K = C + 273.15
+                scale, offset = TEMPERATURE_SCALES[name]
+                registry[name] = Unit(scale, dimension, offset + KELVIN_OFFSET)
+            else:
+                registry[name] = Unit(Fraction(factor), dimension)
+
+    def define(name, scale, unit):
+        registry[name] = Unit(Fraction(scale) * unit.scale, unit.dimension)
+
+    # 时间
+    define('s', 1, Unit(Fraction(1), TIME))
+    define('ms', Fraction(1, 1000), registry['s'])
+    define('min', 60, registry['s'])
+    define('h', 3600, registry['s'])
+    define('day', 86400, registry['s'])
+    # 长度和质量补充
+    define('mile', Fraction('1609.344'), registry['m'])
+    define('yd', Fraction('0.9144'), registry['m'])
+    define('t', 1000, registry['kg'])
+    # 体积
+    define('L', Fraction(1, 1000), registry['m'] ** Fraction(3))
+    define('mL', Fraction(1, 1000000), registry['m'] ** Fraction(3))
+    # 导出单位
+    define('Hz', 1, Unit(Fraction(1), DIMENSIONLESS) / registry['s'])
+    define('N', 1, registry['kg'] * registry['m'] / registry['s'] ** Fraction(2))
+    define('J', 1, registry['N'] * registry['m'])
+    define('W', 1, registry['J'] / registry['s'])
+    define('Pa', 1, registry['N'] / registry['m'] ** Fraction(2))
+    define('kN', 1000, registry['N'])
+    define('kJ', 1000, registry['J'])
+    define('kW', 1000, registry['W'])
+    define('kPa', 1000, registry['Pa'])
+    return registry
+
+
+UNITS = _build_registry()
+
+
+# ======================
+# 复合单位解析
+# ======================
+def _tokenize(text):
+    tokens = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch.isspace():
+            i += 1
+        elif ch.isalpha() or ch == '_':
+            start = i
+            while i < n and (text[i].isalnum() or text[i] == '_'):
+                i += 1
+            tokens.append(('name', text[start:i]))
+        elif ch.isdigit() or ch == '.' or (ch == '-' and tokens and tokens[-1] in (('op', '^'), ('op', '('))):
+            start = i
+            i += 1
+            while i < n and (text[i].isdigit() or text[i] == '.'):
+                i += 1
+            tokens.append(('number', text[start:i]))
+        elif ch in '*/^()·':
+            tokens.append(('op', '*' if ch == '·' else ch))
+            i += 1
+        else:
+            raise ValueError(f"无法识别的单位字符: {ch}")
+    tokens.append(('end', ''))
+    return tokens
+
+
+class _UnitParser:
+    """复合单位表达式解析器
+
+    语法：
+        product  := factor (('*' | '/') factor)*
+        factor   := primary ('^' exponent)?
+        primary  := NAME | '1' | '(' product ')'
+        exponent := NUMBER | '(' NUMBER '/' NUMBER ')' | '(' NUMBER ')'
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.factors = 0
+        self.affine = False
+
+    def parse(self):
+        unit = self.product()
+        if self.tokens[self.pos][0] != 'end':
+            raise ValueError(f"无法解析的单位: {self.text}")
+        if self.affine and self.factors > 1:
+            raise ValueError(f"带偏移的单位不能用于复合单位: {self.text}")
+        return unit
+
+    def next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def peek(self):
+        return self.tokens[self.pos]
+
+    def product(self):
+        unit = self.factor()
+        while self.peek() in (('op', '*'), ('op', '/')):
+            op = self.next()[1]
+            right = self.factor()
+            unit = unit * right if op == '*' else unit / right
+        return unit
+
+    def factor(self):
+        unit = self.primary()
+        if self.peek() == ('op', '^'):
+            self.next()
+            exponent = self.exponent()
+            if unit.offset:
+                raise ValueError(f"带偏移的单位不能取幂: {self.text}")
+            unit = unit ** exponent
+        return unit
+
+    def primary(self):
+        kind, value = self.next()
+        if kind == 'name':
+            self.factors += 1
+            unit = lookup_unit(value)
+            if unit.offset:
+                self.affine = True
+            return unit
+        if (kind, value) == ('number', '1'):
+            # 1/s 这类写法中的无量纲 1
+            return Unit(Fraction(1), DIMENSIONLESS)
+        if (kind, value) == ('op', '('):
+            unit = self.product()
+            self.expect(')')
+            return unit
+        raise ValueError(f"无法解析的单位: {self.text}")
+
+    def exponent(self):
+        kind, value = self.next()
+        if kind == 'number':
+            return Fraction(value)
+        if (kind, value) == ('op', '('):
+            numerator = self.number()
+            denominator = Fraction(1)
+            if self.peek() == ('op', '/'):
+                self.next()
+                denominator = self.number()
+            self.expect(')')
+            return numerator / denominator
+        raise ValueError(f"无法解析的指数: {self.text}")
+
+    def number(self):
+        kind, value = self.next()
+        if kind != 'number':
+            raise ValueError(f"无法解析的指数: {self.text}")
+        return Fraction(value)
+
+    def expect(self, op):
+        if self.next() != ('op', op):
+            raise ValueError(f"无法解析的单位: {self.text}")
+
+
+def lookup_unit(name):
+    """查找单位名，支持 ft2、m3 这类以数字结尾表示指数的写法"""
+    unit = UNITS.get(name)
+    if unit is not None:
+        return unit
+    stem = name.rstrip('0123456789')
+    if stem != name and stem in UNITS and not UNITS[stem].offset:
+        return UNITS[stem] ** Fraction(name[len(stem):])
+    raise ValueError(f"未知的单位: {name}")
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def parse_unit(text):
+    """解析（复合）单位表达式，结果缓存"""
+    text = text.strip()
+    if not text:
+        raise ValueError("单位不能为空")
+    return _UnitParser(text).parse()
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def compile_conversion(from_unit, to_unit):
+    """编译单位转换方案
+
+    在编译时解析两个单位并检查量纲是否一致，返回 (乘数, 加数)，
+    使 目标值 = 值 * 乘数 + 加数。结果按单位对缓存。
+
+    异常：
+        ValueError: 单位无法解析或量纲不一致时抛出
+    """
+    try:
+        source = parse_unit(from_unit)
+        target = parse_unit(to_unit)
+    except ValueError as e:
+        raise ValueError(f"Unsupported unit conversion: {from_unit} -> {to_unit} ({e})")
+    if source.dimension != target.dimension:
+        raise ValueError(f"Unsupported unit conversion: {from_unit} -> {to_unit} "
+                         f"({source.dimension} != {target.dimension})")
+    scale = source.scale / target.scale
+    offset = (source.offset - target.offset) / target.scale
+    return float(scale), float(offset)
+
+
+def clear_cache():
+    """清空解析和编译缓存"""
+    parse_unit.cache_clear()
+    compile_conversion.cache_clear()
@@ -1,38 +1,424 @@
+"""日志记录器：队列 + 后台监听线程
+
+调用方的线程只把日志记录放入队列（QueueHandler），格式化和写文件都在监听线程
+（QueueListener）中完成，写日志不会阻塞计算。
+
+配置来自 config.yaml 的 logging 部分：
+1. level: 日志级别
+2. file: 日志文件（空表示不写文件），第一条记录写入时才创建
+3. format: text 或 json（每行一个 JSON 对象）
+4. console: 是否同时输出到标准错误
+5. max_bytes / backup_count: 按大小轮转；when / interval: 按时间轮转（设置 when 时忽略 max_bytes）
+6. queue_size: 队列容量，队列满时丢弃新的记录（dropped 计数）
+
+setup_logger 可以重复调用：配置不变时直接返回已配置的记录器，配置改变时替换原来的处理器，
+不会重复添加处理器。attach_handler 为某个子记录器（如 calculator.evaluations）添加单独的输出，
+它的记录不再写入主日志文件。
+
+用法示例：
+logger = setup_logger(config['logging'])
+logger.warning("...")
+"""
+import atexit
+import json
 import logging
-import yaml
-from pathlib import Path
-
-def setup_logger():
-    """设置日志记录器
-    
-    配置说明：
-    1. 日志级别：从 config.yaml 的 logging.level 读取
-    2. 日志文件：从 config.yaml 的 logging.file 读取
-    3. 日志格式：时间 - 名称 - 级别 - 消息
-    
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+
+LOGGER_NAME = 'calculator'
+
+DEFAULT_SETTINGS = {
+    'level': 'INFO',
+    'file': 'calculator.log',
+    'format': 'text',
+    'console': False,
+    'max_bytes': 10 * 1024 * 1024,
+    'backup_count': 5,
+    'when': None,
+    'interval': 1,
+    'queue_size': 10000,
+}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# 决定处理器的配置项（evaluations 等其他项由各自的模块处理）
+HANDLER_KEYS = tuple(DEFAULT_SETTINGS)
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录格式化为一行 JSON：time, level, logger, message（有异常时还有 exception）"""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+    _second = (None, '', '')
+
+    def formatTime(self, record, datefmt=None):
+        """ISO 8601 本地时间，精确到毫秒（同一秒内的记录复用 strftime 的结果）"""
+        second, prefix, zone = self._second
+        if int(record.created) != second:
+            second = int(record.created)
+            local = time.localtime(second)
+            prefix, zone = time.strftime('%Y-%m-%dT%H:%M:%S', local), time.strftime('%z', local)
+            self._second = (second, prefix, zone)
+        return f"{prefix}.{int(record.msecs):03d}{zone}"
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """不在调用方线程中格式化记录的 QueueHandler
+
+    同一进程内的队列（SimpleQueue）直接放入原记录，格式化留给监听线程；跨进程的队列（shared）
+    需要可以序列化的记录，仍按 QueueHandler 的默认方式先合并消息参数。
+    队列中的记录达到 capacity 条时丢弃新的记录并计数，不阻塞调用方。
+    """
+
+    def __init__(self, log_queue, capacity=0, shared=False):
+        super().__init__(log_queue)
+        self.capacity = capacity
+        self.shared = shared
+        self.dropped = 0
+
+    def prepare(self, record):
+        if self.shared:
+            return super().prepare(record)
+        return record
+
+    def enqueue(self, record):
+        if self.capacity and self.queue.qsize() >= self.capacity:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredRecord(namedtuple('StructuredRecord', 'name created fields')):
+    """调用方线程直接放入队列的记录（见 enqueue）：监听线程中才创建 LogRecord，
+    fields 中的项成为 LogRecord 的属性"""
+    __slots__ = ()
+
+
+class _FlushMarker:
+    """flush() 放入队列的标记：监听线程处理完它之前的记录后通知等待的线程"""
+    __slots__ = ('token',)
+
+    def __init__(self, token):
+        self.token = token
+
+
+# 标记编号 -> 等待的 Event
+_flush_waiters = {}
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """队列空闲时才把文件处理器缓冲的记录写入磁盘；停止时等待队列有空位再放入结束标记
+    （QueueListener 默认用 put_nowait，队列满时会出错）"""
+
+    def dequeue(self, block):
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                self.sync()
+                item = self.queue.get(block)
+            if not isinstance(item, _FlushMarker):
+                return item
+            self.sync()
+            waiter = _flush_waiters.pop(item.token, None)
+            if waiter is not None:
+                waiter.set()
+
+    def prepare(self, record):
+        if isinstance(record, StructuredRecord):
+            name, created, fields = record
+            record = logging.LogRecord(name, logging.INFO, '', 0, '', None, None)
+            record.created = created
+            record.msecs = (created - int(created)) * 1000
+            record.__dict__.update(fields)
+        return record
+
+    def sync(self):
+        for handler in self.handlers:
+            getattr(handler, 'sync', handler.flush)()
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class _DeferredFlush:
+    """每条记录写入后不 flush，由监听线程在队列空闲时调用 sync（关闭和轮转时随文件一起 flush）"""
+
+    def flush(self):
+        pass
+
+    def sync(self):
+        super().flush()
+
+
+class _FileHandler(_DeferredFlush, logging.FileHandler):
+    pass
+
+
+class _RotatingFileHandler(_DeferredFlush, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class _TimedRotatingFileHandler(_DeferredFlush, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+
+class _LoggingState:
+    """当前进程的日志管道：队列、入队处理器、监听线程和各自的输出处理器"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.settings = None
+        self.queue = None
+        self.shared = False
+        self.queue_handler = None
+        self.listener = None
+        # 主日志的处理器
+        self.handlers = []
+        # 子记录器名称 -> 它的输出处理器
+        self.routes = {}
+
+
+_state = _LoggingState()
+
+
+def _normalize(settings):
+    merged = dict(DEFAULT_SETTINGS)
+    merged.update({key: value for key, value in (settings or {}).items()
+                   if key in HANDLER_KEYS and value is not None})
+    return merged
+
+
+def _level(value):
+    if isinstance(value, int):
+        return value
+    level = logging.getLevelName(str(value).upper())
+    if not isinstance(level, int):
+        raise ValueError(f"unknown log level: {value}")
+    return level
+
+
+def file_handler(path, settings=None):
+    """按轮转配置创建文件处理器（when 非空时按时间轮转，max_bytes 大于 0 时按大小轮转）
+
+    处理器只能用在监听线程中：记录写入后不立即 flush，见 _QueueListener。
+
+    参数：
+        path (str): 日志文件路径
+        settings (dict, optional): max_bytes, backup_count, when, interval
+    """
+    settings = _normalize(settings)
+    backup_count = int(settings['backup_count'])
+    if settings['when']:
+        return _TimedRotatingFileHandler(
+            path, when=settings['when'], interval=int(settings['interval']),
+            backupCount=backup_count, encoding='utf-8', delay=True)
+    if int(settings['max_bytes']) > 0:
+        return _RotatingFileHandler(
+            path, maxBytes=int(settings['max_bytes']), backupCount=backup_count,
+            encoding='utf-8', delay=True)
+    return _FileHandler(path, encoding='utf-8', delay=True)
+
+
+def _not_routed(record):
+    """主日志的处理器跳过已有单独输出的子记录器的记录"""
+    return record.name not in _state.routes
+
+
+def _build_handlers(settings):
+    formatter = JsonFormatter() if settings['format'] == 'json' else logging.Formatter(TEXT_FORMAT)
+    handlers = []
+    if settings['file']:
+        handlers.append(file_handler(settings['file'], settings))
+    if settings['console']:
+        handlers.append(logging.StreamHandler(sys.stderr))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.addFilter(_not_routed)
+    return handlers
+
+
+def _start_listener():
+    """按当前的处理器重新启动监听线程（调用方持有 _state.lock）"""
+    if _state.listener is not None:
+        _state.listener.stop()
+    handlers = list(_state.handlers) + list(_state.routes.values())
+    _state.listener = _QueueListener(_state.queue, *handlers, respect_handler_level=True)
+    _state.listener.start()
+
+
+def _install_queue_handler(logger, handler):
+    for existing in list(logger.handlers):
+        if isinstance(existing, _QueueHandler):
+            logger.removeHandler(existing)
+    logger.addHandler(handler)
+
+
+def setup_logger(settings=None):
+    """配置并返回 calculator 记录器（重复调用时不会重复添加处理器）
+
+    参数：
+        settings (dict, optional): config.yaml 的 logging 部分，缺少的项使用 DEFAULT_SETTINGS
+
     返回：
         Logger: 配置好的日志记录器实例
     """
-    with open('config.yaml', 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+    settings = _normalize(settings)
+    logger = logging.getLogger(LOGGER_NAME)
+    with _state.lock:
+        if settings == _state.settings:
+            return logger
+        logger.setLevel(_level(settings['level']))
+        handlers = _build_handlers(settings)
+        if _state.queue is None:
+            _state.queue = queue.SimpleQueue()
+            _state.queue_handler = _QueueHandler(_state.queue, max(0, int(settings['queue_size'])))
+            atexit.register(shutdown)
+        old_handlers, _state.handlers = _state.handlers, handlers
+        _start_listener()
+        for handler in old_handlers:
+            handler.close()
+        _install_queue_handler(logger, _state.queue_handler)
+        # 只输出到这里配置的处理器，不再传给根记录器
+        logger.propagate = False
+        _state.settings = settings
+    return logger
 
-    logger = logging.getLogger('calculator')
-    logger.setLevel(config['logging']['level'])
 
-    # 文件处理器
-    fh = logging.FileHandler(config['logging']['file'], encoding='utf-8')
-    fh.setFormatter(logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    ))
-    logger.addHandler(fh)
+def attach_handler(name, handler, level=logging.INFO):
+    """为子记录器 name 添加单独的输出（替换之前为它添加的输出），返回该记录器
 
+    子记录器的记录同样经过队列，在监听线程中由 handler 格式化和写入，不再写入主日志。
+    """
+    logger = logging.getLogger(name)
+    with _state.lock:
+        if _state.queue is None:
+            setup_logger()
+        old = _state.routes.get(name)
+        handler.addFilter(logging.Filter(name))
+        _state.routes[name] = handler
+        _start_listener()
+        if old is not None:
+            old.close()
+    logger.setLevel(level)
+    _install_queue_handler(logger, _state.queue_handler)
+    logger.propagate = False
     return logger
 
-def setup_logger():
-    logger = logging.getLogger('calculator')
-    logger.setLevel(logging.INFO)
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-    return logger
\ No newline at end of file
+
+def detach_handler(name):
+    """移除 attach_handler 为子记录器 name 添加的输出"""
+    with _state.lock:
+        route = _state.routes.pop(name, None)
+        if route is None:
+            return
+        _start_listener()
+        route.close()
+    logger = logging.getLogger(name)
+    for existing in list(logger.handlers):
+        if isinstance(existing, _QueueHandler):
+            logger.removeHandler(existing)
+    logger.propagate = True
+
+
+def shared_queue():
+    """返回可以传给子进程（见 attach_queue）的日志队列
+
+    第一次调用时把当前进程的队列换成 multiprocessing.Queue，子进程的记录由本进程的
+    监听线程写入，多个进程不会同时写（和轮转）同一个文件。
+    """
+    with _state.lock:
+        if _state.queue is None:
+            setup_logger()
+        if not _state.shared:
+            import multiprocessing
+            if _state.listener is not None:
+                _state.listener.stop()
+                _state.listener = None
+            _state.queue = multiprocessing.Queue(_state.queue_handler.capacity)
+            # multiprocessing.Queue 本身有容量上限（macOS 上也不支持 qsize）
+            _state.queue_handler.queue = _state.queue
+            _state.queue_handler.capacity = 0
+            _state.shared = True
+            _start_listener()
+        return _state.queue
+
+
+def attach_queue(log_queue, names=(LOGGER_NAME,)):
+    """在子进程中把记录器 names 的记录放入父进程的共享队列（见 shared_queue），不启动监听线程"""
+    handler = _QueueHandler(log_queue, shared=True)
+    with _state.lock:
+        # fork 出的子进程继承了父进程的状态，但没有继承监听线程
+        _state.listener = None
+        _state.handlers = []
+        _state.routes = {}
+        _state.queue = log_queue
+        _state.queue_handler = handler
+        _state.shared = True
+        _state.settings = None
+    for name in names:
+        logger = logging.getLogger(name)
+        _install_queue_handler(logger, handler)
+        logger.propagate = False
+    return handler
+
+
+def enqueue(name, fields):
+    """不经过 Logger，把记录器 name 的一条结构化记录直接放入队列
+
+    调用方线程不创建 LogRecord、不查找调用位置，也不检查记录器的级别和过滤器；
+    用于求值日志这类调用频繁、已经自行采样和限流的记录。
+    """
+    handler = _state.queue_handler
+    if handler is not None:
+        handler.enqueue(StructuredRecord(name, time.time(), fields))
+
+
+def dropped():
+    """队列满而丢弃的记录数"""
+    handler = _state.queue_handler
+    return handler.dropped if handler is not None else 0
+
+
+def flush(timeout=None):
+    """等待队列中已有的记录写完"""
+    if _state.listener is None:
+        return
+    waiter = threading.Event()
+    token = id(waiter)
+    _flush_waiters[token] = waiter
+    _state.queue.put(_FlushMarker(token))
+    waiter.wait(timeout)
+    _flush_waiters.pop(token, None)
+
+
+def shutdown():
+    """停止监听线程：写完队列中剩余的记录并关闭处理器（进程退出时自动调用）"""
+    with _state.lock:
+        listener, _state.listener = _state.listener, None
+        if listener is not None:
+            listener.stop()
+        handlers = list(_state.handlers) + list(_state.routes.values())
+        _state.settings = None
+        if listener is not None:
+            for handler in handlers:
+                handler.close()
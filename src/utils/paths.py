@@ -0,0 +1,50 @@
+import os
+import sys
+from pathlib import Path
+
+# 缓存目录和数据目录下的应用子目录名
+APP_NAME = 'advanced-calculator'
+
+def user_cache_dir():
+    """返回用户缓存目录（不存在时创建）
+
+    目录规则：
+    1. Windows: %LOCALAPPDATA%\\advanced-calculator\\Cache
+    2. macOS: ~/Library/Caches/advanced-calculator
+    3. 其他系统: $XDG_CACHE_HOME/advanced-calculator（默认 ~/.cache）
+
+    返回：
+        Path: 缓存目录路径
+    """
+    if sys.platform == 'win32':
+        base = Path(os.environ.get('LOCALAPPDATA') or Path.home() / 'AppData' / 'Local')
+        path = base / APP_NAME / 'Cache'
+    elif sys.platform == 'darwin':
+        path = Path.home() / 'Library' / 'Caches' / APP_NAME
+    else:
+        path = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / APP_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def user_data_dir():
+    """返回用户数据目录（不存在时创建）
+
+    与缓存目录不同，这里的文件（如历史记录库）不能随意删除。
+
+    目录规则：
+    1. Windows: %APPDATA%\\advanced-calculator
+    2. macOS: ~/Library/Application Support/advanced-calculator
+    3. 其他系统: $XDG_DATA_HOME/advanced-calculator（默认 ~/.local/share）
+
+    返回：
+        Path: 数据目录路径
+    """
+    if sys.platform == 'win32':
+        base = Path(os.environ.get('APPDATA') or Path.home() / 'AppData' / 'Roaming')
+        path = base / APP_NAME
+    elif sys.platform == 'darwin':
+        path = Path.home() / 'Library' / 'Application Support' / APP_NAME
+    else:
+        path = Path(os.environ.get('XDG_DATA_HOME') or Path.home() / '.local' / 'share') / APP_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -1,29 +1,230 @@
-import requests
-import yaml
+"""版本更新检查
+
+check_update() 同步检查；UpdateChecker 在后台守护线程中检查，不阻塞启动：
+1. 检查结果缓存在用户缓存目录的 update_check.json 中，有效期内（默认一天）
+   所有进程都直接使用缓存结果，不访问网络
+2. 缓存过期时通过锁文件保证同一时刻只有一个进程发起请求，其他进程跳过本次检查
+3. 网络请求有严格的超时；调用方只读取已经完成的结果，从不等待网络
+"""
+import atexit
+import json
 import os
+import threading
+import time
 from pathlib import Path
 
+from src.utils.paths import user_cache_dir
+
+DEFAULT_UPDATE_URL = "https://api.github.com/repos/user/advanced-calculator/releases/latest"
+
+CACHE_FILE = 'update_check.json'
+LOCK_FILE = 'update_check.lock'
+
+# 检查结果的有效期（秒）
+DEFAULT_TTL = 24 * 60 * 60
+# 检查失败后的重试间隔（秒），避免离线时每次启动都重试
+FAILURE_TTL = 60 * 60
+# 网络请求超时（秒）
+DEFAULT_TIMEOUT = 3.0
+# 锁文件超过该时间（秒）未释放时视为持有进程已退出
+LOCK_STALE_AFTER = 60
+
 def get_current_version():
     """获取当前版本号"""
     try:
-        config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+        import yaml
+        config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
         with open(config_path, 'r', encoding='utf-8') as f:
             config = yaml.safe_load(f)
-            return config.get('version', '1.0.0')
+            return str(config.get('version', '1.0.0'))
     except Exception:
         return '1.0.0'
 
-def check_update():
-    """检查更新
-    
-    返回：
-        tuple: (是否有更新, 最新版本号)
+def fetch_latest_version(url, timeout=DEFAULT_TIMEOUT):
+    """从发布接口获取最新版本号
+
+    接口返回 JSON，版本号取 tag_name（GitHub releases）或 version 字段，去掉开头的 v。
+
+    异常：
+        requests.RequestException: 网络错误或超时
+        ValueError: 响应中没有版本号
     """
+    import requests
+    response = requests.get(url, timeout=timeout,
+                            headers={'Accept': 'application/vnd.github+json'})
+    response.raise_for_status()
+    data = response.json()
+    version = data.get('tag_name') or data.get('version')
+    if not version:
+        raise ValueError("响应中没有版本号")
+    return str(version).lstrip('vV')
+
+def is_newer(latest_version, current_version):
+    """判断 latest_version 是否比 current_version 新（无法解析的版本号视为不新）"""
+    from packaging.version import Version, InvalidVersion
     try:
-        current_version = get_current_version()
-        # 这里可以实现实际的版本检查逻辑
-        # 例如：从服务器获取最新版本号
-        latest_version = current_version  # 暂时返回当前版本
-        return False, latest_version
-    except Exception as e:
-        return False, None
\ No newline at end of file
+        return Version(latest_version) > Version(current_version)
+    except InvalidVersion:
+        return False
+
+class UpdateChecker:
+    """带缓存的后台更新检查
+
+    用法示例：
+    checker = UpdateChecker().start()    # 立即返回
+    ...
+    result = checker.result()            # 未完成时返回 None，不等待
+    if result and result[0]:
+        print("发现新版本", result[1])
+
+    属性：
+        current_version (str): 当前版本号
+        url (str): 发布信息接口地址
+        ttl (float): 检查结果的有效期（秒）
+        timeout (float): 网络请求超时（秒）
+        error (Exception): 检查失败时的异常，成功时为 None
+    """
+
+    def __init__(self, current_version=None, url=None, ttl=DEFAULT_TTL,
+                 timeout=DEFAULT_TIMEOUT, cache_dir=None):
+        self.current_version = str(current_version or get_current_version())
+        self.url = url or DEFAULT_UPDATE_URL
+        self.ttl = ttl
+        self.timeout = timeout
+        self.error = None
+        self._cache_dir = Path(cache_dir) if cache_dir else None
+        self._result = None
+        self._done = threading.Event()
+        self._thread = None
+
+    @property
+    def cache_dir(self):
+        if self._cache_dir is None:
+            self._cache_dir = user_cache_dir()
+        return self._cache_dir
+
+    @property
+    def done(self):
+        """检查是否已经结束（成功、失败或被跳过）"""
+        return self._done.is_set()
+
+    def start(self):
+        """在后台守护线程中开始检查并立即返回"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='update-check', daemon=True)
+            self._thread.start()
+        return self
+
+    def result(self, wait=0):
+        """返回检查结果
+
+        参数：
+            wait (float): 最多等待的秒数，默认不等待
+
+        返回：
+            tuple: (是否有更新, 最新版本号)；检查未完成、被跳过或失败时返回 None
+        """
+        if wait:
+            self._done.wait(wait)
+        return self._result if self._done.is_set() else None
+
+    def run(self):
+        """在当前线程中执行一次检查，返回值同 result()"""
+        try:
+            latest_version = self._check()
+            if latest_version is not None:
+                self._result = (is_newer(latest_version, self.current_version), latest_version)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+        return self._result
+
+    def _check(self):
+        cache = self.read_cache()
+        if self._is_fresh(cache):
+            return cache.get('latest_version')
+        if not self._acquire_lock():
+            # 其他进程正在检查
+            return None
+        try:
+            # 等待锁期间其他进程可能刚刚更新了缓存
+            cache = self.read_cache()
+            if self._is_fresh(cache):
+                return cache.get('latest_version')
+            latest_version = None
+            try:
+                latest_version = fetch_latest_version(self.url, self.timeout)
+            finally:
+                # 失败时也记录检查时间，FAILURE_TTL 内不再重试
+                self.write_cache(latest_version)
+            return latest_version
+        finally:
+            self._release_lock()
+
+    # ======================
+    # 缓存与锁
+    # ======================
+    def read_cache(self):
+        """读取缓存文件，缺失或损坏时返回 None"""
+        try:
+            with open(self.cache_dir / CACHE_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            return cache if isinstance(cache, dict) else None
+        except (OSError, ValueError):
+            return None
+
+    def write_cache(self, latest_version):
+        """写入检查结果（先写临时文件再原子替换）"""
+        path = self.cache_dir / CACHE_FILE
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'url': self.url, 'checked_at': time.time(),
+                           'latest_version': latest_version}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def _is_fresh(self, cache):
+        if not cache or cache.get('url') != self.url:
+            return False
+        ttl = self.ttl if cache.get('latest_version') else min(self.ttl, FAILURE_TTL)
+        age = time.time() - cache.get('checked_at', 0)
+        return 0 <= age < ttl
+
+    def _acquire_lock(self):
+        path = self.cache_dir / LOCK_FILE
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                # 进程在检查完成前退出时也释放锁（守护线程不会执行 finally）
+                atexit.register(self._release_lock)
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - path.stat().st_mtime < LOCK_STALE_AFTER:
+                        return False
+                    # 持有锁的进程异常退出，未能释放锁
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def _release_lock(self):
+        atexit.unregister(self._release_lock)
+        try:
+            (self.cache_dir / LOCK_FILE).unlink()
+        except OSError:
+            pass
+
+def check_update(current_version=None, url=None, ttl=DEFAULT_TTL, timeout=DEFAULT_TIMEOUT):
+    """检查更新（同步，最多等待 timeout 秒）
+
+    返回：
+        tuple: (是否有更新, 最新版本号)；检查失败、超时或被其他进程占用时返回 (False, None)
+    """
+    checker = UpdateChecker(current_version, url, ttl=ttl, timeout=timeout).start()
+    return checker.result(wait=timeout) or (False, None)
@@ -0,0 +1,263 @@
+"""批量（向量化）计算
+
+为 CalculatorCore 提供批量运算接口：一次调用处理整组操作数，
+而不是对每个标量都经过 handle_errors、字典查找和验证函数。
+
+实现方式：
+1. 安装了 NumPy 时，运算符和函数映射为 NumPy 通用函数（ufunc），
+   参数验证以向量化掩码的形式执行
+2. 未安装 NumPy 时，退回到纯 Python 实现，逐个元素调用
+   CalculatorCore.OPERATORS / FUNCTIONS 中的实现
+
+两种实现都不会在遇到第一个非法元素时抛出异常，而是返回逐元素的错误标记，
+非法位置的结果为 NaN。
+
+复数参数的函数调用和复数幂运算交给复数引擎（complex_engine）的 complex128 实现。
+"""
+import math
+import sys
+from collections import namedtuple
+from itertools import repeat
+
+from src import complex_engine
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖
+    np = None
+
+HAVE_NUMPY = np is not None
+
+# 批量计算结果
+# - values: 结果数组（NumPy 数组，或纯 Python 实现中的 list）
+# - errors: 逐元素错误标记，True 表示该位置参数非法
+# - error_key: 参数非法时对应的错误信息键（与标量接口一致）
+BatchResult = namedtuple('BatchResult', ['values', 'errors', 'error_key'])
+
+NAN = float('nan')
+
+# exp 不溢出的最大实数参数（与 CalculatorCore.FUNCTIONS 中的验证一致）
+MAX_EXP_ARGUMENT = math.log(sys.float_info.max)
+
+
+# ======================
+# NumPy 实现
+# ======================
+def _degrees(kernel):
+    """三角函数输入为角度，先转换为弧度"""
+    return lambda x: kernel(np.radians(x))
+
+
+def _nonzero_divisor(a, b):
+    return b != 0
+
+
+def _require_complex(x):
+    return np.full(np.shape(x), np.iscomplexobj(x), dtype=bool)
+
+
+if HAVE_NUMPY:
+    # 'op': (kernel, mask, error_key)
+    # mask 为 None 表示对所有输入都有效
+    NUMPY_OPERATORS = {
+        '+': (np.add, None, ""),
+        '-': (np.subtract, None, ""),
+        '*': (np.multiply, None, ""),
+        '/': (np.divide, _nonzero_divisor, "error.division_by_zero"),
+        '%': (np.mod, _nonzero_divisor, "error.division_by_zero"),
+        # 实数的 ^ 由 _power 计算（负数的非整数次幂为复数，上溢标记为错误）
+        '^': (np.power, None, ""),
+        '+c': (np.add, None, ""),
+        '-c': (np.subtract, None, ""),
+        '*c': (np.multiply, None, ""),
+        '/c': (np.divide, _nonzero_divisor, "error.division_by_zero"),
+    }
+
+    # 'func_name': (kernel, mask, error_key)
+    # 验证掩码与 CalculatorCore.FUNCTIONS 中的标量验证函数一一对应
+    NUMPY_FUNCTIONS = {
+        'sqrt': (np.sqrt, lambda x: x >= 0, "error.negative_sqrt"),
+        'sin': (_degrees(np.sin), None, ""),
+        'cos': (_degrees(np.cos), None, ""),
+        'tan': (_degrees(np.tan), lambda x: np.mod(x, 90) != 0, "error.invalid_tan"),
+        'log': (np.log, lambda x: x > 0, "error.positive_required"),
+        'log10': (np.log10, lambda x: x > 0, "error.positive_required"),
+        'exp': (np.exp, lambda x: x <= MAX_EXP_ARGUMENT, "error.overflow"),
+        'abs': (np.abs, None, ""),
+        'abs_c': (np.abs, _require_complex, "error.complex_required"),
+        'real': (np.real, _require_complex, "error.complex_required"),
+        'imag': (np.imag, _require_complex, "error.complex_required"),
+        'conj': (np.conjugate, _require_complex, "error.complex_required"),
+        'arg': (np.angle, _require_complex, "error.complex_required"),
+    }
+else:
+    NUMPY_OPERATORS = {}
+    NUMPY_FUNCTIONS = {}
+
+
+def as_array(values, complex_values=False):
+    """将任意序列或缓冲区转换为 float64（或 complex128）数组，不复制已符合要求的数组"""
+    array = np.asarray(values)
+    if complex_values or array.dtype.kind == 'c':
+        return array.astype(np.complex128, copy=False)
+    return array.astype(np.float64, copy=False)
+
+
+def _apply_kernel(kernel, mask, error_key, *operands):
+    """执行向量化运算，非法位置置为 NaN 并返回错误标记"""
+    with np.errstate(all='ignore'):
+        values = np.asarray(kernel(*operands))
+        if mask is None:
+            return BatchResult(values, np.zeros(values.shape, dtype=bool), "")
+        errors = ~np.asarray(mask(*operands), dtype=bool)
+    if not errors.any():
+        return BatchResult(values, np.zeros(values.shape, dtype=bool), "")
+    errors = np.broadcast_to(errors, values.shape).copy()
+    values = values.copy()
+    values[errors] = NAN
+    return BatchResult(values, errors, error_key)
+
+
+def _power(a, b):
+    """实数数组的 ^，与标量实现（numeric_backends.power）一致
+
+    负数的非整数次幂取复数主值（结果为 complex128 数组）；有限的操作数得到 inf / NaN 时
+    标记为错误：0 的负数次幂为 error.division_by_zero，其余为 error.overflow。
+    """
+    with np.errstate(all='ignore'):
+        values = np.asarray(np.power(a, b))
+        complex_base = np.broadcast_to((a < 0) & np.isfinite(b) & (b != np.floor(b)), values.shape)
+        if complex_base.any():
+            a_full, b_full = np.broadcast_arrays(a, b)
+            values = values.astype(np.complex128)
+            values[complex_base] = np.power(a_full[complex_base].astype(np.complex128),
+                                            b_full[complex_base])
+        errors = np.broadcast_to(np.isfinite(a) & np.isfinite(b), values.shape) & ~np.isfinite(values)
+    if not errors.any():
+        return BatchResult(values, errors, "")
+    first = np.unravel_index(np.flatnonzero(errors)[0], values.shape)
+    zero_base = np.broadcast_to(a, values.shape)[first] == 0
+    values = values.copy()
+    values[errors] = NAN
+    return BatchResult(values, errors, "error.division_by_zero" if zero_base else "error.overflow")
+
+
+# ======================
+# 纯 Python 实现
+# ======================
+def _as_number(x):
+    """与 as_array 一致：复数保持不变，其余数值转换为 float"""
+    return x if type(x) is complex else float(x)
+
+
+def _as_list(values):
+    """标量返回 None（由调用方广播），其他输入转换为 float / complex 列表"""
+    if isinstance(values, (int, float, complex)):
+        return None
+    return [_as_number(x) for x in values]
+
+
+def _error_key(e, default):
+    """把内置的算术异常映射为与 _power、numeric_backends.power 相同的错误信息键"""
+    if isinstance(e, OverflowError):
+        return "error.overflow"
+    if isinstance(e, ZeroDivisionError):
+        return "error.division_by_zero"
+    return default
+
+
+def _fallback_calculate(a, b, operator, operators):
+    a_list, b_list = _as_list(a), _as_list(b)
+    if a_list is None and b_list is None:
+        a_list, b_list = [_as_number(a)], [_as_number(b)]
+    elif a_list is None:
+        a_list = repeat(_as_number(a), len(b_list))
+    elif b_list is None:
+        b_list = repeat(_as_number(b), len(a_list))
+    elif len(a_list) != len(b_list):
+        raise ValueError(f"操作数长度不一致: {len(a_list)} != {len(b_list)}")
+
+    func = operators[operator]
+    values, errors = [], []
+    error_key = ""
+    for x, y in zip(a_list, b_list):
+        try:
+            values.append(func(x, y))
+            errors.append(False)
+        except (ValueError, ArithmeticError, TypeError) as e:
+            values.append(NAN)
+            errors.append(True)
+            error_key = error_key or _error_key(e, str(e))
+    return BatchResult(values, errors, error_key)
+
+
+def _fallback_function(func_name, values, functions):
+    func, _, validator, error_msg = functions[func_name]
+    degrees = func_name in ('sin', 'cos', 'tan')
+    complex_func = func_name in complex_engine.FUNCTIONS
+    results, errors = [], []
+    error_key = ""
+    for x in values:
+        x = _as_number(x)
+        try:
+            if type(x) is complex and complex_func:
+                results.append(complex_engine.apply(func_name, x, degrees))
+            else:
+                if not validator(x):
+                    raise ValueError(error_msg)
+                results.append(func(math.radians(x) if degrees else x))
+            errors.append(False)
+        except (ValueError, ArithmeticError, TypeError) as e:
+            results.append(NAN)
+            errors.append(True)
+            error_key = error_key or _error_key(e, str(e) if type(x) is complex and complex_func else error_msg)
+    return BatchResult(results, errors, error_key)
+
+
+# ======================
+# 公共接口
+# ======================
+def calculate_many(a, b, operator, operators):
+    """批量执行二元运算
+
+    参数：
+        a: 第一个操作数数组（NumPy 数组、array.array、列表等）或标量
+        b: 第二个操作数数组或标量，与 a 按 NumPy 规则广播
+        operator (str): 运算符
+        operators (dict): 标量运算符表（CalculatorCore.OPERATORS），用于纯 Python 实现
+
+    返回：
+        BatchResult: 结果数组、逐元素错误标记和错误信息键
+    """
+    if HAVE_NUMPY and operator in NUMPY_OPERATORS:
+        kernel, mask, error_key = NUMPY_OPERATORS[operator]
+        complex_values = operator.endswith('c')
+        a, b = as_array(a, complex_values), as_array(b, complex_values)
+        if operator == '^' and (a.dtype.kind == 'c' or b.dtype.kind == 'c'):
+            # 复数幂取主值，实数掩码（负数的非整数次幂）不适用
+            return complex_engine.calculate_many(a, b, operator)
+        if operator == '^':
+            return _power(a, b)
+        return _apply_kernel(kernel, mask, error_key, a, b)
+    return _fallback_calculate(a, b, operator, operators)
+
+
+def apply_function(func_name, values, functions):
+    """对一组数值批量执行函数
+
+    参数：
+        func_name (str): 函数名
+        values: 参数数组（NumPy 数组、array.array、列表等）
+        functions (dict): 标量函数表（CalculatorCore.FUNCTIONS），用于纯 Python 实现
+
+    返回：
+        BatchResult: 结果数组、逐元素错误标记和错误信息键
+    """
+    if HAVE_NUMPY and func_name in NUMPY_FUNCTIONS:
+        kernel, mask, error_key = NUMPY_FUNCTIONS[func_name]
+        array = as_array(values)
+        if array.dtype.kind == 'c' and func_name in complex_engine.FUNCTIONS:
+            # 复数参数：不做实数定义域验证，按复平面计算
+            return complex_engine.apply_many(func_name, array, func_name in ('sin', 'cos', 'tan'))
+        return _apply_kernel(kernel, mask, error_key, array)
+    return _fallback_function(func_name, values, functions)
@@ -0,0 +1,392 @@
+"""变量工作区
+
+交互模式和图形界面中的赋值语句（a = 3, b = a*2 + sqrt(a)）定义的命名变量，
+按变量之间的依赖关系增量重新计算：
+
+1. 每个定义解析一次，表达式中引用的变量（free_variables）为依赖边，
+   同时维护反向边（依赖它的变量）
+2. 修改一个定义时只把它和下游（直接或间接依赖它的变量）标记为脏，不计算
+3. 读取脏变量时按依赖顺序只重新计算它的脏上游和它自己；读取干净变量是一次字典查找
+4. 定义按编译表达式（expression_compiler）计算，依赖的值作为参数传入
+5. 引用未定义的变量或依赖计算出错的变量时，该变量处于错误状态（定义保留），
+   被引用的变量定义或修正后自动恢复
+6. 形成循环依赖的定义被拒绝
+
+工作区同时作为 CalculatorCore.variables 使用：普通表达式中的变量（expression_parser.Variable）
+通过 workspace[name] 读取当前值。
+
+修改定义和重新计算在锁内执行；读取干净变量不加锁。
+
+用法示例：
+ws = Workspace(core)
+ws.define('a', '3')
+ws.define('b', 'a*2 + sqrt(a)')
+ws.value('b')      # 7.732050...
+ws.define('a', '4')  # 只把 a、b 标记为脏
+ws.value('b')      # 10.0
+"""
+import os
+import re
+import threading
+from collections import deque
+from collections.abc import Mapping
+
+from src.expression_parser import (check_variable_name, free_variables, normalize_expression,
+                                   parse_expression)
+
+# 工作区文件格式版本
+WORKSPACE_FORMAT = 1
+
+# 赋值语句：变量名 = 表达式
+ASSIGNMENT = re.compile(r'\s*([A-Za-z_][A-Za-z0-9_]*)\s*=(.*)$', re.DOTALL)
+
+# 变量名
+IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+def parse_assignment(line):
+    """解析赋值语句
+
+    返回：
+        tuple: (变量名, 表达式)，不是赋值语句时返回 None
+    """
+    match = ASSIGNMENT.match(line)
+    if match is None:
+        return None
+    return match.group(1), match.group(2)
+
+
+class Definition:
+    """一个变量的定义
+
+    属性：
+        name (str): 变量名
+        expression (str): 规范化的表达式文本
+        dependencies (tuple): 引用的变量名（按第一次出现的顺序）
+        compiled (CompiledExpression): 编译后的表达式（第一次计算时编译，切换后端后重新编译）
+    """
+    __slots__ = ('name', 'expression', 'dependencies', 'compiled')
+
+    def __init__(self, name, expression, dependencies):
+        self.name = name
+        self.expression = expression
+        self.dependencies = dependencies
+        self.compiled = None
+
+
+class Workspace(Mapping):
+    """变量工作区（按变量名读取当前值的映射）
+
+    属性：
+        core (CalculatorCore): 计算定义使用的计算核心
+        values (dict): 干净且计算成功的变量的值
+        errors (dict): 干净但计算失败的变量的错误信息
+        recompute_count (int): 累计重新计算的定义数
+        generation (int): 变量名集合的版本号（定义新变量、删除、清空和加载时加一，见 completion）
+    """
+
+    def __init__(self, core):
+        self.core = core
+        self.values = {}
+        self.errors = {}
+        self.recompute_count = 0
+        self.generation = 0
+        self._definitions = {}
+        # 变量名 -> 依赖它的变量名（包括尚未定义的变量名）
+        self._dependents = {}
+        self._dirty = set()
+        self._backend = core.backend
+        self._lock = threading.RLock()
+
+    # ======================
+    # 读取
+    # ======================
+    def value(self, name):
+        """返回变量的当前值（脏变量先重新计算）
+
+        异常：
+            KeyError: 变量未定义时抛出
+            ValueError: 变量计算失败（或依赖的变量未定义、计算失败）时抛出
+        """
+        if self._backend is not self.core.backend or name in self._dirty:
+            with self._lock:
+                self._check_backend()
+                if name in self._dirty:
+                    self._refresh(name)
+        try:
+            return self.values[name]
+        except KeyError:
+            pass
+        error = self.errors.get(name)
+        if error is not None:
+            raise ValueError(error)
+        raise KeyError(name)
+
+    __getitem__ = value
+
+    def __contains__(self, name):
+        return name in self._definitions
+
+    def __iter__(self):
+        return iter(list(self._definitions))
+
+    def __len__(self):
+        return len(self._definitions)
+
+    def expression(self, name):
+        """返回变量定义的表达式文本（变量未定义时抛出 KeyError）"""
+        return self._definitions[name].expression
+
+    def dependencies(self, name):
+        """返回变量直接引用的变量名"""
+        return self._definitions[name].dependencies
+
+    def dependents(self, name):
+        """返回直接引用该变量的已定义变量名"""
+        return tuple(sorted(self._dependents.get(name, ())))
+
+    def entries(self):
+        """按定义顺序返回全部变量 [(变量名, 表达式, 值, 错误信息)]（先重新计算脏变量）"""
+        with self._lock:
+            self.recompute()
+            return [(name, definition.expression, self.values.get(name), self.errors.get(name))
+                    for name, definition in self._definitions.items()]
+
+    # ======================
+    # 修改
+    # ======================
+    def define(self, name, expr):
+        """定义或重新定义变量（不立即计算）
+
+        参数：
+            name (str): 变量名
+            expr (str): 表达式，可以引用其他变量
+
+        返回：
+            str: 规范化的表达式文本
+
+        异常：
+            ValueError: 变量名无效、表达式语法错误或形成循环依赖时抛出（工作区不变）
+        """
+        self._check_name(name)
+        text = normalize_expression(expr)
+        dependencies = free_variables(parse_expression(text))
+        with self._lock:
+            cycle = self._find_cycle(name, dependencies)
+            if cycle:
+                raise ValueError(f"循环依赖: {' -> '.join(cycle)}")
+            old = self._definitions.get(name)
+            if old is not None:
+                for dependency in old.dependencies:
+                    self._dependents[dependency].discard(name)
+            else:
+                self.generation += 1
+            for dependency in dependencies:
+                self._dependents.setdefault(dependency, set()).add(name)
+            self._definitions[name] = Definition(name, text, dependencies)
+            self._mark_dirty(name)
+        return text
+
+    def delete(self, name):
+        """删除变量（依赖它的变量进入错误状态，直到重新定义）
+
+        异常：
+            KeyError: 变量未定义时抛出
+        """
+        with self._lock:
+            definition = self._definitions.pop(name)
+            self.generation += 1
+            for dependency in definition.dependencies:
+                self._dependents[dependency].discard(name)
+            self._dirty.discard(name)
+            self.values.pop(name, None)
+            self.errors.pop(name, None)
+            for dependent in self._dependents.get(name, ()):
+                self._mark_dirty(dependent)
+
+    def clear(self):
+        """删除全部变量"""
+        with self._lock:
+            self._definitions.clear()
+            self.generation += 1
+            self._dependents.clear()
+            self._dirty.clear()
+            self.values.clear()
+            self.errors.clear()
+
+    def invalidate(self):
+        """把全部变量标记为脏（下次读取时重新计算）"""
+        with self._lock:
+            self._dirty.update(self._definitions)
+
+    def recompute(self):
+        """重新计算全部脏变量
+
+        返回：
+            int: 重新计算的定义数
+        """
+        with self._lock:
+            self._check_backend()
+            count = self.recompute_count
+            for name in list(self._dirty):
+                if name in self._dirty:
+                    self._refresh(name)
+            return self.recompute_count - count
+
+    # ======================
+    # 保存和加载
+    # ======================
+    def save(self, path):
+        """把全部定义（不含值）保存为 JSON 文件（先写临时文件再替换）
+
+        返回：
+            int: 保存的变量数
+        """
+        import json
+        with self._lock:
+            variables = [{'name': name, 'expression': definition.expression}
+                         for name, definition in self._definitions.items()]
+        data = {'format': WORKSPACE_FORMAT, 'variables': variables}
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+        return len(variables)
+
+    def load(self, path):
+        """从 JSON 文件加载定义，替换当前的全部变量（值在读取时重新计算）
+
+        返回：
+            int: 加载的变量数
+
+        异常：
+            OSError: 文件无法读取时抛出
+            ValueError: 文件格式错误或定义无效时抛出（工作区不变）
+        """
+        import json
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"工作区文件格式错误: {e}") from None
+        if not isinstance(data, dict) or data.get('format') != WORKSPACE_FORMAT:
+            raise ValueError(f"不支持的工作区文件: {path}")
+        loaded = Workspace(self.core)
+        for item in data.get('variables', []):
+            try:
+                name, expression = item['name'], item['expression']
+            except (TypeError, KeyError):
+                raise ValueError(f"工作区文件格式错误: {item!r}") from None
+            loaded.define(name, expression)
+        with self._lock:
+            self._definitions = loaded._definitions
+            self._dependents = loaded._dependents
+            self._dirty = loaded._dirty
+            self.values = loaded.values
+            self.errors = loaded.errors
+            self.generation += 1
+        return len(self._definitions)
+
+    # ======================
+    # 内部实现
+    # ======================
+    def _check_name(self, name):
+        if (not isinstance(name, str) or not IDENTIFIER.fullmatch(name)
+                or name in self.core.FUNCTIONS):
+            raise ValueError(f"无效的变量名: {name}")
+        check_variable_name(name)
+
+    def _check_backend(self):
+        """切换数值后端后全部定义重新编译并重新计算"""
+        if self._backend is not self.core.backend:
+            self._backend = self.core.backend
+            self.invalidate()
+
+    def _find_cycle(self, name, dependencies):
+        """name 引用 dependencies 时是否形成循环，返回循环路径（无循环时返回 None）
+
+        只有已经被引用的变量才可能形成循环：从 name 沿反向边向下游搜索，
+        到达 dependencies 中的任意变量即为循环。
+        """
+        if name in dependencies:
+            return [name, name]
+        targets = set(dependencies)
+        parents = {name: None}
+        queue = deque([name])
+        while queue:
+            current = queue.popleft()
+            for dependent in self._dependents.get(current, ()):
+                if dependent in parents:
+                    continue
+                parents[dependent] = current
+                if dependent in targets:
+                    path = [dependent]
+                    while path[-1] != name:
+                        path.append(parents[path[-1]])
+                    # name -> dependent（新的依赖）-> ... -> name
+                    return [name] + path
+                queue.append(dependent)
+        return None
+
+    def _mark_dirty(self, name):
+        """把变量和它的下游标记为脏（已经是脏的变量的下游一定也是脏的）"""
+        if name in self._dirty:
+            return
+        stack = [name]
+        while stack:
+            current = stack.pop()
+            if current in self._definitions:
+                self._dirty.add(current)
+            for dependent in self._dependents.get(current, ()):
+                if dependent not in self._dirty:
+                    stack.append(dependent)
+
+    def _refresh(self, name):
+        """按依赖顺序重新计算 name 的脏上游和 name 自己"""
+        order = []
+        visited = set()
+        stack = [(name, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if expanded:
+                order.append(current)
+                continue
+            if current in visited:
+                continue
+            visited.add(current)
+            stack.append((current, True))
+            for dependency in self._definitions[current].dependencies:
+                if dependency in self._dirty and dependency not in visited:
+                    stack.append((dependency, False))
+        for current in order:
+            self._compute(self._definitions[current])
+
+    def _compute(self, definition):
+        name = definition.name
+        args = []
+        error = None
+        for dependency in definition.dependencies:
+            if dependency in self.values:
+                args.append(self.values[dependency])
+            elif dependency in self._definitions:
+                error = f"依赖的变量出错: {dependency}"
+                break
+            else:
+                error = f"未知的标识符: {dependency}"
+                break
+        if error is None:
+            try:
+                compiled = definition.compiled
+                if compiled is None or compiled.backend is not self.core.backend:
+                    compiled = definition.compiled = self.core.compile(definition.expression)
+                value = compiled(*args)
+            except (ValueError, ArithmeticError, TypeError) as e:
+                error = str(e)
+        if error is None:
+            self.values[name] = value
+            self.errors.pop(name, None)
+        else:
+            self.errors[name] = error
+            self.values.pop(name, None)
+        self._dirty.discard(name)
+        self.recompute_count += 1
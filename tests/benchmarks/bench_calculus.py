@@ -0,0 +1,223 @@
+"""数值积分、求导和求根测试
+
+在一组标准测试积分上运行 integrate（自适应 Gauss–Kronrod 15 点，所有待细分区间每轮一次数组调用），
+报告数值、实际误差、误差估计和函数求值次数，并检查：
+- 实际误差不超过 max(误差估计 × ESTIMATE_SLACK, 要求的精度)，即误差估计是可信的上界
+- diff（Richardson 外推的中心差分）与解析导数一致
+- solve（Brent 方法）的根满足方程，区间两端同号时报错
+- solve_many 的结果与逐个调用 solve 一致，且比逐个调用至少快 MIN_SPEEDUP 倍
+- 表达式中的 integrate / diff / solve：process_expression、编译后的数组调用、工作区变量随上游更新、制表
+任一项不符合时以退出码 1 结束。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_calculus.py [--problems 2000]
+"""
+import argparse
+import math
+import sys
+import time
+
+from src import calculator_cli, calculus, tabulator
+
+INF = math.inf
+# (被积函数, 下限, 上限, 精确值)
+INTEGRALS = [
+    ('x^2', 0, 1, 1 / 3),
+    ('exp(x)', 0, 1, math.e - 1),
+    ('1/(1+x^2)', 0, 1, math.pi / 4),
+    ('x^9', 0, 2, 102.4),
+    ('sqrt(x)', 0, 1, 2 / 3),
+    ('1/sqrt(x)', 0, 1, 2.0),
+    ('log(x)', 0, 1, -1.0),
+    ('x*log(x)', 0, 1, -0.25),
+    ('abs(x - 1/3)', 0, 1, 5 / 18),
+    ('exp(-x^2)', -INF, INF, math.sqrt(math.pi)),
+    ('exp(-x)', 0, INF, 1.0),
+    ('1/(1+x^2)', -INF, INF, math.pi),
+    ('1/x^2', 1, INF, 1.0),
+    ('exp(x)', -INF, 0, 1.0),
+    ('sin(x)', 0, 180, 360 / math.pi),
+    ('cos(x)^2', 0, 360, 180.0),
+    ('sin(3600*x)', 0, 1, (1 - math.cos(math.radians(3600))) / math.radians(3600)),
+    ('1/(1e-4 + (x - 0.5)^2)', 0, 1, 2 * math.atan(0.5 / 1e-2) / 1e-2),
+    ('x^2', 1, 0, -1 / 3),
+]
+# (表达式, 点, 导数)
+DERIVATIVES = [
+    ('x^3', 2, 12.0),
+    ('exp(x)', 1, math.e),
+    ('log(x)', 0.5, 2.0),
+    ('sin(x)', 30, math.cos(math.radians(30)) * math.pi / 180),
+    ('sqrt(x)', 1e-3, 0.5 / math.sqrt(1e-3)),
+    ('exp(x)*sin(x)', 1.5, math.exp(1.5) * (math.sin(math.radians(1.5))
+                                           + math.cos(math.radians(1.5)) * math.pi / 180)),
+    ('1/x', -4, -1 / 16),
+]
+# (表达式, 区间, 根)
+ROOTS = [
+    ('x^2 - 2', 0, 2, math.sqrt(2)),
+    ('x^3 - 2*x - 5', 2, 3, 2.0945514815423265),
+    ('exp(x) - 10', 0, 5, math.log(10)),
+    ('cos(x) - x/100', 0, 90, None),
+    ('x^21 - 0.5', 0, 1.5, 0.5 ** (1 / 21)),
+    ('x*exp(x) - 1', -1, 1, 0.5671432904097838),
+    ('x', 0, 1, 0.0),
+]
+# 实际误差最多为误差估计的这个倍数（或在要求的精度以内）
+ESTIMATE_SLACK = 10.0
+DIFF_TOLERANCE = 1e-7
+# solve_many 至少比逐个调用 solve 快这个倍数
+MIN_SPEEDUP = 3.0
+
+
+def timed(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check_integrals(core):
+    failures = []
+    print(f"{'integrand':<26}{'interval':<16}{'value':>20}{'error':>11}{'estimate':>11}{'evals':>8}")
+    for expr, a, b, exact in INTEGRALS:
+        estimate = calculus.integrate(expr, a, b, core=core)
+        error = abs(estimate.value - exact)
+        tolerance = max(calculus.DEFAULT_TOLERANCE, calculus.DEFAULT_REL_TOLERANCE * abs(exact))
+        print(f"{expr:<26}{f'[{a:g}, {b:g}]':<16}{estimate.value:>20.14g}{error:>11.2e}"
+              f"{estimate.error:>11.2e}{estimate.evaluations:>8}")
+        if not estimate.converged or error > max(estimate.error * ESTIMATE_SLACK, tolerance):
+            failures.append(f"integrate({expr}, {a}, {b}): error {error:.2e}, "
+                            f"estimate {estimate.error:.2e}")
+    return failures
+
+
+def check_derivatives(core):
+    failures = []
+    for expr, x0, exact in DERIVATIVES:
+        estimate = calculus.diff(expr, x0, core=core)
+        error = abs(estimate.value - exact)
+        print(f"diff({expr}, {x0:g}) = {estimate.value:.15g}  error {error:.1e}  "
+              f"estimate {estimate.error:.1e}  evals {estimate.evaluations}")
+        if error > DIFF_TOLERANCE * max(1.0, abs(exact)):
+            failures.append(f"diff({expr}, {x0}): error {error:.2e}")
+    return failures
+
+
+def check_roots(core):
+    failures = []
+    for expr, lo, hi, exact in ROOTS:
+        estimate = calculus.solve(expr, lo, hi, core=core)
+        residual = abs(core.compile(expr)(estimate.value))
+        print(f"solve({expr}, {lo:g}, {hi:g}) = {estimate.value:.15g}  width {estimate.error:.1e}  "
+              f"evals {estimate.evaluations}")
+        close = exact is None or abs(estimate.value - exact) <= 1e-9 * max(1.0, abs(exact))
+        if not (estimate.converged and close and (residual < 1e-8 or estimate.error < 1e-11)):
+            failures.append(f"solve({expr}, {lo}, {hi}) = {estimate.value!r}")
+    try:
+        calculus.solve('x^2 + 1', -1, 1, core=core)
+        failures.append("solve does not reject a bracket without a sign change")
+    except ValueError as e:
+        if not str(e).startswith(calculus.SAME_SIGN):
+            failures.append(f"unexpected error {e}")
+    return failures
+
+
+def check_solve_many(core, problems):
+    """x^3 + x - k = 0：solve_many 与逐个调用 solve 的结果一致
+
+    数组和标量的幂运算结果可能相差一个 ulp，两者的根只要求在 xtol 以内一致。
+    """
+    ks = [1 + i * 100 / problems for i in range(problems)] + [-1.0]
+    batch = calculus.solve_many('x^3 + x - k', 0, 5, core=core, bindings={'k': ks})
+    single = []
+    for k in ks:
+        try:
+            single.append(calculus.solve('x^3 + x - k', 0, 5, core=core, bindings={'k': k}).value)
+        except ValueError:
+            single.append(None)
+    failures = []
+    for k, many, one, failed in zip(ks, batch.values, single, batch.failed):
+        if one is None:
+            if not failed:
+                failures.append(f"k={k}: solve_many did not flag the failed problem")
+        elif failed or abs(many - one) > calculus.DEFAULT_XTOL:
+            failures.append(f"k={k}: solve_many {many!r} != solve {one!r}")
+            break
+
+    ks = ks[:-1]
+    loop_seconds = timed(lambda: [calculus.solve('x^3 + x - k', 0, 5, core=core, bindings={'k': k})
+                                  for k in ks], repeat=1)
+    many_seconds = timed(lambda: calculus.solve_many('x^3 + x - k', 0, 5, core=core,
+                                                     bindings={'k': ks}))
+    speedup = loop_seconds / many_seconds
+    print(f"{len(ks)} roots: loop {loop_seconds * 1e3:.1f} ms, solve_many {many_seconds * 1e3:.1f} ms "
+          f"({speedup:.1f}x, {batch.evaluations} batched evaluations)")
+    if calculus.np is not None and speedup < MIN_SPEEDUP:
+        failures.append(f"solve_many is only {speedup:.1f}x faster than a loop")
+    return failures
+
+
+def check_expressions(calculator):
+    """表达式、编译后的数组调用、工作区和制表中的 integrate / diff / solve"""
+    failures = []
+    core = calculator.core
+    result, _ = calculator.process_expression('2*integrate(x^2, 0, 3) + diff(x^2, 1)')
+    if abs(result - 20) > 1e-9 or core.last_estimate is None:
+        failures.append(f"process_expression: {result}")
+
+    compiled = core.compile('solve(x^2 - k, 0, 10)')
+    batch = compiled(k=[1, 4, 9, -1])
+    if list(batch.values[:3]) != [compiled(k=1), compiled(k=4), compiled(k=9)] or \
+            list(batch.errors) != [False, False, False, True]:
+        failures.append(f"compiled solve: {batch}")
+    compiled = core.compile('integrate(a*x^2, 0, b)')
+    batch = compiled(a=[1, 2, 3], b=[1, 1, 2])
+    if any(abs(value - exact) > 1e-12 for value, exact in zip(batch.values, [1 / 3, 2 / 3, 8])):
+        failures.append(f"compiled integrate: {batch}")
+
+    workspace = calculator.workspace
+    workspace.define('a', '2')
+    workspace.define('area', 'integrate(a*x^2, 0, 1)')
+    before = workspace.value('area')
+    workspace.define('a', '6')
+    after = workspace.value('area')
+    print(f"area = integrate(a*x^2, 0, 1): a=2 -> {before:.15g}, a=6 -> {after:.15g}")
+    if abs(before - 2 / 3) > 1e-12 or abs(after - 2) > 1e-12:
+        failures.append("workspace variables are not recomputed when an outer variable changes")
+
+    # x 是 integrate / diff 的积分（求导）变量，t 是制表变量：t^2 + 2t
+    for expr, exact in (('integrate(t^2, 0, 1) + diff(x^2, t)', lambda t: t * t + 2 * t),
+                        ('solve(x^3 - t, 0, 10)', lambda t: t ** (1 / 3))):
+        for xs, block in tabulator.tabulate(expr, 't', 1, 3, 0.5, core=core):
+            if any(abs(value - exact(t)) > 1e-7 for t, value in zip(xs, block.values)):
+                failures.append(f"table of {expr}: {list(block.values)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数值积分、求导和求根测试')
+    parser.add_argument('--problems', type=int, default=2000, help='solve_many 的方程个数')
+    args = parser.parse_args()
+
+    calculator_cli.RAISE_ERRORS = True
+    calculator = calculator_cli.ScientificCalculator()
+    core = calculator.core
+    failures = []
+    for check in (lambda: check_integrals(core), lambda: check_derivatives(core),
+                  lambda: check_roots(core), lambda: check_solve_many(core, args.problems),
+                  lambda: check_expressions(calculator)):
+        failures.extend(check())
+        print()
+
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        return 1
+    print("ok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""编译表达式基准测试
+
+对 N 个 x 值计算同一个公式（每个值的耗时，us/值）：
+1. string: 每个值拼接表达式字符串并调用 process_expression（原有做法）
+2. compiled: compile_expression 编译一次，逐个以标量调用
+3. compiled_array: 编译后以整个数组调用一次（NumPy 向量化，未安装时逐元素计算）
+
+同时检查编译结果与 process_expression 一致（标量完全相同，数组在浮点误差范围内），
+且编译后的标量调用比 string 快，否则以退出码 1 结束。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_compiled_expression.py [--count 10000]
+"""
+import argparse
+import math
+import sys
+import timeit
+
+from src import calculator_cli
+from src.expression_compiler import compile_expression
+
+FORMULAS = {
+    'poly_sin': ('3*x^2 + sin(x)', '3*({x})^2 + sin({x})'),
+    'nested': ('sqrt(x^2+4^2)*2 - log10(x+1)', 'sqrt(({x})^2+4^2)*2 - log10(({x})+1)'),
+}
+
+
+def per_value_us(func, count):
+    return min(timeit.repeat(func, number=1, repeat=3)) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='编译表达式基准测试')
+    parser.add_argument('--count', type=int, default=10000, help='x 值的个数')
+    args = parser.parse_args()
+
+    calculator_cli.RAISE_ERRORS = True
+    calculator = calculator_cli.ScientificCalculator()
+    xs = [0.5 + i * 0.01 for i in range(args.count)]
+    failures = []
+
+    print(f"{'formula':<10}{'string':>10}{'compiled':>10}{'array':>10}{'speedup':>10}   (us/value)")
+    for name, (formula, template) in FORMULAS.items():
+        compiled = compile_expression(formula, calculator.core)
+
+        def string():
+            return [calculator.process_expression(template.format(x=repr(x)))[0] for x in xs]
+
+        def scalar():
+            return [compiled(x) for x in xs]
+
+        def array():
+            return compiled(xs)
+
+        expected = string()
+        if scalar() != expected:
+            failures.append(f"{name}: compiled scalar results differ")
+        result = array()
+        if any(result.errors) or not all(math.isclose(a, b, rel_tol=1e-12)
+                                         for a, b in zip(result.values, expected)):
+            failures.append(f"{name}: compiled array results differ")
+
+        string_us = per_value_us(string, args.count)
+        scalar_us = per_value_us(scalar, args.count)
+        array_us = per_value_us(array, args.count)
+        print(f"{name:<10}{string_us:>10.2f}{scalar_us:>10.2f}{array_us:>10.3f}{string_us / scalar_us:>9.1f}x")
+        if scalar_us >= string_us:
+            failures.append(f"{name}: compiled is not faster than string")
+
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
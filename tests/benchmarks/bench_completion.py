@@ -0,0 +1,209 @@
+"""Tab 补全基准测试
+
+在 --variables 个工作区变量中，模拟 readline 取出一个前缀的全部候选（state = 0, 1, ... 直到 None），
+比较每个前缀的耗时（ms）：
+1. legacy: 原来的 autocomplete，每个 state 都重新构建并过滤函数、运算符和变量的完整列表（k 个候选 O(k·n)）
+2. trie: CompletionIndex 第一次补全这个前缀（遍历一次前缀树的子树）
+3. cached: 同一前缀再次补全（来源未变化时直接返回缓存的结果）
+
+同时检查：
+- 函数、变量和单位的补全结果与逐个比较前缀的结果一致
+- 行首、运算符之后、-> 之后、数字之后、vars / stats 之后的上下文
+- 定义、删除变量，注册函数和单位后补全结果立即更新
+- 最近的表达式只保留 HISTORY_SIZE 条，最新的排在前面
+- 候选超过 100 个的前缀，trie 比 legacy 至少快 MIN_SPEEDUP 倍
+任一项不符合时以退出码 1 结束。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_completion.py [--variables 5000]
+"""
+import argparse
+import math
+import random
+import sys
+import time
+
+from src import calculator_cli, completion, unit_dimensions
+from src.calculator_cli import CalculatorCore
+from src.completion import CompletionIndex
+from src.expression_parser import CALCULUS_FUNCTIONS
+from src.unit_converter import UnitConverter, UnitType
+
+PREFIXES = ('v1', 'v12', 's', 'x')
+# trie（未缓存）至少比原来的实现快这个倍数
+MIN_SPEEDUP = 20.0
+
+
+def legacy_autocomplete(core):
+    """原来的 CalculatorUI.autocomplete"""
+    def autocomplete(text, state):
+        options = [f"{k}(" for k in CalculatorCore.FUNCTIONS.keys() if k.startswith(text)]
+        options += [op for op in CalculatorCore.OPERATORS.keys() if op.startswith(text)]
+        options += [name for name in core.variables if name.startswith(text)]
+        return (options + [None])[state]
+    return autocomplete
+
+
+def drain(autocomplete, text):
+    """像 readline 一样按 state 逐个取候选，直到返回 None"""
+    matches = []
+    state = 0
+    while True:
+        match = autocomplete(text, state)
+        if match is None:
+            return matches
+        matches.append(match)
+        state += 1
+
+
+def timed(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def brute_force(core, text):
+    functions = list(CalculatorCore.FUNCTIONS) + list(CALCULUS_FUNCTIONS)
+    return sorted([f"{name}(" for name in functions if name.startswith(text)]
+                  + [name for name in core.variables if name.startswith(text)])
+
+
+def check_matches(index, core):
+    """运算符之后的补全与逐个比较的结果一致（随机前缀）"""
+    rng = random.Random(7)
+    names = list(core.variables)[:200] + list(CalculatorCore.FUNCTIONS)
+    for name in names:
+        text = name[:rng.randint(0, len(name))]
+        line = f"1+{text}"
+        if sorted(index.complete(text, line, 2)) != brute_force(core, text):
+            return f"operand {text!r}"
+    for name in unit_dimensions.UNITS:
+        text = name[:1]
+        expected = sorted(unit for unit in unit_dimensions.UNITS if unit.startswith(text))
+        if index.complete(text, f"3 km -> {text}", 8) != expected:
+            return f"unit {text!r}"
+    return None
+
+
+def check_contexts(index):
+    cases = [
+        (('st', 'st', 0), lambda m: m[0] == 'stats' and 'stats' in m),
+        (('sq', '2*sq', 2), lambda m: m == ['sqrt(']),
+        (('k', '3 km -> k', 8), lambda m: m == ['kJ', 'kN', 'kPa', 'kW', 'kg', 'km', 'km2']),
+        (('k', '3 k', 2), lambda m: 'km' in m and 'kg' in m),
+        (('m', '2.5e3 m', 6), lambda m: 'mile' in m and not any(name.endswith('(') for name in m)),
+        (('', 'vars ', 5), lambda m: m == ['clear', 'del', 'load', 'save']),
+        (('o', 'stats o', 6), lambda m: m == ['off', 'on']),
+        (('v1', 'vars del v1', 9), lambda m: m and all(name.startswith('v1') for name in m)),
+        (('', 'vars save ', 10), lambda m: m == []),
+    ]
+    for (text, line, begidx), ok in cases:
+        matches = index.complete(text, line, begidx)
+        if not ok(matches):
+            return f"{line!r}: {matches[:8]}"
+    return None
+
+
+def check_updates(index, calculator):
+    """变量、函数和单位变化后补全结果立即更新"""
+    workspace = calculator.workspace
+    before = index.complete('zz', '1+zz', 2)
+    workspace.define('zzz', '1')
+    defined = index.complete('zz', '1+zz', 2)
+    workspace.delete('zzz')
+    deleted = index.complete('zz', '1+zz', 2)
+    if (before, defined, deleted) != ([], ['zzz'], []):
+        return f"variables: {before} {defined} {deleted}"
+
+    CalculatorCore.FUNCTIONS['sinh'] = (math.sinh, 1, lambda _: True, "")
+    try:
+        registered = index.complete('sinh', 'sinh', 0)
+    finally:
+        del CalculatorCore.FUNCTIONS['sinh']
+    if 'sinh(' not in registered or 'sinh(' in index.complete('sinh', 'sinh', 0):
+        return "functions"
+
+    UnitConverter.CONVERSIONS[UnitType.LENGTH]['nmi'] = 1852
+    UnitConverter.clear_cache()
+    try:
+        registered = index.complete('n', '3 m -> n', 7)
+    finally:
+        del UnitConverter.CONVERSIONS[UnitType.LENGTH]['nmi']
+        UnitConverter.clear_cache()
+    if 'nmi' not in registered or 'nmi' in index.complete('n', '3 m -> n', 7):
+        return "units"
+    return None
+
+
+def check_history(index):
+    for i in range(completion.HISTORY_SIZE + 50):
+        index.add_history(f"sqrt({i})")
+    index.add_history('sqrt(60)')
+    matches = [match for match in index.complete('sqrt', 'sqrt', 0) if match != 'sqrt(']
+    if len(matches) != completion.HISTORY_SIZE or matches[0] != 'sqrt(60)' or 'sqrt(49)' in matches:
+        return f"{len(matches)} {matches[:3]}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tab 补全基准测试')
+    parser.add_argument('--variables', type=int, default=5000, help='工作区变量数')
+    args = parser.parse_args()
+
+    calculator = calculator_cli.ScientificCalculator()
+    workspace = calculator.workspace
+    for i in range(args.variables):
+        workspace.define(f"v{i}", str(i))
+    for i in range(args.variables // 10):
+        workspace.define(f"x_{i}", str(i))
+    core = calculator.core
+    ui = calculator_cli.CalculatorUI(core, None, calculator.translator)
+    index = ui.completion = CompletionIndex(core)
+    legacy = legacy_autocomplete(core)
+
+    failures = []
+    print(f"{len(core.variables)} variables, {len(CalculatorCore.FUNCTIONS)} functions, "
+          f"{len(unit_dimensions.UNITS)} units")
+    print(f"{'prefix':<8}{'matches':>9}{'legacy ms':>12}{'trie ms':>10}{'cached ms':>11}{'speedup':>10}")
+    for text in PREFIXES:
+        expected = drain(legacy, text)
+        legacy_seconds = timed(lambda: drain(legacy, text), repeat=1)
+
+        def uncached():
+            index._cache.clear()
+            return drain(ui.autocomplete, text)
+        trie_seconds = timed(uncached)
+        cached_seconds = timed(lambda: drain(ui.autocomplete, text))
+        matches = drain(ui.autocomplete, text)
+        # 行首的候选还包括命令和 integrate / diff / solve；
+        # 原来的实现还会列出运算符（readline 的分隔符使它们不会被补全）
+        legacy_names = sorted(match for match in expected if match not in CalculatorCore.OPERATORS)
+        extra = set(completion.COMMANDS) | {f"{name}(" for name in CALCULUS_FUNCTIONS}
+        if sorted(match for match in matches if match not in extra) != legacy_names:
+            failures.append(f"matches for {text!r} differ from the legacy completion")
+        speedup = legacy_seconds / trie_seconds
+        print(f"{text:<8}{len(matches):>9}{legacy_seconds * 1e3:>12.2f}{trie_seconds * 1e3:>10.3f}"
+              f"{cached_seconds * 1e3:>11.3f}{speedup:>9.0f}x")
+        if len(matches) > 100 and speedup < MIN_SPEEDUP:
+            failures.append(f"trie completion of {text!r} is only {speedup:.1f}x faster")
+
+    for name, check in (('matches', lambda: check_matches(index, core)),
+                        ('contexts', lambda: check_contexts(index)),
+                        ('updates', lambda: check_updates(index, calculator)),
+                        ('history', lambda: check_history(index))):
+        error = check()
+        print(f"{name}: {'ok' if error is None else error}")
+        if error is not None:
+            failures.append(f"{name}: {error}")
+
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""复数引擎基准测试
+
+--count 个随机复数（固定随机种子），比较：
+1. scalar: 原来的复数运算符 lambda（complex(a) op complex(b)）与复数引擎的标量实现，逐个调用
+2. batch: 原来的 lambda 逐元素循环与 calculate_many（complex128 向量化）
+3. function: 逐元素调用 cmath（complex_engine.apply）与 apply_many
+
+同时检查：全部函数和幂运算的数组结果与标量结果一致（包括分支切割线两侧带符号零的点、
+对数的零点和溢出点的错误标记）；批量运算比逐元素 lambda 快、apply_many 比逐元素调用快，
+否则以退出码 1 结束。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_complex.py [--count 200000]
+"""
+import argparse
+import cmath
+import math
+import random
+import sys
+import time
+
+from src import calculator_cli
+from src import complex_engine
+from src.vectorized import np
+
+# 原来 CalculatorCore.__init__ 中的复数运算符
+LAMBDA_OPERATORS = {
+    '+c': lambda a, b: complex(a) + complex(b),
+    '-c': lambda a, b: complex(a) - complex(b),
+    '*c': lambda a, b: complex(a) * complex(b),
+    '/c': lambda a, b: complex(a) / complex(b),
+}
+
+# 分支切割线两侧（虚部 +0.0 / -0.0）、切割线端点和无定义的点
+EDGE_POINTS = [complex(x, s * 0.0) for x in (-4.0, -1.0, -0.5, 0.5, 1.0, 4.0) for s in (1, -1)] + \
+              [complex(s * 0.0, y) for y in (-4.0, -1.0, 1.0, 4.0) for s in (1, -1)] + \
+              [0j, 1j, -1j, complex(800, 1), complex(1, 800), complex(-800, 0.5)]
+
+
+def timed(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def random_complex(rng, count):
+    return [complex(rng.uniform(-10, 10), rng.uniform(-10, 10)) for _ in range(count)]
+
+
+def same(expected, actual):
+    """按整个复数的模比较（一个分量内部的抵消只有模的相对误差，不按分量各自的相对误差比较）
+
+    期望值的分量为零时还要求符号相同（分支切割线两侧的带符号零）。
+    """
+    expected, actual = complex(expected), complex(actual)
+    if not cmath.isclose(expected, actual, rel_tol=1e-12, abs_tol=max(1e-12 * abs(expected), 1e-300)):
+        return False
+    return all(math.copysign(1, e) == math.copysign(1, a)
+               for e, a in ((expected.real, actual.real), (expected.imag, actual.imag)) if e == 0)
+
+
+def check_functions(points):
+    """逐个函数比较 apply_many 与标量 apply，返回不一致的描述"""
+    mismatches = []
+    for name in complex_engine.FUNCTIONS:
+        batch = complex_engine.apply_many(name, points)
+        for z, value, error in zip(points, batch.values, batch.errors):
+            value = value.item() if hasattr(value, 'item') else value
+            try:
+                expected = complex_engine.apply(name, z)
+            except ValueError:
+                expected = None
+            if (expected is None) != bool(error) or \
+                    (expected is not None and not same(expected, value)):
+                mismatches.append(f"{name}({z!r}): {expected!r} != {value!r}")
+    return mismatches
+
+
+def check_power(bases, exponents):
+    mismatches = []
+    batch = complex_engine.calculate_many(bases, exponents, '^c')
+    for a, b, value, error in zip(bases, exponents, batch.values, batch.errors):
+        try:
+            expected = complex_engine.power(a, b)
+        except ValueError:
+            expected = None
+        if (expected is None) != bool(error) or \
+                (expected is not None and not cmath.isclose(expected, value, rel_tol=1e-9)):
+            mismatches.append(f"({a!r}) ^ ({b!r}): {expected!r} != {value!r}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='复数引擎基准测试')
+    parser.add_argument('--count', type=int, default=200000, help='每组运算的元素数')
+    args = parser.parse_args()
+
+    calculator_cli.RAISE_ERRORS = True
+    core = calculator_cli.ScientificCalculator().core
+    rng = random.Random(42)
+    a = random_complex(rng, args.count)
+    b = random_complex(rng, args.count)
+    failures = []
+
+    print(f"elements: {args.count}")
+    print(f"{'operator':<10}{'lambda ns':>11}{'engine ns':>11}{'batch ns':>10}{'batch speedup':>15}")
+    for op, func in LAMBDA_OPERATORS.items():
+        engine = core.OPERATORS[op]
+        lambda_seconds = timed(lambda: [func(x, y) for x, y in zip(a, b)])
+        engine_seconds = timed(lambda: [engine(x, y) for x, y in zip(a, b)])
+        if np is not None:
+            a_array, b_array = np.asarray(a), np.asarray(b)
+            batch_seconds = timed(lambda: core.calculate_many(a_array, b_array, op))
+            batch = core.calculate_many(a_array, b_array, op)
+            if not all(same(func(x, y), value) for x, y, value in zip(a, b, batch.values.tolist())):
+                failures.append(f"{op}: batched results differ from the scalar lambda")
+        else:
+            batch_seconds = timed(lambda: core.calculate_many(a, b, op))
+        print(f"{op:<10}{lambda_seconds / args.count * 1e9:>11.1f}"
+              f"{engine_seconds / args.count * 1e9:>11.1f}{batch_seconds / args.count * 1e9:>10.1f}"
+              f"{lambda_seconds / batch_seconds:>14.1f}x")
+        if batch_seconds >= lambda_seconds:
+            failures.append(f"{op}: calculate_many is not faster than the per-element lambda loop")
+
+    print(f"{'function':<10}{'cmath ns':>11}{'batch ns':>11}{'speedup':>10}")
+    values = np.asarray(a) if np is not None else a
+    for name in ('sqrt', 'log', 'exp', 'sin', 'atanh', 'abs_c'):
+        scalar_seconds = timed(lambda: [complex_engine.apply(name, z) for z in a])
+        batch_seconds = timed(lambda: complex_engine.apply_many(name, values))
+        print(f"{name:<10}{scalar_seconds / args.count * 1e9:>11.1f}"
+              f"{batch_seconds / args.count * 1e9:>11.1f}{scalar_seconds / batch_seconds:>9.1f}x")
+        if batch_seconds >= scalar_seconds:
+            failures.append(f"{name}: apply_many is not faster than per-element cmath")
+
+    points = EDGE_POINTS + a[:2000]
+    mismatches = check_functions(points)
+    mismatches += check_power(points + [0j, 0j, 0j], points[::-1] + [-1, 1j, 0])
+    print(f"array/scalar agreement: {len(points)} points x {len(complex_engine.FUNCTIONS)} functions "
+          f"and ^c, {len(mismatches)} mismatches")
+    for mismatch in mismatches[:10]:
+        print(f"  {mismatch}")
+    if mismatches:
+        failures.append(f"{len(mismatches)} array results differ from cmath")
+
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""表达式解析与求值的微基准测试
+
+对比三种路径的吞吐量（表达式/秒）：
+1. regex: 旧版 process_expression 的正则匹配路径
+2. parse+eval (cold): 每次清空缓存，完整执行词法分析、语法分析和求值
+3. parse+eval (cached): 语法树命中 LRU 缓存，只执行求值
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_expression_parser.py
+"""
+import re
+import sys
+import timeit
+
+from src.calculator_cli import CalculatorCore
+from src.expression_parser import parse_expression, clear_parse_cache
+from src.i18n.translator import Translator
+
+# 旧版路径只支持单个运算符或单个函数调用，因此只用这类表达式做对比
+EXPRESSIONS = ['3+5', '2.5e3*-1.5', '10%3', 'sqrt(25)', 'sin(30)', 'log(100)']
+NUMBER = 20000
+
+
+def legacy_process_expression(core, expr):
+    """旧版 process_expression 的正则匹配实现（仅用于对比）"""
+    expr = expr.strip()
+    func_match = re.match(r"^([a-z_]+)\((.*)\)$", expr)
+    if func_match:
+        func_name, arg = func_match.groups()
+        try:
+            arg = complex(arg) if 'j' in arg else float(arg)
+            result = core.process_function(func_name, arg)
+            return result, f"{func_name}({arg})={result:.6g}"
+        except ValueError:
+            pass
+    complex_match = re.match(r"^\((.*?)\)\s*([+\-*/])\s*\((.*?)\)$", expr)
+    if complex_match:
+        try:
+            num1, op, num2 = complex_match.groups()
+            result = core.calculate(complex(num1), complex(num2), f"{op}c")
+            return result, f"({num1}){op}({num2})={result}"
+        except ValueError:
+            pass
+    basic_match = re.match(r"^([+-]?\d+\.?\d*(?:e[+-]?\d+)?)([+\-*/%^])([+-]?\d+\.?\d*(?:e[+-]?\d+)?)$", expr)
+    if basic_match:
+        num1, op, num2 = basic_match.groups()
+        result = core.calculate(float(num1), float(num2), op)
+        return result, f"{num1}{op}{num2}={result}"
+    raise ValueError("无法识别的表达式格式")
+
+
+def run_regex(core):
+    for expr in EXPRESSIONS:
+        legacy_process_expression(core, expr)
+
+
+def run_cold(core):
+    for expr in EXPRESSIONS:
+        clear_parse_cache()
+        parse_expression(expr).evaluate(core)
+
+
+def run_cached(core):
+    for expr in EXPRESSIONS:
+        parse_expression(expr).evaluate(core)
+
+
+def main():
+    core = CalculatorCore(Translator())
+    total = NUMBER * len(EXPRESSIONS)
+    print(f"{'path':<24}{'expr/s':>14}")
+    for name, func in (('regex', run_regex),
+                       ('parse+eval (cold)', run_cold),
+                       ('parse+eval (cached)', run_cached)):
+        seconds = min(timeit.repeat(lambda: func(core), number=NUMBER, repeat=3))
+        print(f"{name:<24}{total / seconds:>14,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""图形界面事件循环响应性测试（无界面运行）
+
+以 QT_QPA_PLATFORM=offscreen 启动 CalculatorGUI，把部分表达式替换为占用 CPU 的慢计算，
+用 10 ms 的心跳定时器测量事件循环的最大停顿：
+1. blocking: 在界面线程中直接执行慢计算（旧版行为，作为对照）
+2. responsive: 通过后台执行器计算，事件循环保持响应
+3. supersede: 慢计算未完成时提交新表达式，只显示新结果，旧结果不写入历史
+4. cancel: 计算中按 Esc 放弃，结果不再送达界面
+5. timeout: 超过单次超时后放弃计算
+
+任一项不符合预期时以退出码 1 结束。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_gui_responsiveness.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtCore import QEventLoop, Qt, QTimer
+from PyQt6.QtTest import QTest
+from PyQt6.QtWidgets import QApplication
+
+# 慢计算占用 CPU 的时间（秒）
+SLOW_SECONDS = 1.0
+SLOW_EXPRESSIONS = {'sqrt(16)'}
+# 心跳间隔和允许的最大事件循环停顿（毫秒）
+TICK_MS = 10
+MAX_STALL_MS = 100
+
+
+def busy_wait(seconds):
+    """占用 CPU 而不是 sleep，确保工作线程与界面线程竞争 GIL"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+class Heartbeat:
+    """记录心跳定时器两次触发之间的最大间隔"""
+
+    def __init__(self):
+        self.timer = QTimer()
+        self.timer.setInterval(TICK_MS)
+        self.timer.timeout.connect(self.tick)
+        self.last = None
+        self.max_gap = 0.0
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.last is not None:
+            self.max_gap = max(self.max_gap, now - self.last)
+        self.last = now
+
+    def start(self):
+        self.last = time.perf_counter()
+        self.max_gap = 0.0
+        self.timer.start()
+
+    def stop(self):
+        self.tick()
+        self.timer.stop()
+        return self.max_gap * 1000
+
+
+def run_until(signals, timeout_ms):
+    """运行事件循环直到任一信号触发或超时"""
+    loop = QEventLoop()
+    for signal in signals:
+        signal.connect(loop.quit)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+    for signal in signals:
+        signal.disconnect(loop.quit)
+
+
+def main():
+    # 历史记录写入临时目录，不影响用户的历史文件
+    home = tempfile.mkdtemp()
+    os.environ['HOME'] = home
+    app = QApplication(sys.argv)
+
+    from src.gui_calculator import CalculatorGUI
+    gui = CalculatorGUI()
+    original = gui.calculator.process_expression
+
+    def process_expression(expr):
+        if expr in SLOW_EXPRESSIONS:
+            busy_wait(SLOW_SECONDS)
+        return original(expr)
+
+    gui.calculator.process_expression = process_expression
+    evaluator = gui.evaluator
+    heartbeat = Heartbeat()
+    failures = []
+    wait_ms = int(SLOW_SECONDS * 3000)
+
+    def report(name, ok, detail):
+        print(f"{name:<11} {detail}")
+        if not ok:
+            failures.append(name)
+
+    # 1. 对照：在界面线程中直接计算
+    heartbeat.start()
+    QTimer.singleShot(0, lambda: process_expression('sqrt(16)'))
+    run_until([], int(SLOW_SECONDS * 1000) + 200)
+    report('blocking', True, f"max event-loop stall {heartbeat.stop():7.1f} ms (synchronous baseline)")
+
+    # 2. 后台计算
+    gui.expr_input.setText('sqrt(16)')
+    heartbeat.start()
+    gui.calculate()
+    run_until([evaluator.finished, evaluator.failed], wait_ms)
+    stall = heartbeat.stop()
+    report('responsive', stall < MAX_STALL_MS and gui.expr_input.text() == '4.0',
+           f"max event-loop stall {stall:7.1f} ms, result {gui.expr_input.text()!r}")
+
+    # 3. 新提交取代慢计算
+    before = len(gui.calculator.history.get_recent_history())
+    gui.expr_input.setText('sqrt(16)')
+    gui.calculate()
+    gui.expr_input.setText('2+3')
+    gui.calculate()
+    run_until([evaluator.finished], wait_ms)
+    # 等待被取代的慢计算在工作线程中结束
+    gui.thread_pool.waitForDone(wait_ms)
+    app.processEvents()
+    records = gui.calculator.history.get_recent_history()[before:]
+    report('supersede', gui.expr_input.text() == '5.0' and len(records) == 1 and '2+3' in records[0],
+           f"result {gui.expr_input.text()!r}, new history records {records}")
+
+    # 4. Esc 取消
+    gui.expr_input.setText('sqrt(16)')
+    gui.calculate()
+    QTimer.singleShot(100, lambda: QTest.keyClick(gui, Qt.Key.Key_Escape))
+    delivered = []
+    evaluator.finished.connect(delivered.append)
+    run_until([], wait_ms)
+    evaluator.finished.disconnect(delivered.append)
+    report('cancel', not delivered and not evaluator.busy and gui.expr_input.text() == 'sqrt(16)',
+           f"status {gui.statusBar().currentMessage()!r}, delivered {delivered}")
+
+    # 5. 超时
+    evaluator.timeout_ms = int(SLOW_SECONDS * 1000 / 4)
+    gui.expr_input.setText('sqrt(16)')
+    begin = time.perf_counter()
+    gui.calculate()
+    run_until([evaluator.timed_out, evaluator.finished], wait_ms)
+    elapsed = (time.perf_counter() - begin) * 1000
+    report('timeout', not evaluator.busy and gui.expr_input.text() == 'sqrt(16)'
+           and elapsed < SLOW_SECONDS * 1000,
+           f"gave up after {elapsed:7.1f} ms, status {gui.statusBar().currentMessage()!r}")
+
+    gui.close()
+    if failures:
+        print(f"FAIL: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""历史记录内存占用基准测试
+
+在独立的子进程中分别保存 --count 条记录（默认 1000 万条），测量常驻内存（RSS）的增加量：
+1. strings: 原来的做法，每条记录 strftime 生成 "[时间] 表达式=结果" 字符串，保存在 deque 中
+2. records: HistoryRecords 按列保存，显示文本在读取时才生成
+
+记录文本从固定随机种子生成的 1 万条 "数字 运算符 数字=结果" 和 "函数(数字)=结果" 中循环选取，
+其中约 5% 为不能按列保存的嵌套表达式；时间戳每条递增 1 毫秒。
+
+同时检查：抽样记录的显示文本与原来的字符串完全相同；records 占用的内存少于 strings，
+否则以退出码 1 结束。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_history_records.py [--count 10000000]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+from src.history_records import HistoryRecords
+from src.numeric_backends import format_number
+
+START_TIME = 1792300000.0
+BODY_POOL = 10000
+SAMPLES = 1000
+
+
+def bodies(seed=42):
+    """生成记录文本池"""
+    rng = random.Random(seed)
+    pool = []
+    for i in range(BODY_POOL):
+        kind = rng.random()
+        a = rng.choice((rng.randint(0, 999), round(rng.uniform(0, 100), 2)))
+        b = rng.choice((rng.randint(1, 999), round(rng.uniform(1, 100), 2)))
+        if kind < 0.6:
+            op = rng.choice('+-*/^' if a < 10 else '+-*/')
+            value = {'+': a + b, '-': a - b, '*': a * b, '/': a / b, '^': a ** min(b, 5)}[op]
+            b = min(b, 5) if op == '^' else b
+            pool.append(f"{a}{op}{b}={format_number(value)}")
+        elif kind < 0.95:
+            name = rng.choice(('sqrt', 'sin', 'cos', 'log'))
+            a = a or 1
+            value = {'sqrt': a ** 0.5, 'sin': 0.5, 'cos': 0.5, 'log': 2.0}[name]
+            pool.append(f"{name}({a})={format_number(value)}")
+        else:
+            pool.append(f"sqrt({a}^2+{b}^2)*2={format_number(2 * (a * a + b * b) ** 0.5)}")
+    return pool
+
+
+def string_entry(body, timestamp):
+    """原来 HistoryManager.add_record 生成的字符串"""
+    return f"[{datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')}] {body}"
+
+
+def rss_bytes():
+    """当前进程的常驻内存（Linux 读 /proc，其他系统退回到峰值）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def measure(mode, count):
+    """子进程：保存 count 条记录，输出 RSS 增加量、耗时和抽样记录的显示文本"""
+    pool = bodies()
+    gc.collect()
+    before = rss_bytes()
+    start = time.perf_counter()
+    if mode == 'strings':
+        store = deque()
+        for i in range(count):
+            store.append(string_entry(pool[i % BODY_POOL], START_TIME + i * 0.001))
+    else:
+        store = HistoryRecords()
+        for i in range(count):
+            store.append(pool[i % BODY_POOL], START_TIME + i * 0.001)
+    seconds = time.perf_counter() - start
+    gc.collect()
+    growth = rss_bytes() - before
+    step = max(1, count // SAMPLES)
+    samples = {i: str(store[i]) for i in range(0, count, step)}
+    print(json.dumps({'bytes': growth, 'seconds': seconds, 'samples': samples}))
+
+
+def run(mode, count):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    output = subprocess.run([sys.executable, __file__, '--measure', mode, '--count', str(count)],
+                            check=True, capture_output=True, text=True, env=env).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='历史记录内存占用基准测试')
+    parser.add_argument('--count', type=int, default=10_000_000, help='记录数')
+    parser.add_argument('--measure', choices=('strings', 'records'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(args.measure, args.count)
+        return 0
+
+    failures = []
+    results = {mode: run(mode, args.count) for mode in ('strings', 'records')}
+    print(f"records: {args.count:,}")
+    print(f"{'mode':<10}{'RSS MB':>10}{'bytes/rec':>11}{'add ns':>9}")
+    for mode, result in results.items():
+        print(f"{mode:<10}{result['bytes'] / 1e6:>10.1f}{result['bytes'] / args.count:>11.1f}"
+              f"{result['seconds'] / args.count * 1e9:>9.0f}")
+    ratio = results['strings']['bytes'] / max(1, results['records']['bytes'])
+    print(f"memory: records use {ratio:.1f}x less than strings")
+    if ratio <= 1:
+        failures.append("records do not use less memory than strings")
+
+    pool = bodies()
+    expected = {str(i): string_entry(pool[i % BODY_POOL], START_TIME + i * 0.001)
+                for i in map(int, results['records']['samples'])}
+    if results['records']['samples'] != expected or results['strings']['samples'] != expected:
+        failures.append("display text differs from the pre-formatted strings")
+
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
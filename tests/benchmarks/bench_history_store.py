@@ -0,0 +1,217 @@
+"""SQLite 历史记录库基准测试
+
+在临时目录的历史记录库中写入 --count 条记录（默认 100 万条，时间戳每条递增 1 秒），测量：
+1. page: 按游标读取一页（最新一页 / 翻到最早处的一页），对照 LIMIT ... OFFSET 分页
+2. range: 按时间范围查询一小时的记录（全部 / 只取某个函数）
+3. search: 全文搜索（trigram 索引）、函数过滤和时间过滤
+4. writers: --writers 个进程同时各写入 --per-writer 条记录（一半逐条提交，一半组提交）
+
+同时检查：游标分页走遍全库的结果与按 id 倒序读取的结果一致；全文搜索的结果与逐条比较子串的
+结果一致；深处一页的耗时不超过
+最新一页的 PAGE_DEPTH_RATIO 倍；并发写入没有出错、记录总数正确；
+旧版 JSON / JSONL 历史文件的导入结果正确，重复导入不会重复写入；
+任一项不符合时以退出码 1 结束。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_history_store.py [--count 1000000] [--writers 4]
+"""
+import argparse
+import json
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.history_store import HistoryStore
+
+START_TIME = 1792300000.0
+PAGE_SIZE = 100
+# 深处一页允许的耗时倍数（游标分页应与翻到第几页无关）
+PAGE_DEPTH_RATIO = 3.0
+FUNCTIONS = ('sqrt', 'sin', 'cos', 'log')
+
+
+def entry(i):
+    if i % 3:
+        return f"{i}{'+-*/'[i % 4]}{i % 97 + 1}={i}"
+    return f"{FUNCTIONS[i % 4]}({i})={i % 7}"
+
+
+def populate(path, count):
+    store = HistoryStore(path, synchronous='OFF')
+    start = time.perf_counter()
+    with store.group_commit():
+        for i in range(count):
+            store.append(entry(i), START_TIME + i)
+    seconds = time.perf_counter() - start
+    store.close()
+    return seconds
+
+
+def timed(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check_cursor_walk(store, count):
+    """沿游标翻完全部记录，与按 id 倒序读取的结果比较"""
+    walked = []
+    before = None
+    while True:
+        page = store.page(before=before, limit=5000)
+        walked.extend(record.id for record in page)
+        if len(page) < 5000:
+            break
+        before = page[-1].id
+    expected = [row[0] for row in store._db.execute("SELECT id FROM history ORDER BY id DESC")]
+    return walked == expected and len(walked) == count
+
+
+def check_search(store):
+    """全文搜索的结果与逐条比较子串的结果一致"""
+    for query, substring in (('sqrt(99', 'sqrt(99'), ('func:cos', 'cos('), ('=999', '=999')):
+        expected = [row[0] for row in store._db.execute(
+            "SELECT id FROM history WHERE instr(lower(entry), ?) > 0 ORDER BY id DESC LIMIT 50",
+            (substring,))]
+        if [record.id for record in store.search(query, limit=50)] != expected:
+            return False
+    return True
+
+
+def writer(path, index, count, results):
+    """子进程：逐条提交一半记录，另一半在组提交中写入"""
+    try:
+        store = HistoryStore(path)
+        half = count // 2
+        for i in range(half):
+            store.append(f"w{index}:{i}+0={i}")
+        with store.group_commit():
+            for i in range(half, count):
+                store.append(f"w{index}:{i}+0={i}")
+        store.close()
+        results.put((index, None))
+    except Exception as e:
+        results.put((index, repr(e)))
+
+
+def check_writers(directory, writers, per_writer):
+    path = directory / 'concurrent.sqlite'
+    HistoryStore(path).close()
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=writer, args=(path, i, per_writer, results))
+                 for i in range(writers)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    errors = [results.get()[1] for _ in processes]
+    for process in processes:
+        process.join()
+    seconds = time.perf_counter() - start
+    store = HistoryStore(path)
+    total = len(store)
+    per_writer_counts = [len(store.search(f"w{i}:", limit=per_writer + 1)) for i in range(writers)]
+    store.close()
+    errors = [error for error in errors if error is not None]
+    return seconds, total, per_writer_counts, errors
+
+
+def local_time(text):
+    return time.mktime(time.strptime(text, '%Y-%m-%d %H:%M:%S'))
+
+
+def check_import(directory):
+    """导入旧版 calc-cli JSON 数组、GUI JSONL 日志（末行写了一半），再重复导入和追加导入"""
+    legacy_json = directory / 'calc_history.json'
+    legacy_json.write_text(json.dumps(["[2026-01-02 10:00:00] 3+5=8", "[2026-01-01 09:00:00] sqrt(16)=4"]))
+    journal = directory / '.calculator_history.jsonl'
+    lines = [{'ts': local_time('2026-01-01 00:00:00') + 0.5, 'entry': '[2026-01-01 00:00:00] 2*3=6'},
+             {'ts': local_time('2026-01-02 00:00:00'), 'entry': 'sin(30)=0.5'}]
+    journal.write_text(''.join(json.dumps(line) + '\n' for line in lines) + '{"ts": 17')
+    store = HistoryStore(directory / 'import.sqlite')
+    first = store.import_files([legacy_json, journal, directory / 'missing.json'])
+    again = store.import_files([legacy_json, journal])
+    with open(journal, 'a', encoding='utf-8') as f:
+        f.write('\n' + json.dumps({'ts': local_time('2026-01-03 00:00:00'), 'entry': '7-2=5'}) + '\n')
+    appended = store.import_files([journal])
+    records = store.range()
+    store.close()
+    entries = [record.entry for record in records]
+    expected = ['2*3=6', 'sqrt(16)=4', 'sin(30)=0.5', '3+5=8', '7-2=5']
+    return first == 4 and again == 0 and appended == 1 and entries == expected, entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite 历史记录库基准测试')
+    parser.add_argument('--count', type=int, default=1000000, help='预先写入的记录数')
+    parser.add_argument('--writers', type=int, default=4, help='并发写入的进程数')
+    parser.add_argument('--per-writer', type=int, default=2000, help='每个进程写入的记录数')
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix='calc-history-'))
+    failures = []
+    try:
+        path = directory / 'history.sqlite'
+        seconds = populate(path, args.count)
+        size = sum(f.stat().st_size for f in directory.iterdir())
+        print(f"records: {args.count:,}  populate {seconds:.1f} s ({seconds / args.count * 1e6:.1f} us/record), "
+              f"database {size / 1e6:.0f} MB")
+
+        store = HistoryStore(path)
+        latest_id = store.page(limit=1)[0].id
+        deep = latest_id - args.count + PAGE_SIZE + 1
+        offset = args.count - PAGE_SIZE
+        results = {
+            'page latest': timed(lambda: store.page(limit=PAGE_SIZE)),
+            'page deep': timed(lambda: store.page(before=deep, limit=PAGE_SIZE)),
+            'offset latest': timed(lambda: store._db.execute(
+                "SELECT id, ts, entry FROM history ORDER BY id DESC LIMIT ? OFFSET 0",
+                (PAGE_SIZE,)).fetchall()),
+            'offset deep': timed(lambda: store._db.execute(
+                "SELECT id, ts, entry FROM history ORDER BY id DESC LIMIT ? OFFSET ?",
+                (PAGE_SIZE, offset)).fetchall()),
+        }
+        middle = START_TIME + args.count // 2
+        results['range 1h'] = timed(lambda: store.range(middle, middle + 3600))
+        results['range 1h sqrt'] = timed(lambda: store.range(middle, middle + 3600, opcode='sqrt'))
+        day = time.strftime('%Y-%m-%d', time.localtime(middle))
+        for query in ('sqrt(99', 'func:cos', f'+ from:{day} to:{day}', '=999999'):
+            results[f'search {query!r}'] = timed(lambda: store.search(query, limit=20))
+        print(f"{'query':<44}{'ms':>9}")
+        for name, seconds in results.items():
+            print(f"{name:<44}{seconds * 1e3:>9.2f}")
+        if results['page deep'] > results['page latest'] * PAGE_DEPTH_RATIO + 1e-4:
+            failures.append("cursor paging slows down with depth")
+        if not check_cursor_walk(store, args.count):
+            failures.append("cursor walk does not visit every record exactly once")
+        if not check_search(store):
+            failures.append("full-text search differs from a brute-force substring scan")
+        store.close()
+
+        seconds, total, counts, errors = check_writers(directory, args.writers, args.per_writer)
+        expected = args.writers * args.per_writer
+        print(f"writers: {args.writers} processes x {args.per_writer} records in {seconds:.2f} s "
+              f"({expected / seconds:,.0f} records/s), stored {total}, errors {len(errors)}")
+        if errors or total != expected or counts != [args.per_writer] * args.writers:
+            failures.append(f"concurrent writers lost records or failed: {total}/{expected} {errors[:3]}")
+
+        ok, entries = check_import(directory)
+        print(f"import: {'ok' if ok else entries}")
+        if not ok:
+            failures.append("legacy import is wrong or not idempotent")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""日志管道和求值日志测试
+
+对比 process_expression 每次调用的墙钟时间和调用方线程的 CPU 时间（us/次）：
+1. baseline: 未启用求值日志
+2. sync: 求值记录在调用方线程中格式化并写入文件（原来的同步 FileHandler 方式）
+3. async: 求值日志经队列在监听线程中格式化和写入（evaluation_log.enable）
+4. sampled: sample_rate=0.01
+5. limited: max_per_second=1000
+
+同时检查：
+- setup_logger 重复调用不会重复添加处理器，一条日志只写一行
+- 异步方式在调用方线程中的开销不超过同步方式的 MAX_ASYNC_RATIO 倍；写入文件的行数加上队列满时丢弃的条数等于 emitted，每行是完整的 JSON
+- 采样比例在统计误差范围内，出错的求值不受采样影响
+- 限流时写入的行数不超过令牌桶允许的数量，丢弃的条数记在下一条记录的 suppressed 中
+- 超过 max_bytes 时日志文件轮转
+任一项不符合时以退出码 1 结束。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_logging.py
+"""
+import json
+import logging
+import math
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src import calculator_cli, evaluation_log
+from src.utils import logger as log_setup
+
+EXPRESSIONS = ['3+5', 'sqrt(3^2+4^2)*2', '-log10(1e-3)+sin(30)', '(1+2)*(3+4)/(5-6)']
+# 每轮的求值次数（小于日志队列的默认容量 10000）和轮数
+NUMBER = 8000
+REPEAT = 9
+SAMPLE_RATE = 0.01
+RATE = 1000
+BURST = 100
+# 异步方式在调用方线程中的开销最多为同步方式的这个比例
+MAX_ASYNC_RATIO = 0.6
+
+
+def per_call_us(calculator, number=NUMBER, repeat=REPEAT):
+    """返回 (墙钟时间, 调用方线程的 CPU 时间) 的最小值，单位 us/次
+
+    每轮之后等待日志队列写完（不计时），每轮的记录数不超过队列容量。
+    """
+    best_wall = best_cpu = float('inf')
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        for _ in range(number // len(EXPRESSIONS)):
+            for expr in EXPRESSIONS:
+                calculator.process_expression(expr)
+        best_wall = min(best_wall, time.perf_counter() - wall)
+        best_cpu = min(best_cpu, time.thread_time() - cpu)
+        log_setup.flush()
+    return best_wall / number * 1e6, best_cpu / number * 1e6
+
+
+def read_lines(path):
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def check_idempotent(directory):
+    """重复调用 setup_logger：只有一个处理器，一条日志写一行"""
+    path = directory / 'calculator.log'
+    settings = {'level': 'INFO', 'file': str(path)}
+    for _ in range(5):
+        logger = log_setup.setup_logger(settings)
+    logger.warning("once")
+    log_setup.flush()
+    handlers = len(logging.getLogger(log_setup.LOGGER_NAME).handlers)
+    lines = path.read_text(encoding='utf-8').splitlines()
+    return handlers == 1 and len(lines) == 1, handlers, len(lines)
+
+
+def run_sync(calculator, directory):
+    """同步方式：logger.info + 直接挂在记录器上的 FileHandler，格式化和写文件都在调用方线程中"""
+    logger = logging.getLogger('bench.sync')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = logging.FileHandler(directory / 'sync.jsonl', encoding='utf-8')
+    handler.setFormatter(evaluation_log.EvaluationFormatter())
+    logger.addHandler(handler)
+    def emit(name, fields):
+        logger.info('evaluation', extra={'evaluation': fields['evaluation']})
+    evaluation_log._install(evaluation_log.EvaluationLog(emit=emit))
+    try:
+        return per_call_us(calculator)
+    finally:
+        evaluation_log._active = None
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def run_async(calculator, path, **settings):
+    dropped = log_setup.dropped()
+    log = evaluation_log.enable(dict({'file': str(path), 'max_per_second': 0}, **settings))
+    seconds = per_call_us(calculator)
+    log_setup.flush()
+    stats = log.stats()
+    stats['queue_dropped'] -= dropped
+    evaluation_log.disable()
+    return seconds, stats, read_lines(path)
+
+
+def check_errors_always_logged(calculator, path):
+    """sample_rate=0 时成功的求值全部被跳过，出错的求值全部记录"""
+    evaluation_log.enable({'file': str(path), 'sample_rate': 0.0, 'max_per_second': 0})
+    for _ in range(100):
+        calculator.process_expression('3+5')
+        try:
+            calculator.process_expression('1/0')
+        except ValueError:
+            pass
+    log_setup.flush()
+    evaluation_log.disable()
+    lines = read_lines(path)
+    return len(lines) == 100 and all(line['error'] == 'error.division_by_zero' for line in lines)
+
+
+def check_rate_limit(calculator, path):
+    log = evaluation_log.enable({'file': str(path), 'max_per_second': RATE, 'burst': BURST})
+    start = time.monotonic()
+    count = 0
+    while time.monotonic() - start < 0.5:
+        for expr in EXPRESSIONS:
+            calculator.process_expression(expr)
+        count += len(EXPRESSIONS)
+    elapsed = time.monotonic() - start
+    log_setup.flush()
+    stats = log.stats()
+    evaluation_log.disable()
+    lines = read_lines(path)
+    allowed = BURST + RATE * elapsed + 1
+    suppressed = sum(line.get('suppressed', 0) for line in lines)
+    # 最后一条记录之后被丢弃的条数还没有报告
+    ok = (len(lines) == stats['emitted'] <= allowed
+          and stats['emitted'] + stats['rate_limited'] == count
+          and suppressed <= stats['rate_limited'])
+    return ok, count, stats, len(lines), allowed
+
+
+def check_rotation(calculator, directory):
+    path = directory / 'rotated.jsonl'
+    evaluation_log.enable({'file': str(path), 'max_per_second': 0, 'max_bytes': 4096,
+                           'backup_count': 2})
+    for _ in range(500):
+        calculator.process_expression('3+5')
+    log_setup.flush()
+    evaluation_log.disable()
+    files = sorted(p.name for p in directory.glob('rotated.jsonl*'))
+    return files == ['rotated.jsonl', 'rotated.jsonl.1', 'rotated.jsonl.2'], files
+
+
+def main():
+    calculator_cli.RAISE_ERRORS = True
+    calculator = calculator_cli.ScientificCalculator()
+    directory = Path(tempfile.mkdtemp(prefix='calc-logging-'))
+    failures = []
+    try:
+        ok, handlers, lines = check_idempotent(directory)
+        print(f"setup_logger x5: {handlers} handler(s), {lines} line(s) per message")
+        if not ok:
+            failures.append("setup_logger adds duplicate handlers")
+
+        baseline = per_call_us(calculator)
+        sync = run_sync(calculator, directory)
+        asynchronous, stats, records = run_async(calculator, directory / 'async.jsonl')
+        sampled, sampled_stats, sampled_records = run_async(
+            calculator, directory / 'sampled.jsonl', sample_rate=SAMPLE_RATE)
+        limited, _, _ = run_async(calculator, directory / 'limited.jsonl',
+                                  max_per_second=RATE, burst=BURST)
+
+        print(f"{'mode':<10}{'wall us':>10}{'cpu us':>10}{'cpu overhead':>15}")
+        for name, (wall, cpu) in (('baseline', baseline), ('sync', sync), ('async', asynchronous),
+                                  ('sampled', sampled), ('limited', limited)):
+            print(f"{name:<10}{wall:>10.2f}{cpu:>10.2f}{cpu - baseline[1]:>+13.2f}us")
+        # 调用方线程的 CPU 时间：监听线程与它分享 GIL，连续求值时墙钟时间包含监听线程的工作
+        if asynchronous[1] - baseline[1] >= (sync[1] - baseline[1]) * MAX_ASYNC_RATIO:
+            failures.append("queued logging does not take formatting off the calling thread")
+        # 不限流时写文件跟不上求值，队列满后丢弃的记录不应阻塞调用方，也不应写出半行
+        print(f"async: emitted {stats['emitted']}, written {len(records)}, "
+              f"dropped (queue full) {stats['queue_dropped']}")
+        if len(records) + stats['queue_dropped'] != stats['emitted']:
+            failures.append(f"written {len(records)} lines, emitted {stats['emitted']}, "
+                            f"dropped {stats['queue_dropped']}")
+        if {record['opcode'] for record in records} != {'+', '*', '/'}:
+            failures.append("unexpected opcodes in evaluation records")
+
+        total = sampled_stats['emitted'] + sampled_stats['sampled_out']
+        expected = total * SAMPLE_RATE
+        tolerance = 4 * math.sqrt(expected)
+        print(f"sampled: {sampled_stats['emitted']} of {total} (expected {expected:.0f} ± {tolerance:.0f})")
+        if abs(sampled_stats['emitted'] - expected) > tolerance or len(sampled_records) != sampled_stats['emitted']:
+            failures.append("sample rate is off")
+        if not check_errors_always_logged(calculator, directory / 'errors.jsonl'):
+            failures.append("errors are dropped by sampling")
+
+        ok, count, stats, lines, allowed = check_rate_limit(calculator, directory / 'rate.jsonl')
+        print(f"rate limit {RATE}/s (burst {BURST}): {count} evaluations, {lines} written "
+              f"(allowed {allowed:.0f}), {stats['rate_limited']} suppressed")
+        if not ok:
+            failures.append("rate limiting is wrong")
+
+        ok, files = check_rotation(calculator, directory)
+        print(f"rotation: {files}")
+        if not ok:
+            failures.append("log files are not rotated")
+    finally:
+        log_setup.shutdown()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
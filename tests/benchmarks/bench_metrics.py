@@ -0,0 +1,85 @@
+"""运行指标的开销测试
+
+报告 process_expression 每次调用的延迟（us/次，ROUNDS 轮交替测量后取中位数）：
+1. baseline: 从未启用指标
+2. enabled: 启用指标（每次运算和函数调用都计时）
+3. disabled: 启用后再停用
+
+停用后计时层不留下任何东西，所以用方法对象的同一性来检查"停用后没有额外开销"：
+启用时每个目标方法都必须被替换，停用后相关类的每个属性都必须与启用前是同一个对象，否则以退出码 1 结束。
+延迟只作报告，不作为判定条件（disabled 与 baseline 运行的是同一段代码，差别只是测量噪声）。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_metrics.py
+"""
+import statistics
+import sys
+import timeit
+
+from src import calculator_cli, metrics
+from src.history_store import HistoryStore
+from src.unit_converter import UnitConverter
+
+EXPRESSIONS = ['3+5', 'sqrt(3^2+4^2)*2', '-log10(1e-3)+sin(30)', '(1+2)*(3+4)/(5-6)']
+NUMBER = 20000
+# 交替测量的轮数
+ROUNDS = 5
+
+
+def per_call_us(calculator):
+    def run():
+        for expr in EXPRESSIONS:
+            calculator.process_expression(expr)
+    return timeit.timeit(run, number=NUMBER // len(EXPRESSIONS)) / NUMBER * 1e6
+
+
+def method_table():
+    owners = (calculator_cli.ScientificCalculator, calculator_cli.CalculatorCore, UnitConverter, HistoryStore)
+    return {(owner, name): value for owner in owners for name, value in vars(owner).items()}
+
+
+def changed(before, after):
+    """两个方法表中不是同一个对象的属性名"""
+    keys = before.keys() | after.keys()
+    return sorted(f"{owner.__name__}.{name}" for owner, name in keys
+                  if before.get((owner, name)) is not after.get((owner, name)))
+
+
+def main():
+    calculator_cli.RAISE_ERRORS = True
+    calculator = calculator_cli.ScientificCalculator()
+    originals = method_table()
+    targets = sorted(f"{owner.__name__}.{attr}" for owner, attr, _, _ in metrics._targets())
+
+    # baseline 和 disabled 交替测量，取中位数（metrics 停用后方法表与启用前相同，可以反复切换）
+    timings = {'baseline': [], 'enabled': [], 'disabled': []}
+    replaced = []
+    for _ in range(ROUNDS):
+        timings['baseline'].append(per_call_us(calculator))
+        metrics.enable()
+        replaced = changed(originals, method_table())
+        timings['enabled'].append(per_call_us(calculator))
+        metrics.disable()
+        timings['disabled'].append(per_call_us(calculator))
+    calls = sum(row['calls'] for row in metrics.REGISTRY.snapshot())
+    medians = {name: statistics.median(values) for name, values in timings.items()}
+
+    print(f"{'mode':<10}{'us/expr':>10}{'overhead':>10}")
+    for name, value in medians.items():
+        print(f"{name:<10}{value:>10.2f}{(value / medians['baseline'] - 1):>10.1%}")
+    print(f"recorded {calls} timed calls while enabled")
+
+    failures = []
+    if replaced != targets:
+        failures.append(f"enable replaced {replaced}, expected {targets}")
+    leftover = changed(originals, method_table())
+    if leftover:
+        failures.append(f"methods not restored: {', '.join(leftover)}")
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
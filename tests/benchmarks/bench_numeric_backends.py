@@ -0,0 +1,82 @@
+"""数值后端微基准测试
+
+对比各后端的单次运算延迟（ns/次）：
+1. 二元运算（core.calculate）：+ * / ^
+2. 函数调用（core.process_function）：sqrt sin
+3. 整个表达式的求值（语法树已缓存，只计算 core.evaluate）
+adaptive 后端另外测量常见表达式（保持浮点路径）和触发升级的表达式（抵消后以 decimal 重新计算）的耗时，
+并检查升级后的结果正确。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_numeric_backends.py
+"""
+import sys
+import timeit
+from decimal import Decimal
+
+from src.calculator_cli import CalculatorCore
+from src.expression_parser import parse_expression
+from src.i18n.translator import Translator
+from src.numeric_backends import BACKENDS
+
+OPERATIONS = [('+', 1.5, 2.25), ('*', 1.5, 2.25), ('/', 1.5, 2.25), ('^', 1.5, 3.0)]
+FUNCTIONS = [('sqrt', 2.0), ('sin', 30.0)]
+EXPRESSION = '(3.5+2.25)*4-sqrt(16)/2+sin(30)'
+# 常见表达式保持浮点路径；灾难性抵消触发升级
+FAST_EXPRESSION = '0.1+0.2*3-1/7'
+ESCALATING_EXPRESSION = '(1e16+1)-1e16'
+NUMBER = 20000
+
+
+def per_call_ns(func, number=NUMBER):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e9
+
+
+def literal(core, value):
+    """把浮点测试数据转换为后端的数值类型（与语法树中的字面量一致）"""
+    return core.convert_literal(repr(value), value) if core.convert_literal else value
+
+
+def main():
+    translator = Translator()
+    cores = {name: CalculatorCore(translator, backend=name) for name in BACKENDS}
+    columns = [op for op, _, _ in OPERATIONS] + [name for name, _ in FUNCTIONS] + ['expr']
+    print(f"{'backend':<10}" + ''.join(f"{column:>10}" for column in columns) + "   (ns/op)")
+    tree = parse_expression(EXPRESSION)
+    for name, core in cores.items():
+        cells = []
+        for op, a, b in OPERATIONS:
+            a, b = literal(core, a), literal(core, b)
+            cells.append(per_call_ns(lambda: core.calculate(a, b, op)))
+        for func, value in FUNCTIONS:
+            value = literal(core, value)
+            cells.append(per_call_ns(lambda: core.process_function(func, value)))
+        cells.append(per_call_ns(lambda: core.evaluate(tree), NUMBER // 4))
+        print(f"{name:<10}" + ''.join(f"{cell:>10.0f}" for cell in cells))
+
+    failures = []
+    adaptive = cores['adaptive']
+    fast_tree = parse_expression(FAST_EXPRESSION)
+    escalating_tree = parse_expression(ESCALATING_EXPRESSION)
+    float_ns = per_call_ns(lambda: cores['float'].evaluate(fast_tree), NUMBER // 4)
+    fast_ns = per_call_ns(lambda: adaptive.evaluate(fast_tree), NUMBER // 4)
+    escalated_ns = per_call_ns(lambda: adaptive.evaluate(escalating_tree), NUMBER // 4)
+    fast_result = adaptive.evaluate(fast_tree)
+    escalated_result = adaptive.evaluate(escalating_tree)
+    print()
+    print(f"adaptive fast path  {FAST_EXPRESSION:<18}{fast_ns:>8.0f} ns  "
+          f"(float {float_ns:.0f} ns)  result {fast_result!r}")
+    print(f"adaptive escalation {ESCALATING_EXPRESSION:<18}{escalated_ns:>8.0f} ns  "
+          f"(float result {cores['float'].evaluate(escalating_tree)!r})  result {escalated_result!r}")
+    if not isinstance(fast_result, float):
+        failures.append('fast path')
+    if escalated_result != Decimal(1):
+        failures.append('escalation')
+    if failures:
+        print(f"FAIL: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""结果缓存微基准测试
+
+分别在 float 和 decimal 后端上对比 core.process_function / core.calculate 每次调用的延迟（ns/次）：
+1. uncached: 不启用缓存
+2. memory hit: 内存 LRU 命中
+3. disk hit: 新的缓存实例（模拟新的 calc-cli 进程）从 SQLite 磁盘缓存读取
+4. miss: 每次都是新参数（查询 + 计算 + 写入的总开销）
+并检查 -0.0 / 0.0 和 NaN 作为参数时的缓存结果正确。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_result_cache.py
+"""
+import math
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+from src.calculator_cli import CalculatorCore
+from src.i18n.translator import Translator
+from src.result_cache import ResultCache
+
+CALLS = [('sin', 30.0), ('log', 100.0), ('sqrt', 2.0), ('^', (1.5, 3.0))]
+BACKENDS = ('float', 'decimal')
+NUMBER = 20000
+MISS_NUMBER = 5000
+
+
+def call(core, name, args):
+    if isinstance(args, tuple):
+        return core.calculate(core.convert(args[0]), core.convert(args[1]), name)
+    return core.process_function(name, core.convert(args))
+
+
+def make_core(translator, backend, cache=None):
+    core = CalculatorCore(translator, backend=backend)
+    core.set_result_cache(cache)
+    # 把浮点测试数据转换为后端的数值类型（与语法树中的字面量一致）
+    convert = core.convert_literal
+    core.convert = (lambda value: convert(repr(value), value)) if convert else (lambda value: value)
+    return core
+
+
+def per_call_ns(func, number=NUMBER):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e9
+
+
+def check_edge_cases(core):
+    """-0.0 和 0.0 不能共用缓存结果；NaN 参数可以缓存且结果仍为 NaN"""
+    failures = []
+    for _ in range(2):
+        if math.copysign(1, core.process_function('sin', -0.0)) != -1:
+            failures.append('-0.0')
+        if math.copysign(1, core.process_function('sin', 0.0)) != 1:
+            failures.append('0.0')
+        if not math.isnan(core.process_function('sin', float('nan'))):
+            failures.append('nan')
+    return sorted(set(failures))
+
+
+def main():
+    translator = Translator()
+    names = [name for name, _ in CALLS]
+    failures = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = Path(cache_dir) / 'result_cache.sqlite'
+        print(f"{'call':<16}{'uncached':>12}{'memory hit':>12}{'disk hit':>12}{'miss':>12}   (ns/call)")
+        for backend in BACKENDS:
+            plain = make_core(translator, backend)
+            warm_cache = ResultCache(names, path=path)
+            warm = make_core(translator, backend, warm_cache)
+            for name, args in CALLS:
+                uncached = per_call_ns(lambda: call(plain, name, args))
+                call(warm, name, args)
+                memory_hit = per_call_ns(lambda: call(warm, name, args))
+                warm_cache.close()
+
+                # 每次调用都换一个新的缓存实例，只能从磁盘读取（扣除创建实例的开销）
+                cold = make_core(translator, backend)
+
+                def disk_hit():
+                    cold.set_result_cache(ResultCache(names, path=path))
+                    return call(cold, name, args)
+                disk_hit_ns = per_call_ns(disk_hit, number=200) - per_call_ns(
+                    lambda: ResultCache(names, path=path), number=200)
+
+                counter = iter(range(10 ** 9))
+                miss_core = make_core(translator, backend, ResultCache(names, max_entries=1024))
+                if isinstance(args, tuple):
+                    miss = per_call_ns(lambda: call(miss_core, name, (1.0 + next(counter), args[1])),
+                                       MISS_NUMBER)
+                else:
+                    miss = per_call_ns(lambda: call(miss_core, name, 1.0 + next(counter)), MISS_NUMBER)
+                label = f"{backend} {name}"
+                print(f"{label:<16}{uncached:>12.0f}{memory_hit:>12.0f}{disk_hit_ns:>12.0f}{miss:>12.0f}")
+
+        stats = warm_cache.stats()
+        print()
+        print(f"memory cache stats: {stats}")
+        edge_core = CalculatorCore(translator)
+        edge_core.set_result_cache(ResultCache(['sin'], path=path))
+        failures = check_edge_cases(edge_core)
+        edge_core.result_cache.close()
+        print(f"edge cases (-0.0, 0.0, nan): {'ok' if not failures else 'FAILED ' + ', '.join(failures)}")
+
+    if failures:
+        print(f"FAIL: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""calc-server 负载测试
+
+启动一个本地 calc-server（或连接 --url 指定的已运行实例），用多个 keep-alive 连接
+发送流水线请求，报告吞吐量和延迟分布（p50 / p90 / p99 / 最大值）以及服务端的批处理统计。
+
+每个连接保持 --pipeline 个未返回的请求，收到一个响应后立即发送下一个；
+延迟为请求写出到收到完整响应的时间。
+
+同时检查：所有请求都成功返回，且服务端（含向量化批处理）的结果与
+ScientificCalculator.process_expression 逐个计算的结果一致，否则以退出码 1 结束。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_server.py [--connections 16] [--pipeline 8] [--duration 5]
+    PYTHONPATH=. python tests/benchmarks/bench_server.py --url http://127.0.0.1:8765 --endpoint convert
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from src.metrics import LatencyHistogram
+
+# 请求内容：简单的函数调用和二元运算（服务端可以向量化）混合嵌套表达式
+EXPRESSIONS = ['sqrt(2)', 'sin(30)', 'log(100)', '3*4', '10/4', '7%3',
+               'sqrt(3^2+4^2)*2', '-log10(1e-3)+sin(30)', '(1+2j)*(2+3j)']
+CONVERSIONS = [(1.5, 'km', 'm'), (100, 'C', 'F'), (3, 'ft', 'm'), (2, 'kg', 'lb')]
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def request_bodies(endpoint):
+    if endpoint == 'eval':
+        return [json.dumps({'expression': expr}).encode() for expr in EXPRESSIONS]
+    return [json.dumps({'value': value, 'from': from_unit, 'to': to_unit}).encode()
+            for value, from_unit, to_unit in CONVERSIONS]
+
+
+def encode_request(host, path, body):
+    return (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    return status, await reader.readexactly(length)
+
+
+async def client(host, port, path, bodies, pipeline, deadline, histogram, counters, offset):
+    """一个 keep-alive 连接：保持 pipeline 个未返回的请求直到 deadline"""
+    reader, writer = await asyncio.open_connection(host, port)
+    requests = [encode_request(host, path, body) for body in bodies]
+    sent = deque()
+    index = offset
+
+    def send():
+        nonlocal index
+        writer.write(requests[index % len(requests)])
+        sent.append(time.perf_counter_ns())
+        index += 1
+
+    for _ in range(pipeline):
+        send()
+    while sent:
+        status, _ = await read_response(reader)
+        histogram.record(time.perf_counter_ns() - sent.popleft())
+        counters['ok' if status == 200 else 'failed'] += 1
+        if time.perf_counter() < deadline:
+            send()
+            await writer.drain()
+    writer.close()
+
+
+async def post(host, port, path, payload):
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode()
+    writer.write(encode_request(host, path, body))
+    status, data = await read_response(reader)
+    writer.close()
+    return status, json.loads(data)
+
+
+async def get(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode('latin-1'))
+    _, data = await read_response(reader)
+    writer.close()
+    return json.loads(data)
+
+
+async def check_results(host, port):
+    """服务端结果（每种表达式重复多次，触发向量化）与逐个计算的结果比较"""
+    from src import calculator_cli
+    calculator_cli.RAISE_ERRORS = True
+    calculator = calculator_cli.ScientificCalculator()
+    expressions = EXPRESSIONS * 16 + ['1/0'] * 16 + ['sqrt(-4)', 'sqrt(0-4)', 'tan(90)'] * 8
+    _, data = await post(host, port, '/eval', {'expressions': expressions})
+    mismatches = []
+    for expr, item in zip(expressions, data['results']):
+        try:
+            expected, error = calculator.process_expression(expr)[0], None
+        except Exception as e:
+            expected, error = None, calculator.translator.translate(str(e))
+        if item['error'] != error or (error is None and item['formatted'] != calculator.core.format_result(expected)):
+            mismatches.append(f"{expr}: {item} != {expected!r} / {error!r}")
+    return mismatches
+
+
+async def run_load(host, port, args):
+    path = f"/{args.endpoint}"
+    bodies = request_bodies(args.endpoint)
+    histogram = LatencyHistogram()
+    counters = {'ok': 0, 'failed': 0}
+    mismatches = await check_results(host, port)
+    before = await get(host, port, '/stats')
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(client(host, port, path, bodies, args.pipeline, deadline, histogram, counters, i)
+                           for i in range(args.connections)))
+    elapsed = time.perf_counter() - start
+    after = await get(host, port, '/stats')
+    return histogram, counters, elapsed, before, after, mismatches
+
+
+def start_server(extra_args):
+    """启动本地 calc-server（自动选择端口），返回 (进程, host, port)"""
+    command = [sys.executable, '-m', 'src.calc_server', '--port', '0'] + extra_args
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    proc = subprocess.Popen(command, cwd=PROJECT_ROOT, env=env, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith('calc-server listening on http://'):
+        proc.kill()
+        raise RuntimeError(f"calc-server 启动失败: {line.strip()}")
+    host, port = line.rsplit('http://', 1)[1].strip().rsplit(':', 1)
+    return proc, host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='calc-server 负载测试')
+    parser.add_argument('--url', help='已运行实例的地址（默认启动本地实例）')
+    parser.add_argument('--endpoint', choices=('eval', 'convert'), default='eval')
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--pipeline', type=int, default=8, help='每个连接未返回的请求数')
+    parser.add_argument('--duration', type=float, default=5.0, help='测试时长（秒）')
+    parser.add_argument('--server-args', default='', help='启动本地实例时的额外参数')
+    args = parser.parse_args()
+
+    proc = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        proc, host, port = start_server(args.server_args.split())
+    try:
+        histogram, counters, elapsed, before, after, mismatches = asyncio.run(run_load(host, port, args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    total = counters['ok'] + counters['failed']
+    batches = after['batches'] - before['batches']
+    print(f"endpoint: /{args.endpoint}  connections: {args.connections}  pipeline: {args.pipeline}")
+    print(f"requests: {total} ({counters['failed']} failed) in {elapsed:.2f}s")
+    print(f"throughput: {total / elapsed:,.0f} req/s")
+    snapshot = histogram.snapshot()
+    print('latency: ' + '  '.join(f"{name[:-3]}={snapshot[name] / 1e6:.2f}ms"
+                                  for name in ('p50_ns', 'p90_ns', 'p99_ns', 'max_ns')))
+    if batches:
+        print(f"server: {batches} batches, mean {(after['requests'] - before['requests']) / batches:.1f} "
+              f"requests/batch, {after['vectorized'] - before['vectorized']} vectorized")
+
+    failures = []
+    if counters['failed'] or not total:
+        failures.append('failed requests')
+    if mismatches:
+        failures.append(f"{len(mismatches)} results differ from process_expression")
+        for mismatch in mismatches[:5]:
+            print(f"  {mismatch}")
+    if failures:
+        print(f"FAIL: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
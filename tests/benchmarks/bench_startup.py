@@ -0,0 +1,100 @@
+"""calc-cli 启动时间基准测试
+
+测量 calc-cli --eval "2+2" 的首个结果耗时（time-to-first-result）：
+1. 多次启动子进程，取中位数，并减去空解释器（python -c pass）的启动时间，
+   得到计算器自身的启动开销
+2. 使用 python -X importtime 列出导入耗时最多的模块
+3. 检查 --eval 路径没有导入应当延迟加载的重量级模块（yaml、requests、numpy 等）
+
+启动开销超过预算或导入了延迟模块时以退出码 1 结束，可用于 CI。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_startup.py [--budget-ms 100] [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+EVAL_COMMAND = [sys.executable, '-m', 'src.calculator_cli', '--eval', '2+2']
+BASELINE_COMMAND = [sys.executable, '-c', 'pass']
+
+# --eval 路径上不应出现的模块（只在交互模式、批量计算或 GUI 中使用）
+DEFERRED_MODULES = ('yaml', 'requests', 'numpy', 'colorama', 'readline', 'logging',
+                    'src.utils.version_checker', 'src.history_manager', 'src.vectorized',
+                    'src.result_cache', 'sqlite3', 'src.metrics', 'src.workspace',
+                    'src.tabulator')
+
+# 启动开销预算（毫秒，已减去空解释器启动时间）
+DEFAULT_BUDGET_MS = 100
+TOP_IMPORTS = 10
+
+
+def project_root():
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_once(command):
+    """运行一次命令，返回 (耗时秒数, 标准输出, 标准错误)"""
+    start = time.perf_counter()
+    proc = subprocess.run(command, cwd=project_root(), capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} 失败: {proc.stderr.strip()}")
+    return elapsed, proc.stdout, proc.stderr
+
+
+def median_time(command, runs):
+    return statistics.median(run_once(command)[0] for _ in range(runs))
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 的输出，返回 [(累计微秒, 模块名)]"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((int(cumulative), name.strip()))
+    return imports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='calc-cli 启动时间基准测试')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'启动开销预算（毫秒，默认 {DEFAULT_BUDGET_MS}）')
+    parser.add_argument('--runs', type=int, default=10, help='每个命令的运行次数（默认 10）')
+    args = parser.parse_args(argv)
+
+    _, stdout, stderr = run_once([sys.executable, '-X', 'importtime'] + EVAL_COMMAND[1:])
+    if stdout.strip() != '4':
+        print(f"FAIL: --eval 2+2 输出 {stdout.strip()!r}")
+        return 1
+    imports = parse_importtime(stderr)
+    print("slowest imports (cumulative):")
+    for cumulative, name in sorted(imports, reverse=True)[:TOP_IMPORTS]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    baseline = median_time(BASELINE_COMMAND, args.runs)
+    total = median_time(EVAL_COMMAND, args.runs)
+    overhead_ms = (total - baseline) * 1000
+    print(f"interpreter startup:  {baseline * 1000:8.1f} ms")
+    print(f"time to first result: {total * 1000:8.1f} ms")
+    print(f"calc-cli overhead:    {overhead_ms:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    loaded = {name for _, name in imports}
+    eager = [module for module in DEFERRED_MODULES if module in loaded]
+    if eager:
+        print(f"FAIL: --eval 导入了应延迟加载的模块: {', '.join(eager)}")
+        failed = True
+    if overhead_ms > args.budget_ms:
+        print("FAIL: 启动开销超出预算")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""制表基准测试
+
+sin(x)，x 从 0 到 360，步长 0.001（360001 个点）。逐点的做法取前 --sample 个点测量，按点数折算：
+1. repl: 逐点拼接表达式调用 process_expression 并格式化输出（原有做法）
+2. text / csv / binary: tabulate 分块向量化计算并流式写入 os.devnull
+3. compute: 只计算不输出，与逐点调用 process_function 比较
+4. adaptive: tan(x)，x 从 0 到 360，步长 1，自适应加密后的点数和耗时
+
+同时检查：制表结果与 process_function 一致（浮点误差范围内）；流式写出的内存峰值
+（tracemalloc）低于 --max-memory-mb；各种格式都比 repl 快、compute 比 process_function 快，
+否则以退出码 1 结束。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_table.py [--step 0.001] [--sample 20000]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+from src import calculator_cli
+from src import tabulator
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def write(core, fmt, step, **options):
+    chunks = tabulator.tabulate('sin(x)', 'x', 0, 360, step, core=core, **options)
+    mode = 'wb' if fmt == 'binary' else 'w'
+    with open(os.devnull, mode) as output:
+        return tabulator.write_table(chunks, output, fmt, core, header=('x', 'sin(x)'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='制表基准测试')
+    parser.add_argument('--step', type=float, default=0.001)
+    parser.add_argument('--sample', type=int, default=20000, help='逐点调用测量的点数')
+    parser.add_argument('--max-memory-mb', type=float, default=8.0,
+                        help='流式写出允许的内存峰值（MB）')
+    args = parser.parse_args()
+
+    calculator_cli.RAISE_ERRORS = True
+    calculator = calculator_cli.ScientificCalculator()
+    core = calculator.core
+    count = tabulator.grid_size(0, 360, args.step)
+    failures = []
+
+    xs = [i * args.step for i in range(min(args.sample, count))]
+    scale = count / len(xs)
+
+    def repl():
+        with open(os.devnull, 'w') as output:
+            for x in xs:
+                result, _ = calculator.process_expression(f"sin({x!r})")
+                output.write(f"{x}\t{core.format_result(result)}\n")
+
+    repl_seconds = timed(repl)[0] * scale
+    loop_seconds, expected = timed(lambda: [core.process_function('sin', x) for x in xs])
+    loop_seconds *= scale
+
+    chunks = tabulator.tabulate('sin(x)', 'x', 0, 360, args.step, core=core)
+    actual = list(next(chunks)[1].values[:len(expected)])
+    if not all(math.isclose(a, b, rel_tol=1e-12, abs_tol=1e-15) for a, b in zip(actual, expected)):
+        failures.append("tabulated values differ from process_function")
+
+    print(f"points: {count}")
+    print(f"{'mode':<10}{'seconds':>10}{'rows/s':>14}{'speedup':>10}")
+    print(f"{'repl':<10}{repl_seconds:>10.3f}{count / repl_seconds:>14,.0f}{'(est.)':>10}")
+    for fmt in tabulator.FORMATS:
+        seconds, rows = timed(lambda: write(core, fmt, args.step))
+        print(f"{fmt:<10}{seconds:>10.3f}{rows / seconds:>14,.0f}{repl_seconds / seconds:>9.1f}x")
+        if rows != count:
+            failures.append(f"{fmt}: wrote {rows} rows, expected {count}")
+        if seconds >= repl_seconds:
+            failures.append(f"{fmt}: not faster than the per-point REPL path")
+
+    seconds = timed(lambda: sum(len(xs) for xs, _ in tabulator.tabulate(
+        'sin(x)', 'x', 0, 360, args.step, core=core)))[0]
+    print(f"compute: {seconds:.3f}s vs process_function loop {loop_seconds:.3f}s (est.), "
+          f"{loop_seconds / seconds:.1f}x")
+    if seconds >= loop_seconds:
+        failures.append("compute: not faster than the process_function loop")
+
+    tracemalloc.start()
+    write(core, 'binary', args.step)
+    peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    print(f"peak memory while streaming: {peak_mb:.2f} MB")
+    if peak_mb > args.max_memory_mb:
+        failures.append(f"streaming peak memory {peak_mb:.2f} MB exceeds {args.max_memory_mb} MB")
+
+    seconds, points = timed(lambda: sum(len(xs) for xs, _ in tabulator.tabulate(
+        'tan(x)', 'x', 0, 360, 1, core=core, adaptive=True)))
+    print(f"adaptive tan(x) step 1: {points} points (grid 361) in {seconds * 1000:.1f} ms")
+    if points <= 361:
+        failures.append("adaptive mode did not refine tan(x)")
+
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""翻译器基准测试
+
+对比每次调用的耗时：
+1. translate: 扁平键、嵌套键（error.xxx）、不存在的键
+2. format: 预拆分模板填充 与 translate(key).format(...)
+3. 加载语言文件: 解析 JSON 与读取编译后的 marshal 文件
+
+同时检查：所有 Translator 共享同一份翻译表；修改语言文件后编译文件失效；
+format 与 str.format 的结果一致。任一检查失败时以退出码 1 结束。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_translator.py
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+from src.i18n import translator as i18n
+from src.i18n.translator import Translator
+
+NUMBER = 200000
+LOAD_NUMBER = 200
+
+
+def per_call_ns(func, number=NUMBER):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+def main():
+    cache_home = tempfile.mkdtemp(prefix='calc-i18n-')
+    os.environ['XDG_CACHE_HOME'] = cache_home
+    failures = []
+    try:
+        i18n.clear_cache()
+        first = Translator('en_US')
+        if Translator('en_US').translations is not first.translations:
+            failures.append('catalog not shared')
+
+        print(f"{'benchmark':<28}{'ns/call':>10}")
+        for label, key in (('translate.flat', 'welcome'), ('translate.nested', 'error.division_by_zero'),
+                           ('translate.missing', 'no.such.key')):
+            print(f"{label:<28}{per_call_ns(lambda: first.translate(key)):>10.0f}")
+        args = (1.5, 'km', '1500', 'm')
+        fmt = per_call_ns(lambda: first.format('unit_conversion_record', *args))
+        str_fmt = per_call_ns(lambda: first.translate('unit_conversion_record').format(*args))
+        print(f"{'format':<28}{fmt:>10.0f}")
+        print(f"{'translate + str.format':<28}{str_fmt:>10.0f}")
+        if first.format('unit_conversion_record', *args) != first.translate('unit_conversion_record').format(*args):
+            failures.append('format mismatch')
+
+        # 在临时目录中复制语言文件，比较 JSON 解析与编译文件
+        work = tempfile.mkdtemp(prefix='calc-i18n-src-')
+        path = os.path.join(work, 'en_US.json')
+        shutil.copy(i18n.catalog_path('en_US'), path)
+
+        def load_json():
+            with open(path, 'r', encoding='utf-8') as f:
+                return i18n.flatten(json.load(f))
+        cold = per_call_ns(load_json, LOAD_NUMBER)
+        compiled = i18n.load_file(path, 'bench')
+        warm = per_call_ns(lambda: i18n.load_file(path, 'bench'), LOAD_NUMBER)
+        print(f"{'load.json':<28}{cold / 1000:>9.1f}us")
+        print(f"{'load.compiled':<28}{warm / 1000:>9.1f}us")
+        if compiled != load_json():
+            failures.append('compiled catalog differs')
+
+        # 修改语言文件后编译文件必须失效
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'welcome': 'changed'}, f)
+        if i18n.load_file(path, 'bench') != {'welcome': 'changed'}:
+            failures.append('stale compiled catalog')
+        shutil.rmtree(work, True)
+    finally:
+        shutil.rmtree(cache_home, True)
+        i18n.clear_cache()
+
+    if failures:
+        print(f"FAIL: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""单位转换微基准测试
+
+对比每次调用的延迟：
+1. linear scan: 旧版 convert（每次遍历所有 UnitType 查找单位，温度走 if 分支）
+2. plan cache: 新版 convert（转换方案缓存，一次乘加）
+复合单位（km/h -> m/s 等）首次编译的耗时和编译后的调用延迟，
+以及 convert_array 批量转换的吞吐量。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_unit_converter.py
+"""
+import sys
+import timeit
+
+from src import unit_dimensions
+from src.unit_converter import UnitConverter, UnitType
+
+PAIRS = [('km', 'm'), ('lb', 'oz'), ('F', 'K'), ('ha', 'acre')]
+COMPOUND_PAIRS = [('km/h', 'm/s'), ('kg*m/s^2', 'N'), ('ft^2', 'm2'), ('kW*h', 'J')]
+NUMBER = 50000
+ARRAY_SIZE = 1000000
+
+
+def legacy_convert(value, from_unit, to_unit):
+    """旧版 convert 的线性查找实现（仅用于对比）"""
+    conversions = UnitConverter.CONVERSIONS
+    unit_type = None
+    for type_ in UnitType:
+        if from_unit in conversions[type_] and to_unit in conversions[type_]:
+            unit_type = type_
+            break
+    if unit_type is None:
+        raise ValueError(f"Unsupported unit conversion: {from_unit} -> {to_unit}")
+    if unit_type == UnitType.TEMPERATURE:
+        if from_unit == "F":
+            celsius = (value - 32) * 5/9
+        elif from_unit == "K":
+            celsius = value - 273.15
+        else:
+            celsius = value
+        return conversions[unit_type][to_unit](celsius)
+    return value * conversions[unit_type][from_unit] / conversions[unit_type][to_unit]
+
+
+def main():
+    print(f"{'pair':<12}{'linear scan (ns)':>18}{'plan cache (ns)':>18}")
+    for from_unit, to_unit in PAIRS:
+        legacy = min(timeit.repeat(lambda: legacy_convert(1.5, from_unit, to_unit),
+                                   number=NUMBER, repeat=3))
+        cached = min(timeit.repeat(lambda: UnitConverter.convert(1.5, from_unit, to_unit),
+                                   number=NUMBER, repeat=3))
+        print(f"{from_unit + '->' + to_unit:<12}{legacy / NUMBER * 1e9:>18.0f}{cached / NUMBER * 1e9:>18.0f}")
+
+    print(f"{'compound':<12}{'compile (us)':>18}{'plan cache (ns)':>18}")
+    for from_unit, to_unit in COMPOUND_PAIRS:
+        unit_dimensions.clear_cache()
+        compiled = min(timeit.repeat(
+            lambda: (unit_dimensions.clear_cache(), UnitConverter.convert(1.5, from_unit, to_unit)),
+            number=100, repeat=3))
+        cached = min(timeit.repeat(lambda: UnitConverter.convert(1.5, from_unit, to_unit),
+                                   number=NUMBER, repeat=3))
+        print(f"{from_unit + '->' + to_unit:<12}{compiled / 100 * 1e6:>18.1f}{cached / NUMBER * 1e9:>18.0f}")
+
+    values = [float(i) for i in range(ARRAY_SIZE)]
+    seconds = min(timeit.repeat(lambda: UnitConverter.convert_array(values, 'km', 'm'),
+                                number=1, repeat=3))
+    print(f"convert_array: {ARRAY_SIZE / seconds:,.0f} values/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
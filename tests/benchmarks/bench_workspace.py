@@ -0,0 +1,124 @@
+"""变量工作区增量重新计算基准测试
+
+构造一个 --nodes 个变量的依赖图：--groups 个输入变量（叶子），其余变量各引用
+同一组中 1~3 个较早定义的变量（固定随机种子）。测量：
+1. define: 定义全部变量的耗时
+2. first: 第一次计算全部变量（包括编译每个定义）
+   full: 全部变量标记为脏后重新计算（等价于没有依赖图时每次修改都全部重新计算）
+3. update_leaf: 修改一个叶子并重新计算（只计算它的下游）
+4. read_clean: 读取干净变量的耗时（ns/次）
+
+同时检查：修改叶子后重新计算的变量数等于它的下游变量数；增量结果与在新工作区中
+全部重新计算的结果完全相同；增量重新计算比全部重新计算快，否则以退出码 1 结束。
+
+运行方式：
+    PYTHONPATH=. python tests/benchmarks/bench_workspace.py [--nodes 10000] [--groups 100]
+"""
+import argparse
+import random
+import sys
+import time
+import timeit
+
+from src import calculator_cli
+from src.workspace import Workspace
+
+
+def build_definitions(nodes, groups, seed=42):
+    """返回 [(变量名, 表达式)]：每组一个叶子 x{g}，其余变量引用同组较早的变量"""
+    rng = random.Random(seed)
+    members = [[f"x{g}"] for g in range(groups)]
+    definitions = [(f"x{g}", repr(1.0 + g)) for g in range(groups)]
+    templates = ('{0}*0.5 + 1', '({0} + {1})/2 + sin({0})', 'sqrt(abs({0})) + ({1} - {2})/3')
+    for i in range(nodes - groups):
+        group = members[i % groups]
+        refs = [rng.choice(group) for _ in range(3)]
+        template = templates[rng.randrange(len(templates))]
+        name = f"v{i}"
+        definitions.append((name, template.format(*refs)))
+        group.append(name)
+    return definitions
+
+
+def downstream(workspace, name):
+    """name 的全部下游变量（含 name）"""
+    seen = {name}
+    stack = [name]
+    while stack:
+        for dependent in workspace.dependents(stack.pop()):
+            if dependent not in seen:
+                seen.add(dependent)
+                stack.append(dependent)
+    return seen
+
+
+def build(core, definitions):
+    workspace = Workspace(core)
+    for name, expression in definitions:
+        workspace.define(name, expression)
+    return workspace
+
+
+def main():
+    parser = argparse.ArgumentParser(description='变量工作区增量重新计算基准测试')
+    parser.add_argument('--nodes', type=int, default=10000, help='变量总数')
+    parser.add_argument('--groups', type=int, default=100, help='叶子（互相独立的组）数')
+    args = parser.parse_args()
+
+    calculator_cli.RAISE_ERRORS = True
+    core = calculator_cli.ScientificCalculator().core
+    definitions = build_definitions(args.nodes, args.groups)
+    failures = []
+
+    start = time.perf_counter()
+    workspace = build(core, definitions)
+    define_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    workspace.recompute()
+    first_ms = (time.perf_counter() - start) * 1000
+    workspace.invalidate()
+    start = time.perf_counter()
+    workspace.recompute()
+    full_ms = (time.perf_counter() - start) * 1000
+
+    leaf = 'x0'
+    affected = downstream(workspace, leaf)
+    timings = []
+    for value in ('2.5', '3.5', '1.0'):
+        start = time.perf_counter()
+        workspace.define(leaf, value)
+        recomputed = workspace.recompute()
+        timings.append((time.perf_counter() - start) * 1000)
+        if recomputed != len(affected):
+            failures.append(f"recomputed {recomputed} definitions, expected {len(affected)}")
+    update_ms = min(timings)
+
+    workspace.define(leaf, '7.25')
+    workspace.recompute()
+    expected = build(core, [(name, '7.25' if name == leaf else expression)
+                            for name, expression in definitions])
+    expected.recompute()
+    if workspace.values != expected.values or workspace.errors != expected.errors:
+        failures.append("incremental results differ from full recomputation")
+
+    name = definitions[-1][0]
+    reads = 100000
+    read_ns = min(timeit.repeat(lambda: workspace.value(name), number=reads, repeat=3)) / reads * 1e9
+
+    print(f"nodes: {len(workspace)}  groups: {args.groups}  downstream of {leaf}: {len(affected)}")
+    print(f"define:      {define_ms:10.2f} ms")
+    print(f"first:       {first_ms:10.2f} ms")
+    print(f"full:        {full_ms:10.2f} ms")
+    print(f"update_leaf: {update_ms:10.2f} ms  ({full_ms / update_ms:.1f}x faster than full)")
+    print(f"read_clean:  {read_ns:10.0f} ns")
+    if update_ms >= full_ms:
+        failures.append("incremental update is not faster than full recomputation")
+
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""基准测试套件的运行、保存和比较
+
+基准测试用 @benchmark 注册，被注册的函数负责准备数据并返回被测的无参函数：
+
+@benchmark('calculate.add', group='core')
+def bench_add():
+    core = CalculatorCore(Translator())
+    return lambda: core.calculate(1.5, 2.5, '+')
+
+运行时自动选择每轮的调用次数（每轮约 TARGET_ROUND_SECONDS 秒），重复 repeat 轮，
+记录每次调用的最短和中位耗时（纳秒）。one_shot=True 的基准测试（如启动时间）每轮只调用一次。
+
+结果保存为 JSON，compare() 按最短耗时与基线比较，超过阈值视为退化。
+"""
+import json
+import platform
+import re
+import statistics
+import sys
+import time
+import timeit
+
+# 每轮的目标耗时（秒）
+TARGET_ROUND_SECONDS = 0.2
+DEFAULT_REPEAT = 5
+# 默认的退化阈值（相对基线变慢的比例）
+DEFAULT_THRESHOLD = 0.20
+
+# 名称 -> Benchmark（按注册顺序）
+BENCHMARKS = {}
+
+
+class Benchmark:
+    """一个已注册的基准测试
+
+    属性：
+        name (str): 名称（报告和基线中的键）
+        group (str): 分组，用于过滤
+        setup: 准备函数，返回被测的无参函数；无法运行时抛出 SkipBenchmark
+        one_shot (bool): 每轮只调用一次（被测函数本身耗时较长）
+        repeat (int): 重复轮数
+    """
+
+    def __init__(self, name, group, setup, one_shot=False, repeat=DEFAULT_REPEAT):
+        self.name = name
+        self.group = group
+        self.setup = setup
+        self.one_shot = one_shot
+        self.repeat = repeat
+
+
+class SkipBenchmark(Exception):
+    """当前环境无法运行该基准测试（如缺少可选依赖）"""
+
+
+def benchmark(name, group='misc', one_shot=False, repeat=DEFAULT_REPEAT):
+    """注册基准测试的装饰器"""
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(name, group, setup, one_shot, repeat)
+        return setup
+    return register
+
+
+def calibrate(func):
+    """选择每轮的调用次数，使一轮耗时约 TARGET_ROUND_SECONDS 秒"""
+    number = 1
+    while True:
+        elapsed = timeit.timeit(func, number=number)
+        if elapsed >= TARGET_ROUND_SECONDS / 10 or number >= 10 ** 7:
+            break
+        number *= 10
+    return max(1, int(number * TARGET_ROUND_SECONDS / max(elapsed, 1e-9)))
+
+
+def run_one(bench, quick=False):
+    """运行一个基准测试
+
+    返回：
+        dict: best_ns, median_ns（每次调用），number（每轮调用次数），repeat
+    """
+    func = bench.setup()
+    repeat = 3 if quick else bench.repeat
+    if bench.one_shot:
+        number = 1
+    else:
+        number = calibrate(func)
+        if quick:
+            number = max(1, number // 5)
+    rounds = [t / number * 1e9 for t in timeit.repeat(func, number=number, repeat=repeat)]
+    return {
+        'best_ns': min(rounds),
+        'median_ns': statistics.median(rounds),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def run(pattern=None, quick=False, out=sys.stdout):
+    """运行匹配 pattern（正则，匹配名称或分组）的基准测试
+
+    返回：
+        dict: 名称 -> run_one 的结果；跳过的基准测试为 {'skipped': 原因}
+    """
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if pattern and not (re.search(pattern, name) or re.search(pattern, bench.group)):
+            continue
+        try:
+            results[name] = run_one(bench, quick)
+        except SkipBenchmark as e:
+            results[name] = {'skipped': str(e)}
+        print_result(name, results[name], out)
+    return results
+
+
+def format_ns(ns):
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f} {unit}"
+    return f"{ns:.0f} ns"
+
+
+def print_result(name, result, out=sys.stdout):
+    if 'skipped' in result:
+        print(f"{name:<40}{'skipped':>14}  {result['skipped']}", file=out)
+    else:
+        print(f"{name:<40}{format_ns(result['best_ns']):>14}{format_ns(result['median_ns']):>14}"
+              f"  x{result['number']}", file=out)
+
+
+def save(results, path):
+    """保存结果（附带 Python 版本和平台信息，比较时只作提示）"""
+    data = {
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(baseline, results, threshold=DEFAULT_THRESHOLD, out=sys.stdout):
+    """与基线比较
+
+    参数：
+        baseline (dict): load() 读取的基线
+        results (dict): run() 的结果
+        threshold (float): 最短耗时超过基线 (1 + threshold) 倍时视为退化
+
+    返回：
+        list: 退化的基准测试名称
+    """
+    if baseline.get('python') != platform.python_version() or \
+            baseline.get('platform') != platform.platform():
+        print(f"注意: 基线来自 Python {baseline.get('python')} / {baseline.get('platform')}，"
+              f"结果可能不可比", file=out)
+    regressions = []
+    print(f"{'benchmark':<40}{'baseline':>14}{'current':>14}{'change':>10}", file=out)
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if 'skipped' in result or not base or 'skipped' in base:
+            print(f"{name:<40}{'-':>14}{'-':>14}{'n/a':>10}", file=out)
+            continue
+        change = result['best_ns'] / base['best_ns'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<40}{format_ns(base['best_ns']):>14}{format_ns(result['best_ns']):>14}"
+              f"{change:>+10.1%}{flag}", file=out)
+    return regressions
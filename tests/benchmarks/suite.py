@@ -0,0 +1,357 @@
+"""基准测试套件
+
+覆盖计算器的主要路径：
+1. expression: process_expression，每种表达式形状一项（解析缓存命中 / 未命中）
+2. core: CalculatorCore.calculate 和 process_function；compile_expression 编译后的标量 / 数组调用；
+   复数的函数调用和批量运算；tabulate 制表（text / binary 输出）；变量工作区修改一个叶子后的增量重新计算和干净变量的读取
+3. units: UnitConverter.convert（简单、温度、复合单位）
+   calculus: integrate（光滑、端点奇异、无穷区间）、diff、solve 和 1000 个方程的 solve_many
+4. history: HistoryManager.add_record，历史记录库中已有 10 / 1万 / 100万 条记录；按游标分页；按列筛选内存中的记录
+5. i18n: Translator.translate 和 format
+6. startup: calc-cli --eval 和图形界面（offscreen）的启动时间
+
+运行方式：
+    PYTHONPATH=. python -m tests.benchmarks.suite                      # 运行并输出结果
+    PYTHONPATH=. python -m tests.benchmarks.suite --save baseline.json # 保存为基线
+    PYTHONPATH=. python -m tests.benchmarks.suite --compare baseline.json --threshold 0.2
+    PYTHONPATH=. python -m tests.benchmarks.suite --filter history --quick
+
+与基线比较时任一项最短耗时变慢超过阈值则以退出码 1 结束（make bench-compare）。
+"""
+import argparse
+import atexit
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from tests.benchmarks.harness import (
+    benchmark, SkipBenchmark, run, save, load, compare, DEFAULT_THRESHOLD)
+
+# 表达式形状 -> 示例
+EXPRESSIONS = {
+    'binary': '3+5',
+    'function': 'sqrt(25)',
+    'nested': 'sqrt(3^2+4^2)*2',
+    'unary_chain': '-log10(1e-3)+sin(30)',
+    'complex': '(1+2j)*(2+3j)',
+    'long_sum': '+'.join(str(i) for i in range(1, 51)),
+}
+HISTORY_SIZES = {'10': 10, '10k': 10000, '1m': 1000000}
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _calculator():
+    from src import calculator_cli
+    calculator_cli.RAISE_ERRORS = True
+    return calculator_cli.ScientificCalculator()
+
+
+def _temp_dir():
+    path = tempfile.mkdtemp(prefix='calc-bench-')
+    atexit.register(shutil.rmtree, path, True)
+    return Path(path)
+
+
+# ======================
+# 表达式
+# ======================
+def _register_expressions():
+    from src.expression_parser import clear_parse_cache
+
+    for shape, expr in EXPRESSIONS.items():
+        def cached(expr=expr):
+            calculator = _calculator()
+            return lambda: calculator.process_expression(expr)
+
+        def cold(expr=expr):
+            calculator = _calculator()
+
+            def evaluate():
+                clear_parse_cache()
+                return calculator.process_expression(expr)
+            return evaluate
+
+        benchmark(f"expression.{shape}", group='expression')(cached)
+        benchmark(f"expression.{shape}.cold", group='expression')(cold)
+
+
+_register_expressions()
+
+
+# ======================
+# 计算核心
+# ======================
+def _core():
+    from src.calculator_cli import CalculatorCore
+    from src.i18n.translator import Translator
+    return CalculatorCore(Translator())
+
+
+for _op, (_a, _b) in {'+': (1.5, 2.5), '*': (1.5, 2.5), '/': (1.5, 2.5), '^': (1.5, 3.0),
+                      '+c': (1 + 2j, 2 + 3j)}.items():
+    def _calculate(op=_op, a=_a, b=_b):
+        core = _core()
+        return lambda: core.calculate(a, b, op)
+    benchmark(f"calculate.{_op}", group='core')(_calculate)
+
+for _func, _value in {'sin': 30.0, 'sqrt': 2.0, 'log': 100.0, 'abs_c': 3 + 4j}.items():
+    def _process_function(func=_func, value=_value):
+        core = _core()
+        return lambda: core.process_function(func, value)
+    benchmark(f"process_function.{_func}", group='core')(_process_function)
+
+
+for _label, _arg in (('scalar', 2.5), ('array', [0.5 + i * 0.01 for i in range(1000)])):
+    def _compiled(arg=_arg):
+        from src.expression_compiler import compile_expression
+        compiled = compile_expression('3*x^2 + sin(x)', _core())
+        return lambda: compiled(arg)
+    benchmark(f"compiled.{_label}", group='core')(_compiled)
+
+
+@benchmark('process_function.sqrt.complex', group='core')
+def _process_function_complex():
+    core = _core()
+    return lambda: core.process_function('sqrt', -4 + 1j)
+
+
+for _label, _args in (('mul', ('*c',)), ('sqrt', ('sqrt',))):
+    def _complex_many(args=_args):
+        """1000 个复数的批量运算（calculate_many / apply_function）"""
+        values = [complex(i * 0.01 - 5, 5 - i * 0.01) for i in range(1000)]
+        core = _core()
+        if args[0] in core.OPERATORS:
+            return lambda: core.calculate_many(values, values, args[0])
+        return lambda: core.apply_function(args[0], values)
+    benchmark(f"complex.{_label}_many", group='core')(_complex_many)
+
+
+def _workspace():
+    """1000 个变量的工作区：10 条各 100 个变量的依赖链，叶子为 x0 ~ x9"""
+    from src.workspace import Workspace
+    workspace = Workspace(_core())
+    for chain in range(10):
+        workspace.define(f"x{chain}", str(chain))
+        previous = f"x{chain}"
+        for i in range(99):
+            name = f"v{chain}_{i}"
+            workspace.define(name, f"{previous}*0.5 + sin({previous})")
+            previous = name
+    workspace.recompute()
+    return workspace
+
+
+for _fmt in ('text', 'binary'):
+    def _table(fmt=_fmt):
+        """sin(x) 在 10001 个网格点上制表并写入内存"""
+        import io
+        from src import tabulator
+        core = _core()
+
+        def table():
+            output = io.BytesIO() if fmt == 'binary' else io.StringIO()
+            tabulator.write_table(tabulator.tabulate('sin(x)', 'x', 0, 10, 0.001, core=core),
+                                  output, fmt, core)
+        return table
+    benchmark(f"table.{_fmt}", group='core')(_table)
+
+
+@benchmark('workspace.update_leaf', group='core')
+def _workspace_update():
+    workspace = _workspace()
+    values = iter(range(1 << 62))
+
+    def update():
+        workspace.define('x0', str(next(values)))
+        workspace.recompute()
+    return update
+
+
+@benchmark('workspace.read', group='core')
+def _workspace_read():
+    workspace = _workspace()
+    return lambda: workspace.value('v0_98')
+
+
+# ======================
+# 单位转换
+# ======================
+for _from_unit, _to_unit in (('km', 'm'), ('F', 'C'), ('km/h', 'm/s')):
+    def _convert(from_unit=_from_unit, to_unit=_to_unit):
+        from src.unit_converter import UnitConverter
+        return lambda: UnitConverter.convert(1.5, from_unit, to_unit)
+    benchmark(f"unit.convert.{_from_unit}->{_to_unit}", group='units')(_convert)
+
+
+# ======================
+# 数值微积分
+# ======================
+for _label, (_expr, _a, _b) in {'smooth': ('exp(x)*cos(x)', 0, 1),
+                                'singular': ('1/sqrt(x)', 0, 1),
+                                'infinite': ('exp(-x^2)', float('-inf'), float('inf'))}.items():
+    def _integrate(expr=_expr, a=_a, b=_b):
+        from src import calculus
+        core = _core()
+        return lambda: calculus.integrate(expr, a, b, core=core)
+    benchmark(f"calculus.integrate.{_label}", group='calculus')(_integrate)
+
+
+@benchmark('calculus.diff', group='calculus')
+def _diff():
+    from src import calculus
+    core = _core()
+    return lambda: calculus.diff('exp(x)*sin(x)', 1.5, core=core)
+
+
+@benchmark('calculus.solve', group='calculus')
+def _solve():
+    from src import calculus
+    core = _core()
+    return lambda: calculus.solve('x^3 - 2*x - 5', 2, 3, core=core)
+
+
+@benchmark('calculus.solve_many', group='calculus')
+def _solve_many():
+    """x^3 + x - k = 0，k 为 1000 个不同的值"""
+    from src import calculus
+    core = _core()
+    bindings = {'k': [1 + i * 0.01 for i in range(1000)]}
+    return lambda: calculus.solve_many('x^3 + x - k', 0, 5, core=core, bindings=bindings)
+
+
+# ======================
+# 历史记录
+# ======================
+_history_stores = {}
+
+
+def _history_store(size):
+    """预先写入 size 条记录的历史记录库路径（同一规模只建一次）"""
+    from src.history_store import HistoryStore
+    if size in _history_stores:
+        return _history_stores[size]
+    path = _history_stores[size] = _temp_dir() / 'history.sqlite'
+    store = HistoryStore(path, synchronous='OFF')
+    for start in range(0, size, 10000):
+        store.append_many(f"{i}+{i}={2 * i}" for i in range(start, min(size, start + 10000)))
+    store.close()
+    return path
+
+
+for _label, _size in HISTORY_SIZES.items():
+    def _add_record(size=_size):
+        """库中预先写入 size 条记录后测量 add_record
+
+        不同步到磁盘（synchronous: OFF），只测量代码路径，避免磁盘速度影响比较。
+        """
+        from src.history_manager import HistoryManager
+        history = HistoryManager({'path': _history_store(size), 'synchronous': 'OFF'})
+        return lambda: history.add_record('3+5=8')
+    benchmark(f"history.add_record.{_label}", group='history')(_add_record)
+
+
+for _label, _depth in (('latest', 0), ('deep', 900000)):
+    def _page(depth=_depth):
+        """在 100万 条记录中按游标读取一页（latest: 最新一页，deep: 90万 条之前的一页）"""
+        from src.history_store import HistoryStore
+        store = HistoryStore(_history_store(HISTORY_SIZES['1m']), synchronous='OFF')
+        before = store.page(limit=1)[0].id - depth if depth else None
+        return lambda: store.page(before=before, limit=100)
+    benchmark(f"history.page.{_label}", group='history')(_page)
+
+
+@benchmark('history.records.select', group='history')
+def _records_select():
+    """在 1万 条按列保存的记录中按运算符筛选"""
+    from src.history_records import HistoryRecords
+    records = HistoryRecords()
+    for i in range(10000):
+        records.append(f"{i}{'+-*/'[i % 4]}{i + 1}={i}", 1792300000.0 + i)
+    return lambda: records.select(opcode='*', start=1792300000.0 + 5000)
+
+
+# ======================
+# 翻译
+# ======================
+for _label, _key in (('flat', 'welcome'), ('nested', 'error.division_by_zero'), ('missing', 'no.such.key')):
+    def _translate(key=_key):
+        from src.i18n.translator import Translator
+        translator = Translator()
+        return lambda: translator.translate(key)
+    benchmark(f"translate.{_label}", group='i18n')(_translate)
+
+
+@benchmark('translate.format', group='i18n')
+def _format():
+    from src.i18n.translator import Translator
+    translator = Translator()
+    return lambda: translator.format('unit_conversion_record', 1.5, 'km', '1500', 'm')
+
+
+# ======================
+# 启动时间
+# ======================
+def _subprocess(command, env=None):
+    def start():
+        subprocess.run(command, cwd=PROJECT_ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return start
+
+
+@benchmark('startup.cli_eval', group='startup', one_shot=True, repeat=10)
+def _cli_startup():
+    return _subprocess([sys.executable, '-m', 'src.calculator_cli', '--eval', '2+2'])
+
+
+@benchmark('startup.gui', group='startup', one_shot=True, repeat=5)
+def _gui_startup():
+    if importlib.util.find_spec('PyQt6') is None:
+        raise SkipBenchmark('PyQt6 未安装')
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen', HOME=str(_temp_dir()),
+               PYTHONPATH=str(PROJECT_ROOT))
+    code = ("import sys; from PyQt6.QtWidgets import QApplication; app = QApplication(sys.argv); "
+            "from src.gui_calculator import CalculatorGUI; gui = CalculatorGUI(); gui.show(); "
+            "app.processEvents(); gui.close()")
+    return _subprocess([sys.executable, '-c', code], env)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='计算器基准测试套件')
+    parser.add_argument('--filter', metavar='REGEX', help='只运行名称或分组匹配的基准测试')
+    parser.add_argument('--quick', action='store_true', help='减少调用次数和轮数（结果不宜作为基线）')
+    parser.add_argument('--save', metavar='FILE', help='把结果保存为基线 JSON')
+    parser.add_argument('--compare', metavar='FILE', help='与基线 JSON 比较，退化时退出码为 1')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'退化阈值（相对变慢比例，默认 {DEFAULT_THRESHOLD}）')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load(args.compare)
+        except OSError:
+            print(f"错误: 找不到基线 {args.compare}，请先运行 make bench-baseline", file=sys.stderr)
+            return 2
+
+    # 历史记录等基准测试会在当前目录写文件，在临时目录中运行
+    save_path = os.path.abspath(args.save) if args.save else None
+    os.chdir(_temp_dir())
+    results = run(args.filter, args.quick)
+    if save_path:
+        save(results, save_path)
+        print(f"基线已保存到 {save_path}")
+    if baseline is not None:
+        print()
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"FAIL: {len(regressions)} 项退化超过 {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
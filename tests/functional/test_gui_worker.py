@@ -0,0 +1,218 @@
+"""图形界面后台计算的功能测试（QT_QPA_PLATFORM=offscreen，见 make test-functional）
+
+慢计算用 threading.Event 阻塞工作线程，测试结束前放行，不依赖计时。
+"""
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtCore import QEventLoop, QThreadPool, QTimer
+from PyQt6.QtWidgets import QApplication
+
+from src.gui_worker import EvaluationRunner
+
+# 等待信号的最长时间（毫秒）
+WAIT_MS = 5000
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def pool(app):
+    pool = QThreadPool()
+    pool.setMaxThreadCount(1)
+    yield pool
+    pool.waitForDone(WAIT_MS)
+
+
+@pytest.fixture
+def gate():
+    """慢计算在 gate 放行之前阻塞"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def run_until(signals, timeout_ms=WAIT_MS):
+    """运行事件循环直到任一信号触发或超时"""
+    loop = QEventLoop()
+    for signal in signals:
+        signal.connect(loop.quit)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+    for signal in signals:
+        signal.disconnect(loop.quit)
+
+
+def collect(runner):
+    received = {'finished': [], 'failed': [], 'timed_out': []}
+    runner.finished.connect(received['finished'].append)
+    runner.failed.connect(received['failed'].append)
+    runner.timed_out.connect(lambda: received['timed_out'].append(True))
+    return received
+
+
+def slow(gate, result):
+    def func(is_stale):
+        gate.wait(WAIT_MS / 1000)
+        return result
+    return func
+
+
+def test_result_is_delivered(pool):
+    runner = EvaluationRunner(pool, timeout_ms=0)
+    received = collect(runner)
+    runner.submit(lambda is_stale, a, b: a + b, 2, 3)
+    run_until([runner.finished])
+    assert received['finished'] == [5]
+    assert not runner.busy
+
+
+def test_error_is_delivered(pool):
+    runner = EvaluationRunner(pool, timeout_ms=0)
+    received = collect(runner)
+
+    def fail(is_stale):
+        raise ValueError("error.division_by_zero")
+    runner.submit(fail)
+    run_until([runner.failed])
+    assert [str(e) for e in received['failed']] == ["error.division_by_zero"]
+    assert received['finished'] == []
+
+
+def test_new_submission_supersedes_pending_one(pool, gate):
+    runner = EvaluationRunner(pool, timeout_ms=0)
+    received = collect(runner)
+    stale = []
+    started = threading.Event()
+
+    def first(is_stale):
+        started.set()
+        gate.wait(WAIT_MS / 1000)
+        stale.append(is_stale())
+        return 'old'
+    runner.submit(first)
+    assert started.wait(WAIT_MS / 1000)
+    runner.submit(lambda is_stale: 'new')
+    gate.set()
+    run_until([runner.finished])
+    pool.waitForDone(WAIT_MS)
+    QApplication.processEvents()
+    assert received['finished'] == ['new']
+    assert stale == [True]
+
+
+def test_superseded_queued_task_is_skipped(pool, gate):
+    runner = EvaluationRunner(pool, timeout_ms=0)
+    received = collect(runner)
+    calls = []
+    runner.submit(slow(gate, 'blocker'))
+    runner.submit(lambda is_stale: calls.append('queued'))
+    runner.submit(lambda is_stale: 'latest')
+    gate.set()
+    run_until([runner.finished])
+    pool.waitForDone(WAIT_MS)
+    assert calls == []
+    assert received['finished'] == ['latest']
+
+
+def test_cancel_drops_the_result(pool, gate):
+    runner = EvaluationRunner(pool, timeout_ms=0)
+    received = collect(runner)
+    busy = []
+    runner.busy_changed.connect(busy.append)
+    runner.submit(slow(gate, 'cancelled'))
+    assert runner.cancel()
+    assert not runner.cancel()
+    gate.set()
+    pool.waitForDone(WAIT_MS)
+    QApplication.processEvents()
+    assert received['finished'] == []
+    assert busy == [True, False]
+
+
+def test_timeout_abandons_the_task(pool, gate):
+    runner = EvaluationRunner(pool, timeout_ms=50)
+    received = collect(runner)
+    runner.submit(slow(gate, 'late'))
+    run_until([runner.timed_out])
+    assert received['timed_out'] == [True]
+    assert not runner.busy
+    gate.set()
+    pool.waitForDone(WAIT_MS)
+    QApplication.processEvents()
+    assert received['finished'] == []
+
+
+@pytest.fixture
+def gui(app, tmp_path, monkeypatch):
+    """历史记录库和缓存写入临时目录的 CalculatorGUI"""
+    for name in ('HOME', 'XDG_DATA_HOME', 'XDG_CACHE_HOME'):
+        monkeypatch.setenv(name, str(tmp_path / name.lower()))
+    from src import calculator_cli
+    from src.gui_calculator import CalculatorGUI
+    monkeypatch.setattr(calculator_cli, 'RAISE_ERRORS', calculator_cli.RAISE_ERRORS)
+    window = CalculatorGUI()
+    run_until([window.table_runner.finished])
+    yield window
+    window.close()
+
+
+def test_gui_superseded_calculation_is_not_recorded(gui, gate):
+    original = gui.calculator.process_expression
+
+    def process_expression(expr):
+        if expr == 'sqrt(16)':
+            gate.wait(WAIT_MS / 1000)
+        return original(expr)
+    gui.calculator.process_expression = process_expression
+    before = len(gui.calculator.history.get_recent_history())
+    gui.expr_input.setText('sqrt(16)')
+    gui.calculate()
+    gui.expr_input.setText('2+3')
+    gui.calculate()
+    gate.set()
+    run_until([gui.evaluator.finished])
+    gui.thread_pool.waitForDone(WAIT_MS)
+    QApplication.processEvents()
+    records = gui.calculator.history.get_recent_history()[before:]
+    assert gui.expr_input.text() == '5.0'
+    assert len(records) == 1 and '2+3' in records[0]
+
+
+def test_gui_cancel_and_timeout_keep_the_input(gui, gate):
+    original = gui.calculator.process_expression
+
+    def process_expression(expr):
+        if expr == 'sqrt(16)':
+            gate.wait(WAIT_MS / 1000)
+        return original(expr)
+    gui.calculator.process_expression = process_expression
+    gui.expr_input.setText('sqrt(16)')
+    gui.calculate()
+    gui.evaluator.cancel()
+    assert not gui.evaluator.busy
+
+    gui.evaluator.timeout_ms = 50
+    gui.calculate()
+    run_until([gui.evaluator.timed_out])
+    assert not gui.evaluator.busy
+    assert gui.expr_input.text() == 'sqrt(16)'
+    assert gui.statusBar().currentMessage() == gui.translator.translate('error.timeout')
+
+
+def test_gui_variable_table_is_filled_by_the_worker(gui):
+    gui.variable_input.setText('a = 3')
+    gui.define_variable()
+    run_until([gui.variable_runner.finished])
+    gui.expr_input.setText('b = a*2')
+    gui.calculate()
+    run_until([gui.evaluator.finished])
+    values = [gui.variable_table.item(row, 2).text() for row in range(gui.variable_table.rowCount())]
+    assert values == ['3', '6']
@@ -0,0 +1,59 @@
+"""批量计算（src/batch_runner.py）的测试"""
+import json
+
+import pytest
+
+from src import calculator_cli
+from src.batch_runner import evaluate_stream, run_batch
+
+EXPRESSIONS = ['1+2', 'diff(log(x),0.001)', '1/0', '']
+
+
+@pytest.fixture
+def source(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setattr(calculator_cli, 'RAISE_ERRORS', False)
+    path = tmp_path / 'input.txt'
+    path.write_text('\n'.join(EXPRESSIONS) + '\n', encoding='utf-8')
+    return path
+
+
+def test_text_output_reports_unconverged_estimate_on_stderr(source, tmp_path, capsys):
+    output = tmp_path / 'output.txt'
+    assert run_batch(str(source), str(output)) == 1
+    lines = output.read_text(encoding='utf-8').splitlines()
+    assert lines[0] == '3'
+    assert float(lines[1]) == pytest.approx(1000, rel=1e-3)
+    assert lines[2].startswith('error: ')
+    assert lines[3] == ''
+    warnings = capsys.readouterr().err.splitlines()
+    assert len(warnings) == 1 and warnings[0].startswith('line 2: ')
+
+
+def test_jsonl_rows_carry_the_warning(source, tmp_path, capsys):
+    output = tmp_path / 'output.jsonl'
+    run_batch(str(source), str(output), fmt='jsonl')
+    rows = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert [row['line'] for row in rows] == [1, 2, 3]
+    assert 'warning' not in rows[0] and 'warning' not in rows[2]
+    assert rows[1]['error'] is None and rows[1]['warning']
+    assert capsys.readouterr().err == ''
+
+
+def test_worker_pool_keeps_input_order(source):
+    expressions = [f'{i}*2' if i % 7 else '1/0' for i in range(1, 60)]
+    lines = list(enumerate(expressions, 1))
+    sequential = list(evaluate_stream(lines))
+    pooled = list(evaluate_stream(lines, workers=2, chunk_size=4))
+    assert [row[0] for row in pooled] == list(range(1, 60))
+    assert [row[2] for row in pooled] == [row[2] for row in sequential]
+    assert [row[4] is not None for row in pooled] == [i % 7 == 0 for i in range(1, 60)]
+
+
+def test_blank_lines_are_kept_in_text_and_skipped_in_jsonl(source, tmp_path):
+    text, jsonl = tmp_path / 'out.txt', tmp_path / 'out.jsonl'
+    source.write_text('1+1\n\n2+2\n', encoding='utf-8')
+    assert run_batch(str(source), str(text)) == 0
+    assert run_batch(str(source), str(jsonl), fmt='jsonl') == 0
+    assert text.read_text(encoding='utf-8').splitlines() == ['2', '', '4']
+    assert [json.loads(line)['line'] for line in jsonl.read_text(encoding='utf-8').splitlines()] == [1, 3]
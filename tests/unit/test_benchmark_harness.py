@@ -0,0 +1,67 @@
+"""基准测试工具（tests/benchmarks/harness.py）的测试"""
+import io
+import platform
+
+import pytest
+
+from tests.benchmarks import harness
+from tests.benchmarks.harness import SkipBenchmark, benchmark, compare, load, run, save
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(harness, 'BENCHMARKS', {})
+    monkeypatch.setattr(harness, 'TARGET_ROUND_SECONDS', 0.001)
+
+
+def baseline(**best):
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'results': {name: {'best_ns': ns, 'median_ns': ns} for name, ns in best.items()}}
+
+
+def test_run_filters_by_name_or_group_and_reports_skips():
+    calls = []
+
+    @benchmark('core.add', group='core')
+    def add():
+        return lambda: calls.append(1)
+
+    @benchmark('history.page', group='history')
+    def page():
+        raise SkipBenchmark('需要 SQLite')
+
+    @benchmark('slow.once', group='startup', one_shot=True, repeat=2)
+    def once():
+        return lambda: calls.append(2)
+
+    results = run('core|startup', quick=True, out=io.StringIO())
+    assert set(results) == {'core.add', 'slow.once'}
+    assert results['core.add']['best_ns'] <= results['core.add']['median_ns']
+    assert results['slow.once']['number'] == 1
+    assert calls.count(2) == 3
+    assert run('history', out=io.StringIO()) == {'history.page': {'skipped': '需要 SQLite'}}
+
+
+def test_compare_flags_only_regressions_beyond_the_threshold():
+    results = {'fast': {'best_ns': 90.0}, 'slower': {'best_ns': 115.0}, 'regressed': {'best_ns': 130.0},
+               'new': {'best_ns': 10.0}, 'skipped': {'skipped': 'no numpy'}}
+    out = io.StringIO()
+    regressions = compare(baseline(fast=100, slower=100, regressed=100, skipped=100), results, 0.2, out)
+    assert regressions == ['regressed']
+    assert 'REGRESSION' in out.getvalue() and '注意' not in out.getvalue()
+
+
+def test_compare_warns_about_a_different_platform():
+    out = io.StringIO()
+    compare(dict(baseline(a=100), python='2.7'), {'a': {'best_ns': 100.0}}, out=out)
+    assert out.getvalue().startswith('注意')
+
+
+def test_save_and_load_round_trip(tmp_path):
+    results = {'core.add': {'best_ns': 12.5, 'median_ns': 13.0, 'number': 1000, 'repeat': 5}}
+    path = tmp_path / 'baseline.json'
+    save(results, path)
+    data = load(path)
+    assert data['results'] == results
+    assert data['python'] == platform.python_version()
+    assert compare(data, results, out=io.StringIO()) == []
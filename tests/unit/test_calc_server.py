@@ -0,0 +1,139 @@
+"""计算服务（src/calc_server.py）的测试"""
+import asyncio
+import json
+
+import pytest
+
+from src import calc_server, calculator_cli
+from src.calc_server import BatchEvaluator, CalcServer, http_response
+
+
+@pytest.fixture
+def calculator(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setattr(calculator_cli, 'RAISE_ERRORS', True)
+    return calculator_cli.ScientificCalculator()
+
+
+def run_server(server, path, client):
+    async def main():
+        await server.start(port=None, unix_path=str(path))
+        try:
+            return await client()
+        finally:
+            await server.shutdown()
+    return asyncio.run(main())
+
+
+def test_reads_pause_when_pending_slots_are_used(calculator, tmp_path, monkeypatch):
+    monkeypatch.setattr(calc_server, 'SHUTDOWN_TIMEOUT', 0.1)
+    server = CalcServer(calculator, max_pending=1)
+    submitted = []
+
+    def submit(kind, payload):
+        submitted.append(payload)
+        return asyncio.get_running_loop().create_future()  # 计算一直未完成
+
+    server.batcher.submit = submit
+    handled = []
+    handle_line = server._handle_line
+
+    async def counting_handle_line(line):
+        handled.append(line)
+        return await handle_line(line)
+
+    server._handle_line = counting_handle_line
+    path = tmp_path / 'calc.sock'
+
+    async def client():
+        reader, writer = await asyncio.open_unix_connection(str(path))
+        writer.write(b''.join(json.dumps({'expression': f'{i}+1'}).encode() + b'\n' for i in range(3)))
+        await writer.drain()
+        await asyncio.sleep(0.05)
+        writer.close()
+        return len(handled), list(submitted)
+
+    assert run_server(server, path, client) == (1, ['0+1'])
+
+
+def test_connections_over_the_cap_are_refused(calculator, tmp_path):
+    server = CalcServer(calculator, max_connections=1)
+    path = tmp_path / 'calc.sock'
+
+    async def client():
+        first = await asyncio.open_unix_connection(str(path))
+        await asyncio.sleep(0.01)
+        reader, writer = await asyncio.open_unix_connection(str(path))
+        refused = json.loads(await reader.readline())
+        first[1].write(b'{"expression": "1+2", "id": 7}\n')
+        answer = json.loads(await first[0].readline())
+        first[1].close()
+        writer.close()
+        return refused, answer
+
+    refused, answer = run_server(server, path, client)
+    assert refused == {'error': 'too many connections'}
+    assert (answer['id'], answer['result']) == (7, 3)
+
+
+BATCH = ([('eval', f'sqrt({i})') for i in range(10)] + [('eval', f'{i}/{i % 3}') for i in range(10)]
+         + [('convert', (float(i), 'km', 'm')) for i in range(10)]
+         + [('eval', 'sqrt(-1)'), ('eval', '1+'), ('eval', 'diff(log(x),0.001)'),
+            ('convert', (1, 'km', 'kg'))])
+
+
+def test_vectorized_batch_matches_one_by_one(calculator):
+    evaluator = BatchEvaluator(calculator)
+    batched = evaluator.evaluate_batch(BATCH)
+    assert evaluator.vectorized == 31  # sqrt(-1) 与 sqrt(0..9) 同组
+    sequential_evaluator = BatchEvaluator(calculator, min_vector_batch=len(BATCH) + 1)
+    sequential = sequential_evaluator.evaluate_batch(BATCH)
+    assert sequential_evaluator.vectorized == 0
+    assert len(batched) == len(sequential) == len(BATCH)
+    for (kind, payload), got, expected in zip(BATCH, batched, sequential):
+        assert (got[1] is None) == (expected[1] is None), payload
+        if got[1] is None:
+            assert got[0] == pytest.approx(expected[0]), payload
+        assert got[2:] == expected[2:], payload
+
+
+def test_http_pipeline_answers_in_request_order(calculator, tmp_path):
+    server = CalcServer(calculator)
+
+    async def client():
+        await server.start(port=0)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        bodies = [{'expression': '1/0'}, {'expressions': ['1+1', 'sqrt(16)']},
+                  {'value': 2, 'from': 'km', 'to': 'm'}]
+        for body in bodies:
+            data = json.dumps(body).encode()
+            writer.write(f'POST /{"convert" if "value" in body else "eval"} HTTP/1.1\r\n'
+                         f'Content-Length: {len(data)}\r\n\r\n'.encode() + data)
+        writer.write(b'GET /health HTTP/1.1\r\nConnection: close\r\n\r\n')
+        await writer.drain()
+        responses = []
+        while True:
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+            responses.append((int(head.split()[1]), json.loads(await reader.readexactly(length))))
+            if b'Connection: close' in head:
+                break
+        writer.close()
+        await server.shutdown()
+        return responses
+
+    responses = asyncio.run(client())
+    assert [status for status, _ in responses] == [422, 200, 200, 200]
+    assert responses[0][1]['error'] == 'Division by zero'
+    assert [item['result'] for item in responses[1][1]['results']] == [2, 4]
+    assert responses[2][1]['result'] == 2000
+    assert responses[3][1] == {'status': 'ok'}
+
+
+def test_http_response_encoding():
+    data = http_response((404, {'error': 'unknown path: /x'}), keep_alive=False)
+    head, body = data.split(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.1 404 Not Found\r\n')
+    assert b'Connection: close' in head and f'Content-Length: {len(body)}'.encode() in head
+    assert json.loads(body) == {'error': 'unknown path: /x'}
@@ -0,0 +1,49 @@
+"""命令行入口（src/calculator_cli.py）的测试"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src import calculator_cli
+from src.calculator_cli import build_arg_parser, join_eval_argument, main
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+@pytest.fixture(autouse=True)
+def home(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setattr(calculator_cli, 'RAISE_ERRORS', False)
+
+
+@pytest.mark.parametrize('argv', [
+    ['--eval', '-3^2'], ['--eval=-3^2'], ['--backend', 'float', '--eval', '-3^2', '--precision', '3'],
+])
+def test_eval_expression_with_leading_minus(argv, capsys):
+    assert main(argv) == 0
+    assert capsys.readouterr().out.strip() == '-9'
+
+
+@pytest.mark.parametrize('argv, expected', [
+    (['--eval', '-x+1'], ['--eval=-x+1']),
+    (['--eval', '1-2'], ['--eval', '1-2']),
+    (['--eval', '--backend', 'decimal'], ['--eval', '--backend', 'decimal']),
+    (['--', '--eval', '-1'], ['--', '--eval', '-1']),
+])
+def test_join_eval_argument(argv, expected):
+    assert join_eval_argument(argv, build_arg_parser()) == expected
+
+
+def test_eval_does_not_import_heavy_modules(tmp_path):
+    # 在新的解释器中检查，避免其他测试已经导入的模块
+    code = ("import sys\n"
+            "from src import calculator_cli\n"
+            "calculator_cli.main(['--eval', 'sqrt(16)'])\n"
+            "heavy = ('numpy', 'yaml', 'readline', 'sqlite3', 'src.history_manager',\n"
+            "         'src.utils.version_checker', 'src.utils.logger', 'src.vectorized', 'src.unit_converter')\n"
+            "print(sorted(name for name in heavy if name in sys.modules))\n")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=ROOT, env=dict(os.environ, HOME=str(tmp_path)), check=True)
+    assert result.stdout.splitlines() == ['4', '[]']
@@ -0,0 +1,136 @@
+"""数值积分、求导和求根（src/calculus.py）的测试"""
+import functools
+import math
+
+import pytest
+
+from src import calculus, expression_compiler, vectorized
+from src.calculator_cli import CalculatorCore
+from src.calculus import diff, integrate, solve, solve_many
+from src.expression_parser import parse_expression
+from src.i18n.translator import Translator
+
+PATHS = [pytest.param(True, id='numpy'), pytest.param(False, id='fallback')]
+
+
+@pytest.fixture(params=PATHS)
+def numpy_path(request, monkeypatch):
+    """False 时按未安装 NumPy 的方式计算"""
+    if request.param and vectorized.np is None:
+        pytest.skip('NumPy 未安装')
+    if not request.param:
+        monkeypatch.setattr(vectorized, 'HAVE_NUMPY', False)
+        for module in (vectorized, expression_compiler, calculus):
+            monkeypatch.setattr(module, 'np', None)
+    return request.param
+
+
+@pytest.mark.parametrize('expr, a, b, expected', [
+    ('x^2', 0, 1, 1 / 3),
+    ('exp(-x^2)', -math.inf, math.inf, math.sqrt(math.pi)),
+    ('1 / (1 + x^2)', 0, math.inf, math.pi / 2),
+    ('exp(x)', -math.inf, 0, 1.0),
+    ('sqrt(x)', 0, 1, 2 / 3),
+    ('x^2', 1, 0, -1 / 3),
+    ('x', 2, 2, 0.0),
+])
+def test_integrate(numpy_path, expr, a, b, expected):
+    estimate = integrate(expr, a, b)
+    assert estimate.converged
+    assert estimate.value == pytest.approx(expected, rel=1e-9, abs=1e-12)
+    assert abs(estimate.value - expected) <= max(estimate.error, 1e-12)
+
+
+def test_integrate_refines_only_where_needed():
+    smooth = integrate('x^2', 0, 1)
+    # 15 点 Kronrod 对二次多项式精确，不需要对分
+    assert smooth.evaluations == 15
+    peaked = integrate('1 / (1e-4 + x^2)', -1, 1)
+    assert peaked.converged and peaked.value == pytest.approx(200 * math.atan(100), rel=1e-9)
+
+
+def test_integrate_reports_unconverged_and_invalid_integrands():
+    estimate = integrate('1 / (1e-4 + x^2)', -1, 1, max_panels=2)
+    assert not estimate.converged
+    with pytest.raises(ValueError):
+        integrate('log(x)', -1, 1)
+
+
+@pytest.mark.parametrize('expr, x0, expected', [
+    ('x^3', 2, 12.0),
+    ('exp(x)', 1, math.e),
+    ('sin(x)', 60, math.pi / 180 * 0.5),
+    ('log(x)', 0.05, 20.0),
+])
+def test_diff(numpy_path, expr, x0, expected):
+    estimate = diff(expr, x0)
+    assert estimate.converged
+    assert estimate.value == pytest.approx(expected, rel=1e-8)
+
+
+def test_diff_needs_two_usable_steps():
+    with pytest.raises(ValueError):
+        diff('sqrt(x)', 0)
+
+
+@pytest.mark.parametrize('expr, lo, hi, expected', [
+    ('x^2 - 2', 0, 2, math.sqrt(2)),
+    ('cos(x) - 0.5', 0, 90, 60.0),
+    ('exp(x) - 10', 0, 5, math.log(10)),
+    ('x - 1', 1, 3, 1.0),
+])
+def test_solve(numpy_path, expr, lo, hi, expected):
+    estimate = solve(expr, lo, hi)
+    assert estimate.converged
+    assert estimate.value == pytest.approx(expected, abs=1e-10)
+
+
+def test_solve_rejects_same_sign():
+    with pytest.raises(ValueError, match=calculus.SAME_SIGN):
+        solve('x^2 + 1', -1, 1)
+
+
+def test_solve_many_matches_solve(numpy_path):
+    ks = [0.5, 1, 2, 3, 10, 100]
+    batch = solve_many('x^2 - k', 0, 20, bindings={'k': ks})
+    assert not any(bool(failed) for failed in batch.failed)
+    for k, value in zip(ks, batch.values):
+        single = solve('x^2 - k', 0, 20, bindings={'k': k})
+        assert float(value) == pytest.approx(single.value, abs=1e-10)
+        assert float(value) == pytest.approx(math.sqrt(k), abs=1e-10)
+    # 每轮的求值点合在一次调用中，总求值次数与逐个求解相同量级
+    singles = sum(solve('x^2 - k', 0, 20, bindings={'k': k}).evaluations for k in ks)
+    assert batch.evaluations <= singles + 2 * len(ks)
+
+
+def test_solve_many_marks_failed_problems_only(numpy_path):
+    batch = solve_many('x^2 - k', [0, 0, 0], [2, 2, 2], bindings={'k': [1, -1, 4]})
+    assert [bool(failed) for failed in batch.failed] == [False, True, False]
+    assert float(batch.values[0]) == pytest.approx(1.0) and float(batch.values[2]) == pytest.approx(2.0)
+    assert math.isnan(float(batch.values[1]))
+    assert batch.error_key == calculus.SAME_SIGN
+    with pytest.raises(ValueError):
+        solve_many('x - k', [0, 0], [1, 1, 1], bindings={'k': [0.5, 0.5]})
+
+
+def test_unconverged_calls_are_counted(monkeypatch):
+    core = CalculatorCore(Translator())
+    core.unconverged = 0
+    assert core.evaluate(parse_expression('integrate(x^2, 0, 3)')) == pytest.approx(9.0)
+    assert core.last_estimate.converged and core.unconverged == 0
+    monkeypatch.setitem(calculus.METHODS, 'integrate', functools.partial(integrate, max_panels=2))
+    core.evaluate(parse_expression('integrate(1 / (1e-4 + x^2), -1, 1)'))
+    assert not core.last_estimate.converged and core.unconverged == 1
+    # 编译后的调用同样计数
+    call = calculus.bind(core, 'integrate', '1 / (1e-4 + x^2)')
+    call(-1, 1)
+    assert core.unconverged == 2
+
+
+def test_other_variables_come_from_the_core():
+    core = CalculatorCore(Translator())
+    core.variables = {'k': 4.0}
+    assert solve('x^2 - k', 0, 5, core=core).value == pytest.approx(2.0)
+    assert integrate('k', 0, 2, core=core).value == pytest.approx(8.0)
+    with pytest.raises(ValueError):
+        integrate('q * x', 0, 1, core=core)
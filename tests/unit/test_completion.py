@@ -0,0 +1,114 @@
+"""Tab 补全索引（src/completion.py）的测试"""
+import pytest
+
+from src import completion
+from src.calculator_cli import CalculatorCore
+from src.completion import CompletionIndex, PrefixTrie, context_of
+from src.i18n.translator import Translator
+from src.workspace import Workspace
+
+
+class FakeHistory:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def get_recent_history(self, count):
+        return self.entries[-count:]
+
+
+@pytest.fixture
+def core():
+    core = CalculatorCore(Translator())
+    core.variables = Workspace(core)
+    return core
+
+
+def test_prefix_trie():
+    trie = PrefixTrie(['sin', 'sinh', 'sqrt'])
+    assert sorted(trie.words('s')) == ['sin', 'sinh', 'sqrt']
+    assert sorted(trie.words('sin')) == ['sin', 'sinh']
+    assert trie.words('x') == []
+    trie.insert('sin', 'sin(')
+    assert len(trie) == 3 and sorted(trie.words('si')) == ['sin(', 'sinh']
+    trie.discard('sinh')
+    trie.discard('cos')
+    assert 'sinh' not in trie and 'sin' in trie and len(trie) == 2
+    trie.discard('sin')
+    # 不再通向任何单词的节点一起删除
+    assert trie.words('si') == [] and 's' in trie._root and 'i' not in trie._root['s']
+
+
+@pytest.mark.parametrize('line, begidx, expected', [
+    ('', 0, completion.START),
+    ('  sq', 2, completion.START),
+    ('2 + sq', 4, completion.OPERAND),
+    ('3 km -> m', 8, completion.UNITS),
+    ('3 km->m', 6, completion.UNITS),
+    ('3 k', 2, completion.UNITS),
+    ('-1.5e3 k', 7, completion.UNITS),
+    ('vars s', 5, 'vars'),
+    ('vars del r', 9, completion.VARIABLES),
+    ('vars save f', 10, completion.NONE),
+    ('stats', 0, completion.START),
+])
+def test_context_of(line, begidx, expected):
+    assert context_of(line, begidx) == expected
+
+
+def test_contexts_choose_candidates(core):
+    index = CompletionIndex(core)
+    assert index.complete('sq') == ['sqrt(']
+    units = index.complete('k', '3 km -> k', 8)
+    assert 'km' in units and units == sorted(units) and all(unit.startswith('k') for unit in units)
+    assert 'km' in index.complete('k', '3 k', 2)
+    assert index.complete('o', 'stats o', 6) == ['off', 'on']
+    assert index.complete('s', 'vars s', 5) == ['save']
+    assert index.complete('', 'vars save ', 10) == []
+    assert index.complete('st') == ['stats']
+    assert 'integrate(' in index.complete('int', '1 + int', 4)
+
+
+def test_variables_are_updated_incrementally(core):
+    index = CompletionIndex(core)
+    assert index.complete('ra', '2 * ra', 4) == []
+    builds = index.builds
+    core.variables.define('rate', '0.05')
+    core.variables.define('radius', '3')
+    assert index.complete('ra', '2 * ra', 4) == ['radius', 'rate']
+    # 只更新变量的前缀树
+    assert index.builds == builds + 1
+    assert not index.refresh()
+    core.variables.define('rate', '0.07')
+    assert not index.refresh()
+    core.variables.delete('rate')
+    assert index.complete('ra', '2 * ra', 4) == ['radius']
+    assert index.complete('r', 'vars del r', 9) == ['radius']
+
+
+def test_plain_dict_variables(core):
+    core.variables = {'alpha': 1.0}
+    index = CompletionIndex(core)
+    assert index.complete('al', '1+al', 2) == ['alpha']
+    core.variables['also'] = 2.0
+    assert index.complete('al', '1+al', 2) == ['alpha', 'also']
+
+
+def test_recent_expressions_are_newest_first(core, monkeypatch):
+    monkeypatch.setattr(completion, 'HISTORY_SIZE', 3)
+    history = FakeHistory(['[2026-10-18 12:00:00] sqrt(16)=4', 'sqrt(25)=5', 'sqrt(9) = 3'])
+    index = CompletionIndex(core, history)
+    assert index.complete('sqrt') == ['sqrt(9)', 'sqrt(25)', 'sqrt(16)', 'sqrt(']
+    index.add_history('sqrt(16)')
+    assert index.complete('sqrt') == ['sqrt(16)', 'sqrt(9)', 'sqrt(25)', 'sqrt(']
+    index.add_history('sqrt(2)')
+    # 超过 HISTORY_SIZE 条时删除最早的一条
+    assert index.complete('sqrt') == ['sqrt(2)', 'sqrt(16)', 'sqrt(9)', 'sqrt(']
+    # 最近的表达式只在行首补全
+    assert index.complete('sqrt', '1 + sqrt', 4) == ['sqrt(']
+
+
+def test_registered_functions_are_picked_up(core, monkeypatch):
+    index = CompletionIndex(core)
+    assert index.complete('cube') == []
+    monkeypatch.setitem(CalculatorCore.FUNCTIONS, 'cube', (lambda x: x ** 3, 1, lambda _: True, ""))
+    assert index.complete('cube') == ['cube(']
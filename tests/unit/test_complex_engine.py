@@ -0,0 +1,93 @@
+"""复数引擎（src/complex_engine.py）的测试：标量、NumPy 数组和纯 Python 数组结果一致"""
+import cmath
+import math
+
+import pytest
+
+from src import complex_engine, vectorized
+
+PATHS = [pytest.param(True, id='numpy'), pytest.param(False, id='fallback')]
+
+POINTS = [2 + 3j, -4 + 0j, complex(-4, -0.0), 0.5j, -1.5 - 2j, 3 + 0j]
+
+
+@pytest.fixture(params=PATHS, autouse=True)
+def numpy_path(request, monkeypatch):
+    if request.param and not vectorized.HAVE_NUMPY:
+        pytest.skip('NumPy 未安装')
+    monkeypatch.setattr(vectorized, 'HAVE_NUMPY', request.param)
+    return request.param
+
+
+def _close(a, b):
+    return cmath.isclose(complex(a), complex(b), rel_tol=1e-12, abs_tol=1e-12)
+
+
+@pytest.mark.parametrize('func_name', sorted(complex_engine.FUNCTIONS))
+def test_array_matches_scalar(func_name):
+    result = complex_engine.apply_many(func_name, POINTS)
+    assert not any(result.errors)
+    for z, value in zip(POINTS, result.values):
+        assert _close(value, complex_engine.apply(func_name, z)), (func_name, z)
+
+
+def test_branch_cut_follows_sign_of_zero():
+    assert complex_engine.apply('sqrt', -4 + 0j) == 2j
+    assert complex_engine.apply('sqrt', complex(-4, -0.0)) == -2j
+    values = list(complex_engine.apply_many('sqrt', [-4 + 0j, complex(-4, -0.0)]).values)
+    assert _close(values[0], 2j) and _close(values[1], -2j)
+
+
+def test_degrees():
+    assert _close(complex_engine.apply('sin', 90, degrees=True), 1)
+    result = complex_engine.apply_many('cos', [0, 180], degrees=True)
+    assert [complex(v) for v in result.values] == pytest.approx([1, -1])
+
+
+def test_domain_errors_are_marked_per_element():
+    with pytest.raises(ValueError, match=complex_engine.DOMAIN_ERROR):
+        complex_engine.apply('log', 0)
+    result = complex_engine.apply_many('log', [1j, -1, 0])
+    assert list(map(bool, result.errors)) == [False, False, True]
+    assert result.error_key == complex_engine.DOMAIN_ERROR
+    assert _close(result.values[1], 1j * math.pi)
+    assert math.isnan(complex(result.values[2]).real)
+
+
+@pytest.mark.parametrize('op', ['+', '-', '*', '/', '^', '+c', '^c'])
+def test_calculate_many_matches_scalar(op):
+    a = [2 + 3j, -1 + 0j, 0.5j, 4 + 0j]
+    b = [1 - 1j, 0.5 + 0j, 2 + 0j, -2j]
+    result = complex_engine.calculate_many(a, b, op)
+    assert not any(result.errors)
+    for x, y, value in zip(a, b, result.values):
+        assert _close(value, complex_engine.calculate(x, y, op)), (x, op, y)
+
+
+def test_calculate_many_broadcasts_scalars():
+    result = complex_engine.calculate_many([1, 2j], 1j, '*c')
+    assert [complex(v) for v in result.values] == [1j, -2]
+    result = complex_engine.calculate_many(2, [1, 2], '^')
+    assert [complex(v) for v in result.values] == pytest.approx([2, 4])
+
+
+@pytest.mark.parametrize('a, b, op, error_key', [
+    ([1, 2], [1j, 0], '/', 'error.division_by_zero'),
+    ([2, 0], [2, -1], '^', complex_engine.DOMAIN_ERROR),
+    ([2, 0], [2, 1j], '^', complex_engine.DOMAIN_ERROR),
+])
+def test_calculate_many_errors(a, b, op, error_key):
+    result = complex_engine.calculate_many(a, b, op)
+    assert list(map(bool, result.errors)) == [False, True]
+    assert result.error_key == error_key
+    with pytest.raises(ValueError, match=error_key):
+        complex_engine.calculate(a[1], b[1], op)
+
+
+def test_unsupported_names_are_rejected():
+    with pytest.raises(ValueError):
+        complex_engine.apply('gamma', 1)
+    with pytest.raises(ValueError):
+        complex_engine.apply_many('gamma', [1])
+    with pytest.raises(ValueError):
+        complex_engine.calculate_many([1], [1], '%')
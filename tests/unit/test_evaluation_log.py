@@ -0,0 +1,131 @@
+"""求值日志（src/evaluation_log.py）和日志队列（src/utils/logger.py）的测试"""
+import json
+import logging
+import queue
+
+import pytest
+
+from src import evaluation_log
+from src.evaluation_log import EvaluationFormatter, EvaluationLog, expression_hash, opcode_of
+from src.utils import logger as log_setup
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_log(**options):
+    emitted = []
+    log = EvaluationLog(emit=lambda name, fields: emitted.append(fields['evaluation']), **options)
+    log._clock = clock = FakeClock()
+    log._refilled = 0.0
+    return log, emitted, clock
+
+
+@pytest.fixture
+def logging_dir(tmp_path):
+    log_setup.setup_logger({'file': str(tmp_path / 'calculator.log')})
+    yield tmp_path
+    evaluation_log.disable()
+    log_setup.shutdown()
+
+
+def test_sampling_keeps_every_error():
+    log, emitted, _ = make_log(sample_rate=0.25)
+    values = iter([0.1, 0.5, 0.2, 0.9])
+    log._random = lambda: next(values)
+    for expr in ('1+1', '2+2', '3+3', '4+4'):
+        log.record(expr, 1000)
+    log.record('1/0', 1000, 'error.division_by_zero')
+    assert [item[0] for item in emitted] == ['1+1', '3+3', '1/0']
+    assert (log.emitted, log.sampled_out, log.rate_limited) == (3, 2, 0)
+
+
+def test_rate_limit_refills_and_reports_suppressed_records():
+    log, emitted, clock = make_log(max_per_second=10, burst=2)
+    for _ in range(5):
+        log.record('1+1', 1000)
+    assert len(emitted) == 2 and log.rate_limited == 3
+    clock.now = 0.1
+    log.record('2+2', 1000)
+    log.record('3+3', 1000)
+    assert [item[0] for item in emitted] == ['1+1', '1+1', '2+2']
+    # 第一条通过限流的记录带上之前丢弃的条数
+    assert emitted[-1][3] == 3 and log.rate_limited == 4
+    clock.now = 10.0
+    log.record('4+4', 1000)
+    assert emitted[-1] == ('4+4', 1000, None, 1)
+
+
+def test_unlimited_by_default():
+    log, emitted, _ = make_log()
+    for _ in range(10000):
+        log.record('1+1', 1)
+    assert len(emitted) == 10000 and log.rate_limited == 0
+
+
+@pytest.mark.parametrize('expr, opcode', [
+    ('sqrt(25)', 'sqrt'), ('3 + 5', '+'), ('(1+2)*3', '*'), ('42', ''), ('1 +', ''),
+])
+def test_opcode_of(expr, opcode):
+    assert opcode_of(expr) == opcode
+
+
+def test_formatter_writes_one_json_line_without_the_expression():
+    record = logging.LogRecord(evaluation_log.LOGGER_NAME, logging.INFO, '', 0, '', None, None)
+    record.evaluation = ('  sqrt(25) ', 12500, 'error."quoted"', 4)
+    data = json.loads(EvaluationFormatter().format(record))
+    # 摘要按规范化的表达式计算
+    assert data['expr_hash'] == expression_hash('sqrt(25)')
+    assert (data['opcode'], data['duration_us'], data['error'], data['suppressed']) == \
+        ('sqrt', 12.5, 'error."quoted"', 4)
+    assert '25' not in json.dumps({key: value for key, value in data.items() if key != 'time'})
+
+
+def test_records_reach_their_own_file_through_the_queue(logging_dir):
+    path = logging_dir / 'evaluations.jsonl'
+    log = evaluation_log.enable({'file': str(path)})
+    log.record('3+5', 2000)
+    log.record('1/0', 3000, 'error.division_by_zero')
+    log_setup.setup_logger({'file': str(logging_dir / 'calculator.log')}).warning('main log')
+    log_setup.flush(5)
+    lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [(line['opcode'], line['error']) for line in lines] == \
+        [('+', None), ('/', 'error.division_by_zero')]
+    main_log = (logging_dir / 'calculator.log').read_text(encoding='utf-8')
+    assert 'main log' in main_log and 'expr_hash' not in main_log
+    assert evaluation_log.stats()['emitted'] == 2
+
+
+def test_setup_logger_is_idempotent(logging_dir):
+    settings = {'file': str(logging_dir / 'calculator.log')}
+    logger = log_setup.setup_logger(settings)
+    assert log_setup.setup_logger(dict(settings)) is logger
+    log_setup.setup_logger(dict(settings, format='json'))
+    queue_handlers = [h for h in logger.handlers if isinstance(h, log_setup._QueueHandler)]
+    assert len(queue_handlers) == 1 and not logger.propagate
+    logger.warning('once')
+    log_setup.flush(5)
+    lines = (logging_dir / 'calculator.log').read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['message'] for line in lines] == ['once']
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = log_setup._QueueHandler(queue.SimpleQueue(), capacity=2)
+    for _ in range(5):
+        handler.enqueue(object())
+    assert handler.dropped == 3 and handler.queue.qsize() == 2
+
+
+def test_disable_restores_process_expression(logging_dir):
+    from src.calculator_cli import ScientificCalculator
+    original = ScientificCalculator.__dict__['process_expression']
+    evaluation_log.enable({'file': str(logging_dir / 'evaluations.jsonl')})
+    assert ScientificCalculator.__dict__['process_expression'] is not original
+    evaluation_log.disable()
+    assert ScientificCalculator.__dict__['process_expression'] is original
+    assert evaluation_log.active() is None and evaluation_log.stats() is None
@@ -0,0 +1,87 @@
+"""表达式编译器（src/expression_compiler.py）的测试：编译后的函数与解释执行结果一致"""
+import math
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from src import calculator_cli, vectorized
+from src.calculator_cli import CalculatorCore
+from src.expression_compiler import compile_expression
+from src.expression_parser import parse_expression
+from src.i18n.translator import Translator
+
+
+@pytest.fixture
+def core(monkeypatch):
+    monkeypatch.setattr(calculator_cli, 'RAISE_ERRORS', True)
+    return CalculatorCore(Translator())
+
+
+def interpret(core, expr, **variables):
+    core.variables = variables
+    try:
+        return core.evaluate(parse_expression(expr))
+    finally:
+        core.variables = {}
+
+
+@pytest.mark.parametrize('expr, variables', [
+    ('3*x^2 + sin(x)', {'x': 2}),
+    ('-x^2', {'x': 3}),
+    ('rate*(1+rate)^n/((1+rate)^n-1)', {'rate': 0.05, 'n': 12}),
+    ('x % 7 - y / 4', {'x': 23, 'y': 10}),
+    ('log10(x) + sqrt(abs(y))', {'x': 1000, 'y': -16}),
+    ('(x +c 2j) *c y', {'x': 1j, 'y': 2}),
+])
+def test_compiled_matches_interpreter(core, expr, variables):
+    f = compile_expression(expr, core)
+    assert f.variables == tuple(variables)
+    expected = interpret(core, expr, **variables)
+    assert f(*variables.values()) == pytest.approx(expected)
+    assert f(**variables) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('expr, args, error', [
+    ('sqrt(x)', (-1,), 'error.negative_sqrt'),
+    ('1/x', (0,), 'error.division_by_zero'),
+    ('x^y', (0, -1), 'error.division_by_zero'),
+    ('x^y', (10.0, 400), 'error.overflow'),
+    ('log(x)', (0,), 'error.positive_required'),
+])
+def test_errors_are_translation_keys(core, expr, args, error):
+    with pytest.raises(ValueError, match=error):
+        compile_expression(expr, core)(*args)
+
+
+def test_argument_errors(core):
+    f = compile_expression('x + y', core)
+    with pytest.raises(ValueError, match='参数过多'):
+        f(1, 2, 3)
+    with pytest.raises(ValueError, match='缺少变量的值: y'):
+        f(1)
+    with pytest.raises(ValueError, match='未知的变量: z'):
+        f(1, y=2, z=3)
+
+
+def test_compiled_function_is_cached_per_backend(core):
+    f = compile_expression('x/3', core)
+    assert compile_expression('  x/3 ', core) is f
+    core.set_backend('fraction')
+    g = compile_expression('x/3', core)
+    assert g is not f and g(1) == Fraction(1, 3)
+    core.set_backend('decimal')
+    assert compile_expression('x + 0.1', core)(0.2) == Decimal('0.3')
+
+
+@pytest.mark.parametrize('have_numpy', [True, False])
+def test_array_arguments_return_batch_results(core, monkeypatch, have_numpy):
+    if have_numpy and not vectorized.HAVE_NUMPY:
+        pytest.skip('NumPy 未安装')
+    monkeypatch.setattr(vectorized, 'HAVE_NUMPY', have_numpy)
+    f = compile_expression('sqrt(x) + y', core)
+    result = f([4, -1, 9], 1)
+    assert list(result.errors) == [False, True, False]
+    assert result.error_key == 'error.negative_sqrt'
+    values = list(result.values)
+    assert values[0] == 3 and values[2] == 4 and math.isnan(values[1])
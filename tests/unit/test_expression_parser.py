@@ -0,0 +1,60 @@
+"""表达式解析器（src/expression_parser.py）的测试"""
+import pytest
+
+from src import calculator_cli
+from src.calculator_cli import CalculatorCore
+from src.expression_compiler import compile_expression
+from src.expression_parser import clear_parse_cache, parse_cache_info, parse_expression
+from src.i18n.translator import Translator
+
+
+@pytest.fixture
+def core(monkeypatch):
+    monkeypatch.setattr(calculator_cli, 'RAISE_ERRORS', True)
+    return CalculatorCore(Translator('en_US'))
+
+
+@pytest.mark.parametrize('expr, expected', [
+    ('1+2*3', 7), ('(1+2)*3', 9), ('10-4-3', 3), ('2^3^2', 512), ('2*3^2', 18),
+    ('8/4/2', 1), ('7%4*2', 6), ('1+-2', -1),
+])
+def test_precedence_and_associativity(core, expr, expected):
+    assert core.evaluate(parse_expression(expr)) == expected
+
+
+@pytest.mark.parametrize('expr, expected', [('-3^2', -9), ('(-3)^2', 9), ('2^-1', 0.5), ('-2^-2', -0.25)])
+def test_unary_minus_binds_looser_than_power(core, expr, expected):
+    assert core.evaluate(parse_expression(expr)) == expected
+
+
+@pytest.mark.parametrize('expr, match', [
+    ('foo(1)', 'Unsupported function: foo'),
+    ('foo(1,2)', 'Unsupported function: foo'),
+    ('sin(1,2)', r'sin\(\) takes 1 argument\(s\), 2 given'),
+    ('sqrt()', r'sqrt\(\) takes 1 argument\(s\), 0 given'),
+])
+def test_unknown_function_and_arity(core, expr, match):
+    with pytest.raises(ValueError, match=match):
+        core.evaluate(parse_expression(expr))
+    # 编译路径给出相同的错误
+    with pytest.raises(ValueError, match=match):
+        compile_expression(expr, core)
+
+
+def test_function_call(core):
+    assert core.evaluate(parse_expression('sqrt(16)+abs(-2)')) == 6
+
+
+def test_parse_cache_reuses_normalized_text():
+    clear_parse_cache()
+    tree = parse_expression('1 + 2*x')
+    assert parse_expression('  1   +  2*x ') is tree
+    info = parse_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_syntax_error_is_not_cached():
+    clear_parse_cache()
+    with pytest.raises(ValueError):
+        parse_expression('1 +')
+    assert parse_cache_info().currsize == 0
@@ -0,0 +1,114 @@
+"""历史记录管理器（src/history_manager.py）的测试"""
+import json
+import time
+
+import pytest
+
+from src.history_manager import HistoryManager
+
+
+@pytest.fixture
+def database(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    return tmp_path / 'history.sqlite'
+
+
+def open_manager(database, **options):
+    return HistoryManager({'path': str(database)}, **options)
+
+
+def test_records_survive_reopening(database):
+    manager = open_manager(database)
+    for i in range(5):
+        manager.add_record(f"{i}+1={i + 1}")
+    manager.close()
+    reopened = open_manager(database, max_memory_size=3)
+    assert [text.split('] ', 1)[1] for text in reopened.get_recent_history()] == ['2+1=3', '3+1=4', '4+1=5']
+    reopened.close()
+
+
+def test_journal_import_is_incremental_and_skips_torn_lines(database, tmp_path):
+    journal = tmp_path / 'calc_history.jsonl'
+    journal.write_text(json.dumps({'ts': 1000.0, 'entry': '1+1=2'}) + '\n'
+                       + json.dumps({'ts': 1001.0, 'entry': '2+2=4'}) + '\n'
+                       + '{"ts": 1002.0, "ent', encoding='utf-8')
+    manager = open_manager(database)
+    assert manager.import_files([journal]) == 2
+    assert manager.import_files([journal]) == 0
+    with open(journal, 'a', encoding='utf-8') as f:
+        f.write('\n' + json.dumps({'ts': 1003.0, 'entry': '3+3=6'}) + '\n')
+    assert manager.import_files([journal]) == 1
+    assert [(record.timestamp, record.entry) for record in manager.range()] == [
+        (1000.0, '1+1=2'), (1001.0, '2+2=4'), (1003.0, '3+3=6')]
+    manager.close()
+
+
+def test_json_array_import_keeps_the_time_prefix(database, tmp_path):
+    legacy = tmp_path / 'calc_history.json'
+    legacy.write_text(json.dumps(['[2026-10-01 12:00:00] sqrt(25)=5']), encoding='utf-8')
+    manager = open_manager(database)
+    assert manager.import_files([legacy]) == 1
+    [record] = manager.range()
+    assert record.entry == 'sqrt(25)=5'
+    assert record.timestamp == time.mktime((2026, 10, 1, 12, 0, 0, 0, 0, -1))
+    manager.close()
+
+
+def test_unusable_database_keeps_history_in_memory(database):
+    blocker = database.parent / 'not-a-directory'
+    blocker.write_text('', encoding='utf-8')
+    manager = open_manager(blocker / 'history.sqlite')
+    assert manager.store is None and manager.error is not None
+    manager.add_record('1+2=3')
+    assert manager.get_recent_history()[0].endswith('1+2=3')
+    assert manager.search('1+2') == manager.get_recent_history()
+
+
+ENTRIES = ['sqrt(25)=5', '3+5=8', 'SQRT(16)=4', '2^10=1024', 'log(100)=4.60517', 'x = 3*5', '25-5=20']
+
+
+@pytest.fixture
+def history(database):
+    manager = open_manager(database)
+    for i, entry in enumerate(ENTRIES):
+        manager.memory_history.append(entry, 1000.0 + i * 86400)
+        manager.store.append(entry, 1000.0 + i * 86400)
+    yield manager
+    manager.close()
+
+
+def bodies(texts):
+    return [text.split('] ', 1)[1] for text in texts]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('sqrt', ['SQRT(16)=4', 'sqrt(25)=5']),
+    ('func:sqrt 25', ['sqrt(25)=5']),
+    ('op:^', ['2^10=1024']),
+    ('5', ['25-5=20', 'x = 3*5', 'log(100)=4.60517', '3+5=8', 'sqrt(25)=5']),
+    ('25 =5', ['sqrt(25)=5']),
+    ('nothing', []),
+])
+def test_search(history, query, expected):
+    assert bodies(history.search(query)) == expected
+
+
+@pytest.mark.parametrize('full_text', [True, False])
+def test_search_without_full_text_index_agrees(history, full_text):
+    history.store.full_text = full_text and history.store.full_text
+    assert bodies(history.search('sqrt')) == ['SQRT(16)=4', 'sqrt(25)=5']
+    assert bodies(history.search('=4')) == ['log(100)=4.60517', 'SQRT(16)=4']
+
+
+def test_search_by_date_and_pages(history):
+    day = time.strftime('%Y-%m-%d', time.localtime(1000.0 + 2 * 86400))
+    assert bodies(history.search(f'from:{day} to:{day}')) == ['SQRT(16)=4']
+    pages = [bodies(history.search('=', limit=3, offset=offset)) for offset in (0, 3, 6)]
+    assert [entry for page in pages for entry in page] == ENTRIES[::-1]
+
+
+def test_memory_search_matches_the_store(history):
+    expected = history.search('func:sqrt')
+    history.close()
+    assert history.store is None
+    assert history.search('func:sqrt') == expected
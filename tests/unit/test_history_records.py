@@ -0,0 +1,101 @@
+"""紧凑的历史记录存储（src/history_records.py）的测试"""
+import math
+import random
+
+import pytest
+
+from src.history_records import HistoryRecords, format_record, parse_record, strip_timestamp
+
+
+@pytest.mark.parametrize('entry, expected', [
+    ('3+5=8', ('+', 3.0, 5.0, 8.0)),
+    ('-2*-4=8', ('*', -2.0, -4.0, 8.0)),
+    ('2^10=1024', ('^', 2.0, 10.0, 1024.0)),
+    ('sqrt(25)=5', ('sqrt', 25.0, math.nan, 5.0)),
+    ('0.1+0.2=0.30000000000000004', ('+', 0.1, 0.2, 0.30000000000000004)),
+    ('1e-05*2=2e-05', ('*', 1e-05, 2.0, 2e-05)),
+])
+def test_parse_record(entry, expected):
+    opcode, first, second, result = parse_record(entry)
+    assert (opcode, first, result) == (expected[0], expected[1], expected[3])
+    assert second == expected[2] or (math.isnan(second) and math.isnan(expected[2]))
+
+
+@pytest.mark.parametrize('entry', [
+    '-3^2=-9',            # -(3^2)，-3 不是 ^ 的操作数
+    '1+2*3=7',            # 嵌套表达式
+    '3.0+5=8',            # 数字不是最短形式
+    '0.10+1=1.1',
+    'x = 2 = 2',
+    'sqrt(-1)=1j',
+    '10 cm = 0.1 m',
+])
+def test_records_that_cannot_be_parsed(entry):
+    opcode, first, second, result = parse_record(entry)
+    assert opcode == '' and math.isnan(first) and math.isnan(second) and math.isnan(result)
+
+
+def test_body_round_trips_every_entry():
+    rng = random.Random(7)
+    entries = ['-3^2=-9', '1+2*3=7', '3.0+5=8', 'sqrt(25)=5', 'x = 2']
+    for _ in range(500):
+        a, b = rng.uniform(-1e6, 1e6), rng.choice([rng.random(), float(rng.randint(1, 99))])
+        op = rng.choice('+-*/')
+        entries.append(f"{a!r}{op}{b!r}={a * b!r}")
+    records = HistoryRecords()
+    for entry in entries:
+        records.append(entry, timestamp=0.0)
+    assert [record.body for record in records] == entries
+    assert records[3].opcode == 'sqrt' and records[3].operands == (25.0,)
+    assert records[0].opcode == '' and records[0].operands == ()
+
+
+def test_text_has_the_timestamp_prefix():
+    records = HistoryRecords()
+    records.append('3+5=8', timestamp=1.5e9)
+    text = str(records[0])
+    assert text == format_record(1.5e9, '3+5=8')
+    assert strip_timestamp(text) == '3+5=8'
+    assert records[0].text(show_time=False) == '3+5=8'
+    records.show_time = False
+    assert records.texts() == ['3+5=8']
+
+
+def test_maxlen_drops_the_oldest_records():
+    records = HistoryRecords(maxlen=100)
+    entries = [f"{i}+1={i + 1}" if i % 3 else f"x{i} = {i}" for i in range(1000)]
+    for i, entry in enumerate(entries):
+        records.append(entry, timestamp=float(i))
+    assert len(records) == 100
+    assert [record.body for record in records] == entries[-100:]
+    assert records[0].timestamp == 900.0 and records[-1].body == entries[-1]
+    # 丢弃的记录文本不再保留
+    assert len(records._texts) == sum(1 for i in range(900, 1000) if i % 3 == 0)
+    with pytest.raises(IndexError):
+        records[100]
+
+
+def test_texts_returns_the_most_recent_entries():
+    records = HistoryRecords(show_time=False)
+    for i in range(5):
+        records.append(f"{i}*2={i * 2}", timestamp=float(i))
+    assert records.texts(2) == ['3*2=6', '4*2=8']
+    assert records.texts(10) == records.texts()
+    records.clear()
+    assert len(records) == 0 and records.texts() == []
+    records.append('x = 1', timestamp=0.0)
+    assert records.texts() == ['x = 1']
+
+
+def test_select_filters_columns():
+    records = HistoryRecords()
+    records.append('3+5=8', timestamp=10.0)
+    records.append('sqrt(25)=5', timestamp=20.0)
+    records.append('1/0', timestamp=30.0, error=True)
+    records.append('2+2=4', timestamp=40.0)
+    assert [r.body for r in records.select(opcode='+')] == ['3+5=8', '2+2=4']
+    assert [r.body for r in records.select(opcode='+', start=20.0)] == ['2+2=4']
+    assert [r.body for r in records.select(start=20.0, end=30.0)] == ['sqrt(25)=5', '1/0']
+    assert [r.body for r in records.select(error=True)] == ['1/0']
+    assert len(records.select(error=False)) == 3
+    assert records.select(opcode='log') == []
@@ -0,0 +1,134 @@
+"""SQLite 历史记录库（src/history_store.py）的测试"""
+import json
+from datetime import datetime
+
+import pytest
+
+from src import history_store
+from src.history_store import HistoryStore, Query
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(tmp_path / 'history.sqlite')
+    yield store
+    store.close()
+
+
+def _entries(count):
+    """第 i 条：每 3 条一个 sqrt 调用，其余为加法"""
+    return [f"sqrt({i * i})={i}" if i % 3 == 0 else f"{i}+1={i + 1}" for i in range(count)]
+
+
+def test_cursor_paging_returns_every_row_once_across_flushes(store):
+    entries = _entries(history_store.FLUSH_EVERY * 2 + 37)
+    with store.group_commit():
+        for i, entry in enumerate(entries):
+            store.append(entry, timestamp=1000.0 + i)
+    assert len(store) == len(entries)
+    seen = []
+    page = store.page(limit=50)
+    while page:
+        seen.extend(page)
+        page = store.page(before=page[-1].id, limit=50)
+    assert [record.entry for record in reversed(seen)] == entries
+    assert len({record.id for record in seen}) == len(entries)
+
+
+@pytest.mark.parametrize('full_text', [True, False], ids=['fts', 'scan'])
+def test_search_returns_every_match_once_across_flushes(store, full_text):
+    if full_text and not store.full_text:
+        pytest.skip('SQLite 不支持 FTS5 trigram')
+    store.full_text = full_text
+    entries = _entries(history_store.FLUSH_EVERY * 2 + 37)
+    with store.group_commit():
+        for i, entry in enumerate(entries[:300]):
+            store.append(entry, timestamp=1000.0 + i)
+        # 组提交中缓存的记录也能查到
+        assert len(store.search('sqrt(', limit=1000)) == 100
+        for i, entry in enumerate(entries[300:], 300):
+            store.append(entry, timestamp=1000.0 + i)
+    expected = [entry for entry in entries if entry.startswith('sqrt')]
+    for query in ('sqrt', 'func:sqrt', 'SQRT'):
+        found = []
+        offset = 0
+        while True:
+            page = store.search(query, limit=40, offset=offset)
+            found.extend(page)
+            if len(page) < 40:
+                break
+            offset += 40
+        assert [record.entry for record in reversed(found)] == expected, query
+    # 短于 trigram 的子串逐条比较
+    assert len(store.search('op:+', limit=1000)) == len(entries) - len(expected)
+
+
+def test_search_with_dates(store):
+    day = datetime(2026, 10, 1, 12).timestamp()
+    store.append('1+1=2', timestamp=day)
+    store.append('sqrt(4)=2', timestamp=day + 86400)
+    store.append('sqrt(9)=3', timestamp=day + 2 * 86400)
+    assert [r.entry for r in store.search('sqrt from:2026-10-02')] == ['sqrt(9)=3', 'sqrt(4)=2']
+    assert [r.entry for r in store.search('to:2026-10-02')] == ['sqrt(4)=2', '1+1=2']
+    assert [r.entry for r in store.search('from:2026-10-02 to:2026-10-02')] == ['sqrt(4)=2']
+    with pytest.raises(ValueError):
+        Query('from:yesterday')
+
+
+def test_range_by_time_and_opcode(store):
+    store.append_many(['3+5=8', 'sqrt(25)=5', '1+2*3=7'], timestamp=10.0)
+    store.append('2+2=4', timestamp=20.0)
+    store.append('sqrt(4)=2', timestamp=30.0)
+    assert [r.entry for r in store.range(opcode='+')] == ['3+5=8', '2+2=4']
+    assert [r.entry for r in store.range(start=20.0, opcode='sqrt')] == ['sqrt(4)=2']
+    assert [r.entry for r in store.range(end=10.0)] == ['3+5=8', 'sqrt(25)=5', '1+2*3=7']
+    assert len(store.range(limit=2)) == 2
+    assert [r.entry for r in store.tail(2)] == ['2+2=4', 'sqrt(4)=2']
+
+
+def test_two_stores_share_one_database(tmp_path):
+    path = tmp_path / 'history.sqlite'
+    first, second = HistoryStore(path), HistoryStore(path)
+    try:
+        with first.group_commit():
+            first.append('sqrt(1)=1', timestamp=1.0)
+            second.append('sqrt(4)=2', timestamp=2.0)
+        second.append('sqrt(9)=3', timestamp=3.0)
+        for store in (first, second):
+            assert [r.entry for r in store.tail(10)] == ['sqrt(4)=2', 'sqrt(1)=1', 'sqrt(9)=3']
+            assert sorted(r.entry for r in store.search('sqrt')) == \
+                ['sqrt(1)=1', 'sqrt(4)=2', 'sqrt(9)=3']
+    finally:
+        first.close()
+        second.close()
+
+
+def test_retain_prunes_old_rows_and_their_index(tmp_path):
+    path = tmp_path / 'history.sqlite'
+    store = HistoryStore(path)
+    store.append_many(_entries(30), timestamp=1.0)
+    store.close()
+    store = HistoryStore(path, retain=10)
+    try:
+        assert [r.entry for r in store.tail(100)] == _entries(30)[-10:]
+        assert [r.entry for r in store.search('sqrt', limit=100)] == \
+            ['sqrt(729)=27', 'sqrt(576)=24', 'sqrt(441)=21']
+    finally:
+        store.close()
+
+
+def test_import_only_adds_new_legacy_records(store, tmp_path):
+    path = tmp_path / 'calc_history.jsonl'
+    lines = [json.dumps({'ts': 1.0, 'entry': '1+1=2'}), json.dumps({'ts': 2.0, 'entry': '2+2=4'})]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    assert store.import_files([path, tmp_path / 'missing.jsonl']) == 2
+    assert store.import_files([path]) == 0
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'ts': 3.0, 'entry': '3+3=6'}) + '\n{"ts": 4')
+    assert store.import_files([path]) == 1
+    assert [r.entry for r in store.range()] == ['1+1=2', '2+2=4', '3+3=6']
+
+
+def test_invalid_synchronous_mode(tmp_path):
+    with pytest.raises(ValueError):
+        HistoryStore(tmp_path / 'history.sqlite', synchronous='sometimes')
@@ -0,0 +1,74 @@
+"""运行指标（src/metrics.py）的测试"""
+import json
+
+import pytest
+
+from src import metrics
+from src.calculator_cli import CalculatorCore
+from src.i18n.translator import Translator
+from src.metrics import REGISTRY, LatencyHistogram, bucket_index, bucket_upper_bound
+
+
+@pytest.fixture
+def registry():
+    REGISTRY.reset()
+    metrics.enable()
+    yield REGISTRY
+    metrics.disable()
+    REGISTRY.reset()
+
+
+@pytest.mark.parametrize('value', [0, 1, 31, 32, 33, 1000, 123456, 10 ** 9 + 7, 2 ** 40 - 1])
+def test_bucket_relative_error(value):
+    upper = bucket_upper_bound(bucket_index(value))
+    assert value <= upper <= value * (1 + 1 / metrics.SUB_BUCKETS)
+
+
+def test_percentiles():
+    histogram = LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.record(value * 1000)
+    snapshot = histogram.snapshot()
+    assert (snapshot['count'], snapshot['min_ns'], snapshot['max_ns']) == (1000, 1000, 1000000)
+    assert snapshot['p50_ns'] == pytest.approx(500000, rel=1 / 16)
+    assert snapshot['p99_ns'] == pytest.approx(990000, rel=1 / 16)
+
+
+def test_disable_restores_the_original_methods():
+    original = CalculatorCore.__dict__['calculate']
+    metrics.enable()
+    try:
+        assert REGISTRY.enabled
+        assert CalculatorCore.__dict__['calculate'] is not original
+    finally:
+        metrics.disable()
+    assert CalculatorCore.__dict__['calculate'] is original
+
+
+def test_calls_and_errors_are_counted_by_name_and_key(registry):
+    core = CalculatorCore(Translator())
+    core.calculate(1, 2, '+')
+    core.process_function('sqrt', 4)
+    with pytest.raises(ValueError):
+        core.calculate(1, 0, '/')
+    with pytest.raises(ValueError):
+        core.process_function('sqrt', -4)
+    rows = {(row['operation'], row['name']): row for row in registry.snapshot()}
+    assert rows[('operator', '+')]['calls'] == 1
+    assert rows[('operator', '/')]['errors'] == {'error.division_by_zero': 1}
+    assert rows[('function', 'sqrt')]['calls'] == 2
+    assert rows[('function', 'sqrt')]['errors'] == {'error.negative_sqrt': 1}
+
+
+def test_exports(registry, tmp_path):
+    core = CalculatorCore(Translator())
+    for _ in range(3):
+        core.calculate(2, 3, '*')
+    text = registry.to_prometheus()
+    assert 'calculator_calls_total{operation="operator",name="*"} 3' in text
+    assert 'calculator_latency_seconds_bucket{operation="operator",name="*",le="+Inf"} 3' in text
+    metrics.write(tmp_path / 'metrics.json')
+    data = json.loads((tmp_path / 'metrics.json').read_text(encoding='utf-8'))
+    assert data['metrics'][0]['calls'] == 3
+    metrics.write(tmp_path / 'metrics.prom')
+    assert (tmp_path / 'metrics.prom').read_text(encoding='utf-8') == registry.to_prometheus()
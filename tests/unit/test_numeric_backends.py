@@ -0,0 +1,58 @@
+"""数值后端（src/numeric_backends.py）边界情况的一致性测试"""
+import math
+
+import pytest
+
+from src import calculator_cli
+from src.calculator_cli import CalculatorCore
+from src.expression_parser import parse_expression
+from src.i18n.translator import Translator
+from src.numeric_backends import BACKENDS
+
+
+@pytest.fixture(autouse=True)
+def raise_errors(monkeypatch):
+    monkeypatch.setattr(calculator_cli, 'RAISE_ERRORS', True)
+
+
+def evaluate(backend, expr):
+    core = CalculatorCore(Translator(), backend=backend)
+    return core.evaluate(parse_expression(expr))
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('expr', ['0^-1', '0^(-0.5)', '0.0^-2'])
+def test_zero_to_negative_power_is_division_by_zero(backend, expr):
+    with pytest.raises(ValueError, match='error.division_by_zero'):
+        evaluate(backend, expr)
+
+
+@pytest.mark.parametrize('backend, overflows', [
+    ('float', True), ('decimal', False), ('fraction', False), ('adaptive', False),
+])
+def test_two_to_1024(backend, overflows):
+    if overflows:
+        with pytest.raises(ValueError, match='error.overflow'):
+            evaluate(backend, '2^1024')
+    else:
+        assert evaluate(backend, '2^1024') > 2 ** 1023
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_result_beyond_every_range_is_overflow(backend):
+    with pytest.raises(ValueError, match='error.overflow'):
+        evaluate(backend, '10^1000000000')
+
+
+@pytest.mark.parametrize('backend, exact', [
+    ('float', False), ('decimal', True), ('fraction', True), ('adaptive', False),
+])
+@pytest.mark.parametrize('function, expected', [('log', -400 * math.log(10)), ('log10', -400)])
+def test_log_of_tiny_argument(backend, exact, function, expected):
+    expr = f'{function}(1e-400)'
+    if exact:
+        assert float(evaluate(backend, expr)) == pytest.approx(expected)
+    else:
+        # 1e-400 按浮点读入即为 0
+        with pytest.raises(ValueError, match='error.positive_required'):
+            evaluate(backend, expr)
@@ -0,0 +1,113 @@
+"""结果缓存（src/result_cache.py）的测试"""
+import math
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from src import calculator_cli
+from src.calculator_cli import CalculatorCore
+from src.expression_parser import parse_expression
+from src.i18n.translator import Translator
+from src.result_cache import ResultCache
+from src.workspace import Workspace
+
+
+@pytest.fixture
+def cache():
+    return ResultCache(names=('sin', 'sqrt', '^'))
+
+
+@pytest.fixture
+def core(cache, monkeypatch):
+    monkeypatch.setattr(calculator_cli, 'RAISE_ERRORS', True)
+    core = CalculatorCore(Translator())
+    core.set_result_cache(cache)
+    return core
+
+
+def evaluate(core, expr):
+    return core.evaluate(parse_expression(expr))
+
+
+def test_repeated_calls_hit_the_cache(core, cache):
+    assert evaluate(core, 'sin(30)') == pytest.approx(0.5)
+    assert evaluate(core, 'sin(30)') == pytest.approx(0.5)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_switching_backend_does_not_reuse_results(core, cache):
+    assert type(evaluate(core, '2^0.5')) is float
+    core.set_backend('decimal', decimal_precision=10)
+    short = evaluate(core, '2^0.5')
+    core.set_backend('decimal', decimal_precision=40)
+    long = evaluate(core, '2^0.5')
+    assert type(short) is Decimal and type(long) is Decimal
+    assert len(str(short)) < len(str(long))
+    core.set_backend('fraction')
+    assert evaluate(core, '2^3') == 8 and type(evaluate(core, '2^3')) is not float
+    assert cache.hits == 1
+
+
+def test_reassigned_variable_is_not_served_from_the_cache(core):
+    workspace = Workspace(core)
+    core.variables = workspace
+    workspace.define('x', '30')
+    workspace.define('y', 'sin(x)')
+    assert workspace.value('y') == pytest.approx(0.5)
+    workspace.define('x', '90')
+    assert workspace.value('y') == pytest.approx(1.0)
+
+
+def test_errors_are_not_cached(core, cache):
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            evaluate(core, 'sqrt(-1)')
+    assert cache.stats()['size'] == 0
+
+
+@pytest.mark.parametrize('a, b', [(0.0, -0.0), (2.0, Fraction(2)), (1.0, Decimal('1.0')),
+                                  (Decimal('1.0'), Decimal('1'))])
+def test_keys_distinguish_equal_arguments(a, b):
+    assert ResultCache.make_key('float', 'sin', (a,)) != ResultCache.make_key('float', 'sin', (b,))
+
+
+def test_nan_arguments_share_a_key(cache):
+    key = ResultCache.make_key('float', 'sqrt', (math.nan,))
+    cache.put(key, math.nan)
+    assert cache.get(ResultCache.make_key('float', 'sqrt', (float('nan'),))) is not cache.MISSING
+
+
+def test_lru_evicts_the_oldest_entry():
+    cache = ResultCache(names=('sin',), max_entries=2)
+    for value in (1.0, 2.0, 1.0, 3.0):
+        key = ResultCache.make_key('float', 'sin', (value,))
+        if cache.get(key) is cache.MISSING:
+            cache.put(key, value)
+    assert cache.evictions == 1
+    assert cache.get(ResultCache.make_key('float', 'sin', (2.0,))) is cache.MISSING
+    assert cache.get(ResultCache.make_key('float', 'sin', (1.0,))) == 1.0
+
+
+def test_disk_cache_is_shared_between_instances(tmp_path):
+    path = tmp_path / 'results.sqlite'
+    key = ResultCache.make_key('decimal:28', 'sqrt', (Decimal('2'),))
+    first = ResultCache(path=path)
+    first.put(key, Decimal('1.414213562373095048801688724'))
+    first.close()
+    second = ResultCache(path=path)
+    assert second.get(key) == Decimal('1.414213562373095048801688724')
+    assert second.disk_hits == 1
+    second.close()
+
+
+def test_corrupt_disk_cache_only_disables_the_disk_tier(tmp_path):
+    path = tmp_path / 'results.sqlite'
+    path.write_bytes(b'not a database' * 100)
+    cache = ResultCache(path=path)
+    key = ResultCache.make_key('float', 'sin', (1.0,))
+    assert cache.get(key) is cache.MISSING
+    cache.put(key, 0.5)
+    assert cache.get(key) == 0.5
+    assert cache.disk_error is not None
+    cache.close()
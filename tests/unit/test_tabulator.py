@@ -0,0 +1,131 @@
+"""函数制表（src/tabulator.py）的测试"""
+import io
+import struct
+
+import pytest
+
+from src.calculator_cli import CalculatorCore
+from src.i18n.translator import Translator
+from src.tabulator import (format_for_path, grid_size, parse_range, parse_table_command,
+                           save_table, tabulate, write_table)
+
+
+def rows(chunks):
+    xs, values, errors = [], [], []
+    for chunk_xs, result in chunks:
+        xs.extend(float(x) for x in chunk_xs)
+        values.extend(result.values)
+        errors.extend(bool(error) for error in result.errors)
+    return xs, values, errors
+
+
+@pytest.mark.parametrize('start, stop, step, expected', [
+    (0, 1, 0.1, 11), (0, 360, 1, 361), (0, 1, 0.3, 4), (1, 0, -0.25, 5), (2, 2, 1, 1),
+])
+def test_grid_size(start, stop, step, expected):
+    assert grid_size(start, stop, step) == expected
+
+
+@pytest.mark.parametrize('start, stop, step', [(0, 1, 0), (0, 1, -1), (0, float('inf'), 1)])
+def test_grid_size_rejects_bad_steps(start, stop, step):
+    with pytest.raises(ValueError):
+        grid_size(start, stop, step)
+
+
+def test_chunks_cover_the_grid_without_accumulated_error():
+    chunks = list(tabulate('x^2', 'x', 0, 1, 0.1, chunk_size=4))
+    assert [len(xs) for xs, _ in chunks] == [4, 4, 3]
+    xs, values, errors = rows(chunks)
+    assert xs == [i * 0.1 for i in range(11)]
+    assert values == pytest.approx([x * x for x in xs])
+    assert not any(errors)
+
+
+def test_negative_step_runs_backwards():
+    xs, values, _ = rows(tabulate('x', 'x', 1, 0, -0.5))
+    assert xs == [1.0, 0.5, 0.0]
+    assert values == pytest.approx(xs)
+
+
+def test_invalid_points_are_marked():
+    chunks = list(tabulate('1/x', 'x', -1, 1, 0.5))
+    xs, values, errors = rows(chunks)
+    assert errors == [False, False, True, False, False]
+    assert chunks[0][1].error_key == 'error.division_by_zero'
+
+
+def test_other_variables_come_from_the_core():
+    core = CalculatorCore(Translator())
+    core.variables = {'k': 3.0}
+    _, values, _ = rows(tabulate('k*x', 'x', 0, 2, 1, core=core))
+    assert values == pytest.approx([0.0, 3.0, 6.0])
+    _, values, _ = rows(tabulate('k', 'x', 0, 2, 1, core=core))
+    assert values == pytest.approx([3.0, 3.0, 3.0])
+    with pytest.raises(ValueError, match='q'):
+        tabulate('q*x', 'x', 0, 1, 1, core=core)
+
+
+def test_adaptive_refines_only_near_fast_changes():
+    plain, _, _ = rows(tabulate('tan(x)', 'x', 10, 170, 10))
+    refined, _, errors = rows(tabulate('tan(x)', 'x', 10, 170, 10, adaptive=True, tolerance=0.1))
+    assert set(plain) <= set(refined)
+    assert refined == sorted(refined)
+    extra = sorted(set(refined) - set(plain))
+    # 只在奇点附近加密，最多对分 max_depth 层
+    assert extra and all(80 < x < 100 for x in extra)
+    assert min(abs(x - 90) for x in extra) == pytest.approx(10 / 2 ** 8)
+    assert errors[refined.index(90.0)]
+    # 线性函数不需要加密
+    linear, _, _ = rows(tabulate('2*x+1', 'x', 0, 10, 1, adaptive=True))
+    assert linear == [float(x) for x in range(11)]
+
+
+def test_adaptive_chunks_do_not_duplicate_points():
+    one, _, _ = rows(tabulate('tan(x)', 'x', 10, 170, 10, adaptive=True))
+    many, _, _ = rows(tabulate('tan(x)', 'x', 10, 170, 10, adaptive=True, chunk_size=3))
+    assert many == one
+
+
+def test_write_table_formats():
+    output = io.StringIO()
+    assert write_table(tabulate('x^2', 'x', 0, 1, 0.5), output, 'csv', header=('x', 'x^2')) == 3
+    assert output.getvalue() == 'x,x^2\n0,0.0\n0.5,0.25\n1,1.0\n'
+
+    output = io.StringIO()
+    write_table(tabulate('1/x', 'x', -1, 1, 1), output)
+    assert output.getvalue() == '-1\t-1\n0\tDivision by zero\n1\t1\n'
+
+    output = io.BytesIO()
+    assert write_table(tabulate('1/x', 'x', -1, 1, 1), output, 'binary') == 3
+    data = struct.unpack('<6d', output.getvalue())
+    assert data[:2] == (-1.0, -1.0) and data[2] == 0.0 and data[3] != data[3]
+
+    with pytest.raises(ValueError):
+        write_table(tabulate('x', 'x', 0, 1, 1), io.StringIO(), 'xml')
+
+
+def test_save_table_picks_format_from_extension(tmp_path):
+    path = tmp_path / 'table.csv'
+    assert save_table(tabulate('x', 'x', 0, 2, 1), str(path)) == 3
+    assert path.read_text(encoding='utf-8') == '0,0.0\n1,1.0\n2,2.0\n'
+    assert format_for_path('OUT.BIN') == 'binary'
+    assert format_for_path('out.txt') == 'text'
+
+
+def test_parse_table_command():
+    assert parse_table_command('sin(x) x=0..360 step 1 adaptive 1e-4 > out.csv') == {
+        'expression': 'sin(x)', 'variable': 'x', 'start': '0', 'stop': '360', 'step': '1',
+        'adaptive': True, 'tolerance': '1e-4', 'output': 'out.csv',
+    }
+    command = parse_table_command('x * 2 t = -1 .. 1 step 0.5')
+    assert (command['expression'], command['variable'], command['start'], command['stop']) == \
+        ('x * 2', 't', '-1', '1')
+    assert not command['adaptive'] and command['output'] is None
+    with pytest.raises(ValueError):
+        parse_table_command('sin(x) x=0..360')
+
+
+def test_parse_range():
+    assert parse_range(' t = -pi .. pi ') == ('t', '-pi', 'pi')
+    with pytest.raises(ValueError):
+        parse_range('x=0-1')
@@ -0,0 +1,66 @@
+"""翻译器（src/i18n/translator.py）的测试"""
+import json
+import os
+
+import pytest
+
+from src.i18n import translator as translator_module
+from src.i18n.translator import Translator, compile_template, flatten, load_file
+
+
+@pytest.fixture
+def compiled_dir(monkeypatch, tmp_path):
+    directory = tmp_path / 'i18n'
+    monkeypatch.setattr(translator_module, '_compiled_dir', lambda: str(directory))
+    return directory
+
+
+def test_translators_share_one_catalog_per_language():
+    assert Translator('en_US').translations is Translator('en_US').translations
+    assert Translator('en_US').translate('error.division_by_zero') == 'Division by zero'
+    assert Translator('en_US').translate('no.such.key') == 'no.such.key'
+
+
+def test_flatten():
+    assert flatten({'a': 'x', 'error': {'b': 'y', 'nested': {'c': 1}}}) == {
+        'a': 'x', 'error.b': 'y', 'error.nested.c': '1'}
+
+
+@pytest.mark.parametrize('template, compiled', [
+    ('Error: {}', 'Error: %s'), ('{} of {}', '%s of %s'), ('100% {}', '100%% %s'),
+    ('{0} and {1}', None), ('{name}', None), ('{{literal}}', None),
+])
+def test_compile_template(template, compiled):
+    assert compile_template(template) == compiled
+
+
+def test_format():
+    translator = Translator('en_US')
+    assert translator.format('error.calc_error', '1/0') == 'Calculation error: 1/0'
+    assert translator.format('error.argument_count', 'sin', 1, 2) == 'sin() takes 1 argument(s), 2 given'
+    # 参数个数不一致时返回未填充的模板
+    assert translator.format('error.calc_error') == 'Calculation error: {}'
+
+
+def test_compiled_catalog_is_reused_until_the_source_changes(compiled_dir, tmp_path):
+    source = tmp_path / 'xx.json'
+    source.write_text(json.dumps({'greeting': 'hello', 'error': {'x': 'bad'}}), encoding='utf-8')
+    assert load_file(str(source), 'xx') == {'greeting': 'hello', 'error.x': 'bad'}
+    assert (compiled_dir / 'xx.marshal').exists()
+
+    # 编译文件与源文件一致时不再解析 JSON
+    stat = os.stat(source)
+    translator_module._write_compiled('xx', stat, {'greeting': 'from marshal'})
+    assert load_file(str(source), 'xx') == {'greeting': 'from marshal'}
+
+    source.write_text(json.dumps({'greeting': 'changed'}), encoding='utf-8')
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert load_file(str(source), 'xx') == {'greeting': 'changed'}
+
+
+def test_corrupt_compiled_catalog_falls_back_to_json(compiled_dir, tmp_path):
+    source = tmp_path / 'xx.json'
+    source.write_text(json.dumps({'greeting': 'hello'}), encoding='utf-8')
+    compiled_dir.mkdir()
+    (compiled_dir / 'xx.marshal').write_bytes(b'\x00garbage')
+    assert load_file(str(source), 'xx') == {'greeting': 'hello'}
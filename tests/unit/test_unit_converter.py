@@ -0,0 +1,65 @@
+"""单位转换（src/unit_converter.py）的测试"""
+import io
+
+import pytest
+
+from src import unit_converter, unit_dimensions
+from src.unit_converter import UnitConverter, convert_csv, parse_conversion
+
+
+@pytest.mark.parametrize('value, from_unit, to_unit, expected', [
+    (1.5, 'km', 'm', 1500), (12, 'in', 'ft', 1), (1, 'lb', 'oz', 16), (2, 'ha', 'm2', 20000),
+    (100, 'C', 'F', 212), (32, 'F', 'K', 273.15), (0, 'K', 'C', -273.15),
+])
+def test_convert(value, from_unit, to_unit, expected):
+    assert UnitConverter.convert(value, from_unit, to_unit) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('from_unit, to_unit', [('km', 'kg'), ('m', 'parsec'), ('C', 'm2')])
+def test_unsupported_conversion(from_unit, to_unit):
+    with pytest.raises(ValueError, match='Unsupported unit conversion'):
+        UnitConverter.convert(1, from_unit, to_unit)
+
+
+def test_conversion_plan_is_compiled_once():
+    unit_dimensions.clear_cache()
+    plan = UnitConverter.conversion_plan('F', 'C')
+    for value in range(100):
+        UnitConverter.convert(value, 'F', 'C')
+    info = unit_dimensions.compile_conversion.cache_info()
+    assert (info.misses, info.hits) == (1, 100)
+    assert plan == pytest.approx((5 / 9, -160 / 9))
+
+
+@pytest.mark.parametrize('have_numpy', [True, False])
+def test_convert_array_matches_scalar_conversion(monkeypatch, have_numpy):
+    if have_numpy and unit_converter.np is None:
+        pytest.skip('NumPy 未安装')
+    if not have_numpy:
+        monkeypatch.setattr(unit_converter, 'np', None)
+    values = [-40.0, 0.0, 36.6, 100.0]
+    converted = UnitConverter.convert_array(values, 'C', 'F')
+    assert list(converted) == pytest.approx([UnitConverter.convert(v, 'C', 'F') for v in values])
+
+
+def test_convert_csv_column_by_name_in_chunks():
+    source = io.StringIO('name,distance\na,1\nb,n/a\nc,2.5\nd,\n')
+    output = io.StringIO()
+    skipped = convert_csv(source, 'distance', 'km', 'm', output, chunk_size=2)
+    assert skipped == 2
+    assert output.getvalue().splitlines() == ['name,distance', 'a,1000.0', 'b,n/a', 'c,2500.0', 'd,']
+
+
+def test_convert_csv_rejects_unknown_column():
+    with pytest.raises(ValueError):
+        convert_csv(io.StringIO('a,b\n1,2\n'), 'c', 'km', 'm', io.StringIO())
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('5 km -> m', ('5', 'km', 'm')),
+    ('2*3 km/h -> m/s', ('2*3', 'km/h', 'm/s')),
+    ('3+4', None),
+])
+def test_parse_conversion(line, expected):
+    assert parse_conversion(line) == expected
+
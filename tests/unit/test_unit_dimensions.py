@@ -0,0 +1,47 @@
+"""量纲分析单位引擎（src/unit_dimensions.py）的测试"""
+from fractions import Fraction
+
+import pytest
+
+from src.unit_converter import UnitConverter
+from src.unit_dimensions import LENGTH, MASS, TIME, Dimension, parse_unit
+
+
+@pytest.mark.parametrize('value, from_unit, to_unit, expected', [
+    (36, 'km/h', 'm/s', 10),
+    (1, 'kg*m/s^2', 'N', 1),
+    (1, 'ft^2', 'm2', 0.09290304),
+    (1, 'ft2', 'ft^2', 1),
+    (1, 'kW*h', 'kJ', 3600),
+    (1, 'L', 'cm^3', 1000),
+    (60, 'mile/h', 'km/h', 96.56064),
+    (1, 'kg/(m*s^2)', 'Pa', 1),
+    (4, 'm^(1/2)', 'm^(1/2)', 4),
+    (300, 'K', 'C', 26.85),
+])
+def test_compound_conversions(value, from_unit, to_unit, expected):
+    assert UnitConverter.convert(value, from_unit, to_unit) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('text, dimension', [
+    ('N', MASS * LENGTH / TIME ** 2),
+    ('J/s', MASS * LENGTH ** 2 / TIME ** 3),
+    ('Hz', Dimension() / TIME),
+    ('m^(1/2)', LENGTH ** Fraction(1, 2)),
+])
+def test_dimensions(text, dimension):
+    assert parse_unit(text).dimension == dimension
+
+
+@pytest.mark.parametrize('from_unit, to_unit', [
+    ('km/h', 'm'), ('N', 'J'), ('C/s', 'K/s'), ('m^', 'm'), ('m*', 'm'), ('(m', 'm'),
+])
+def test_invalid_compound_units(from_unit, to_unit):
+    with pytest.raises(ValueError, match='Unsupported unit conversion'):
+        UnitConverter.conversion_plan(from_unit, to_unit)
+
+
+def test_exact_scales_are_rounded_once():
+    # 换算系数按精确分数合并后只舍入一次
+    scale, offset = UnitConverter.conversion_plan('mile/h', 'm/s')
+    assert (scale, offset) == (float(Fraction('1609.344') / 3600), 0.0)
@@ -0,0 +1,68 @@
+"""批量计算（src/vectorized.py）的测试：NumPy 实现与纯 Python 实现结果一致"""
+import math
+
+import pytest
+
+from src import vectorized
+from src.calculator_cli import CalculatorCore
+from src.i18n.translator import Translator
+
+PATHS = [pytest.param(True, id='numpy'), pytest.param(False, id='fallback')]
+
+
+@pytest.fixture(params=PATHS)
+def core(request, monkeypatch):
+    if request.param and not vectorized.HAVE_NUMPY:
+        pytest.skip('NumPy 未安装')
+    monkeypatch.setattr(vectorized, 'HAVE_NUMPY', request.param)
+    return CalculatorCore(Translator())
+
+
+def _values(result):
+    return [complex(v) if isinstance(v, complex) else float(v) for v in result.values]
+
+
+@pytest.mark.parametrize('a, b, operator, expected, error_key', [
+    ([2, 3], [3, 2], '*', [6.0, 6.0], ""),
+    ([2], [1024], '^', [math.nan], "error.overflow"),
+    ([2, 0], [10, -1], '^', [1024.0, math.nan], "error.division_by_zero"),
+    ([1, 4], [0, 2], '/', [math.nan, 2.0], "error.division_by_zero"),
+    ([1], [0], '%', [math.nan], "error.division_by_zero"),
+])
+def test_calculate_many(core, a, b, operator, expected, error_key):
+    result = core.calculate_many(a, b, operator)
+    assert _values(result) == pytest.approx(expected, nan_ok=True)
+    assert list(result.errors) == [math.isnan(v) for v in expected]
+    assert result.error_key == error_key
+
+
+def test_integer_operands_are_floats(core):
+    result = core.calculate_many(7, [2], '/')
+    assert _values(result) == [3.5]
+    assert all(type(v) is not int for v in core.calculate_many([2], 10, '^').values)
+
+
+@pytest.mark.parametrize('func_name, values, expected, error_key', [
+    ('sqrt', [4, -1], [2.0, math.nan], "error.negative_sqrt"),
+    ('log', [0], [math.nan], "error.positive_required"),
+    ('exp', [0, 1000], [1.0, math.nan], "error.overflow"),
+    ('sin', [90], [1.0], ""),
+])
+def test_apply_function(core, func_name, values, expected, error_key):
+    result = core.apply_function(func_name, values)
+    assert _values(result) == pytest.approx(expected, nan_ok=True)
+    assert list(result.errors) == [math.isnan(v) for v in expected]
+    assert result.error_key == error_key
+
+
+def test_fallback_maps_arithmetic_exceptions():
+    def overflow(x):
+        raise OverflowError('math range error')
+
+    def divide(x):
+        raise ZeroDivisionError('float division by zero')
+
+    functions = {'f': (overflow, 1, lambda x: True, "error.invalid"),
+                 'g': (divide, 1, lambda x: True, "error.invalid")}
+    assert vectorized._fallback_function('f', [1], functions).error_key == "error.overflow"
+    assert vectorized._fallback_function('g', [1], functions).error_key == "error.division_by_zero"
@@ -0,0 +1,159 @@
+"""后台更新检查（src/utils/version_checker.py）的测试
+
+发布接口由本地 HTTP 替身服务器代替，路径决定响应方式。
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.utils import version_checker
+from src.utils.version_checker import UpdateChecker
+
+TIMEOUT = 0.5
+# start() 允许阻塞调用方的最长时间（秒）
+START_BUDGET = 0.05
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """发布接口替身"""
+
+    def do_GET(self):
+        self.server.hits += 1
+        if self.path == '/slow':
+            time.sleep(TIMEOUT * 4)
+        elif self.path == '/hanging':
+            self.server.release.wait()
+            return
+        elif self.path == '/contended':
+            time.sleep(TIMEOUT / 2)
+        elif self.path == '/broken':
+            self.send_error(500)
+            return
+        tag = 'v1.0.0' if self.path == '/old' else 'v9.0.0'
+        body = json.dumps({'tag_name': tag}).encode()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            # 客户端已超时断开
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    server.hits = 0
+    server.release = threading.Event()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.base = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.release.set()
+    server.shutdown()
+
+
+def check(url, cache_dir, **kwargs):
+    """启动一次后台检查并等待结束，返回 (start 耗时, 检查器)"""
+    begin = time.perf_counter()
+    checker = UpdateChecker('1.1.1', url, timeout=TIMEOUT, cache_dir=cache_dir, **kwargs).start()
+    started = time.perf_counter() - begin
+    checker.result(wait=TIMEOUT * 10)
+    return started, checker
+
+
+def test_newer_version_is_reported(server, tmp_path):
+    started, checker = check(server.base + '/fast', tmp_path)
+    assert started < START_BUDGET
+    assert checker.result() == (True, '9.0.0')
+    assert checker.error is None
+
+
+def test_older_version_is_not_an_update(server, tmp_path):
+    _, checker = check(server.base + '/old', tmp_path)
+    assert checker.result() == (False, '1.0.0')
+
+
+def test_cached_result_skips_the_request(server, tmp_path):
+    check(server.base + '/fast', tmp_path)
+    hits = server.hits
+    _, checker = check(server.base + '/fast', tmp_path)
+    assert checker.result() == (True, '9.0.0')
+    assert server.hits == hits
+
+
+def test_expired_cache_checks_again(server, tmp_path):
+    check(server.base + '/fast', tmp_path)
+    hits = server.hits
+    _, checker = check(server.base + '/fast', tmp_path, ttl=0)
+    assert checker.result() == (True, '9.0.0')
+    assert server.hits == hits + 1
+
+
+def test_cache_for_another_url_is_ignored(server, tmp_path):
+    check(server.base + '/old', tmp_path)
+    _, checker = check(server.base + '/fast', tmp_path)
+    assert checker.result() == (True, '9.0.0')
+
+
+@pytest.mark.parametrize('path', ['/slow', '/hanging'])
+def test_unresponsive_server_times_out(server, tmp_path, path):
+    begin = time.perf_counter()
+    started, checker = check(server.base + path, tmp_path)
+    assert started < START_BUDGET
+    assert checker.done
+    assert checker.result() is None
+    assert checker.error is not None
+    assert time.perf_counter() - begin < TIMEOUT * 3
+
+
+def test_failure_is_cached(server, tmp_path):
+    _, checker = check(server.base + '/broken', tmp_path)
+    assert checker.result() is None and checker.error is not None
+    hits = server.hits
+    _, checker = check(server.base + '/broken', tmp_path)
+    assert checker.result() is None
+    assert server.hits == hits
+    cache = json.loads((tmp_path / version_checker.CACHE_FILE).read_text(encoding='utf-8'))
+    assert cache['latest_version'] is None
+
+
+def test_concurrent_checks_send_one_request(server, tmp_path):
+    hits = server.hits
+    checkers = [UpdateChecker('1.1.1', server.base + '/contended', timeout=TIMEOUT, cache_dir=tmp_path)
+                for _ in range(8)]
+    for checker in checkers:
+        checker.start()
+    for checker in checkers:
+        checker.result(wait=TIMEOUT * 10)
+    assert server.hits - hits == 1
+    assert all(checker.done for checker in checkers)
+    assert not (tmp_path / version_checker.LOCK_FILE).exists()
+
+
+def test_stale_lock_is_taken_over(server, tmp_path):
+    lock = tmp_path / version_checker.LOCK_FILE
+    lock.write_text('12345')
+    old = time.time() - version_checker.LOCK_STALE_AFTER - 1
+    os.utime(lock, (old, old))
+    _, checker = check(server.base + '/fast', tmp_path)
+    assert checker.result() == (True, '9.0.0')
+    assert not lock.exists()
+
+
+def test_fresh_lock_skips_the_check(server, tmp_path):
+    (tmp_path / version_checker.LOCK_FILE).write_text('12345')
+    hits = server.hits
+    _, checker = check(server.base + '/fast', tmp_path)
+    assert checker.done
+    assert checker.result() is None
+    assert server.hits == hits
@@ -0,0 +1,150 @@
+"""变量工作区（src/workspace.py）的测试"""
+import pytest
+
+from src.calculator_cli import CalculatorCore
+from src.expression_parser import parse_expression, tokenize
+from src.i18n.translator import Translator
+from src.tabulator import parse_range
+from src.workspace import Workspace, parse_assignment
+
+
+@pytest.fixture
+def workspace():
+    core = CalculatorCore(Translator())
+    workspace = Workspace(core)
+    core.variables = workspace
+    return workspace
+
+
+@pytest.mark.parametrize('name', ['c', 'j', 'J'])
+def test_reserved_names_are_rejected(workspace, name):
+    with pytest.raises(ValueError, match='保留名'):
+        workspace.define(name, '5')
+    assert name not in workspace
+
+
+def test_table_variable_cannot_be_reserved():
+    assert parse_range('x=0..1') == ('x', '0', '1')
+    with pytest.raises(ValueError, match='保留名'):
+        parse_range('c=0..1')
+
+
+def test_c_with_spaces_is_an_unknown_name(workspace):
+    workspace.define('y', '2 * c + 1')
+    assert workspace.dependencies('y') == ('c',)
+    with pytest.raises(ValueError):
+        workspace.value('y')
+
+
+@pytest.mark.parametrize('expr, expected', [
+    ('2*c1+1', 11.0), ('2 * c1 + 1', 11.0), ('cc-c1', 2.0), ('c1*c1', 25.0),
+])
+def test_names_starting_with_c_are_variables(workspace, expr, expected):
+    workspace.define('c1', '5')
+    workspace.define('cc', '7')
+    workspace.define('y', expr)
+    assert workspace.value('y') == expected
+
+
+@pytest.mark.parametrize('expr, op', [('(1+2j)*c 2j', '*c'), ('(1+2j) *c (3-1j)', '*c'),
+                                      ('2j +c 1', '+c'), ('4 /c 2j', '/c'), ('1 -c 1j', '-c')])
+def test_complex_operators_with_and_without_spaces(expr, op):
+    assert op in [token.text for token in tokenize(expr)]
+    assert parse_expression(expr).op == op
+
+
+def test_dependent_is_recomputed_after_its_input_changes(workspace):
+    workspace.define('a', '3')
+    workspace.define('b', 'a*2 + 1')
+    assert workspace.value('b') == 7.0
+    workspace.define('a', '10')
+    assert workspace.value('b') == 21.0
+    assert workspace.dependents('a') == ('b',)
+
+
+def test_only_the_dirty_chain_is_recomputed(workspace):
+    workspace.define('a', '1')
+    workspace.define('b', 'a + 1')
+    workspace.define('x', '5')
+    workspace.define('y', 'x * 2')
+    assert workspace.recompute() == 4
+    workspace.define('a', '2')
+    assert workspace.recompute() == 2
+    assert workspace.value('b') == 3.0
+    assert workspace.value('y') == 10.0
+    assert workspace.recompute() == 0
+
+
+@pytest.mark.parametrize('name, expr', [('a', 'a + 1'), ('a', 'c1 * 2')])
+def test_cycle_is_rejected_and_old_definition_kept(workspace, name, expr):
+    workspace.define('a', '1')
+    workspace.define('b', 'a + 1')
+    workspace.define('c1', 'b + 1')
+    with pytest.raises(ValueError, match='循环依赖'):
+        workspace.define(name, expr)
+    assert workspace.expression('a') == '1'
+    assert workspace.value('c1') == 3.0
+
+
+def test_error_state_recovers_when_dependency_is_defined(workspace):
+    workspace.define('b', 'a * 2')
+    with pytest.raises(ValueError, match='a'):
+        workspace.value('b')
+    workspace.define('a', '4')
+    assert workspace.value('b') == 8.0
+    workspace.define('a', '1/0')
+    with pytest.raises(ValueError):
+        workspace.value('a')
+    with pytest.raises(ValueError, match='依赖的变量出错'):
+        workspace.value('b')
+
+
+def test_delete_puts_dependents_into_error_state(workspace):
+    workspace.define('a', '2')
+    workspace.define('b', 'a + 1')
+    assert workspace.value('b') == 3.0
+    workspace.delete('a')
+    assert 'a' not in workspace
+    with pytest.raises(KeyError):
+        workspace.value('a')
+    with pytest.raises(ValueError):
+        workspace.value('b')
+    with pytest.raises(KeyError):
+        workspace.delete('a')
+
+
+def test_backend_switch_recomputes_values(workspace):
+    workspace.define('a', '1/3')
+    assert isinstance(workspace.value('a'), float)
+    workspace.core.set_backend('fraction')
+    assert str(workspace.value('a')) == '1/3'
+
+
+def test_save_and_load_round_trip(workspace, tmp_path):
+    workspace.define('a', '3')
+    workspace.define('b', 'a*2 + sqrt(a)')
+    path = tmp_path / 'vars.json'
+    assert workspace.save(path) == 2
+    other = Workspace(workspace.core)
+    assert other.load(path) == 2
+    assert [entry[:2] for entry in other.entries()] == [('a', '3'), ('b', workspace.expression('b'))]
+    assert other.value('b') == pytest.approx(7.732050807568877)
+
+
+def test_load_rejects_bad_files_and_keeps_workspace(workspace, tmp_path):
+    workspace.define('a', '3')
+    path = tmp_path / 'bad.json'
+    path.write_text('{"format": "other", "variables": []}', encoding='utf-8')
+    with pytest.raises(ValueError):
+        workspace.load(path)
+    path.write_text('not json', encoding='utf-8')
+    with pytest.raises(ValueError):
+        workspace.load(path)
+    assert workspace.value('a') == 3.0
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('x = 1 + 2', ('x', ' 1 + 2')), ('  rate=5%', ('rate', '5%')), ('1 + 2', None),
+])
+def test_parse_assignment(line, expected):
+    assert parse_assignment(line) == expected